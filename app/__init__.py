@@ -9,7 +9,6 @@ This module:
 """
 
 from flask import Flask, jsonify, request, redirect, url_for
-from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFProtect
@@ -19,10 +18,12 @@ import jinja2
 import markupsafe
 import os
 from app.utils.errors import register_error_handlers
+from app.utils.db_tuning import configure_database
+from app.utils.db_routing import RoutingSQLAlchemy, configure_reporting_bind
 import logging
 
 # Initialize extensions
-db = SQLAlchemy()
+db = RoutingSQLAlchemy()
 migrate = Migrate()
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
@@ -70,6 +71,12 @@ def create_app(config_name='default'):
     login_manager.init_app(app)
     csrf.init_app(app)
     
+    # Apply connection pool settings and SQLite PRAGMAs from the config
+    configure_database(app, db)
+    
+    # Optional read-only engine (or replica) used by reports
+    configure_reporting_bind(app)
+    
     # Custom unauthorized handler for login_manager
     @login_manager.unauthorized_handler
     def unauthorized():
@@ -111,8 +118,16 @@ def create_app(config_name='default'):
     app.register_blueprint(api_bp)
     app.register_blueprint(import_bp, url_prefix='/import')
     
-    # Temporarily disable CSRF for import routes to debug issues
-    csrf.exempt(import_bp)
+    # Register CLI commands
+    from app.utils.report_snapshots import report_snapshots_command
+    from app.utils.schema import upgrade_db_command, upgrade_schema
+    app.cli.add_command(report_snapshots_command)
+    app.cli.add_command(upgrade_db_command)
+    
+    # Bring databases created before newer model columns up to date
+    if app.config.get('UPGRADE_SCHEMA_ON_START'):
+        with app.app_context():
+            upgrade_schema()
     
     # Register Jinja2 filters
     app.jinja_env.filters['format_date'] = format_date
@@ -8,5 +8,6 @@ from app.models.user import User
 from app.models.part import Part
 from app.models.sale import Sale
 from app.models.setting import Setting
+from app.models.kpi_counter import KpiCounter
 
-__all__ = ['Car', 'Dealer', 'Repair', 'RepairProvider', 'Stand', 'User', 'Part', 'Sale', 'Setting'] 
\ No newline at end of file
+__all__ = ['Car', 'Dealer', 'Repair', 'RepairProvider', 'Stand', 'User', 'Part', 'Sale', 'Setting', 'KpiCounter'] 
\ No newline at end of file
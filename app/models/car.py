@@ -98,7 +98,9 @@ def on_car_refresh(target, context, attrs):
 @event.listens_for(Car, "expire")
 def on_car_expire(target, attrs):
     """Flag car for consistency check after expire"""
-    target._needs_consistency_check = True
+    # Cars garbage collected since they were loaded are expired without an object
+    if target is not None:
+        target._needs_consistency_check = True
 
 # This is a descriptor that can intercept attribute access
 class ConsistencyCheckingDescriptor:
@@ -0,0 +1,13 @@
+from app import db
+from datetime import datetime
+
+class KpiCounter(db.Model):
+    """Model for the kpi_counters table, holding running totals for dashboard headline numbers"""
+    __tablename__ = 'kpi_counters'
+
+    name = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    def __repr__(self):
+        return f'<KpiCounter {self.name}={self.value}>'
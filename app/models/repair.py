@@ -1,5 +1,6 @@
 from datetime import datetime
 from app import db
+from sqlalchemy import event
 
 class Repair(db.Model):
     """Model for storing repair information"""
@@ -13,6 +14,14 @@ class Repair(db.Model):
     repair_cost = db.Column(db.Numeric(10, 2), nullable=False)
     start_date = db.Column(db.Date, nullable=False, default=datetime.now().date)
     end_date = db.Column(db.Date, nullable=True)
+    # Days from start_date to end_date, kept in step with the dates on every
+    # insert and update so duration analytics can aggregate it in SQL
+    duration_days = db.Column(db.Integer, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_repairs_provider_end_date', 'provider_id', 'end_date'),
+        db.Index('ix_repairs_type_start_date', 'repair_type', 'start_date'),
+    )
     
     # Relationships
     car = db.relationship('Car', back_populates='repairs')
@@ -36,4 +45,13 @@ class Repair(db.Model):
         # Get the sum of all parts costs
         parts_cost = sum(float(part.purchase_price) for part in self.parts)
         # Add labor cost
-        return float(self.repair_cost) + parts_cost 
\ No newline at end of file
+        return float(self.repair_cost) + parts_cost
+
+# Keep the stored duration in step with the repair's dates
+@event.listens_for(Repair, 'before_insert')
+@event.listens_for(Repair, 'before_update')
+def set_duration_days(mapper, connection, repair):
+    if repair.start_date and repair.end_date:
+        repair.duration_days = (repair.end_date - repair.start_date).days
+    else:
+        repair.duration_days = None
@@ -16,6 +16,9 @@ class RepairProvider(db.Model):
 
     # Add the repairs relationship
     repairs = db.relationship('Repair', back_populates='provider')
+    
+    # Number of repairs, filled in by queries using the provider_with_repair_count loader profile
+    repair_count = db.query_expression()
 
     def __repr__(self):
         return f'<RepairProvider {self.provider_name} ({self.service_type})>'
@@ -1,4 +1,7 @@
 from datetime import datetime
+from threading import Lock
+import time
+from flask import current_app
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from app import db, login_manager
@@ -35,13 +38,104 @@ class User(UserMixin, db.Model):
         """Update the last login timestamp"""
         self.last_login = datetime.now()
         db.session.commit()
+        invalidate_user_cache(self.user_id)
 
     def get_id(self):
         """Override get_id method from UserMixin"""
         return str(self.user_id)
 
 
+class UserPrincipal:
+    """
+    Lightweight, detached snapshot of a User row used as ``current_user``.
+
+    Holds only the fields templates and permission checks read, so it can be
+    cached between requests without keeping an ORM instance (and its session)
+    alive.
+    """
+    __slots__ = ('user_id', 'username', 'full_name', 'role', 'last_login')
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def __init__(self, user_id, username, full_name, role, last_login=None):
+        self.user_id = user_id
+        self.username = username
+        self.full_name = full_name
+        self.role = role
+        self.last_login = last_login
+
+    @classmethod
+    def from_user(cls, user):
+        """Build a principal from a User instance"""
+        return cls(user.user_id, user.username, user.full_name, user.role, user.last_login)
+
+    def get_id(self):
+        """Return the id Flask-Login stores in the session"""
+        return str(self.user_id)
+
+    def __eq__(self, other):
+        if isinstance(other, (UserPrincipal, User)):
+            return self.user_id == other.user_id
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.user_id)
+
+    def __repr__(self):
+        return f'<UserPrincipal {self.username}>'
+
+
+# Per-process cache of user_id -> (expires_at, UserPrincipal)
+_user_cache = {}
+_user_cache_lock = Lock()
+
+
+def invalidate_user_cache(user_id=None):
+    """
+    Drop cached principals so the next request reloads them from the database.
+
+    Args:
+        user_id (int, optional): User to invalidate; clears the whole cache if None
+    """
+    with _user_cache_lock:
+        if user_id is None:
+            _user_cache.clear()
+        else:
+            _user_cache.pop(int(user_id), None)
+
+
 @login_manager.user_loader
 def load_user(user_id):
-    """User loader function for Flask-Login"""
-    return User.query.get_or_404(int(user_id)) if user_id else None 
\ No newline at end of file
+    """
+    User loader function for Flask-Login.
+
+    Serves a cached UserPrincipal while it is younger than USER_CACHE_TTL
+    seconds, otherwise reads the users table and refreshes the cache.
+    """
+    if not user_id:
+        return None
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    ttl = current_app.config.get('USER_CACHE_TTL', 0)
+    now = time.monotonic()
+    if ttl > 0:
+        with _user_cache_lock:
+            entry = _user_cache.get(user_id)
+        if entry and entry[0] > now:
+            return entry[1]
+
+    user = User.query.get(user_id)
+    if user is None:
+        invalidate_user_cache(user_id)
+        return None
+
+    principal = UserPrincipal.from_user(user)
+    if ttl > 0:
+        with _user_cache_lock:
+            _user_cache[user_id] = (now + ttl, principal)
+    return principal 
\ No newline at end of file
@@ -1,5 +1,7 @@
 # Base package for reports
 from app.reports.base.report import Report
+from app.reports.base.projections import Projection
+from app.reports.base.expressions import days_between
 
-__all__ = ['Report'] 
+__all__ = ['Report', 'Projection', 'days_between'] 
 # Base package for reports 
\ No newline at end of file
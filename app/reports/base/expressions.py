@@ -0,0 +1,38 @@
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import Integer
+
+
+class days_between(FunctionElement):
+    """
+    Whole days from one date column to another, computed by the database.
+
+    Date arithmetic differs per dialect, so the expression compiles to
+    julianday() on SQLite, date subtraction on PostgreSQL and DATEDIFF on
+    MySQL. NULL when either date is NULL.
+
+    Example:
+        db.session.query(func.sum(days_between(Repair.start_date, Repair.end_date)))
+    """
+    type = Integer()
+    inherit_cache = True
+    name = 'days_between'
+
+
+@compiles(days_between)
+def _days_between_default(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f"({compiler.process(end, **kw)} - {compiler.process(start, **kw)})"
+
+
+@compiles(days_between, 'sqlite')
+def _days_between_sqlite(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return (f"CAST(julianday({compiler.process(end, **kw)}) - "
+            f"julianday({compiler.process(start, **kw)}) AS INTEGER)")
+
+
+@compiles(days_between, 'mysql')
+def _days_between_mysql(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f"DATEDIFF({compiler.process(end, **kw)}, {compiler.process(start, **kw)})"
@@ -0,0 +1,37 @@
+from collections import namedtuple
+from app import db
+
+class Projection:
+    """
+    A named set of columns selected into lightweight row tuples.
+
+    Reports that copy a dozen fields out of each row into dicts do not need
+    full ORM entities (identity-map bookkeeping, load events, relationship
+    proxies). A projection selects only the labelled columns and returns each
+    row as a named tuple, so rows keep attribute access (``row.car_id``)
+    without touching the unit of work.
+
+    Example:
+        CAR_ROW = Projection('CarRow', car_id=Car.car_id, make=Car.vehicle_make)
+        rows = CAR_ROW.rows(CAR_ROW.query().filter(Car.date_sold == None))
+    """
+
+    def __init__(self, name, **columns):
+        self.name = name
+        self.columns = columns
+        self.row_type = namedtuple(name, columns.keys())
+
+    def query(self):
+        """
+        Start a query selecting the projected columns
+        """
+        return db.session.query(*(
+            column.label(label) for label, column in self.columns.items()
+        ))
+
+    def rows(self, query):
+        """
+        Run a query built from query() and return its rows as named tuples
+        """
+        make_row = self.row_type._make
+        return [make_row(row) for row in query]
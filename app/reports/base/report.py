@@ -1,6 +1,9 @@
 from flask import request, render_template
 from datetime import datetime
+from inspect import signature
 from app.utils.validators import validate_params
+from app.utils.db_routing import on_reporting_bind
+from app.utils.single_flight import single_flight
 from abc import ABC, abstractmethod
 
 class Report(ABC):
@@ -17,6 +20,20 @@ class Report(ABC):
     # Parameter validation rules
     param_rules = {}
     
+    # Heavy sections (large tables, drill-downs) that pages can load on demand,
+    # mapping each section's key in the generate() payload to the method
+    # that builds it
+    deferred_sections = {}
+    
+    def __init_subclass__(cls, **kwargs):
+        """
+        Run each report's generate() against the read-only reporting engine,
+        once for all identical concurrent requests
+        """
+        super().__init_subclass__(**kwargs)
+        if 'generate' in cls.__dict__:
+            cls.generate = single_flight(on_reporting_bind(cls.__dict__['generate']))
+    
     def __init__(self):
         """
         Initialize a new report instance
@@ -24,6 +41,64 @@ class Report(ABC):
         self.params = {}
         self.data = {}
         self.report_date = datetime.now().strftime('%Y-%m-%d %H:%M')
+        # When set, generate() leaves deferred_sections out of its payload
+        self.defer_sections = False
+    
+    @classmethod
+    def parse_parameters(cls, args):
+        """
+        Build constructor arguments from request args using parameter_rules
+        
+        Values that fail to convert are treated as not provided, matching the
+        report pages.
+        """
+        rules = getattr(cls, 'parameter_rules', {})
+        accepted = signature(cls.__init__).parameters
+        kwargs = {}
+        
+        for name, rule in rules.items():
+            if name not in accepted:
+                continue
+            param_type = rule.get('type')
+            
+            if param_type == 'list':
+                values = args.getlist(name)
+                kwargs[name] = [int(value) for value in values if value.isdigit()]
+                continue
+            
+            value = args.get(name)
+            if not value:
+                continue
+            if param_type == 'integer':
+                value = int(value) if value.isdigit() else None
+            elif param_type == 'date':
+                try:
+                    value = datetime.strptime(value, '%Y-%m-%d').date()
+                except ValueError:
+                    value = None
+            elif 'choices' in rule and value not in rule['choices']:
+                value = None
+            
+            if value is not None:
+                kwargs[name] = value
+        
+        return kwargs
+    
+    def is_deferred(self, section):
+        """
+        Whether generate() should leave a section for the page to fetch later
+        """
+        return self.defer_sections and section in self.deferred_sections
+    
+    @on_reporting_bind
+    def generate_section(self, section):
+        """
+        Generate the data for one deferred section
+        """
+        if section not in self.deferred_sections:
+            raise ValueError(f"Section '{section}' not found")
+        
+        return getattr(self, self.deferred_sections[section])()
     
     def validate_parameters(self):
         """
@@ -1,8 +1,10 @@
 from app.reports.base.report import Report
+from app.reports.base.expressions import days_between
 from app.models.repair import Repair
 from app.models.car import Car
 from app.models.repair_provider import RepairProvider
-from sqlalchemy import func, extract, desc, asc
+from app import db
+from sqlalchemy import func, extract, desc, asc, case
 from datetime import datetime, date, timedelta
 from app.utils import import_helpers
 import pandas as pd
@@ -11,6 +13,10 @@ import calendar
 import io
 import os
 
+# Stored repair duration, computed from the dates for rows it has not been
+# filled in for yet (written by raw SQL or before the backfill reached them)
+REPAIR_DAYS = func.coalesce(Repair.duration_days, days_between(Repair.start_date, Repair.end_date))
+
 class ProviderEfficiencyReport(Report):
     """
     Report tracking Repair Provider Performance, including metrics like:
@@ -38,25 +44,10 @@ class ProviderEfficiencyReport(Report):
         
     def generate(self):
         """Generate the report data"""
-        # Base query for repairs
-        base_query = Repair.query.join(Repair.provider)
-        
-        # Apply filters
-        if self.start_date:
-            base_query = base_query.filter(Repair.start_date >= self.start_date)
-        
-        if self.end_date:
-            base_query = base_query.filter(Repair.start_date <= self.end_date)
-            
-        if self.repair_type:
-            base_query = base_query.filter(Repair.repair_type == self.repair_type)
-        
-        # Get all repairs matching the filters
-        repairs = base_query.all()
-        
-        # Calculate metrics
-        provider_metrics = self._calculate_provider_metrics(repairs)
-        cost_vs_duration = self._calculate_cost_vs_duration(repairs)
+        # Calculate metrics from per-provider totals
+        provider_totals = self._get_provider_totals()
+        provider_metrics = self._calculate_provider_metrics(provider_totals)
+        cost_vs_duration = self._calculate_cost_vs_duration(provider_totals)
         available_repair_types = self._get_available_repair_types()
         
         # Return data for rendering
@@ -87,36 +78,65 @@ class ProviderEfficiencyReport(Report):
         
         return self.data
     
-    def _calculate_provider_metrics(self, repairs):
-        """Calculate metrics for each provider"""
-        providers = {}
+    def _get_provider_totals(self):
+        """
+        Sum costs, counts and durations per provider in one GROUP BY query
+
+        Returns:
+            list: One dict per provider with repairs in the filtered range
+        """
+        completed = REPAIR_DAYS != None
+        query = db.session.query(
+            Repair.provider_id,
+            RepairProvider.provider_name,
+            RepairProvider.service_type,
+            func.count(Repair.repair_id),
+            func.sum(Repair.repair_cost),
+            func.count(REPAIR_DAYS),
+            func.sum(case((completed, Repair.repair_cost), else_=0)),
+            func.sum(REPAIR_DAYS)
+        ).join(
+            RepairProvider, RepairProvider.provider_id == Repair.provider_id
+        )
         
-        for repair in repairs:
-            provider_id = repair.provider_id
-            provider = repair.provider
-            cost = self._to_decimal(repair.repair_cost)
-            
-            if provider_id not in providers:
-                providers[provider_id] = {
-                    "provider_id": provider_id,
-                    "provider_name": provider.provider_name,
-                    "service_type": provider.service_type,
-                    "total_cost": decimal.Decimal('0.00'),
-                    "total_repairs": 0,
-                    "completed_repairs": 0,
-                    "total_duration": 0
-                }
-                
-            providers[provider_id]["total_cost"] += cost
-            providers[provider_id]["total_repairs"] += 1
+        # Apply filters
+        if self.start_date:
+            query = query.filter(Repair.start_date >= self.start_date)
+        
+        if self.end_date:
+            query = query.filter(Repair.start_date <= self.end_date)
             
-            # Calculate duration for completed repairs
-            if repair.duration is not None:
-                providers[provider_id]["completed_repairs"] += 1
-                providers[provider_id]["total_duration"] += repair.duration
+        if self.repair_type:
+            query = query.filter(Repair.repair_type == self.repair_type)
+        
+        query = query.group_by(Repair.provider_id, RepairProvider.provider_name, RepairProvider.service_type)
+        
+        return [{
+            "provider_id": provider_id,
+            "provider_name": provider_name,
+            "service_type": service_type,
+            "total_repairs": total_repairs,
+            "total_cost": self._to_decimal(total_cost),
+            "completed_repairs": completed_repairs,
+            "completed_cost": self._to_decimal(completed_cost),
+            "total_duration": int(total_duration or 0)
+        } for (provider_id, provider_name, service_type, total_repairs, total_cost,
+               completed_repairs, completed_cost, total_duration) in query]
+    
+    def _calculate_provider_metrics(self, provider_totals):
+        """Calculate metrics for each provider"""
+        providers = []
         
-        # Calculate averages
-        for provider in providers.values():
+        for totals in provider_totals:
+            provider = {
+                "provider_id": totals["provider_id"],
+                "provider_name": totals["provider_name"],
+                "service_type": totals["service_type"],
+                "total_cost": totals["total_cost"],
+                "total_repairs": totals["total_repairs"],
+                "completed_repairs": totals["completed_repairs"],
+                "total_duration": totals["total_duration"]
+            }
             provider["avg_cost"] = provider["total_cost"] / provider["total_repairs"] if provider["total_repairs"] > 0 else 0
             provider["avg_duration"] = provider["total_duration"] / provider["completed_repairs"] if provider["completed_repairs"] > 0 else 0
             
@@ -125,48 +145,38 @@ class ProviderEfficiencyReport(Report):
                 provider["cost_duration_ratio"] = float(provider["avg_cost"]) / float(provider["avg_duration"])
             else:
                 provider["cost_duration_ratio"] = None
+            
+            providers.append(provider)
         
         # Sort by average cost
         return sorted(
-            providers.values(),
+            providers,
             key=lambda x: x["avg_cost"] if x["avg_cost"] is not None else float('inf')
         )
     
-    def _calculate_cost_vs_duration(self, repairs):
+    def _calculate_cost_vs_duration(self, provider_totals):
         """Calculate cost vs duration comparison data for visualization"""
-        providers = {}
+        providers = []
         
-        for repair in repairs:
-            if repair.duration is None:
+        # Only completed repairs have a duration
+        for totals in provider_totals:
+            count = totals["completed_repairs"]
+            if count == 0:
                 continue
-                
-            provider_id = repair.provider_id
-            provider = repair.provider
-            cost = self._to_decimal(repair.repair_cost)
             
-            if provider_id not in providers:
-                providers[provider_id] = {
-                    "provider_id": provider_id,
-                    "provider_name": provider.provider_name,
-                    "service_type": provider.service_type,
-                    "avg_cost": 0,
-                    "avg_duration": 0,
-                    "total_cost": decimal.Decimal('0.00'),
-                    "total_duration": 0,
-                    "count": 0
-                }
-                
-            providers[provider_id]["total_cost"] += cost
-            providers[provider_id]["total_duration"] += repair.duration
-            providers[provider_id]["count"] += 1
-        
-        # Calculate averages
-        for provider in providers.values():
-            provider["avg_cost"] = float(provider["total_cost"] / provider["count"]) if provider["count"] > 0 else 0
-            provider["avg_duration"] = provider["total_duration"] / provider["count"] if provider["count"] > 0 else 0
+            providers.append({
+                "provider_id": totals["provider_id"],
+                "provider_name": totals["provider_name"],
+                "service_type": totals["service_type"],
+                "avg_cost": float(totals["completed_cost"] / count),
+                "avg_duration": totals["total_duration"] / count,
+                "total_cost": totals["completed_cost"],
+                "total_duration": totals["total_duration"],
+                "count": count
+            })
         
         # Return data for chart visualization
-        return sorted(providers.values(), key=lambda x: x["provider_name"])
+        return sorted(providers, key=lambda x: x["provider_name"])
     
     def _get_available_repair_types(self):
         """Get list of all available repair types for filtering"""
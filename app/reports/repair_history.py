@@ -2,6 +2,7 @@ from app.reports.base.report import Report
 from app.models.repair import Repair
 from app.models.car import Car
 from app.models.repair_provider import RepairProvider
+from app.utils.loaders import with_loader_profile
 from sqlalchemy import func, extract
 from datetime import datetime, date, timedelta
 from app.utils import import_helpers
@@ -48,7 +49,7 @@ class RepairHistoryReport(Report):
     def generate(self):
         """Generate the report data"""
         # Base query for repairs
-        base_query = Repair.query.join(Repair.car)
+        base_query = with_loader_profile(Repair.query.join(Repair.car), 'repair_with_joined_car_and_provider')
         
         # Apply filters
         if self.start_date:
@@ -77,8 +78,9 @@ class RepairHistoryReport(Report):
         
         # Calculate metrics
         avg_cost_per_type = self._calculate_avg_cost_per_type(repairs)
-        avg_duration_from_purchase = self._calculate_avg_duration_from_purchase(repairs)
-        repair_count_per_car = self._calculate_repair_count_per_car(repairs)
+        car_summaries = self._summarize_repairs_by_car(repairs)
+        avg_duration_from_purchase = self._calculate_avg_duration_from_purchase(car_summaries)
+        repair_count_per_car = self._calculate_repair_count_per_car(car_summaries)
         avg_duration_per_provider = self._calculate_avg_duration_per_provider(repairs)
         cost_trend_per_type = self._calculate_cost_trend_per_type(repairs)
         repairs_by_model = self._group_repairs_by_car_model(repairs)
@@ -160,59 +162,72 @@ class RepairHistoryReport(Report):
             reverse=True
         )
     
-    def _calculate_avg_duration_from_purchase(self, repairs):
-        """Calculate average days from purchase to first repair for each car"""
-        car_first_repairs = {}
+    def _summarize_repairs_by_car(self, repairs):
+        """
+        Collect each car's repair count, total cost and first repair date in one pass
+
+        Returns:
+            dict: car_id -> {"car", "repairs", "total_cost", "first_repair_date"}
+        """
+        cars = {}
         
-        # Get first repair for each car
         for repair in repairs:
-            car_id = repair.car_id
+            summary = cars.get(repair.car_id)
+            if summary is None:
+                # repair.car is eager-loaded with the repairs
+                summary = cars[repair.car_id] = {
+                    "car": repair.car,
+                    "repairs": 0,
+                    "total_cost": decimal.Decimal('0.00'),
+                    "first_repair_date": repair.start_date
+                }
             
-            # Skip if we've already processed this car or missing purchase date
-            if car_id in car_first_repairs or not repair.car.date_bought:
+            summary["repairs"] += 1
+            summary["total_cost"] += self._to_decimal(repair.repair_cost)
+            if repair.start_date < summary["first_repair_date"]:
+                summary["first_repair_date"] = repair.start_date
+        
+        return cars
+    
+    def _calculate_avg_duration_from_purchase(self, car_summaries):
+        """Calculate average days from purchase to first repair for each car"""
+        car_first_repairs = []
+        
+        for car_id, summary in car_summaries.items():
+            car = summary["car"]
+            
+            # Skip cars missing a purchase date
+            if not car.date_bought:
                 continue
-                
-            # Calculate days from purchase to repair start
-            days_to_first_repair = (repair.start_date - repair.car.date_bought).days
             
-            car_first_repairs[car_id] = {
+            car_first_repairs.append({
                 "car_id": car_id,
-                "car_name": f"{repair.car.year} {repair.car.vehicle_make} {repair.car.vehicle_model}",
-                "purchase_date": repair.car.date_bought,
-                "first_repair_date": repair.start_date,
-                "days_to_repair": days_to_first_repair
-            }
+                "car_name": f"{car.year} {car.vehicle_make} {car.vehicle_model}",
+                "purchase_date": car.date_bought,
+                "first_repair_date": summary["first_repair_date"],
+                "days_to_repair": (summary["first_repair_date"] - car.date_bought).days
+            })
         
         # Calculate average
-        avg_days = sum(item["days_to_repair"] for item in car_first_repairs.values()) / len(car_first_repairs) if car_first_repairs else 0
+        avg_days = sum(item["days_to_repair"] for item in car_first_repairs) / len(car_first_repairs) if car_first_repairs else 0
         
         return {
             "average_days": round(avg_days, 1),
-            "cars": sorted(car_first_repairs.values(), key=lambda x: x["days_to_repair"], reverse=True)
+            "cars": sorted(car_first_repairs, key=lambda x: x["days_to_repair"], reverse=True)
         }
     
-    def _calculate_repair_count_per_car(self, repairs):
+    def _calculate_repair_count_per_car(self, car_summaries):
         """Calculate repair count per car"""
-        car_repairs = {}
-        
-        for repair in repairs:
-            car_id = repair.car_id
-            car = repair.car
-            
-            if car_id not in car_repairs:
-                car_repairs[car_id] = {
-                    "car_id": car_id,
-                    "car_name": f"{car.year} {car.vehicle_make} {car.vehicle_model}",
-                    "licence_number": car.licence_number,
-                    "repairs": 0,
-                    "total_cost": decimal.Decimal('0.00')
-                }
-                
-            car_repairs[car_id]["repairs"] += 1
-            car_repairs[car_id]["total_cost"] += self._to_decimal(repair.repair_cost)
+        car_repairs = [{
+            "car_id": car_id,
+            "car_name": f"{summary['car'].year} {summary['car'].vehicle_make} {summary['car'].vehicle_model}",
+            "licence_number": summary["car"].licence_number,
+            "repairs": summary["repairs"],
+            "total_cost": summary["total_cost"]
+        } for car_id, summary in car_summaries.items()]
         
         # Sort by repair count descending
-        return sorted(car_repairs.values(), key=lambda x: x["repairs"], reverse=True)
+        return sorted(car_repairs, key=lambda x: x["repairs"], reverse=True)
     
     def _calculate_avg_duration_per_provider(self, repairs):
         """Calculate average repair duration per provider"""
@@ -253,57 +268,40 @@ class RepairHistoryReport(Report):
             start_date = date(year_to_use, 1, 1)
             end_date = date(year_to_use, 12, 31)
         else:
-            start_date = self.start_date or min(repair.start_date for repair in repairs) if repairs else date.today()
-            end_date = self.end_date or max(repair.start_date for repair in repairs) if repairs else date.today()
-            
-        # Get all unique repair types
-        repair_types = set(repair.repair_type for repair in repairs)
-        
-        # Initialize data structure
-        months_range = []
-        current_date = start_date.replace(day=1)
-        while current_date <= end_date:
-            months_range.append(current_date.strftime("%Y-%m"))
-            # Move to next month
-            if current_date.month == 12:
-                current_date = current_date.replace(year=current_date.year + 1, month=1)
-            else:
-                current_date = current_date.replace(month=current_date.month + 1)
-        
-        # Initialize trend data
+            start_date = self.start_date or (min(repair.start_date for repair in repairs) if repairs else date.today())
+            end_date = self.end_date or (max(repair.start_date for repair in repairs) if repairs else date.today())
+        
+        # Months are numbered year * 12 + month - 1, so the range is a slice of integers
+        first_month = start_date.year * 12 + start_date.month - 1
+        month_count = max(end_date.year * 12 + end_date.month - first_month, 0)
+        
+        # One pass over the repairs fills every type's monthly totals
+        totals = {}
+        for repair in repairs:
+            index = repair.start_date.year * 12 + repair.start_date.month - 1 - first_month
+            series = totals.get(repair.repair_type)
+            if series is None:
+                series = totals[repair.repair_type] = ([0] * month_count, [0.0] * month_count)
+            if 0 <= index < month_count:
+                series[0][index] += 1
+                series[1][index] += float(repair.repair_cost)
+        
         trend_data = {
-            "labels": [datetime.strptime(m, "%Y-%m").strftime("%b %Y") for m in months_range],
+            "labels": [date(month // 12, month % 12 + 1, 1).strftime("%b %Y")
+                       for month in range(first_month, first_month + month_count)],
             "datasets": []
         }
         
         # Background colors for chart
         bg_colors = ['#4e73df', '#1cc88a', '#36b9cc', '#f6c23e', '#e74a3b', '#5a5c69', '#858796']
         
-        # Populate data for each repair type
-        for idx, repair_type in enumerate(repair_types):
-            # Initialize monthly data
-            monthly_data = {month: {"count": 0, "total": 0} for month in months_range}
-            
-            # Populate with actual data
-            for repair in repairs:
-                if repair.repair_type == repair_type:
-                    repair_month = repair.start_date.strftime("%Y-%m")
-                    if repair_month in monthly_data:
-                        monthly_data[repair_month]["count"] += 1
-                        monthly_data[repair_month]["total"] += float(repair.repair_cost)
-            
-            # Calculate averages
-            dataset = {
+        for idx, repair_type in enumerate(sorted(totals, key=str)):
+            counts, costs = totals[repair_type]
+            trend_data["datasets"].append({
                 "label": repair_type,
-                "data": [
-                    round(monthly_data[month]["total"] / monthly_data[month]["count"], 2) 
-                    if monthly_data[month]["count"] > 0 else 0 
-                    for month in months_range
-                ],
+                "data": [round(cost / count, 2) if count > 0 else 0 for count, cost in zip(counts, costs)],
                 "backgroundColor": bg_colors[idx % len(bg_colors)]
-            }
-            
-            trend_data["datasets"].append(dataset)
+            })
         
         return trend_data
     
@@ -1,10 +1,37 @@
-from app.reports.base import Report
+from app.reports.base import Report, Projection
 from app.models import Car, Repair, Setting, Stand
 from datetime import datetime
 from sqlalchemy import func, and_
 import decimal
 from dateutil.relativedelta import relativedelta
 
+# Columns read for each unsold car in the aging table
+INVENTORY_CAR_ROW = Projection(
+    'InventoryCarRow',
+    car_id=Car.car_id,
+    registration_number=Car.registration_number,
+    year=Car.year,
+    vehicle_make=Car.vehicle_make,
+    vehicle_model=Car.vehicle_model,
+    colour=Car.colour,
+    repair_status=Car.repair_status,
+    stand_id=Car.stand_id,
+    date_bought=Car.date_bought,
+    date_added_to_stand=Car.date_added_to_stand,
+    purchase_price=Car.purchase_price,
+    recon_cost=Car.recon_cost,
+    current_location=Car.current_location
+)
+
+# Columns needed for status counts and the make/model filter options
+INVENTORY_STATUS_ROW = Projection(
+    'InventoryStatusRow',
+    vehicle_make=Car.vehicle_make,
+    vehicle_model=Car.vehicle_model,
+    repair_status=Car.repair_status,
+    stand_id=Car.stand_id
+)
+
 class InventoryAgingReport(Report):
     """
     Report showing the aging of inventory in stock, including:
@@ -71,7 +98,7 @@ class InventoryAgingReport(Report):
         stands_data = [{"stand_id": stand.stand_id, "stand_name": stand.stand_name} for stand in stands]
         
         # Base query - exclude cars that have been sold
-        car_query = Car.query.filter(Car.date_sold == None)
+        car_query = INVENTORY_CAR_ROW.query().filter(Car.date_sold == None)
         
         # Apply filters from report parameters
         if self.status != "all":
@@ -89,11 +116,11 @@ class InventoryAgingReport(Report):
         if self.model:
             car_query = car_query.filter(Car.vehicle_model.ilike(f"%{self.model}%"))
         
-        # Execute query and get the cars
-        db_cars = car_query.all()
+        # Execute query and get the cars as lightweight rows
+        db_cars = INVENTORY_CAR_ROW.rows(car_query)
         
         # Get all cars for status counts, vehicle makes and models (excluding sold cars)
-        all_cars = Car.query.filter(Car.date_sold == None).all()
+        all_cars = INVENTORY_STATUS_ROW.rows(INVENTORY_STATUS_ROW.query().filter(Car.date_sold == None))
         
         # Convert to dictionary objects with required attributes
         cars = []
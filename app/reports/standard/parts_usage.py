@@ -1,4 +1,5 @@
 from app.reports.base.report import Report
+from app.reports.base import Projection
 from app.models.part import Part, RepairPart
 from app.models.repair import Repair
 from app.models.car import Car
@@ -9,9 +10,23 @@ from app.utils import import_helpers
 import pandas as pd
 import decimal
 import calendar
+import heapq
 import io
 import json
 
+# One row per part fitted in a repair, with the columns the metrics group on
+PART_USAGE_ROW = Projection(
+    'PartUsageRow',
+    part_id=Part.part_id,
+    part_name=Part.part_name,
+    manufacturer=Part.manufacturer,
+    repair_id=Repair.repair_id,
+    purchase_price=RepairPart.purchase_price,
+    purchase_date=RepairPart.purchase_date,
+    vehicle_make=Car.vehicle_make,
+    vehicle_model=Car.vehicle_model
+)
+
 class PartsUsageReport(Report):
     """
     Report analyzing parts usage, including metrics like:
@@ -43,9 +58,7 @@ class PartsUsageReport(Report):
     def generate(self):
         """Generate the report data"""
         # Base query for repair parts
-        base_query = db.session.query(
-            RepairPart, Repair, Part, Car
-        ).join(
+        base_query = PART_USAGE_ROW.query().select_from(RepairPart).join(
             Repair, RepairPart.repair_id == Repair.repair_id
         ).join(
             Part, RepairPart.part_id == Part.part_id
@@ -66,14 +79,16 @@ class PartsUsageReport(Report):
         if self.vehicle_model:
             base_query = base_query.filter(Car.vehicle_model == self.vehicle_model)
         
-        # Get all repair parts data
-        repair_parts_data = base_query.all()
+        # Get all repair parts data as one frame the metrics aggregate
+        rows = PART_USAGE_ROW.rows(base_query)
+        self.parts = {row.part_id: (row.part_name, row.manufacturer) for row in rows}
+        usage = self._usage_frame(rows)
         
         # Calculate metrics
-        most_used_parts = self._calculate_most_used_parts(repair_parts_data)
-        avg_unit_cost_over_time = self._calculate_avg_unit_cost_over_time(repair_parts_data)
-        parts_most_used_per_model = self._calculate_parts_most_used_per_model(repair_parts_data)
-        top_parts_by_frequency = self._get_top_parts_by_frequency(repair_parts_data, limit=10)
+        most_used_parts = self._calculate_most_used_parts(usage)
+        avg_unit_cost_over_time = self._calculate_avg_unit_cost_over_time(usage)
+        parts_most_used_per_model = self._calculate_parts_most_used_per_model(usage)
+        top_parts_by_frequency = self._get_top_parts_by_frequency(usage, limit=10)
         
         # Get all available options for filtering
         available_parts = self._get_available_parts()
@@ -111,78 +126,79 @@ class PartsUsageReport(Report):
         
         return self.data
     
-    def _calculate_most_used_parts(self, repair_parts_data):
+    def _usage_frame(self, rows):
+        """
+        Build the frame of part usage rows
+
+        Prices are floats and months are numbered year * 12 + month - 1, so
+        each metric is a groupby over plain columns.
+        """
+        usage = pd.DataFrame(rows, columns=list(PART_USAGE_ROW.columns))
+        usage["price"] = pd.to_numeric(usage["purchase_price"], errors="coerce").fillna(0.0)
+        purchase_dates = pd.to_datetime(usage["purchase_date"])
+        usage["month"] = purchase_dates.dt.year * 12 + purchase_dates.dt.month - 1
+        return usage
+    
+    def _to_money(self, value):
+        """Convert a float sum of prices back to a Decimal amount"""
+        return decimal.Decimal(str(round(float(value), 2)))
+    
+    def _calculate_most_used_parts(self, usage):
         """Calculate most frequently used parts"""
-        part_usage = {}
+        if usage.empty:
+            return []
         
-        for rp, repair, part, car in repair_parts_data:
-            part_id = part.part_id
-            
-            if part_id not in part_usage:
-                part_usage[part_id] = {
-                    "part_id": part_id,
-                    "part_name": part.part_name,
-                    "manufacturer": part.manufacturer,
-                    "count": 0,
-                    "total_cost": decimal.Decimal('0.00'),
-                    "repairs": set(),
-                    "models": set()
-                }
-                
-            part_usage[part_id]["count"] += 1
-            part_usage[part_id]["total_cost"] += self._to_decimal(rp.purchase_price)
-            part_usage[part_id]["repairs"].add(repair.repair_id)
-            part_usage[part_id]["models"].add(car.vehicle_model)
-            
-        # Calculate average costs and format data
-        for part_data in part_usage.values():
-            part_data["avg_cost"] = part_data["total_cost"] / part_data["count"] if part_data["count"] > 0 else 0
-            part_data["repairs"] = len(part_data["repairs"])
-            part_data["models"] = len(part_data["models"])
+        per_part = usage.groupby("part_id", sort=False).agg(
+            count=("price", "size"),
+            total_cost=("price", "sum"),
+            repairs=("repair_id", "nunique"),
+            models=("vehicle_model", "nunique")
+        )
+        
+        part_usage = []
+        for part_id, count, total_cost, repairs, models in per_part.itertuples():
+            part_name, manufacturer = self.parts[part_id]
+            total_cost = self._to_money(total_cost)
+            part_usage.append({
+                "part_id": int(part_id),
+                "part_name": part_name,
+                "manufacturer": manufacturer,
+                "count": int(count),
+                "total_cost": total_cost,
+                "avg_cost": total_cost / int(count),
+                "repairs": int(repairs),
+                "models": int(models)
+            })
             
         # Sort by count descending
-        return sorted(part_usage.values(), key=lambda x: x["count"], reverse=True)
+        return sorted(part_usage, key=lambda x: x["count"], reverse=True)
     
-    def _calculate_avg_unit_cost_over_time(self, repair_parts_data):
+    def _calculate_avg_unit_cost_over_time(self, usage):
         """Calculate average unit cost per part over time"""
+        if usage.empty:
+            return {"labels": [], "datasets": []}
+        
         # If no date range is set, use last 12 months
         if not self.start_date and not self.end_date:
             end_date = date.today()
             start_date = date(end_date.year - 1, end_date.month, 1)
         else:
-            start_date = self.start_date or min(rp.purchase_date for rp, _, _, _ in repair_parts_data) if repair_parts_data else date.today()
-            end_date = self.end_date or max(rp.purchase_date for rp, _, _, _ in repair_parts_data) if repair_parts_data else date.today()
-            
-        # Get all unique parts
-        parts = {part.part_id: part.part_name for _, _, part, _ in repair_parts_data}
+            start_date = self.start_date or min(usage["purchase_date"])
+            end_date = self.end_date or max(usage["purchase_date"])
         
-        if not parts:
-            return {"labels": [], "datasets": []}
+        first_month = start_date.year * 12 + start_date.month - 1
+        month_count = max(end_date.year * 12 + end_date.month - first_month, 0)
         
-        # Initialize data structure for months
-        months_range = []
-        current_date = start_date.replace(day=1)
-        while current_date <= end_date:
-            months_range.append(current_date.strftime("%Y-%m"))
-            # Move to next month
-            if current_date.month == 12:
-                current_date = current_date.replace(year=current_date.year + 1, month=1)
-            else:
-                current_date = current_date.replace(month=current_date.month + 1)
-        
-        # Initialize monthly data for each part
-        part_monthly_data = {part_id: {month: {"count": 0, "total": 0} for month in months_range} for part_id in parts}
-        
-        # Populate with actual data
-        for rp, _, part, _ in repair_parts_data:
-            purchase_month = rp.purchase_date.strftime("%Y-%m")
-            if purchase_month in months_range and part.part_id in part_monthly_data:
-                part_monthly_data[part.part_id][purchase_month]["count"] += 1
-                part_monthly_data[part.part_id][purchase_month]["total"] += float(rp.purchase_price)
+        # Single aggregation by (part, month) over the window
+        in_window = usage[(usage["month"] >= first_month) & (usage["month"] < first_month + month_count)]
+        monthly = in_window.groupby(["part_id", "month"], sort=False)["price"].agg(["size", "sum"])
+        averages = (monthly["sum"] / monthly["size"]).round(2)
+        part_counts = monthly["size"].groupby(level="part_id", sort=False).sum()
         
         # Initialize trend data
         trend_data = {
-            "labels": [datetime.strptime(m, "%Y-%m").strftime("%b %Y") for m in months_range],
+            "labels": [date(month // 12, month % 12 + 1, 1).strftime("%b %Y")
+                       for month in range(first_month, first_month + month_count)],
             "datasets": []
         }
         
@@ -190,21 +206,17 @@ class PartsUsageReport(Report):
         bg_colors = ['#4e73df', '#1cc88a', '#36b9cc', '#f6c23e', '#e74a3b', '#5a5c69', '#858796']
         
         # Get top 5 most used parts for the chart
-        top_parts = sorted(parts.items(), key=lambda x: sum(data[month]["count"] for month in months_range 
-                                                for part_id, data in part_monthly_data.items() 
-                                                if part_id == x[0]), reverse=True)[:5]
+        top_parts = heapq.nlargest(5, part_counts.items(), key=lambda item: item[1])
         
         # Populate datasets for each part
-        for idx, (part_id, part_name) in enumerate(top_parts):
-            # Calculate monthly averages
-            data = [
-                round(part_monthly_data[part_id][month]["total"] / part_monthly_data[part_id][month]["count"], 2)
-                if part_monthly_data[part_id][month]["count"] > 0 else None
-                for month in months_range
-            ]
+        for idx, (part_id, _) in enumerate(top_parts):
+            # Monthly averages, None for months without purchases
+            data = [None] * month_count
+            for month, average in averages.loc[part_id].items():
+                data[int(month) - first_month] = float(average)
             
             dataset = {
-                "label": part_name,
+                "label": self.parts[part_id][0],
                 "data": data,
                 "backgroundColor": bg_colors[idx % len(bg_colors)],
                 "borderColor": bg_colors[idx % len(bg_colors)],
@@ -216,70 +228,66 @@ class PartsUsageReport(Report):
         
         return trend_data
     
-    def _calculate_parts_most_used_per_model(self, repair_parts_data):
+    def _calculate_parts_most_used_per_model(self, usage):
         """Calculate parts most frequently used for each vehicle model"""
+        if usage.empty:
+            return []
+        
+        per_model_part = usage.groupby(["vehicle_model", "part_id"], sort=False)["price"].agg(["size", "sum"])
+        makes = usage.groupby("vehicle_model", sort=False)["vehicle_make"].first()
+        
         model_parts = {}
+        for (model, part_id), count, total_cost in per_model_part.itertuples():
+            model_parts.setdefault(model, []).append((int(count), part_id, total_cost))
         
-        for rp, repair, part, car in repair_parts_data:
-            model = car.vehicle_model
-            
-            if model not in model_parts:
-                model_parts[model] = {
-                    "model": model,
-                    "make": car.vehicle_make,
-                    "part_usage": {}
-                }
-                
-            if part.part_id not in model_parts[model]["part_usage"]:
-                model_parts[model]["part_usage"][part.part_id] = {
-                    "part_name": part.part_name,
-                    "count": 0,
-                    "total_cost": decimal.Decimal('0.00')
-                }
-                
-            model_parts[model]["part_usage"][part.part_id]["count"] += 1
-            model_parts[model]["part_usage"][part.part_id]["total_cost"] += self._to_decimal(rp.purchase_price)
-        
-        # Sort parts by usage and limit to top 5 for each model
-        for model_data in model_parts.values():
-            top_parts = sorted(model_data["part_usage"].values(), key=lambda x: x["count"], reverse=True)[:5]
-            model_data["top_parts"] = top_parts
-            model_data["total_parts_used"] = sum(part["count"] for part in model_data["part_usage"].values())
-            del model_data["part_usage"]  # Remove raw data to keep response size reasonable
+        results = []
+        for model, part_usage in model_parts.items():
+            # Top 5 parts for each model
+            top_parts = heapq.nlargest(5, part_usage, key=lambda item: item[0])
+            results.append({
+                "model": model,
+                "make": makes[model],
+                "top_parts": [{
+                    "part_name": self.parts[part_id][0],
+                    "count": count,
+                    "total_cost": self._to_money(total_cost)
+                } for count, part_id, total_cost in top_parts],
+                "total_parts_used": sum(count for count, _, _ in part_usage)
+            })
             
         # Sort models by total parts used
-        return sorted(model_parts.values(), key=lambda x: x["total_parts_used"], reverse=True)
+        return sorted(results, key=lambda x: x["total_parts_used"], reverse=True)
     
-    def _get_top_parts_by_frequency(self, repair_parts_data, limit=10):
+    def _get_top_parts_by_frequency(self, usage, limit=10):
         """Get top N parts by frequency of use"""
-        part_frequency = {}
+        if usage.empty:
+            return []
         
-        for rp, repair, part, car in repair_parts_data:
-            part_id = part.part_id
-            
-            if part_id not in part_frequency:
-                part_frequency[part_id] = {
-                    "part_id": part_id,
-                    "part_name": part.part_name,
-                    "manufacturer": part.manufacturer,
-                    "count": 0,
-                    "models": set()
-                }
-                
-            part_frequency[part_id]["count"] += 1
-            part_frequency[part_id]["models"].add(f"{car.vehicle_make} {car.vehicle_model}")
-        
-        # Format data
-        for part_data in part_frequency.values():
-            part_data["models"] = list(part_data["models"])
-            part_data["model_count"] = len(part_data["models"])
-            part_data["most_common_models"] = ", ".join(part_data["models"][:3])
-            if len(part_data["models"]) > 3:
-                part_data["most_common_models"] += f" and {len(part_data['models']) - 3} more"
-            del part_data["models"]  # Remove raw data
-            
-        # Get top N by frequency
-        return sorted(part_frequency.values(), key=lambda x: x["count"], reverse=True)[:limit]
+        part_counts = usage.groupby("part_id", sort=False).size()
+        top_parts = heapq.nlargest(limit, part_counts.items(), key=lambda item: item[1])
+        
+        # Distinct "make model" names per part, in order of first use
+        make_models = usage["vehicle_make"] + " " + usage["vehicle_model"]
+        pairs = pd.DataFrame({"part_id": usage["part_id"], "model": make_models}).drop_duplicates()
+        part_models = pairs.groupby("part_id", sort=False)["model"].agg(list)
+        
+        results = []
+        for part_id, count in top_parts:
+            part_name, manufacturer = self.parts[part_id]
+            models = part_models[part_id]
+            most_common_models = ", ".join(models[:3])
+            if len(models) > 3:
+                most_common_models += f" and {len(models) - 3} more"
+            results.append({
+                "part_id": int(part_id),
+                "part_name": part_name,
+                "manufacturer": manufacturer,
+                "count": int(count),
+                "model_count": len(models),
+                "most_common_models": most_common_models
+            })
+        
+        return results
     
     def _get_available_parts(self):
         """Get all available parts for filtering"""
@@ -291,12 +299,6 @@ class PartsUsageReport(Report):
         models = Car.query.with_entities(Car.vehicle_model).distinct().order_by(Car.vehicle_model).all()
         return [m[0] for m in models]
     
-    def _to_decimal(self, value):
-        """Convert a value to Decimal safely"""
-        if isinstance(value, decimal.Decimal):
-            return value
-        return decimal.Decimal(str(value)) if value is not None else decimal.Decimal('0.00')
-    
     def export_xlsx(self):
         """Export report data to XLSX format"""
         # Generate report data if not already generated
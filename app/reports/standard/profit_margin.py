@@ -1,5 +1,8 @@
 from app.reports.base import Report
+from app import db
 from app.models import Car, Sale, Dealer, Stand
+from app.utils.loaders import with_loader_profile
+from app.utils.report_buckets import get_bucket_totals
 from sqlalchemy import func, and_, extract, join, case
 from datetime import datetime, timedelta, date
 from dateutil.relativedelta import relativedelta
@@ -57,7 +60,7 @@ class ProfitMarginReport(Report):
         date_filter = self._get_date_filter()
         
         # Get all sales in the specified timeframe with applied filters
-        sales_query = Sale.query.join(Car)
+        sales_query = with_loader_profile(Sale.query.join(Car), 'sale_with_joined_car_costs')
         
         if date_filter is not None:
             sales_query = sales_query.filter(date_filter)
@@ -313,16 +316,7 @@ class ProfitMarginReport(Report):
     def _get_margin_trend(self, timeframe, start_date=None, end_date=None, stand_id=None, dealer_id=None):
         """Get profit margin trend over time based on timeframe and filters"""
         today = date.today()
-        result = []
-        
-        # Build base query with filters
-        base_query = Sale.query.join(Car)
-        
-        if stand_id:
-            base_query = base_query.filter(Car.stand_id == stand_id)
-            
-        if dealer_id:
-            base_query = base_query.filter(Sale.dealer_id == dealer_id)
+        buckets = []
         
         # Custom date range
         if timeframe == "custom" and start_date and end_date:
@@ -334,26 +328,7 @@ class ProfitMarginReport(Report):
                 month_end = (current_date + relativedelta(months=1) - timedelta(days=1))
                 if month_end > end_date:
                     month_end = end_date
-                
-                month_sales = base_query.filter(
-                    and_(Sale.sale_date >= current_date, Sale.sale_date <= month_end)
-                ).all()
-                
-                if month_sales:
-                    month_revenue = sum(self._decimal(sale.sale_price) for sale in month_sales)
-                    month_cost = sum(self._decimal(sale.car.total_investment) for sale in month_sales)
-                    month_profit = month_revenue - month_cost
-                    month_margin = (month_profit / month_revenue * 100) if month_revenue > 0 else 0
-                    month_roi = (month_profit / month_cost * 100) if month_cost > 0 else 0
-                else:
-                    month_margin = 0
-                    month_roi = 0
-                    
-                result.append({
-                    "label": current_date.strftime("%b %Y"),
-                    "margin": month_margin,
-                    "roi": month_roi
-                })
+                buckets.append((current_date.strftime("%b %Y"), current_date, month_end))
                 
                 # Move to the next month
                 current_date = (current_date + relativedelta(months=1))
@@ -362,49 +337,14 @@ class ProfitMarginReport(Report):
             # Daily data for the last 30 days
             for days_ago in range(29, -1, -1):
                 day_date = today - timedelta(days=days_ago)
-                day_sales = base_query.filter(func.date(Sale.sale_date) == day_date).all()
-                
-                if day_sales:
-                    day_revenue = sum(self._decimal(sale.sale_price) for sale in day_sales)
-                    day_cost = sum(self._decimal(sale.car.total_investment) for sale in day_sales)
-                    day_profit = day_revenue - day_cost
-                    day_margin = (day_profit / day_revenue * 100) if day_revenue > 0 else 0
-                    day_roi = (day_profit / day_cost * 100) if day_cost > 0 else 0
-                else:
-                    day_margin = 0
-                    day_roi = 0
-                    
-                result.append({
-                    "label": day_date.strftime("%b %d"),
-                    "margin": day_margin,
-                    "roi": day_roi
-                })
+                buckets.append((day_date.strftime("%b %d"), day_date, day_date))
                 
         elif timeframe == "last_90_days":
             # Weekly data for the last 90 days
             for week in range(12, -1, -1):
                 week_end = today - timedelta(days=week*7)
                 week_start = week_end - timedelta(days=6)
-                
-                week_sales = base_query.filter(
-                    and_(Sale.sale_date >= week_start, Sale.sale_date <= week_end)
-                ).all()
-                
-                if week_sales:
-                    week_revenue = sum(self._decimal(sale.sale_price) for sale in week_sales)
-                    week_cost = sum(self._decimal(sale.car.total_investment) for sale in week_sales)
-                    week_profit = week_revenue - week_cost
-                    week_margin = (week_profit / week_revenue * 100) if week_revenue > 0 else 0
-                    week_roi = (week_profit / week_cost * 100) if week_cost > 0 else 0
-                else:
-                    week_margin = 0
-                    week_roi = 0
-                    
-                result.append({
-                    "label": f"{week_start.strftime('%b %d')} - {week_end.strftime('%b %d')}",
-                    "margin": week_margin,
-                    "roi": week_roi
-                })
+                buckets.append((f"{week_start.strftime('%b %d')} - {week_end.strftime('%b %d')}", week_start, week_end))
                 
         elif timeframe in ["year_to_date", "last_year"]:
             # Monthly data for the year
@@ -414,35 +354,12 @@ class ProfitMarginReport(Report):
                 
             for month in range(1, 13):
                 month_start = date(year, month, 1)
-                # Handle December as a special case
-                if month == 12:
-                    month_end = date(year, month, 31)
-                else:
-                    month_end = date(year, month + 1, 1) - timedelta(days=1)
+                month_end = month_start + relativedelta(months=1) - timedelta(days=1)
                     
                 # Skip future months in year_to_date mode
                 if timeframe == "year_to_date" and month_start > today:
                     continue
-                    
-                month_sales = base_query.filter(
-                    and_(Sale.sale_date >= month_start, Sale.sale_date <= month_end)
-                ).all()
-                
-                if month_sales:
-                    month_revenue = sum(self._decimal(sale.sale_price) for sale in month_sales)
-                    month_cost = sum(self._decimal(sale.car.total_investment) for sale in month_sales)
-                    month_profit = month_revenue - month_cost
-                    month_margin = (month_profit / month_revenue * 100) if month_revenue > 0 else 0
-                    month_roi = (month_profit / month_cost * 100) if month_cost > 0 else 0
-                else:
-                    month_margin = 0
-                    month_roi = 0
-                    
-                result.append({
-                    "label": month_start.strftime("%b %Y"),
-                    "margin": month_margin,
-                    "roi": month_roi
-                })
+                buckets.append((month_start.strftime("%b %Y"), month_start, month_end))
                 
         elif timeframe == "all_time":
             # Yearly data for all time
@@ -452,31 +369,38 @@ class ProfitMarginReport(Report):
             
             for year_row in sales_years:
                 year = int(year_row[0])
-                year_start = date(year, 1, 1)
-                year_end = date(year, 12, 31)
-                
-                year_sales = base_query.filter(
-                    and_(Sale.sale_date >= year_start, Sale.sale_date <= year_end)
-                ).all()
-                
-                if year_sales:
-                    year_revenue = sum(self._decimal(sale.sale_price) for sale in year_sales)
-                    year_cost = sum(self._decimal(sale.car.total_investment) for sale in year_sales)
-                    year_profit = year_revenue - year_cost
-                    year_margin = (year_profit / year_revenue * 100) if year_revenue > 0 else 0
-                    year_roi = (year_profit / year_cost * 100) if year_cost > 0 else 0
-                else:
-                    year_margin = 0
-                    year_roi = 0
-                    
-                result.append({
-                    "label": str(year),
-                    "margin": year_margin,
-                    "roi": year_roi
-                })
-                
+                buckets.append((str(year), date(year, 1, 1), date(year, 12, 31)))
+        
+        # Closed days, weeks and months are reused until a write touches them
+        totals = get_bucket_totals(
+            'profit_margin', (stand_id, dealer_id),
+            [(first, last) for _, first, last in buckets],
+            lambda first, last: self._get_trend_rows(first, last, stand_id, dealer_id)
+        )
+        
+        result = []
+        for (label, _, _), bucket in zip(buckets, totals):
+            result.append({
+                "label": label,
+                "margin": (bucket.profit / bucket.revenue * 100) if bucket.revenue > 0 else 0,
+                "roi": (bucket.profit / bucket.cost * 100) if bucket.cost > 0 else 0
+            })
         return result
     
+    def _get_trend_rows(self, first, last, stand_id=None, dealer_id=None):
+        """Load (sale date, revenue, cost) rows for the margin trend between two days"""
+        query = with_loader_profile(Sale.query.join(Car), 'sale_with_joined_car_costs').filter(
+            Sale.sale_date.between(first, last)
+        )
+        if stand_id:
+            query = query.filter(Car.stand_id == stand_id)
+        if dealer_id:
+            query = query.filter(Sale.dealer_id == dealer_id)
+        return [
+            (sale.sale_date, self._decimal(sale.sale_price), self._decimal(sale.car.total_investment))
+            for sale in query.all()
+        ]
+    
     def _get_top_models(self, sales):
         """Find top performing car models by profit margin"""
         models = {}
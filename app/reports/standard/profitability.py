@@ -1,10 +1,35 @@
-from app.reports.base import Report
-from app.models import Car, Sale, Stand, Dealer
+from app.reports.base import Report, Projection
+from app.models import Car, Sale, Stand, Dealer, Repair
+from app import db
 from sqlalchemy import func, and_, extract
 from datetime import datetime, timedelta, date
 from dateutil.relativedelta import relativedelta
 import decimal
 
+# Total repair cost per car, joined once instead of loading Car.repairs per sale
+REPAIR_TOTALS = db.select(
+    Repair.car_id,
+    func.sum(Repair.repair_cost).label('repair_cost')
+).group_by(Repair.car_id).subquery()
+
+# Columns read for each sold car in the profitability detail table
+SALE_PROFIT_ROW = Projection(
+    'SaleProfitRow',
+    car_id=Car.car_id,
+    vehicle_make=Car.vehicle_make,
+    vehicle_model=Car.vehicle_model,
+    year=Car.year,
+    colour=Car.colour,
+    licence_number=Car.licence_number,
+    purchase_price=Car.purchase_price,
+    refuel_cost=Car.refuel_cost,
+    repair_cost=REPAIR_TOTALS.c.repair_cost,
+    stand_name=Stand.stand_name,
+    sale_price=Sale.sale_price,
+    sale_date=Sale.sale_date,
+    dealer_name=Dealer.dealer_name
+)
+
 class ProfitabilityReport(Report):
     """
     Detailed report showing investment vs profit per car, including:
@@ -58,6 +83,10 @@ class ProfitabilityReport(Report):
             "default": None
         }
     }
+    deferred_sections = {
+        "model_profitability": "_get_model_profitability_section",
+        "cars_data": "_get_cars_data_section"
+    }
 
     def __init__(self, timeframe=None, start_date=None, end_date=None, stand_id=None, dealer_id=None, 
                  vehicle_make=None, vehicle_model=None):
@@ -74,30 +103,13 @@ class ProfitabilityReport(Report):
         # Apply date filter based on timeframe
         date_filter = self._get_date_filter()
         
-        # Get all sales in the specified timeframe with applied filters
-        sales_query = Sale.query.join(Car)
-        
-        if date_filter is not None:
-            sales_query = sales_query.filter(date_filter)
-            
-        if self.stand_id:
-            sales_query = sales_query.filter(Car.stand_id == self.stand_id)
-            
-        if self.dealer_id:
-            sales_query = sales_query.filter(Sale.dealer_id == self.dealer_id)
-            
-        if self.vehicle_make:
-            sales_query = sales_query.filter(Car.vehicle_make == self.vehicle_make)
-            
-        if self.vehicle_model:
-            sales_query = sales_query.filter(Car.vehicle_model == self.vehicle_model)
-            
-        sales = sales_query.all()
+        # Per-car investment, profit and ROI, computed once from a single projected query
+        cars_data = self._get_cars_profitability_data(self._get_sale_rows(date_filter))
         
         # Calculate summary metrics
-        total_cars_sold = len(sales)
-        total_revenue = sum(self._decimal(sale.sale_price) for sale in sales)
-        total_investment = sum(self._decimal(sale.car.total_investment) for sale in sales)
+        total_cars_sold = len(cars_data)
+        total_revenue = sum((car["sale_price"] for car in cars_data), decimal.Decimal('0.00'))
+        total_investment = sum((car["total_investment"] for car in cars_data), decimal.Decimal('0.00'))
         total_profit = total_revenue - total_investment
         
         average_revenue = total_revenue / total_cars_sold if total_cars_sold > 0 else decimal.Decimal('0.00')
@@ -105,14 +117,13 @@ class ProfitabilityReport(Report):
         average_profit = total_profit / total_cars_sold if total_cars_sold > 0 else decimal.Decimal('0.00')
         average_roi = (total_profit / total_investment * 100) if total_investment > 0 else decimal.Decimal('0.00')
         
-        # Get cars with detailed investment and profit data
-        cars_data = self._get_cars_profitability_data(sales)
-        
-        # Get profitability by make/model with drilldown
-        model_profitability = self._get_model_profitability(sales)
+        # Get profitability by make/model with drilldown, unless the page loads it later
+        model_profitability = None
+        if not self.is_deferred("model_profitability"):
+            model_profitability = self._get_model_profitability(cars_data)
         
         # Get ROI distribution for color bands
-        roi_distribution = self._get_roi_distribution(sales)
+        roi_distribution = self._get_roi_distribution(cars_data)
         
         # Get available filters (makes, models, dealers, stands)
         makes_models = self._get_available_makes_models()
@@ -136,7 +147,7 @@ class ProfitabilityReport(Report):
             "average_investment": average_investment,
             "average_profit": average_profit,
             "average_roi": average_roi,
-            "cars_data": cars_data,
+            "cars_data": None if self.is_deferred("cars_data") else cars_data,
             "model_profitability": model_profitability,
             "roi_distribution": roi_distribution,
             "available_makes_models": makes_models,
@@ -186,20 +197,59 @@ class ProfitabilityReport(Report):
             
         return None
 
-    def _get_cars_profitability_data(self, sales):
+    def _apply_filters(self, query, date_filter):
+        """Apply the report's timeframe, stand, dealer and make/model filters to a sales query"""
+        if date_filter is not None:
+            query = query.filter(date_filter)
+            
+        if self.stand_id:
+            query = query.filter(Car.stand_id == self.stand_id)
+            
+        if self.dealer_id:
+            query = query.filter(Sale.dealer_id == self.dealer_id)
+            
+        if self.vehicle_make:
+            query = query.filter(Car.vehicle_make == self.vehicle_make)
+            
+        if self.vehicle_model:
+            query = query.filter(Car.vehicle_model == self.vehicle_model)
+            
+        return query
+    
+    def _get_sale_rows(self, date_filter):
+        """Get the filtered sales as SaleProfitRow tuples (sale, car cost, stand and dealer columns)"""
+        query = SALE_PROFIT_ROW.query().select_from(Sale).join(
+            Car, Sale.car_id == Car.car_id
+        ).outerjoin(
+            Stand, Car.stand_id == Stand.stand_id
+        ).outerjoin(
+            Dealer, Sale.dealer_id == Dealer.dealer_id
+        ).outerjoin(
+            REPAIR_TOTALS, REPAIR_TOTALS.c.car_id == Car.car_id
+        )
+        
+        return SALE_PROFIT_ROW.rows(self._apply_filters(query, date_filter))
+
+    def _get_cars_data_section(self):
+        """Build the per-car table on its own for deferred loading"""
+        return self._get_cars_profitability_data(self._get_sale_rows(self._get_date_filter()))
+    
+    def _get_model_profitability_section(self):
+        """Build the make/model drilldown on its own for deferred loading"""
+        return self._get_model_profitability(self._get_cars_data_section())
+
+    def _get_cars_profitability_data(self, rows):
         """Get detailed profitability data for each car"""
         cars_data = []
         
-        for sale in sales:
-            car = sale.car
-            
+        for row in rows:
             # Get all cost components
-            purchase_price = self._decimal(car.purchase_price)
-            repair_cost = self._decimal(car.total_repair_cost)
-            refuel_cost = self._decimal(car.refuel_cost)
+            purchase_price = self._decimal(row.purchase_price)
+            repair_cost = self._decimal(row.repair_cost)
+            refuel_cost = self._decimal(row.refuel_cost)
             total_investment = purchase_price + repair_cost + refuel_cost
             
-            sale_price = self._decimal(sale.sale_price)
+            sale_price = self._decimal(row.sale_price)
             profit = sale_price - total_investment
             roi = (profit / total_investment * 100) if total_investment > 0 else decimal.Decimal('0.00')
             
@@ -207,13 +257,13 @@ class ProfitabilityReport(Report):
             roi_band = self._get_roi_band(roi)
             
             cars_data.append({
-                "car_id": car.car_id,
-                "make": car.vehicle_make,
-                "model": car.vehicle_model,
-                "year": car.year,
-                "color": car.colour,
-                "vin": car.licence_number,
-                "stand_name": car.stand.stand_name if car.stand else "Unknown",
+                "car_id": row.car_id,
+                "make": row.vehicle_make,
+                "model": row.vehicle_model,
+                "year": row.year,
+                "color": row.colour,
+                "vin": row.licence_number,
+                "stand_name": row.stand_name or "Unknown",
                 "purchase_price": purchase_price,
                 "repair_cost": repair_cost,
                 "refuel_cost": refuel_cost,
@@ -222,52 +272,22 @@ class ProfitabilityReport(Report):
                 "profit": profit,
                 "roi": roi,
                 "roi_band": roi_band,
-                "sale_date": sale.sale_date.strftime("%Y-%m-%d") if sale.sale_date else "Unknown",
-                "dealer_name": sale.dealer.dealer_name if sale.dealer else "Unknown"
+                "sale_date": row.sale_date.strftime("%Y-%m-%d") if row.sale_date else "Unknown",
+                "dealer_name": row.dealer_name or "Unknown"
             })
         
         # Sort by ROI (highest to lowest)
         return sorted(cars_data, key=lambda x: x["roi"], reverse=True)
     
-    def _get_model_profitability(self, sales):
+    def _get_model_profitability(self, cars_data):
         """Calculate profitability metrics grouped by make/model with drilldown to individual cars"""
         make_models = {}
         
-        for sale in sales:
-            car = sale.car
-            make = car.vehicle_make
-            model = car.vehicle_model
+        for car_detail in cars_data:
+            make = car_detail["make"]
+            model = car_detail["model"]
             make_model_key = f"{make}_{model}"
             
-            # Purchase, repair, and refuel costs
-            purchase_price = self._decimal(car.purchase_price)
-            repair_cost = self._decimal(car.total_repair_cost)
-            refuel_cost = self._decimal(car.refuel_cost)
-            total_investment = purchase_price + repair_cost + refuel_cost
-            
-            sale_price = self._decimal(sale.sale_price)
-            profit = sale_price - total_investment
-            roi = (profit / total_investment * 100) if total_investment > 0 else decimal.Decimal('0.00')
-            
-            # Create car detail record for drilldown
-            car_detail = {
-                "car_id": car.car_id,
-                "year": car.year,
-                "color": car.colour,
-                "vin": car.licence_number,
-                "stand_name": car.stand.stand_name if car.stand else "Unknown",
-                "purchase_price": purchase_price,
-                "repair_cost": repair_cost,
-                "refuel_cost": refuel_cost,
-                "total_investment": total_investment,
-                "sale_price": sale_price,
-                "profit": profit,
-                "roi": roi,
-                "roi_band": self._get_roi_band(roi),
-                "sale_date": sale.sale_date.strftime("%Y-%m-%d") if sale.sale_date else "Unknown",
-                "dealer_name": sale.dealer.dealer_name if sale.dealer else "Unknown"
-            }
-            
             # Add to make/model group
             if make_model_key not in make_models:
                 make_models[make_model_key] = {
@@ -285,12 +305,12 @@ class ProfitabilityReport(Report):
             
             # Update make/model group with this car's data
             make_models[make_model_key]["count"] += 1
-            make_models[make_model_key]["total_purchase"] += purchase_price
-            make_models[make_model_key]["total_repair"] += repair_cost
-            make_models[make_model_key]["total_refuel"] += refuel_cost
-            make_models[make_model_key]["total_investment"] += total_investment
-            make_models[make_model_key]["total_revenue"] += sale_price
-            make_models[make_model_key]["total_profit"] += profit
+            make_models[make_model_key]["total_purchase"] += car_detail["purchase_price"]
+            make_models[make_model_key]["total_repair"] += car_detail["repair_cost"]
+            make_models[make_model_key]["total_refuel"] += car_detail["refuel_cost"]
+            make_models[make_model_key]["total_investment"] += car_detail["total_investment"]
+            make_models[make_model_key]["total_revenue"] += car_detail["sale_price"]
+            make_models[make_model_key]["total_profit"] += car_detail["profit"]
             make_models[make_model_key]["cars"].append(car_detail)
         
         # Calculate averages and ROI for each make/model
@@ -305,7 +325,7 @@ class ProfitabilityReport(Report):
             make_model["roi"] = (make_model["total_profit"] / make_model["total_investment"] * 100) if make_model["total_investment"] > 0 else decimal.Decimal('0.00')
             make_model["roi_band"] = self._get_roi_band(make_model["roi"])
         
-        # Sort by ROI (highest to lowest)
+        # Sort by ROI (highest to lowest); each drilldown keeps the cars' ROI order
         return sorted(make_models.values(), key=lambda x: x["roi"], reverse=True)
     
     def _get_roi_band(self, roi):
@@ -317,7 +337,7 @@ class ProfitabilityReport(Report):
         else:
             return "low"
     
-    def _get_roi_distribution(self, sales):
+    def _get_roi_distribution(self, cars_data):
         """Calculate ROI distribution for color bands"""
         distribution = {
             "high": 0,
@@ -325,21 +345,12 @@ class ProfitabilityReport(Report):
             "low": 0
         }
         
-        for sale in sales:
-            car = sale.car
-            
-            # Calculate ROI
-            total_investment = self._decimal(car.total_investment)
-            sale_price = self._decimal(sale.sale_price)
-            profit = sale_price - total_investment
-            roi = (profit / total_investment * 100) if total_investment > 0 else decimal.Decimal('0.00')
-            
-            # Increment appropriate band counter
-            roi_band = self._get_roi_band(roi)
-            distribution[roi_band] += 1
+        # Count the bands already assigned to each car
+        for car in cars_data:
+            distribution[car["roi_band"]] += 1
         
         # Calculate percentages
-        total = len(sales)
+        total = len(cars_data)
         if total > 0:
             # Use a list of the original keys to avoid modifying during iteration
             for band in list(distribution.keys()):
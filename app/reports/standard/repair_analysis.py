@@ -1,10 +1,15 @@
-from app.reports.base import Report
+from app.reports.base import Report, days_between
+from app import db
 from app.models import Repair, RepairProvider, Car
 from sqlalchemy import func, extract
 from datetime import datetime, date, timedelta
 import decimal
 import calendar
 
+# Stored repair duration, computed from the dates for rows it has not been
+# filled in for yet (written by raw SQL or before the backfill reached them)
+REPAIR_DAYS = func.coalesce(Repair.duration_days, days_between(Repair.start_date, Repair.end_date))
+
 class RepairAnalysisReport(Report):
     """
     Report showing repair costs by type and provider, repair duration,
@@ -49,44 +54,31 @@ class RepairAnalysisReport(Report):
         self.months = [calendar.month_name[i] for i in range(1, 13)]
         
     def generate(self):
-        # Base query for repairs
-        base_query = Repair.query
-        
-        # Apply filters
-        if self.start_date and self.end_date:
-            base_query = base_query.filter(Repair.start_date >= self.start_date, Repair.start_date <= self.end_date)
-        elif self.year:
-            base_query = base_query.filter(extract('year', Repair.start_date) == self.year)
-            
-        if self.provider_id:
-            base_query = base_query.filter(Repair.provider_id == self.provider_id)
-            
-        if self.repair_type:
-            base_query = base_query.filter(Repair.repair_type == self.repair_type)
-        
-        # Get all repairs matching the filters
-        repairs = base_query.all()
-        
-        # Calculate total metrics
-        total_repairs = len(repairs)
-        total_cost = sum(self._decimal(repair.repair_cost) for repair in repairs)
+        # Totals across all repairs matching the filters
+        total_repairs, total_cost, average_duration = self._apply_filters(db.session.query(
+            func.count(Repair.repair_id),
+            func.sum(Repair.repair_cost),
+            func.avg(REPAIR_DAYS)
+        )).one()
+        total_cost = self._decimal(total_cost)
         average_cost = total_cost / total_repairs if total_repairs > 0 else decimal.Decimal('0.00')
+        average_duration = average_duration or 0
         
-        # Calculate average repair duration
-        durations = [repair.duration for repair in repairs if repair.duration is not None]
-        average_duration = sum(durations) / len(durations) if durations else 0
+        # Per-type and per-provider totals feed both the cost and duration breakdowns
+        type_totals = self._get_type_totals()
+        provider_totals = self._get_provider_totals()
         
         # Calculate repair costs by type
-        repair_costs_by_type = self._get_repair_costs_by_type(repairs)
+        repair_costs_by_type = self._get_repair_costs_by_type(type_totals)
         
         # Calculate repair costs by provider
-        repair_costs_by_provider = self._get_repair_costs_by_provider(repairs)
+        repair_costs_by_provider = self._get_repair_costs_by_provider(provider_totals)
         
         # Calculate average repair duration by type
-        repair_duration_by_type = self._get_repair_duration_by_type(repairs)
+        repair_duration_by_type = self._get_repair_duration_by_type(type_totals)
         
         # Calculate average repair duration by provider
-        repair_duration_by_provider = self._get_repair_duration_by_provider(repairs)
+        repair_duration_by_provider = self._get_repair_duration_by_provider(provider_totals)
         
         # Calculate monthly costs
         monthly_costs = self._get_monthly_costs(self.year, self.start_date, self.end_date)
@@ -129,217 +121,190 @@ class RepairAnalysisReport(Report):
             }
         }
     
+    def _apply_filters(self, query):
+        """Restrict a query over repairs to the report's period, provider and type"""
+        if self.start_date and self.end_date:
+            query = query.filter(Repair.start_date >= self.start_date, Repair.start_date <= self.end_date)
+        elif self.year:
+            query = query.filter(extract('year', Repair.start_date) == self.year)
+            
+        if self.provider_id:
+            query = query.filter(Repair.provider_id == self.provider_id)
+            
+        if self.repair_type:
+            query = query.filter(Repair.repair_type == self.repair_type)
+        
+        return query
+    
     def _decimal(self, value):
         """Convert a value to Decimal safely"""
         if isinstance(value, decimal.Decimal):
             return value
         return decimal.Decimal(str(value)) if value is not None else decimal.Decimal('0.00')
     
-    def _get_repair_costs_by_type(self, repairs):
+    def _get_type_totals(self):
+        """Aggregate repair count, cost and duration per repair type in one query"""
+        return self._apply_filters(db.session.query(
+            Repair.repair_type,
+            func.count(Repair.repair_id),
+            func.sum(Repair.repair_cost),
+            func.sum(REPAIR_DAYS),
+            func.count(REPAIR_DAYS)
+        )).group_by(Repair.repair_type).all()
+    
+    def _get_provider_totals(self):
+        """Aggregate repair count, cost and duration per provider in one query"""
+        return self._apply_filters(db.session.query(
+            Repair.provider_id,
+            RepairProvider.provider_name,
+            func.count(Repair.repair_id),
+            func.sum(Repair.repair_cost),
+            func.sum(REPAIR_DAYS),
+            func.count(REPAIR_DAYS)
+        )).outerjoin(
+            RepairProvider, RepairProvider.provider_id == Repair.provider_id
+        ).group_by(Repair.provider_id, RepairProvider.provider_name).all()
+    
+    def _get_repair_costs_by_type(self, type_totals):
         """Calculate repair costs grouped by type"""
-        repair_types = {}
+        repair_types = []
         
-        for repair in repairs:
-            repair_type = repair.repair_type
-            cost = self._decimal(repair.repair_cost)
-            
-            if repair_type not in repair_types:
-                repair_types[repair_type] = {
-                    "type": repair_type,
-                    "count": 0,
-                    "total_cost": decimal.Decimal('0.00')
-                }
-                
-            repair_types[repair_type]["count"] += 1
-            repair_types[repair_type]["total_cost"] += cost
-            
-        # Calculate average costs
-        for repair_type in repair_types.values():
-            repair_type["average_cost"] = repair_type["total_cost"] / repair_type["count"]
+        for repair_type, count, total_cost, _, _ in type_totals:
+            total_cost = self._decimal(total_cost)
+            repair_types.append({
+                "type": repair_type,
+                "count": count,
+                "total_cost": total_cost,
+                "average_cost": total_cost / count
+            })
             
         # Sort by total cost descending
         return sorted(
-            repair_types.values(),
+            repair_types,
             key=lambda x: x["total_cost"],
             reverse=True
         )
     
-    def _get_repair_costs_by_provider(self, repairs):
+    def _get_repair_costs_by_provider(self, provider_totals):
         """Calculate repair costs grouped by provider"""
-        providers = {}
+        providers = []
         
-        for repair in repairs:
-            provider_id = repair.provider_id
-            provider = RepairProvider.query.get(provider_id)
-            
-            if provider_id not in providers:
-                providers[provider_id] = {
-                    "provider_id": provider_id,
-                    "provider_name": provider.provider_name if provider else "Unknown",
-                    "name": provider.provider_name if provider else "Unknown",  # For template compatibility
-                    "count": 0,
-                    "total_cost": decimal.Decimal('0.00')
-                }
-                
-            providers[provider_id]["count"] += 1
-            providers[provider_id]["total_cost"] += self._decimal(repair.repair_cost)
-            
-        # Calculate average cost
-        for provider in providers.values():
-            provider["average_cost"] = provider["total_cost"] / provider["count"] if provider["count"] > 0 else 0
+        for provider_id, provider_name, count, total_cost, _, _ in provider_totals:
+            total_cost = self._decimal(total_cost)
+            providers.append({
+                "provider_id": provider_id,
+                "provider_name": provider_name or "Unknown",
+                "name": provider_name or "Unknown",  # For template compatibility
+                "count": count,
+                "total_cost": total_cost,
+                "average_cost": total_cost / count
+            })
             
         # Return as list sorted by count (descending)
         return sorted(
-            providers.values(),
+            providers,
             key=lambda x: x["count"],
             reverse=True
         )
     
-    def _get_repair_duration_by_type(self, repairs):
+    def _get_repair_duration_by_type(self, type_totals):
         """Compute average repair duration by type"""
-        repair_types = {}
-        
-        for repair in repairs:
-            if repair.duration is None:
-                continue
-                
-            repair_type = repair.repair_type
-            
-            if repair_type not in repair_types:
-                repair_types[repair_type] = {
-                    "type": repair_type,
-                    "total_duration": 0,
-                    "count": 0
-                }
-                
-            repair_types[repair_type]["total_duration"] += repair.duration
-            repair_types[repair_type]["count"] += 1
-            
-        # Calculate average duration
-        for repair_type in repair_types.values():
-            repair_type["average_duration"] = repair_type["total_duration"] / repair_type["count"]
+        repair_types = [{
+            "type": repair_type,
+            "total_duration": int(total_duration),
+            "count": completed,
+            "average_duration": int(total_duration) / completed
+        } for repair_type, _, _, total_duration, completed in type_totals if completed]
             
         # Sort by average duration descending
         return sorted(
-            repair_types.values(),
+            repair_types,
             key=lambda x: x["average_duration"],
             reverse=True
         )
     
-    def _get_repair_duration_by_provider(self, repairs):
+    def _get_repair_duration_by_provider(self, provider_totals):
         """Compute average repair duration by provider"""
-        providers = {}
-        
-        for repair in repairs:
-            if repair.duration is None:
-                continue
-                
-            provider_id = repair.provider_id
-            provider = RepairProvider.query.get(provider_id)
-            
-            if provider_id not in providers:
-                providers[provider_id] = {
-                    "provider_id": provider_id,
-                    "provider_name": provider.provider_name if provider else "Unknown",
-                    "name": provider.provider_name if provider else "Unknown",  # For template compatibility
-                    "total_duration": 0,
-                    "count": 0
-                }
-                
-            providers[provider_id]["total_duration"] += repair.duration
-            providers[provider_id]["count"] += 1
-            
-        # Calculate average duration
-        for provider in providers.values():
-            provider["average_duration"] = provider["total_duration"] / provider["count"] if provider["count"] > 0 else 0
+        providers = [{
+            "provider_id": provider_id,
+            "provider_name": provider_name or "Unknown",
+            "name": provider_name or "Unknown",  # For template compatibility
+            "total_duration": int(total_duration),
+            "count": completed,
+            "average_duration": int(total_duration) / completed
+        } for provider_id, provider_name, _, _, total_duration, completed in provider_totals if completed]
             
         # Sort by average duration (ascending is better)
         return sorted(
-            providers.values(),
+            providers,
             key=lambda x: x["average_duration"]
         )
     
     def _get_monthly_costs(self, year=None, start_date=None, end_date=None):
         """Get repair costs by month for the specified period"""
-        monthly_data = []
-        
-        # If specific date range is provided
         if start_date and end_date:
-            # Create a list of month/year combinations in the date range
+            # Every month touched by the date range
+            months = []
             current_date = start_date.replace(day=1)
             end_of_range = end_date.replace(day=1)
-            
             while current_date <= end_of_range:
-                current_month = current_date.month
-                current_year = current_date.year
-                
-                # Query for repairs in this month/year
-                month_repairs = Repair.query.filter(
-                    extract('year', Repair.start_date) == current_year,
-                    extract('month', Repair.start_date) == current_month
-                )
-                
-                # Apply other filters if they exist
-                if self.provider_id:
-                    month_repairs = month_repairs.filter(Repair.provider_id == self.provider_id)
-                if self.repair_type:
-                    month_repairs = month_repairs.filter(Repair.repair_type == self.repair_type)
-                    
-                # Get all repairs for this month
-                month_repairs = month_repairs.all()
-                
-                # Calculate totals for this month
-                month_count = len(month_repairs)
-                month_total_cost = sum(self._decimal(repair.repair_cost) for repair in month_repairs)
-                month_average_cost = month_total_cost / month_count if month_count > 0 else decimal.Decimal('0.00')
-                
-                monthly_data.append({
-                    "month": current_month,
-                    "year": current_year,
-                    "name": f"{calendar.month_name[current_month]} {current_year}",
-                    "month_name": calendar.month_name[current_month],
-                    "count": month_count,
-                    "total_cost": month_total_cost,
-                    "average_cost": month_average_cost
-                })
-                
-                # Move to next month
-                if current_month == 12:
-                    current_date = current_date.replace(year=current_year + 1, month=1)
+                months.append((current_date.year, current_date.month))
+                if current_date.month == 12:
+                    current_date = current_date.replace(year=current_date.year + 1, month=1)
                 else:
-                    current_date = current_date.replace(month=current_month + 1)
-        
-        # If only year is specified
+                    current_date = current_date.replace(month=current_date.month + 1)
         elif year:
-            for month in range(1, 13):
-                # Query for repairs in this month/year
-                month_repairs = Repair.query.filter(
-                    extract('year', Repair.start_date) == year,
-                    extract('month', Repair.start_date) == month
-                )
-                
-                # Apply other filters if they exist
-                if self.provider_id:
-                    month_repairs = month_repairs.filter(Repair.provider_id == self.provider_id)
-                if self.repair_type:
-                    month_repairs = month_repairs.filter(Repair.repair_type == self.repair_type)
-                    
-                # Get all repairs for this month
-                month_repairs = month_repairs.all()
-                
-                # Calculate totals for this month
-                month_count = len(month_repairs)
-                month_total_cost = sum(self._decimal(repair.repair_cost) for repair in month_repairs)
-                month_average_cost = month_total_cost / month_count if month_count > 0 else decimal.Decimal('0.00')
-                
-                monthly_data.append({
-                    "month": month,
-                    "year": year,
-                    "name": calendar.month_name[month],
-                    "month_name": calendar.month_name[month],
-                    "count": month_count,
-                    "total_cost": month_total_cost,
-                    "average_cost": month_average_cost
-                })
+            months = [(year, month) for month in range(1, 13)]
+        else:
+            return []
+        
+        # An inverted date range has no months
+        if not months:
+            return []
+        
+        # One grouped query covers every month; months without repairs are zero-filled
+        repair_year = extract('year', Repair.start_date)
+        repair_month = extract('month', Repair.start_date)
+        query = db.session.query(
+            repair_year,
+            repair_month,
+            func.count(Repair.repair_id),
+            func.sum(Repair.repair_cost),
+            func.avg(REPAIR_DAYS)
+        ).filter(
+            Repair.start_date >= date(*months[0], 1),
+            Repair.start_date < self._month_after(*months[-1])
+        )
+        if self.provider_id:
+            query = query.filter(Repair.provider_id == self.provider_id)
+        if self.repair_type:
+            query = query.filter(Repair.repair_type == self.repair_type)
+        totals = {
+            (int(row_year), int(row_month)): (count, self._decimal(total_cost), average_duration)
+            for row_year, row_month, count, total_cost, average_duration
+            in query.group_by(repair_year, repair_month)
+        }
+        
+        monthly_data = []
+        for month_year, month in months:
+            month_count, month_total_cost, month_duration = totals.get(
+                (month_year, month), (0, decimal.Decimal('0.00'), None)
+            )
+            month_average_cost = month_total_cost / month_count if month_count > 0 else decimal.Decimal('0.00')
             
-        return monthly_data 
\ No newline at end of file
+            monthly_data.append({
+                "month": month,
+                "year": month_year,
+                "name": f"{calendar.month_name[month]} {month_year}" if start_date and end_date else calendar.month_name[month],
+                "month_name": calendar.month_name[month],
+                "count": month_count,
+                "total_cost": month_total_cost,
+                "average_cost": month_average_cost,
+                "average_duration": float(month_duration) if month_duration is not None else 0
+            })
+            
+        return monthly_data
+    
+    def _month_after(self, year, month):
+        """First day of the month following the given one"""
+        return date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
@@ -1,5 +1,7 @@
 from app.reports.base import Report
 from app.models import Sale, Dealer, Car, Stand
+from app.utils.loaders import with_loader_profile
+from app.utils.report_buckets import get_bucket_totals
 from sqlalchemy import func, extract, and_, event
 from datetime import datetime, timedelta, date
 import decimal
@@ -49,6 +51,9 @@ class SalesPerformanceReport(Report):
             "required": False
         }
     }
+    deferred_sections = {
+        "top_models": "_get_top_models"
+    }
 
     def __init__(self, period=None, year=None, start_date=None, end_date=None, 
                  vehicle_make=None, vehicle_model=None, stand_ids=None):
@@ -88,20 +93,29 @@ class SalesPerformanceReport(Report):
         except Exception as e:
             print(f"Error checking for duplicate sales: {e}")
         
+        # Load every car's sale dates in one query instead of one query per car
+        # (most recent first, matching the duplicate cleanup above)
+        sale_dates_by_car = {}
+        sale_rows = db.session.query(Sale.car_id, Sale.sale_date).order_by(
+            Sale.car_id, Sale.sale_date.desc()
+        ).all()
+        for car_id, sale_date in sale_rows:
+            sale_dates_by_car.setdefault(car_id, []).append(sale_date)
+        
         # Now check for Car/Sale inconsistencies one by one
         for car in Car.query.all():
             # Get all sales for this car (should be at most one after our cleanup)
-            sales = Sale.query.filter_by(car_id=car.car_id).all()
+            sales = sale_dates_by_car.get(car.car_id, [])
             has_sale = len(sales) > 0
             
             if has_sale and car.date_sold is None:
                 # Car has a sale record but date_sold is None
-                car.date_sold = sales[0].sale_date  # Use the first sale (should be only one)
+                car.date_sold = sales[0]  # Use the first sale (should be only one)
                 inconsistencies += 1
                 
-            elif has_sale and car.date_sold != sales[0].sale_date:
+            elif has_sale and car.date_sold != sales[0]:
                 # Car's date_sold doesn't match sale date
-                car.date_sold = sales[0].sale_date
+                car.date_sold = sales[0]
                 inconsistencies += 1
                 
             elif car.date_sold is not None and not has_sale:
@@ -124,7 +138,7 @@ class SalesPerformanceReport(Report):
         periods, period_labels = self._get_period_definitions()
         
         # Get all sales with filtering
-        sales_query = Sale.query.join(Car)
+        sales_query = with_loader_profile(Sale.query.join(Car), 'sale_with_joined_car_costs')
         
         # Apply date filtering
         if self.start_date and self.end_date:
@@ -190,8 +204,8 @@ class SalesPerformanceReport(Report):
         # Get year-over-year comparison
         previous_year_comparison = self._get_previous_year_comparison()
         
-        # Get top 5 most sold car models
-        top_models = self._get_top_models()
+        # Get top 5 most sold car models, unless the page loads them later
+        top_models = None if self.is_deferred("top_models") else self._get_top_models()
         
         # Get vehicle makes for filter options
         vehicle_makes = Car.query.with_entities(Car.vehicle_make).distinct().all()
@@ -308,42 +322,26 @@ class SalesPerformanceReport(Report):
         """Calculate sales metrics for each defined period"""
         result = []
         
+        buckets = []
         for period in periods:
-            # Build filter for this period
-            date_filter = extract('year', Sale.sale_date) == self.year
-            
             if self.start_date and self.end_date:
                 # Use custom date range if provided
-                start_date = self.start_date
-                end_date = self.end_date
-                date_filter = Sale.sale_date.between(start_date, end_date)
+                buckets.append((self.start_date, self.end_date))
             else:
                 # Otherwise use period definition
-                date_filter = and_(
-                    extract('year', Sale.sale_date) == self.year,
-                    extract('month', Sale.sale_date) >= period["start_month"],
-                    extract('month', Sale.sale_date) <= period["end_month"]
-                )
-            
-            # Start query with date filter
-            period_query = Sale.query.join(Car).filter(date_filter)
-            
-            # Apply additional filters
-            if self.vehicle_make:
-                period_query = period_query.filter(Car.vehicle_make == self.vehicle_make)
-            if self.vehicle_model:
-                period_query = period_query.filter(Car.vehicle_model == self.vehicle_model)
-            if self.stand_ids:
-                period_query = period_query.filter(Car.stand_id.in_(self.stand_ids))
-                
-            # Get filtered sales
-            period_sales = period_query.all()
-            
+                last_day = calendar.monthrange(self.year, period["end_month"])[1]
+                buckets.append((date(self.year, period["start_month"], 1),
+                                date(self.year, period["end_month"], last_day)))
+        
+        # Closed months and quarters are reused until a write touches them
+        filters = (self.vehicle_make, self.vehicle_model, tuple(sorted(self.stand_ids)))
+        totals = get_bucket_totals('sales_performance', filters, buckets, self._get_period_rows)
+        
+        for period, bucket in zip(periods, totals):
             # Calculate metrics
-            count = len(period_sales)
-            revenue = sum(self._decimal(sale.sale_price) for sale in period_sales)
-            cost = sum(self._decimal(sale.car.total_investment) if sale.car is not None else decimal.Decimal('0.00')
-                      for sale in period_sales)
+            count = bucket.count
+            revenue = bucket.revenue
+            cost = bucket.cost
             profit = revenue - cost
             margin = (profit / revenue * 100) if revenue > 0 else decimal.Decimal('0.00')
             avg_price = revenue / count if count > 0 else decimal.Decimal('0.00')
@@ -383,6 +381,26 @@ class SalesPerformanceReport(Report):
             
         return result
     
+    def _get_period_rows(self, first, last):
+        """Load (sale date, revenue, cost) rows for the period breakdown between two days"""
+        period_query = with_loader_profile(Sale.query.join(Car), 'sale_with_joined_car_costs').filter(
+            Sale.sale_date.between(first, last)
+        )
+        
+        # Apply additional filters
+        if self.vehicle_make:
+            period_query = period_query.filter(Car.vehicle_make == self.vehicle_make)
+        if self.vehicle_model:
+            period_query = period_query.filter(Car.vehicle_model == self.vehicle_model)
+        if self.stand_ids:
+            period_query = period_query.filter(Car.stand_id.in_(self.stand_ids))
+        
+        return [
+            (sale.sale_date, self._decimal(sale.sale_price),
+             self._decimal(sale.car.total_investment) if sale.car is not None else decimal.Decimal('0.00'))
+            for sale in period_query.all()
+        ]
+    
     def _get_sales_by_dealer(self):
         """Calculate sales metrics grouped by dealer"""
         # Get all dealers with sales in the specified year
@@ -394,7 +412,7 @@ class SalesPerformanceReport(Report):
         else:
             date_filter = extract('year', Sale.sale_date) == self.year
             
-        sales_query = Sale.query.join(Car).filter(date_filter)
+        sales_query = with_loader_profile(Sale.query.join(Car), 'sale_with_joined_car_costs').filter(date_filter)
         
         # Apply additional filters
         if self.vehicle_make:
@@ -449,7 +467,7 @@ class SalesPerformanceReport(Report):
         else:
             date_filter = extract('year', Sale.sale_date) == self.year
             
-        sales_query = Sale.query.join(Car).filter(date_filter)
+        sales_query = with_loader_profile(Sale.query.join(Car), 'sale_with_joined_car_costs').filter(date_filter)
         
         # Apply additional filters
         if self.vehicle_make:
@@ -523,7 +541,7 @@ class SalesPerformanceReport(Report):
         previous_year = current_year - 1
         
         # Get current year sales
-        current_year_sales = Sale.query.filter(extract('year', Sale.sale_date) == current_year).all()
+        current_year_sales = with_loader_profile(Sale.query, 'sale_with_costs').filter(extract('year', Sale.sale_date) == current_year).all()
         current_sales = len(current_year_sales)
         current_revenue = sum(self._decimal(sale.sale_price) for sale in current_year_sales)
         current_cost = sum(self._decimal(sale.car.total_investment) if sale.car is not None else decimal.Decimal('0.00') 
@@ -531,7 +549,7 @@ class SalesPerformanceReport(Report):
         current_profit = current_revenue - current_cost
         
         # Get previous year sales
-        previous_year_sales = Sale.query.filter(extract('year', Sale.sale_date) == previous_year).all()
+        previous_year_sales = with_loader_profile(Sale.query, 'sale_with_costs').filter(extract('year', Sale.sale_date) == previous_year).all()
         previous_sales = len(previous_year_sales)
         previous_revenue = sum(self._decimal(sale.sale_price) for sale in previous_year_sales)
         previous_cost = sum(self._decimal(sale.car.total_investment) if sale.car is not None else decimal.Decimal('0.00')
@@ -569,7 +587,7 @@ class SalesPerformanceReport(Report):
             date_filter = extract('year', Sale.sale_date) == self.year
             
         # Make sure we only include cars that have been sold (date_sold is not None)
-        sales_query = Sale.query.join(Car).filter(date_filter).filter(Car.date_sold.isnot(None))
+        sales_query = with_loader_profile(Sale.query.join(Car), 'sale_with_joined_car_costs').filter(date_filter).filter(Car.date_sold.isnot(None))
         
         # Apply additional filters
         if self.vehicle_make:
@@ -1,5 +1,6 @@
 from app.reports.base import Report
 from app.models import Car, Sale, Stand, Setting
+from app.utils.loaders import with_loader_profile
 from datetime import datetime, timedelta
 from sqlalchemy import func, and_, or_
 from sqlalchemy.sql import text
@@ -97,7 +98,7 @@ class StandPerformanceReport(Report):
             cars_query = Car.query.filter(Car.stand_id == stand.stand_id)
             
             # Apply date filters if provided for sold cars
-            sold_cars_query = cars_query.filter(Car.date_sold != None)
+            sold_cars_query = with_loader_profile(cars_query, 'car_with_sale_and_costs').filter(Car.date_sold != None)
             if self.start_date:
                 sold_cars_query = sold_cars_query.filter(or_(
                     Car.date_bought >= self.start_date,
@@ -36,8 +36,7 @@ def login():
         
         # Log the user in and update last login timestamp
         login_user(user, remember=form.remember_me.data)
-        user.last_login = datetime.now()
-        db.session.commit()
+        user.update_last_login()
         
         # Redirect to the next page or dashboard
         next_page = request.validated_params.get('next')
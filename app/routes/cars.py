@@ -8,6 +8,9 @@ from app.models.sale import Sale
 from app.utils.forms import CarForm, CarSaleForm, MoveToStandForm, StandForm
 from app.utils.validators import validate_params, validate_form
 from app.utils.helpers import safe_get_or_404
+from app.utils.loaders import get_loader_options
+from app.utils.search import apply_search
+from app.utils.pagination import keyset_paginate
 from app import db
 from datetime import datetime
 from sqlalchemy import extract
@@ -25,7 +28,9 @@ VALID_SORT_DIRS = ['asc', 'desc']
     status=(str, False, 'All', lambda x: x in VALID_STATUSES),
     search=(str, False, ''),
     sort_by=(str, False, 'date_bought', lambda x: x in VALID_SORT_FIELDS),
-    sort_dir=(str, False, 'desc', lambda x: x in VALID_SORT_DIRS)
+    sort_dir=(str, False, 'desc', lambda x: x in VALID_SORT_DIRS),
+    after=(str, False, None),
+    before=(str, False, None)
 )
 def index():
     """List all cars"""
@@ -39,32 +44,24 @@ def index():
     # Base query
     query = Car.query
     
-    # Apply search filter
+    # Apply search filter (FTS5 index on SQLite, ilike across the same columns elsewhere)
     if search:
-        query = query.filter(
-            (Car.vehicle_name.ilike(f'%{search}%')) |
-            (Car.vehicle_make.ilike(f'%{search}%')) |
-            (Car.vehicle_model.ilike(f'%{search}%')) |
-            (Car.colour.ilike(f'%{search}%')) |
-            (Car.licence_number.ilike(f'%{search}%')) |
-            (Car.registration_number.ilike(f'%{search}%'))
-        )
+        query = apply_search(query, 'cars', search)
     
     # Apply status filter
     if status != 'All':
         query = query.filter(Car.repair_status == status)
     
-    # Apply sorting
-    if sort_dir == 'desc':
-        query = query.order_by(getattr(Car, sort_by).desc())
-    else:
-        query = query.order_by(getattr(Car, sort_by))
-    
-    cars = query.all()
+    # Fetch one page in sort order, with car_id as the tiebreaker
+    page = keyset_paginate(
+        query, getattr(Car, sort_by), Car.car_id, sort_dir,
+        after=params.get('after'), before=params.get('before')
+    )
     
     return render_template(
         'cars/index.html',
-        cars=cars,
+        cars=page.items,
+        page=page,
         current_status=status,
         current_sort=sort_by,
         current_sort_dir=sort_dir
@@ -348,7 +345,8 @@ def edit_car(car_id):
 @validate_params(car_id=(int, True))
 def view(car_id):
     """View car details"""
-    car = safe_get_or_404(Car, car_id, f"Car with ID {car_id} not found")
+    car = safe_get_or_404(Car, car_id, f"Car with ID {car_id} not found",
+                          options=get_loader_options('car_with_repair_details'))
     sale_form = None
     move_to_stand_form = None
     
@@ -6,6 +6,7 @@ from app.models.car import Car
 from app.utils.forms import DealerForm
 from app.utils.validators import validate_params, validate_form
 from app.utils.helpers import safe_get_or_404
+from app.utils.loaders import with_loader_profile
 from datetime import datetime
 
 dealers_bp = Blueprint('dealers', __name__)
@@ -117,10 +118,10 @@ def view(dealer_id):
     db.session.commit()
     
     # Get dealer's cars
-    cars = Car.query.filter_by(dealer_id=dealer_id).all()
+    cars = with_loader_profile(Car.query, 'car_with_costs').filter_by(dealer_id=dealer_id).all()
     
     # Get sales history (only sold cars)
-    sales_history = Car.query.filter_by(
+    sales_history = with_loader_profile(Car.query, 'car_with_costs').filter_by(
         dealer_id=dealer_id, 
         repair_status='Sold'
     ).order_by(Car.date_sold.desc()).all()
@@ -10,7 +10,7 @@ This module provides routes for bulk importing:
 6. Stands
 """
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, send_file
+from flask import Blueprint, render_template, redirect, url_for, flash, request, send_file, jsonify, abort
 from flask_login import login_required
 from app.utils.auth import requires_role
 from werkzeug.utils import secure_filename
@@ -20,16 +20,8 @@ import io
 from flask_wtf.csrf import generate_csrf
 from flask import current_app
 
-# Import helper functions (these will be implemented separately)
-from app.utils.import_helpers import (
-    import_cars,
-    import_repairs,
-    import_sales,
-    import_dealers,
-    import_parts,
-    import_stands,
-    create_sample_template
-)
+from app.utils.import_helpers import create_sample_template
+from app.utils.import_jobs import submit_import_job, get_import_job, list_import_jobs
 
 # Create blueprint
 import_bp = Blueprint('import', __name__)
@@ -54,7 +46,7 @@ def index():
     # Debug info on CSRF
     logging.info(f"CSRF is {'enabled' if current_app.config.get('WTF_CSRF_ENABLED', True) else 'disabled'}")
     
-    return render_template('import/import.html')
+    return render_template('import/import.html', jobs=list_import_jobs())
 
 @import_bp.route('/download-template/<entity_type>')
 @login_required
@@ -86,241 +78,92 @@ def download_template(entity_type):
         flash(f"Error generating template: {str(e)}", "danger")
         return redirect(url_for('import.index'))
 
+def _submit_upload(entity_type):
+    """
+    Queue the uploaded file as a background import job
+
+    Returns 202 with the job's status URL to clients asking for JSON, and
+    otherwise redirects to the import page, which polls the job.
+    """
+    wants_json = request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json'
+
+    def fail(message):
+        if wants_json:
+            return jsonify({'error': message}), 400
+        flash(message, 'danger')
+        return redirect(url_for('import.index'))
+
+    if 'file' not in request.files:
+        return fail('No file part')
+
+    file = request.files['file']
+    if file.filename == '':
+        return fail('No file selected')
+
+    if not allowed_file(file.filename):
+        return fail('Invalid file type. Please upload a CSV or Excel file.')
+
+    try:
+        logging.info(f"Queueing {entity_type} import of {secure_filename(file.filename)}")
+        job = submit_import_job(entity_type, file)
+    except Exception as e:
+        logging.error(f"Error queueing {entity_type} import: {str(e)}")
+        return fail(f'Error importing {entity_type}: {str(e)}')
+
+    status_url = url_for('import.import_job_status', job_id=job.job_id)
+    if wants_json:
+        return jsonify({'job_id': job.job_id, 'status': job.status, 'status_url': status_url}), 202
+    flash(f'Import of {job.filename} started. Progress is shown below.', 'info')
+    return redirect(url_for('import.index'))
+
 @import_bp.route('/cars', methods=['POST'])
 @login_required
 @requires_role('admin')
 def import_cars_route():
     """Handle car import"""
-    try:
-        logging.info("Car import route started")
-        
-        if 'file' not in request.files:
-            flash('No file part', 'danger')
-            return redirect(url_for('import.index'))
-        
-        file = request.files['file']
-        if file.filename == '':
-            flash('No file selected', 'danger')
-            return redirect(url_for('import.index'))
-        
-        if file and allowed_file(file.filename):
-            try:
-                # Process the uploaded file
-                filename = secure_filename(file.filename)
-                logging.info(f"Processing file: {filename}")
-                result = import_cars(file)
-                
-                # Flash the results
-                flash(f'Import completed: {result["success"]} cars imported successfully, {result["failed"]} failed', 
-                      'success' if result["success"] > 0 else 'warning')
-                
-                if result["errors"]:
-                    for error in result["errors"][:5]:  # Show first 5 errors
-                        flash(f'Error: {error}', 'danger')
-                    if len(result["errors"]) > 5:
-                        flash(f'... and {len(result["errors"]) - 5} more errors', 'danger')
-                        
-            except Exception as e:
-                logging.error(f"Error in import_cars_route when processing file: {str(e)}")
-                import traceback
-                logging.error(traceback.format_exc())
-                flash(f'Error importing cars: {str(e)}', 'danger')
-        else:
-            flash('Invalid file type. Please upload a CSV or Excel file.', 'danger')
-    except Exception as e:
-        logging.error(f"Unexpected error in import_cars_route: {str(e)}")
-        import traceback
-        logging.error(traceback.format_exc())
-        flash(f'An unexpected error occurred: {str(e)}', 'danger')
-            
-    return redirect(url_for('import.index'))
+    return _submit_upload('cars')
 
 @import_bp.route('/repairs', methods=['POST'])
 @login_required
 @requires_role('admin')
 def import_repairs_route():
     """Handle repairs import"""
-    if 'file' not in request.files:
-        flash('No file part', 'danger')
-        return redirect(url_for('import.index'))
-    
-    file = request.files['file']
-    if file.filename == '':
-        flash('No file selected', 'danger')
-        return redirect(url_for('import.index'))
-    
-    if file and allowed_file(file.filename):
-        try:
-            # Process the uploaded file
-            filename = secure_filename(file.filename)
-            result = import_repairs(file)
-            
-            # Flash the results
-            flash(f'Import completed: {result["success"]} repairs imported successfully, {result["failed"]} failed', 
-                  'success' if result["success"] > 0 else 'warning')
-            
-            if result["errors"]:
-                for error in result["errors"][:5]:  # Show first 5 errors
-                    flash(f'Error: {error}', 'danger')
-                if len(result["errors"]) > 5:
-                    flash(f'... and {len(result["errors"]) - 5} more errors', 'danger')
-                    
-        except Exception as e:
-            logging.error(f"Error importing repairs: {str(e)}")
-            flash(f'Error importing repairs: {str(e)}', 'danger')
-    else:
-        flash('Invalid file type. Please upload a CSV or Excel file.', 'danger')
-        
-    return redirect(url_for('import.index'))
+    return _submit_upload('repairs')
 
 @import_bp.route('/sales', methods=['POST'])
 @login_required
 @requires_role('admin')
 def import_sales_route():
     """Handle sales import"""
-    if 'file' not in request.files:
-        flash('No file part', 'danger')
-        return redirect(url_for('import.index'))
-    
-    file = request.files['file']
-    if file.filename == '':
-        flash('No file selected', 'danger')
-        return redirect(url_for('import.index'))
-    
-    if file and allowed_file(file.filename):
-        try:
-            # Process the uploaded file
-            filename = secure_filename(file.filename)
-            result = import_sales(file)
-            
-            # Flash the results
-            flash(f'Import completed: {result["success"]} sales imported successfully, {result["failed"]} failed', 
-                  'success' if result["success"] > 0 else 'warning')
-            
-            if result["errors"]:
-                for error in result["errors"][:5]:  # Show first 5 errors
-                    flash(f'Error: {error}', 'danger')
-                if len(result["errors"]) > 5:
-                    flash(f'... and {len(result["errors"]) - 5} more errors', 'danger')
-                    
-        except Exception as e:
-            logging.error(f"Error importing sales: {str(e)}")
-            flash(f'Error importing sales: {str(e)}', 'danger')
-    else:
-        flash('Invalid file type. Please upload a CSV or Excel file.', 'danger')
-        
-    return redirect(url_for('import.index'))
+    return _submit_upload('sales')
 
 @import_bp.route('/dealers', methods=['POST'])
 @login_required
 @requires_role('admin')
 def import_dealers_route():
     """Handle dealers import"""
-    if 'file' not in request.files:
-        flash('No file part', 'danger')
-        return redirect(url_for('import.index'))
-    
-    file = request.files['file']
-    if file.filename == '':
-        flash('No file selected', 'danger')
-        return redirect(url_for('import.index'))
-    
-    if file and allowed_file(file.filename):
-        try:
-            # Process the uploaded file
-            filename = secure_filename(file.filename)
-            result = import_dealers(file)
-            
-            # Flash the results
-            flash(f'Import completed: {result["success"]} dealers imported successfully, {result["failed"]} failed', 
-                  'success' if result["success"] > 0 else 'warning')
-            
-            if result["errors"]:
-                for error in result["errors"][:5]:  # Show first 5 errors
-                    flash(f'Error: {error}', 'danger')
-                if len(result["errors"]) > 5:
-                    flash(f'... and {len(result["errors"]) - 5} more errors', 'danger')
-                    
-        except Exception as e:
-            logging.error(f"Error importing dealers: {str(e)}")
-            flash(f'Error importing dealers: {str(e)}', 'danger')
-    else:
-        flash('Invalid file type. Please upload a CSV or Excel file.', 'danger')
-        
-    return redirect(url_for('import.index'))
+    return _submit_upload('dealers')
 
 @import_bp.route('/parts', methods=['POST'])
 @login_required
 @requires_role('admin')
 def import_parts_route():
     """Handle parts import"""
-    if 'file' not in request.files:
-        flash('No file part', 'danger')
-        return redirect(url_for('import.index'))
-    
-    file = request.files['file']
-    if file.filename == '':
-        flash('No file selected', 'danger')
-        return redirect(url_for('import.index'))
-    
-    if file and allowed_file(file.filename):
-        try:
-            # Process the uploaded file
-            filename = secure_filename(file.filename)
-            result = import_parts(file)
-            
-            # Flash the results
-            flash(f'Import completed: {result["success"]} parts imported successfully, {result["failed"]} failed', 
-                  'success' if result["success"] > 0 else 'warning')
-            
-            if result["errors"]:
-                for error in result["errors"][:5]:  # Show first 5 errors
-                    flash(f'Error: {error}', 'danger')
-                if len(result["errors"]) > 5:
-                    flash(f'... and {len(result["errors"]) - 5} more errors', 'danger')
-                    
-        except Exception as e:
-            logging.error(f"Error importing parts: {str(e)}")
-            flash(f'Error importing parts: {str(e)}', 'danger')
-    else:
-        flash('Invalid file type. Please upload a CSV or Excel file.', 'danger')
-        
-    return redirect(url_for('import.index'))
+    return _submit_upload('parts')
 
 @import_bp.route('/stands', methods=['POST'])
 @login_required
 @requires_role('admin')
 def import_stands_route():
     """Handle stands import"""
-    if 'file' not in request.files:
-        flash('No file part', 'danger')
-        return redirect(url_for('import.index'))
-    
-    file = request.files['file']
-    if file.filename == '':
-        flash('No file selected', 'danger')
-        return redirect(url_for('import.index'))
-    
-    if file and allowed_file(file.filename):
-        try:
-            # Process the uploaded file
-            filename = secure_filename(file.filename)
-            result = import_stands(file)
-            
-            # Flash the results
-            flash(f'Import completed: {result["success"]} stands imported successfully, {result["failed"]} failed', 
-                  'success' if result["success"] > 0 else 'warning')
-            
-            if result["errors"]:
-                for error in result["errors"][:5]:  # Show first 5 errors
-                    flash(f'Error: {error}', 'danger')
-                if len(result["errors"]) > 5:
-                    flash(f'... and {len(result["errors"]) - 5} more errors', 'danger')
-                    
-        except Exception as e:
-            logging.error(f"Error importing stands: {str(e)}")
-            flash(f'Error importing stands: {str(e)}', 'danger')
-    else:
-        flash('Invalid file type. Please upload a CSV or Excel file.', 'danger')
-        
-    return redirect(url_for('import.index')) 
\ No newline at end of file
+    return _submit_upload('stands')
+
+@import_bp.route('/jobs/<job_id>')
+@login_required
+@requires_role('admin')
+def import_job_status(job_id):
+    """Report a background import's progress: rows processed, succeeded, failed and errors"""
+    job = get_import_job(job_id)
+    if job is None:
+        abort(404)
+    return jsonify(job.to_dict())
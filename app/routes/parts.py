@@ -1,10 +1,12 @@
 from flask import Blueprint, render_template, flash, redirect, url_for, request, jsonify
 from flask_login import login_required
 from app.models.part import Part
-from app.models.car import Car
 from app.utils.forms import PartForm
 from app.utils.validators import validate_params, validate_form
 from app.utils.helpers import safe_get_or_404
+from app.utils.search import apply_search
+from app.utils.pagination import keyset_paginate
+from app.utils.autocomplete import autocomplete
 from app import db
 from app.models.setting import Setting
 from sqlalchemy import func
@@ -22,7 +24,9 @@ VALID_SORT_DIRS = ['asc', 'desc']
     search=(str, False, None),
     min_price=(float, False, None, lambda x: x >= 0),
     max_price=(float, False, None, lambda x: x >= 0),
-    manufacturer=(str, False, None)
+    manufacturer=(str, False, None),
+    after=(str, False, None),
+    before=(str, False, None)
 )
 def index():
     """List all parts"""
@@ -38,13 +42,9 @@ def index():
     # Start with base query
     query = Part.query
     
-    # Apply filters
+    # Apply filters (full-text prefix search over name, description, manufacturer and location)
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            Part.part_name.ilike(search_term) | 
-            Part.description.ilike(search_term)
-        )
+        query = apply_search(query, 'parts', search)
     
     if min_price is not None:
         query = query.filter(Part.standard_price >= min_price)
@@ -56,32 +56,26 @@ def index():
         query = query.filter(Part.manufacturer.ilike(f"%{manufacturer}%"))
     
     # Apply sorting - check if sort field exists in model
-    if sort_by == 'storage_location':
-        # Use the storage_location field (which maps to location in database)
-        if sort_dir == 'desc':
-            query = query.order_by(Part.storage_location.desc())
-        else:
-            query = query.order_by(Part.storage_location)
-    elif sort_by == 'location':
-        # For backwards compatibility with older code
-        if sort_dir == 'desc':
-            query = query.order_by(Part.storage_location.desc())
-        else:
-            query = query.order_by(Part.storage_location)
-    elif hasattr(Part, sort_by):
-        if sort_dir == 'desc':
-            query = query.order_by(getattr(Part, sort_by).desc())
-        else:
-            query = query.order_by(getattr(Part, sort_by))
+    if sort_by in ('storage_location', 'location'):
+        # Use the storage_location field (which maps to location in database);
+        # 'location' is kept for backwards compatibility with older code
+        sort_column = Part.storage_location
+    elif sort_by in Part.__table__.columns:
+        sort_column = getattr(Part, sort_by)
     else:
         # Default to part_name if sort field doesn't exist
-        query = query.order_by(Part.part_name)
+        sort_column = Part.part_name
     
-    parts = query.all()
+    # Fetch one page in sort order, with part_id as the tiebreaker
+    page = keyset_paginate(
+        query, sort_column, Part.part_id, sort_dir,
+        after=params.get('after'), before=params.get('before')
+    )
     
     return render_template(
         'parts/index.html',
-        parts=parts,
+        parts=page.items,
+        page=page,
         current_sort=sort_by,
         current_sort_dir=sort_dir,
         current_search=search,
@@ -392,79 +386,39 @@ def delete(part_id):
 @login_required
 def autocomplete_makes():
     """Return a list of distinct car makes for autocomplete"""
-    query = request.args.get('query', '').strip().lower()
+    query = request.args.get('query', '')
     
-    # Get distinct makes from cars table
-    makes_query = db.session.query(func.distinct(Car.vehicle_make))\
-        .filter(Car.vehicle_make != None)\
-        .filter(func.lower(Car.vehicle_make).contains(query))\
-        .order_by(Car.vehicle_make)
-    
-    makes = [make[0] for make in makes_query.all() if make[0]]
-    
-    return jsonify(makes)
+    # Distinct makes from the cars table, answered from the in-memory index
+    return jsonify(autocomplete('car_makes', query))
 
 @parts_bp.route('/autocomplete/models')
 @login_required
 def autocomplete_models():
     """Return a list of distinct car models for autocomplete"""
-    query = request.args.get('query', '').strip().lower()
+    query = request.args.get('query', '')
     make = request.args.get('make', '').strip()
     
-    # Start with base query
-    models_query = db.session.query(func.distinct(Car.vehicle_model))\
-        .filter(Car.vehicle_model != None)
-    
-    # Filter by make if provided
-    if make:
-        models_query = models_query.filter(func.lower(Car.vehicle_make) == make.lower())
-    
-    # Filter by search query
-    if query:
-        models_query = models_query.filter(func.lower(Car.vehicle_model).contains(query))
-    
-    # Order and get results
-    models = [model[0] for model in models_query.order_by(Car.vehicle_model).all() if model[0]]
-    
-    return jsonify(models)
+    # Models are grouped by lower-cased make; filter by make if provided
+    return jsonify(autocomplete('car_models', query, group=make.lower() if make else None))
 
 @parts_bp.route('/autocomplete/manufacturers')
 @login_required
 def autocomplete_manufacturers():
     """Return a list of distinct part manufacturers for autocomplete"""
-    query = request.args.get('query', '').strip().lower()
-    
-    # Get distinct manufacturers from parts table
-    manufacturers_query = db.session.query(func.distinct(Part.manufacturer))\
-        .filter(Part.manufacturer != None)\
-        .filter(func.lower(Part.manufacturer).contains(query))\
-        .order_by(Part.manufacturer)
+    query = request.args.get('query', '')
     
-    manufacturers = [mfg[0] for mfg in manufacturers_query.all() if mfg[0]]
-    
-    return jsonify(manufacturers)
+    # Distinct manufacturers from the parts table, answered from the in-memory index
+    return jsonify(autocomplete('part_manufacturers', query))
 
 @parts_bp.route('/autocomplete/storage-locations')
 @login_required
 def autocomplete_storage_locations():
     """Return a list of distinct storage locations for autocomplete"""
-    query = request.args.get('query', '').strip().lower()
+    query = request.args.get('query', '')
     
     try:
-        # Get distinct storage locations from parts table
-        # Note: storage_location is mapped to 'location' column in the database
-        locations_query = db.session.query(func.distinct(Part.storage_location))\
-            .filter(Part.storage_location != None)
-        
-        # Apply search filter if provided
-        if query:
-            locations_query = locations_query.filter(func.lower(Part.storage_location).contains(query))
-            
-        # Order and execute query
-        locations_query = locations_query.order_by(Part.storage_location)
-        locations = [loc[0] for loc in locations_query.all() if loc[0]]
-        
-        return jsonify(locations)
+        # Distinct storage locations from the parts table, answered from the in-memory index
+        return jsonify(autocomplete('part_storage_locations', query))
     except Exception as e:
         # If there's an error, return an empty list
         print(f"Error in storage locations autocomplete: {str(e)}")
@@ -5,6 +5,8 @@ from app.models.repair_provider import RepairProvider
 from app.utils.forms import RepairProviderForm, RepairForm
 from app.utils.validators import validate_params, validate_form
 from app.utils.helpers import safe_get_or_404
+from app.utils.loaders import with_loader_profile
+from app.utils.pagination import keyset_paginate
 
 providers_bp = Blueprint('providers', __name__)
 
@@ -20,7 +22,9 @@ VALID_SORT_DIRS = ['asc', 'desc']
     service_type=(str, False, 'All', lambda x: x in VALID_SERVICE_TYPES),
     rating=(int, False, None, lambda x: 1 <= x <= 5),
     sort_by=(str, False, 'provider_name', lambda x: x in VALID_SORT_FIELDS),
-    sort_dir=(str, False, 'asc', lambda x: x in VALID_SORT_DIRS)
+    sort_dir=(str, False, 'asc', lambda x: x in VALID_SORT_DIRS),
+    after=(str, False, None),
+    before=(str, False, None)
 )
 def index():
     """List all repair providers with filtering options"""
@@ -32,8 +36,8 @@ def index():
     sort_by = params.get('sort_by', 'provider_name')
     sort_dir = params.get('sort_dir', 'asc')
     
-    # Start with base query
-    query = RepairProvider.query
+    # Start with base query, counting repairs in SQL for the repairs count column
+    query = with_loader_profile(RepairProvider.query, 'provider_with_repair_count')
     
     # Apply filters
     if search:
@@ -50,17 +54,16 @@ def index():
     if rating:
         query = query.filter(RepairProvider.rating == rating)
     
-    # Apply sorting
-    if sort_dir == 'desc':
-        query = query.order_by(getattr(RepairProvider, sort_by).desc())
-    else:
-        query = query.order_by(getattr(RepairProvider, sort_by))
-    
-    providers = query.all()
+    # Fetch one page in sort order, with provider_id as the tiebreaker
+    page = keyset_paginate(
+        query, getattr(RepairProvider, sort_by), RepairProvider.provider_id, sort_dir,
+        after=params.get('after'), before=params.get('before')
+    )
     
     return render_template(
         'providers/index.html', 
-        providers=providers,
+        providers=page.items,
+        page=page,
         service_types=VALID_SERVICE_TYPES,
         current_search=search,
         current_service_type=service_type,
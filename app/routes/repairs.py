@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required
 from app.models.repair import Repair
 from app.models.car import Car
@@ -7,6 +7,9 @@ from app.models.part import Part, RepairPart
 from app.utils.forms import RepairForm, RepairPartForm
 from app.utils.validators import validate_params, validate_form
 from app.utils.helpers import safe_get_or_404
+from app.utils.loaders import with_loader_profile
+from app.utils.search import apply_search
+from app.utils.pagination import keyset_paginate
 from app import db
 from datetime import datetime
 from app.models.setting import Setting
@@ -23,7 +26,9 @@ VALID_SORT_DIRS = ['asc', 'desc']
     car_id=(int, False, None),
     status=(str, False, 'All', lambda x: x in VALID_STATUSES),
     sort_by=(str, False, 'start_date', lambda x: x in VALID_SORT_FIELDS),
-    sort_dir=(str, False, 'desc', lambda x: x in VALID_SORT_DIRS)
+    sort_dir=(str, False, 'desc', lambda x: x in VALID_SORT_DIRS),
+    after=(str, False, None),
+    before=(str, False, None)
 )
 def index():
     """List all repairs"""
@@ -34,8 +39,8 @@ def index():
     sort_by = params.get('sort_by', 'start_date')
     sort_dir = params.get('sort_dir', 'desc')
     
-    # Base query
-    query = Repair.query
+    # Base query, eager-loading the car and provider shown in each row
+    query = with_loader_profile(Repair.query, 'repair_with_car_and_provider')
     
     # Apply filters
     if car_id:
@@ -46,23 +51,52 @@ def index():
     elif status == 'In Progress':
         query = query.filter(Repair.end_date == None)
     
-    # Apply sorting
-    if sort_dir == 'desc':
-        query = query.order_by(getattr(Repair, sort_by).desc())
-    else:
-        query = query.order_by(getattr(Repair, sort_by))
-    
-    repairs = query.all()
+    # Fetch one page in sort order, with repair_id as the tiebreaker
+    page = keyset_paginate(
+        query, getattr(Repair, sort_by), Repair.repair_id, sort_dir,
+        after=params.get('after'), before=params.get('before')
+    )
     
     return render_template(
         'repairs/index.html',
-        repairs=repairs,
+        repairs=page.items,
+        page=page,
         current_car_id=car_id,
         current_status=status,
         current_sort=sort_by,
         current_sort_dir=sort_dir
     )
 
+@repairs_bp.route('/search')
+@login_required
+@validate_params(
+    query=(str, False, ''),
+    limit=(int, False, 20, lambda x: 1 <= x <= 100)
+)
+def search():
+    """Search repairs by type and notes, best matches first (JSON)"""
+    params = request.validated_params
+    term = (params.get('query') or '').strip()
+    limit = params.get('limit', 20)
+    
+    if not term:
+        return jsonify([])
+    
+    query = with_loader_profile(Repair.query, 'repair_with_car_and_provider')
+    repairs = apply_search(query, 'repairs', term, ranked=True).limit(limit).all()
+    
+    return jsonify([{
+        'repair_id': repair.repair_id,
+        'url': url_for('repairs.view', repair_id=repair.repair_id),
+        'repair_type': repair.repair_type,
+        'additional_notes': repair.additional_notes,
+        'car_id': repair.car_id,
+        'car': repair.car.vehicle_name if repair.car else None,
+        'provider': repair.provider.provider_name if repair.provider else None,
+        'start_date': repair.start_date.isoformat() if repair.start_date else None,
+        'end_date': repair.end_date.isoformat() if repair.end_date else None
+    } for repair in repairs])
+
 @repairs_bp.route('/create', methods=['GET', 'POST'])
 @login_required
 def create():
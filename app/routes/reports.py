@@ -1,11 +1,26 @@
-from flask import Blueprint, render_template, flash, redirect, url_for, request, jsonify, make_response
+from flask import Blueprint, render_template, flash, redirect, url_for, request, jsonify, make_response, g
 from flask_login import login_required
 from app import db
 from app.reports import get_report
+from app.utils.db_routing import push_reporting_bind, pop_reporting_bind
+from app.utils.report_snapshots import serves_report_snapshot
 from datetime import datetime
 
 reports_bp = Blueprint('reports', __name__)
 
+@reports_bp.before_request
+def use_reporting_bind_for_api():
+    """Serve the JSON API endpoints from the read-only reporting engine."""
+    if request.endpoint and request.endpoint.startswith('reports.api_'):
+        g.reporting_bind_token = push_reporting_bind()
+
+@reports_bp.teardown_request
+def release_reporting_bind(exc=None):
+    """Undo use_reporting_bind_for_api at the end of the request."""
+    token = g.pop('reporting_bind_token', None)
+    if token is not None:
+        pop_reporting_bind(token)
+
 @reports_bp.route('/')
 @login_required
 def index():
@@ -15,6 +30,7 @@ def index():
 
 @reports_bp.route('/sales-performance')
 @login_required
+@serves_report_snapshot('sales_performance')
 def sales_performance():
     """Sales Performance Report."""
     # Get parameters from request
@@ -64,6 +80,8 @@ def sales_performance():
         vehicle_model=vehicle_model,
         stand_ids=stand_ids
     )
+    # Top models are fetched by the page through api_report_section
+    report.defer_sections = True
     
     try:
         # Generate report data
@@ -182,6 +200,7 @@ def test_sales_performance():
 
 @reports_bp.route('/repair-analysis')
 @login_required
+@serves_report_snapshot('repair_analysis')
 def repair_analysis():
     """Repair Cost Analysis Report."""
     # Get parameters from request
@@ -219,6 +238,7 @@ def repair_analysis():
 
 @reports_bp.route('/inventory-aging')
 @login_required
+@serves_report_snapshot('inventory_aging')
 def inventory_aging():
     """Inventory Aging Report."""
     # Get parameters from request
@@ -274,6 +294,7 @@ def inventory_aging():
 
 @reports_bp.route('/profit-margin')
 @login_required
+@serves_report_snapshot('profit_margin')
 def profit_margin():
     """Profit Margin Analysis Report."""
     # Get parameters from request
@@ -302,6 +323,32 @@ def profit_margin():
         flash(f"Error generating report: {str(e)}", "danger")
         return redirect(url_for('reports.index'))
 
+@reports_bp.route('/api/<report_name>/sections/<section>')
+@login_required
+def api_report_section(report_name, section):
+    """Deferred report section as a JSON fragment, fetched by the report page on demand."""
+    report_name = report_name.replace('-', '_')
+    try:
+        report_class = get_report(report_name)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    
+    if section not in report_class.deferred_sections:
+        return jsonify({'error': f"Section '{section}' not found"}), 404
+    
+    try:
+        report = report_class(**report_class.parse_parameters(request.args))
+        data = report.generate_section(section)
+        
+        from app.utils.serializers import decimal_to_float
+        return jsonify({
+            'section': section,
+            'data': decimal_to_float(data),
+            'html': render_template(f'reports/sections/{report_name}/{section}.html', **{section: data})
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # API endpoints for testing (no login required)
 @reports_bp.route('/api/sales-performance')
 def api_sales_performance():
@@ -1733,6 +1780,9 @@ def profitability():
         stand_id=stand_id,
         dealer_id=dealer_id
     )
+    # The make/model drilldown and per-car table are fetched by the page
+    # through api_report_section
+    report.defer_sections = True
     
     try:
         # Generate report data
@@ -10,7 +10,7 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from flask_login import login_required, current_user
 from app import db
 from app.models.setting import Setting
-from app.models.user import User
+from app.models.user import User, invalidate_user_cache
 from app.utils.auth import requires_role
 from app.utils.validators import validate_form, validate_params
 from app.utils.errors import ValidationError
@@ -300,6 +300,7 @@ def edit_user(user_id):
             user.password = password  # This will hash the password
             
         db.session.commit()
+        invalidate_user_cache(user_id)
         flash(f"User '{user.username}' updated successfully", 'success')
         
     except ValueError as e:
@@ -327,6 +328,7 @@ def delete_user(user_id):
         # Delete user
         db.session.delete(user)
         db.session.commit()
+        invalidate_user_cache(user_id)
         
         flash(f"User '{user.username}' deleted successfully", 'success')
         
@@ -6,6 +6,7 @@ from app.models.car import Car
 from app.utils.forms import StandForm
 from app.utils.validators import validate_params, validate_form
 from app.utils.helpers import safe_get_or_404
+from app.utils.pagination import keyset_paginate
 from datetime import datetime
 
 stands_bp = Blueprint('stands', __name__)
@@ -20,7 +21,9 @@ VALID_SORT_DIRS = ['asc', 'desc']
     min_capacity=(int, False, None, lambda x: x >= 0),
     max_capacity=(int, False, None, lambda x: x >= 0),
     sort_by=(str, False, 'stand_name', lambda x: x in VALID_SORT_FIELDS),
-    sort_dir=(str, False, 'asc', lambda x: x in VALID_SORT_DIRS)
+    sort_dir=(str, False, 'asc', lambda x: x in VALID_SORT_DIRS),
+    after=(str, False, None),
+    before=(str, False, None)
 )
 def index():
     """List all stands with filtering options"""
@@ -49,31 +52,38 @@ def index():
     if max_capacity is not None:
         query = query.filter(Stand.capacity <= max_capacity)
     
-    # Apply sorting for model attributes - check if field exists in model
-    if sort_by in ['stand_name', 'location', 'capacity'] and hasattr(Stand, sort_by):
-        if sort_dir == 'desc':
-            query = query.order_by(getattr(Stand, sort_by).desc())
-        else:
-            query = query.order_by(getattr(Stand, sort_by))
+    # Computed counts sort by correlated subqueries so they can be paged in SQL
+    computed_sorts = {
+        'current_car_count': db.select(db.func.count(Car.car_id)).where(
+            Car.stand_id == Stand.stand_id, Car.date_sold.is_(None)
+        ).scalar_subquery(),
+        'cars_sold_count': db.select(db.func.count(Car.car_id)).where(
+            Car.stand_id == Stand.stand_id, Car.date_sold.isnot(None)
+        ).scalar_subquery()
+    }
+    
+    if sort_by in ['stand_name', 'location', 'capacity']:
+        sort_column = getattr(Stand, sort_by)
+        sort_value = None
+    elif sort_by in computed_sorts:
+        sort_column = computed_sorts[sort_by]
+        sort_value = lambda stand: getattr(stand, sort_by)
     else:
         # Default sort by stand_name if invalid field specified
-        query = query.order_by(Stand.stand_name)
-    
-    stands = query.all()
-    
-    # For computed properties, sort after query
-    if sort_by in ['current_car_count', 'cars_sold_count'] and hasattr(Stand, sort_by):
-        try:
-            stands = sorted(stands, 
-                        key=lambda x: getattr(x, sort_by, 0) or 0,  # Handle None values
-                        reverse=(sort_dir == 'desc'))
-        except (AttributeError, TypeError):
-            # If sorting fails, just leave the stands as is
-            pass
+        sort_column = Stand.stand_name
+        sort_value = None
+    
+    # Fetch one page in sort order, with stand_id as the tiebreaker
+    page = keyset_paginate(
+        query, sort_column, Stand.stand_id, sort_dir,
+        after=params.get('after'), before=params.get('before'),
+        sort_value=sort_value
+    )
     
     return render_template(
         'stands/index.html', 
-        stands=stands,
+        stands=page.items,
+        page=page,
         current_search=search,
         current_min_capacity=min_capacity,
         current_max_capacity=max_capacity,
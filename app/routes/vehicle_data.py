@@ -4,6 +4,7 @@ from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from app import db
 from app.models.car import VehicleMake, VehicleModel, Car
 from app.models.dealer import Dealer
+from app.utils.autocomplete import autocomplete, get_autocomplete_index
 
 vehicle_data = Blueprint('vehicle_data', __name__)
 
@@ -20,18 +21,8 @@ def get_makes():
     """API endpoint to get vehicle makes with optional filtering"""
     query = request.args.get('query', '')
     
-    # Filter makes by query
-    makes_query = VehicleMake.query
-    if query:
-        makes_query = makes_query.filter(VehicleMake.name.ilike(f'%{query}%'))
-    
-    # Order by name and retrieve data
-    makes = makes_query.order_by(VehicleMake.name).all()
-    
-    # Convert to list of names
-    make_names = [make.name for make in makes]
-    
-    return jsonify(make_names)
+    # Make names matching the query, answered from the in-memory index
+    return jsonify(autocomplete('vehicle_makes', query))
 
 @vehicle_data.route('/api/models')
 @login_required
@@ -40,27 +31,12 @@ def get_models():
     query = request.args.get('query', '')
     make_name = request.args.get('make', '')
     
-    # Filter models by query
-    models_query = VehicleModel.query
+    # Models are grouped by lower-cased make name; an unknown make is not a filter
+    group = make_name.lower() if make_name else None
+    if group and not get_autocomplete_index('vehicle_models').has_group(group):
+        group = None
     
-    # Apply make filter if provided
-    if make_name:
-        # Find the make ID based on name
-        make = VehicleMake.query.filter(db.func.lower(VehicleMake.name) == db.func.lower(make_name)).first()
-        if make:
-            models_query = models_query.filter(VehicleModel.make_id == make.id)
-    
-    # Apply search query if provided
-    if query:
-        models_query = models_query.filter(VehicleModel.name.ilike(f'%{query}%'))
-    
-    # Order by name and retrieve data
-    models = models_query.order_by(VehicleModel.name).all()
-    
-    # Convert to list of names
-    model_names = [model.name for model in models]
-    
-    return jsonify(model_names)
+    return jsonify(autocomplete('vehicle_models', query, group=group))
 
 @vehicle_data.route('/api/years')
 @login_required
@@ -68,15 +44,8 @@ def get_years():
     """API endpoint to get vehicle years with optional filtering"""
     query = request.args.get('query', '')
     
-    # Get distinct years from cars
-    years_query = db.session.query(Car.year.distinct())
-    if query:
-        years_query = years_query.filter(db.cast(Car.year, db.String).ilike(f'%{query}%'))
-    
-    # Order by year and retrieve data
-    years = [str(year[0]) for year in years_query.order_by(Car.year.desc()).all()]
-    
-    return jsonify(years)
+    # Distinct car years (newest first), answered from the in-memory index
+    return jsonify(autocomplete('car_years', query))
 
 @vehicle_data.route('/api/colors')
 @login_required
@@ -84,15 +53,8 @@ def get_colors():
     """API endpoint to get vehicle colors with optional filtering"""
     query = request.args.get('query', '')
     
-    # Get distinct colors from cars
-    colors_query = db.session.query(Car.colour.distinct()).filter(Car.colour != None)
-    if query:
-        colors_query = colors_query.filter(Car.colour.ilike(f'%{query}%'))
-    
-    # Order by color and retrieve data
-    colors = [color[0] for color in colors_query.order_by(Car.colour).all()]
-    
-    return jsonify(colors)
+    # Distinct car colours, answered from the in-memory index
+    return jsonify(autocomplete('car_colours', query))
 
 @vehicle_data.route('/api/dealers')
 @login_required
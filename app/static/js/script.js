@@ -484,4 +484,49 @@ window.mobileUtils = {
             this.style.transform = 'scale(1)';
         }, { passive: true });
     }
-}; 
\ No newline at end of file
+}; 
+// Deferred report sections: elements marked with data-report-section are
+// filled from their JSON fragment endpoint once they scroll into view
+function loadReportSection(container) {
+    const url = container.getAttribute('data-report-section');
+    container.removeAttribute('data-report-section');
+    
+    fetch(url, { headers: { 'Accept': 'application/json' }, credentials: 'same-origin' })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Section request failed with status ' + response.status);
+            }
+            return response.json();
+        })
+        .then(fragment => {
+            container.innerHTML = fragment.html;
+            container.dispatchEvent(new CustomEvent('report-section-loaded', { bubbles: true, detail: fragment }));
+        })
+        .catch(error => {
+            console.error(error);
+            const columns = container.closest('table') ? container.closest('table').querySelectorAll('thead th').length : 1;
+            container.innerHTML = '<tr><td colspan="' + columns + '" class="text-center text-danger">Could not load this section</td></tr>';
+        });
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    const sections = document.querySelectorAll('[data-report-section]');
+    if (!sections.length) {
+        return;
+    }
+    
+    if (!('IntersectionObserver' in window)) {
+        sections.forEach(loadReportSection);
+        return;
+    }
+    
+    const observer = new IntersectionObserver(function(entries) {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                observer.unobserve(entry.target);
+                loadReportSection(entry.target);
+            }
+        });
+    }, { rootMargin: '200px' });
+    sections.forEach(section => observer.observe(section));
+});
@@ -0,0 +1,233 @@
+"""
+In-memory autocomplete indexes for the Car Repair and Sales Tracking application.
+
+The autocomplete endpoints are called on every keystroke. Rather than running
+a ``SELECT DISTINCT ... WHERE lower(col) LIKE '%q%'`` scan each time, each
+source's distinct values are loaded once per process into a suffix array,
+which answers substring lookups with a binary search:
+
+    makes = autocomplete('vehicle_makes', request.args.get('query', ''))
+
+Indexes are rebuilt lazily after a commit that inserts, updates or deletes a
+Car, Part, VehicleMake or VehicleModel, and at most AUTOCOMPLETE_TTL seconds
+after they were built (covering bulk SQL and writes from other processes).
+"""
+
+import time
+import weakref
+from bisect import bisect_left
+from threading import Lock
+from flask import current_app
+from sqlalchemy import func
+from app import db
+from app.models.car import Car, VehicleMake, VehicleModel
+from app.models.part import Part
+from app.utils.cache_events import invalidate_on_commit
+
+
+class AutocompleteIndex:
+    """
+    Substring index over a list of display values
+
+    Args:
+        entries (list): (value, group) pairs in display order; group is an
+            optional key (e.g. a lower-cased make) results can be restricted to
+    """
+
+    def __init__(self, entries):
+        self.values = []
+        self.groups = {}
+        positions = {}
+
+        for value, group in entries:
+            if value is None or value == '':
+                continue
+            if value not in positions:
+                positions[value] = len(self.values)
+                self.values.append(value)
+            if group is not None:
+                self.groups.setdefault(group, set()).add(positions[value])
+
+        # Suffix array: every suffix of every lower-cased value, sorted, so all
+        # values containing q are the suffixes starting with q (one bisect)
+        self.suffixes = sorted(
+            (text[start:], position)
+            for position, text in enumerate(str(value).lower() for value in self.values)
+            for start in range(len(text))
+        )
+
+    def has_group(self, group):
+        return group in self.groups
+
+    def search(self, query, group=None, limit=20):
+        """
+        Find values containing a query string (case-insensitive)
+
+        Args:
+            query (str): Text to look for anywhere in the value
+            group (str, optional): Only return values in this group
+            limit (int): Maximum number of results
+
+        Returns:
+            list: Matching values in display order
+        """
+        query = (query or '').strip().lower()
+
+        if query:
+            matches = set()
+            i = bisect_left(self.suffixes, (query,))
+            while i < len(self.suffixes) and self.suffixes[i][0].startswith(query):
+                matches.add(self.suffixes[i][1])
+                i += 1
+        else:
+            matches = None
+
+        if group is not None:
+            in_group = self.groups.get(group, set())
+            matches = in_group if matches is None else matches & in_group
+
+        if matches is None:
+            return self.values[:limit]
+        return [self.values[position] for position in sorted(matches)[:limit]]
+
+
+def _car_makes():
+    rows = db.session.query(Car.vehicle_make).distinct().order_by(Car.vehicle_make)
+    return [(make, None) for make, in rows]
+
+
+def _car_models():
+    rows = db.session.query(Car.vehicle_model, func.lower(Car.vehicle_make)).distinct().order_by(Car.vehicle_model)
+    return list(rows)
+
+
+def _car_years():
+    rows = db.session.query(Car.year).distinct().order_by(Car.year.desc())
+    return [(str(year), None) for year, in rows if year is not None]
+
+
+def _car_colours():
+    rows = db.session.query(Car.colour).distinct().order_by(Car.colour)
+    return [(colour, None) for colour, in rows]
+
+
+def _part_manufacturers():
+    rows = db.session.query(Part.manufacturer).distinct().order_by(Part.manufacturer)
+    return [(manufacturer, None) for manufacturer, in rows]
+
+
+def _part_storage_locations():
+    rows = db.session.query(Part.storage_location).distinct().order_by(Part.storage_location)
+    return [(location, None) for location, in rows]
+
+
+def _vehicle_makes():
+    rows = db.session.query(VehicleMake.name).order_by(VehicleMake.name)
+    return [(name, None) for name, in rows]
+
+
+def _vehicle_models():
+    rows = db.session.query(VehicleModel.name, func.lower(VehicleMake.name)).join(
+        VehicleMake, VehicleModel.make_id == VehicleMake.id
+    ).order_by(VehicleModel.name)
+    return list(rows)
+
+
+# Dictionary mapping source names to functions loading their (value, group) entries
+AUTOCOMPLETE_SOURCES = {
+    'car_makes': _car_makes,
+    'car_models': _car_models,
+    'car_years': _car_years,
+    'car_colours': _car_colours,
+    'part_manufacturers': _part_manufacturers,
+    'part_storage_locations': _part_storage_locations,
+    'vehicle_makes': _vehicle_makes,
+    'vehicle_models': _vehicle_models,
+}
+
+# Models whose writes make each source stale
+SOURCE_MODELS = {
+    Car: ['car_makes', 'car_models', 'car_years', 'car_colours'],
+    Part: ['part_manufacturers', 'part_storage_locations'],
+    VehicleMake: ['vehicle_makes', 'vehicle_models'],
+    VehicleModel: ['vehicle_models'],
+}
+
+# Attributes whose updates matter (other updates, e.g. a car's status, do not)
+TRACKED_ATTRIBUTES = {
+    Car: ('vehicle_make', 'vehicle_model', 'year', 'colour'),
+    Part: ('manufacturer', 'storage_location'),
+    VehicleMake: ('name',),
+    VehicleModel: ('name', 'make_id'),
+}
+
+# Built indexes per engine: engine -> {source name: (index, monotonic build time)}
+_indexes = weakref.WeakKeyDictionary()
+# Bumped on every invalidation so a build that raced with a commit is discarded
+_generations = {}
+_indexes_lock = Lock()
+
+
+def invalidate_autocomplete(*source_names):
+    """
+    Drop built indexes so the next lookup reloads them
+
+    Args:
+        *source_names: Sources to drop; all sources when none are given
+    """
+    with _indexes_lock:
+        for name in source_names or AUTOCOMPLETE_SOURCES:
+            _generations[name] = _generations.get(name, 0) + 1
+            for built in _indexes.values():
+                built.pop(name, None)
+
+
+def get_autocomplete_index(source_name):
+    """
+    Get the index for a source, building it if missing or expired
+
+    Raises:
+        ValueError: If the source does not exist
+    """
+    if source_name not in AUTOCOMPLETE_SOURCES:
+        raise ValueError(f"Autocomplete source '{source_name}' not found")
+
+    ttl = current_app.config.get('AUTOCOMPLETE_TTL', 300)
+    now = time.monotonic()
+    engine = db.session.get_bind()
+
+    with _indexes_lock:
+        cached = _indexes.get(engine, {}).get(source_name)
+        generation = _generations.get(source_name, 0)
+    if cached is not None and now - cached[1] < ttl:
+        return cached[0]
+
+    index = AutocompleteIndex(AUTOCOMPLETE_SOURCES[source_name]())
+    with _indexes_lock:
+        if _generations.get(source_name, 0) == generation:
+            _indexes.setdefault(engine, {})[source_name] = (index, now)
+    return index
+
+
+def autocomplete(source_name, query, group=None, limit=None):
+    """
+    Look up autocomplete suggestions from memory
+
+    Args:
+        source_name (str): Name of a registered source
+        query (str): Text typed so far
+        group (str, optional): Restrict to one group (e.g. a lower-cased make)
+        limit (int, optional): Maximum results, defaults to AUTOCOMPLETE_LIMIT
+
+    Returns:
+        list: Matching values
+    """
+    limit = limit or current_app.config.get('AUTOCOMPLETE_LIMIT', 20)
+    return get_autocomplete_index(source_name).search(query, group=group, limit=limit)
+
+
+def _invalidate_written_sources(written_models):
+    invalidate_autocomplete(*{name for model in written_models for name in SOURCE_MODELS[model]})
+
+
+invalidate_on_commit('autocomplete', list(SOURCE_MODELS), _invalidate_written_sources, TRACKED_ATTRIBUTES)
@@ -0,0 +1,56 @@
+"""
+Commit-driven cache invalidation for the Car Repair and Sales Tracking application.
+
+In-process caches (autocomplete indexes, the dashboard snapshot) must be
+dropped when the rows they were built from change. Dropping them at flush
+time is too early: another request could rebuild from the old rows before the
+commit lands. Instead, mapper events note which models a session wrote, and
+the callback runs once that session commits (a rollback discards the notes):
+
+    invalidate_on_commit('dashboard', [Car, Sale, Repair],
+                         lambda written: invalidate_dashboard_snapshot())
+"""
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+
+def invalidate_on_commit(name, models, callback, tracked_attributes=None):
+    """
+    Call a function after each commit that inserted, updated or deleted a model
+
+    Args:
+        name (str): Unique name for this subscription
+        models (list): Model classes to watch
+        callback (callable): Called with the set of model classes written
+        tracked_attributes (dict, optional): Model class -> attribute names;
+            updates to a listed model only count when one of these changed
+    """
+    tracked_attributes = tracked_attributes or {}
+    info_key = f'written_for_{name}'
+
+    def note_write(mapper, connection, target):
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault(info_key, set()).add(mapper.class_)
+
+    def note_update(mapper, connection, target):
+        names = tracked_attributes.get(mapper.class_)
+        state = inspect(target)
+        if names is None or any(state.attrs[attr].history.has_changes() for attr in names):
+            note_write(mapper, connection, target)
+
+    for model in models:
+        event.listen(model, 'after_insert', note_write)
+        event.listen(model, 'after_update', note_update)
+        event.listen(model, 'after_delete', note_write)
+
+    @event.listens_for(Session, 'after_commit')
+    def run_callback(session):
+        written = session.info.pop(info_key, None)
+        if written:
+            callback(written)
+
+    @event.listens_for(Session, 'after_rollback')
+    def discard_writes(session):
+        session.info.pop(info_key, None)
@@ -0,0 +1,315 @@
+"""
+Dashboard metrics for the Car Repair and Sales Tracking application.
+
+The dashboard used to run a count per metric, load every unsold car to test
+its status age and run one car query per stand. Its headline counts now come
+from the kpi_counters table and the rest of its metrics from a handful of
+grouped queries, collected into a snapshot that is kept per process for
+DASHBOARD_CACHE_TTL seconds:
+
+    snapshot = get_dashboard_snapshot()
+    return render_template('dashboard.html', now=datetime.now(), **snapshot.metrics)
+
+The snapshot is dropped after a commit that writes a car, sale, repair or
+anything else it shows (stand and provider names, threshold settings), and
+when the date changes, since the age thresholds are relative to today.
+"""
+
+import time
+import weakref
+from datetime import datetime, timedelta
+from threading import Lock
+from flask import current_app
+from sqlalchemy import and_, case, func
+from app import db
+from app.models.car import Car
+from app.models.repair import Repair
+from app.models.repair_provider import RepairProvider
+from app.models.sale import Sale
+from app.models.setting import Setting
+from app.models.stand import Stand
+from app.reports.base import Projection
+from app.utils.cache_events import invalidate_on_commit
+from app.utils.kpi_counters import get_kpi_counters
+
+# Rows shown in the dashboard's tables (plain tuples, so they can outlive the session)
+WAITING_CAR_ROW = Projection(
+    'WaitingCarRow',
+    car_id=Car.car_id,
+    vehicle_make=Car.vehicle_make,
+    vehicle_model=Car.vehicle_model,
+    year=Car.year,
+    date_bought=Car.date_bought
+)
+
+STAND_CAR_ROW = Projection(
+    'StandCarRow',
+    car_id=Car.car_id,
+    vehicle_make=Car.vehicle_make,
+    vehicle_model=Car.vehicle_model,
+    year=Car.year,
+    stand_name=Stand.stand_name,
+    date_added_to_stand=Car.date_added_to_stand,
+    date_sold=Car.date_sold
+)
+
+RECENT_REPAIR_ROW = Projection(
+    'RecentRepairRow',
+    repair_id=Repair.repair_id,
+    car_id=Repair.car_id,
+    vehicle_make=Car.vehicle_make,
+    vehicle_model=Car.vehicle_model,
+    repair_type=Repair.repair_type,
+    provider_name=RepairProvider.provider_name,
+    start_date=Repair.start_date,
+    end_date=Repair.end_date,
+    repair_cost=Repair.repair_cost
+)
+
+# Models whose writes change what the dashboard shows
+SNAPSHOT_MODELS = [Car, Sale, Repair, Stand, RepairProvider, Setting]
+
+
+class DashboardSnapshot:
+    """
+    Dashboard metrics computed at one point in time
+
+    Attributes:
+        metrics (dict): Template variables for dashboard.html
+        built_on (date): Day the date-relative metrics were computed for
+    """
+
+    def __init__(self, metrics, built_on):
+        self.metrics = metrics
+        self.built_on = built_on
+
+
+def _count_where(*conditions):
+    """SUM(CASE ...) counting the rows matching all conditions"""
+    return func.coalesce(func.sum(case((and_(*conditions), 1), else_=0)), 0)
+
+
+def _older_than(column, today, days):
+    """Condition for (today - column).days > days, as a date comparison the index can use"""
+    return column <= today - timedelta(days=int(days) + 1)
+
+
+def _aging_counts(today, stand_aging_threshold_days, status_inactivity_threshold_days,
+                  enable_status_warnings):
+    """Stand aging and status inactivity counts in a single pass over unsold cars"""
+    on_display = Car.repair_status == 'On Display'
+    aging_threshold_date = today - timedelta(days=stand_aging_threshold_days)
+    aging_warning_date = today - timedelta(days=stand_aging_threshold_days / 2)
+    # Placeholder until cars record their last status change: unsold cars
+    # waiting for repairs, aged from their purchase date
+    waiting = and_(Car.repair_status == 'Waiting for Repairs', Car.date_bought != None)
+    inactive = _older_than(Car.date_bought, today, status_inactivity_threshold_days)
+    approaching_inactive = _older_than(Car.date_bought, today, status_inactivity_threshold_days / 2)
+
+    row = db.session.query(
+        _count_where(on_display, Car.date_added_to_stand <= aging_threshold_date),
+        _count_where(on_display, Car.date_added_to_stand <= aging_warning_date,
+                     Car.date_added_to_stand > aging_threshold_date),
+        _count_where(waiting, inactive),
+        _count_where(waiting, approaching_inactive, ~inactive)
+    ).filter(Car.date_sold == None).one()
+
+    counts = {
+        'vehicles_exceeding_aging': row[0],
+        'vehicles_approaching_aging': row[1],
+        'vehicles_inactive_status': 0,
+        'vehicles_approaching_inactive': 0
+    }
+    if enable_status_warnings:
+        counts['vehicles_inactive_status'] = row[2]
+        counts['vehicles_approaching_inactive'] = row[3]
+    return counts
+
+
+def _avg_recon_time(today):
+    """
+    Average days from purchase for unsold cars ready for display
+
+    Uses today as an approximation of when the status changed.
+    """
+    rows = db.session.query(Car.date_bought, func.count(Car.car_id)).filter(
+        Car.repair_status == 'Ready for Display',
+        Car.date_sold == None,
+        Car.date_bought != None
+    ).group_by(Car.date_bought)
+
+    total_days = total_cars = 0
+    for date_bought, count in rows:
+        recon_time = (today - date_bought).days
+        if recon_time >= 0:  # Ensure we don't include negative values
+            total_days += recon_time * count
+            total_cars += count
+    return total_days / total_cars if total_cars else None
+
+
+def _recent_sales_profit(today):
+    """Profit and ROI for cars sold in the last 30 days"""
+    repair_totals = db.select(
+        Repair.car_id,
+        func.sum(Repair.repair_cost).label('repair_cost')
+    ).group_by(Repair.car_id).subquery()
+
+    rows = db.session.query(
+        Car.sale_price, Car.purchase_price, Car.refuel_cost, repair_totals.c.repair_cost
+    ).outerjoin(
+        repair_totals, repair_totals.c.car_id == Car.car_id
+    ).filter(
+        Car.date_sold >= today - timedelta(days=30)
+    ).all()
+
+    profits = []
+    roi_values = []
+    for sale_price, purchase_price, refuel_cost, repair_cost in rows:
+        # Same arithmetic as Car.total_investment and Car.profit
+        investment = float(purchase_price or 0) + float(repair_cost or 0) + float(refuel_cost or 0)
+        if not sale_price:
+            continue
+        profit = float(sale_price) - investment
+        profits.append(profit)
+        if investment > 0:
+            roi_values.append(profit / investment * 100)
+
+    return {
+        'total_profit': sum(profits),
+        'avg_roi': sum(roi_values) / len(roi_values) if roi_values else 0,
+        'avg_profit': sum(profits) / len(profits) if profits else 0
+    }
+
+
+def _stand_stats(today):
+    """Unsold cars per stand and their average days on stand, oldest stands first"""
+    rows = db.session.query(
+        Stand.stand_id, Stand.stand_name, Car.date_added_to_stand, func.count(Car.car_id)
+    ).join(
+        Car, Car.stand_id == Stand.stand_id
+    ).filter(
+        Car.date_sold == None
+    ).group_by(
+        Stand.stand_id, Stand.stand_name, Car.date_added_to_stand
+    ).order_by(Stand.stand_name)
+
+    stands = {}
+    for stand_id, stand_name, date_added_to_stand, count in rows:
+        stats = stands.setdefault(stand_id, {'stand_name': stand_name, 'total_cars': 0, 'total_age': 0})
+        stats['total_cars'] += count
+        if date_added_to_stand:
+            stats['total_age'] += (today - date_added_to_stand).days * count
+
+    stands_with_stats = [{
+        'stand_id': stand_id,
+        'stand_name': stats['stand_name'],
+        'total_cars': stats['total_cars'],
+        'avg_age': round(stats['total_age'] / stats['total_cars'])
+    } for stand_id, stats in stands.items()]
+    stands_with_stats.sort(key=lambda x: x['avg_age'], reverse=True)
+    return stands_with_stats
+
+
+def _recent_repairs():
+    """Last 10 completed repairs, with their duration in days"""
+    query = RECENT_REPAIR_ROW.query().join(
+        Car, Car.car_id == Repair.car_id
+    ).outerjoin(
+        RepairProvider, RepairProvider.provider_id == Repair.provider_id
+    ).filter(
+        Repair.end_date != None
+    ).order_by(Repair.end_date.desc()).limit(10)
+
+    return [
+        dict(row._asdict(), duration=(row.end_date - row.start_date).days)
+        for row in RECENT_REPAIR_ROW.rows(query)
+    ]
+
+
+def build_dashboard_snapshot(today=None):
+    """
+    Compute the dashboard metrics
+
+    Args:
+        today (date, optional): Day to measure ages from, defaults to today
+
+    Returns:
+        DashboardSnapshot: The computed metrics
+    """
+    today = today or datetime.now().date()
+
+    stand_aging_threshold_days = Setting.get_setting('stand_aging_threshold_days', 180, 'int')
+    status_inactivity_threshold_days = Setting.get_setting('status_inactivity_threshold_days', 30, 'int')
+    enable_status_warnings = Setting.get_setting('enable_status_warnings', True, 'bool')
+
+    metrics = {
+        'stand_aging_threshold_days': stand_aging_threshold_days,
+        'status_inactivity_threshold_days': status_inactivity_threshold_days,
+        'enable_status_warnings': enable_status_warnings,
+        'avg_recon_time': _avg_recon_time(today),
+        'stands_with_stats': _stand_stats(today),
+        'recent_repairs': _recent_repairs()
+    }
+    # Inventory and 30-day sales headline numbers are running totals
+    metrics.update(get_kpi_counters(today))
+    metrics.update(_aging_counts(today, stand_aging_threshold_days, status_inactivity_threshold_days,
+                                 enable_status_warnings))
+    metrics.update(_recent_sales_profit(today))
+
+    # Top 5 cars waiting longest for repair
+    metrics['cars_waiting_repair'] = WAITING_CAR_ROW.rows(WAITING_CAR_ROW.query().filter(
+        Car.repair_status == 'Waiting for Repairs'
+    ).order_by(Car.date_bought).limit(5))
+
+    # Top 5 cars on stand the longest
+    metrics['cars_on_stand_longest'] = STAND_CAR_ROW.rows(STAND_CAR_ROW.query().outerjoin(
+        Stand, Stand.stand_id == Car.stand_id
+    ).filter(
+        Car.repair_status == 'On Display',
+        Car.date_sold == None
+    ).order_by(Car.date_added_to_stand).limit(5))
+
+    return DashboardSnapshot(metrics, today)
+
+
+# Built snapshots per engine: engine -> (snapshot, monotonic build time)
+_snapshots = weakref.WeakKeyDictionary()
+# Bumped on every invalidation so a build that raced with a commit is discarded
+_generation = 0
+_snapshots_lock = Lock()
+
+
+def invalidate_dashboard_snapshot():
+    """Drop cached snapshots so the next dashboard view recomputes them"""
+    global _generation
+    with _snapshots_lock:
+        _generation += 1
+        _snapshots.clear()
+
+
+def get_dashboard_snapshot():
+    """
+    Get the dashboard metrics, reusing a snapshot built in the last DASHBOARD_CACHE_TTL seconds
+
+    Returns:
+        DashboardSnapshot: The current metrics
+    """
+    ttl = current_app.config.get('DASHBOARD_CACHE_TTL', 60)
+    now = time.monotonic()
+    today = datetime.now().date()
+    engine = db.session.get_bind()
+
+    with _snapshots_lock:
+        cached = _snapshots.get(engine)
+        generation = _generation
+    if cached is not None and now - cached[1] < ttl and cached[0].built_on == today:
+        return cached[0]
+
+    snapshot = build_dashboard_snapshot(today)
+    with _snapshots_lock:
+        if _generation == generation:
+            _snapshots[engine] = (snapshot, now)
+    return snapshot
+
+
+invalidate_on_commit('dashboard', SNAPSHOT_MODELS, lambda written: invalidate_dashboard_snapshot())
@@ -0,0 +1,166 @@
+"""
+Read-only reporting connection for the Car Repair and Sales Tracking application.
+
+Reports scan whole tables while interactive pages write cars, repairs and sales.
+This module lets those reads use a separate engine:
+
+1. A replica database when ``REPORTING_DATABASE_URL`` is set
+2. Otherwise, for a file-based SQLite database with ``REPORTING_READ_ONLY``
+   enabled, a read-only ``mode=ro`` URI connection to the same file with its
+   own pool
+
+Code running inside ``reporting_bind()`` reads through that engine. Flushes
+still go to the primary engine, so a report that repairs data keeps working:
+once a session has changes the reporting engine cannot see yet (pending or
+flushed but not committed), its reads stay on the primary until it commits
+or rolls back.
+When no reporting engine is configured everything uses the primary engine.
+"""
+
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import create_engine, event, orm
+from sqlalchemy.engine import make_url
+from app.utils.db_tuning import build_engine_options, is_file_sqlite, register_sqlite_pragmas
+
+# Whether the current request/thread should read from the reporting engine
+_use_reporting_bind = ContextVar('use_reporting_bind', default=False)
+
+
+@contextmanager
+def reporting_bind():
+    """
+    Route session reads made inside the block to the reporting engine
+    """
+    token = push_reporting_bind()
+    try:
+        yield
+    finally:
+        pop_reporting_bind(token)
+
+
+def push_reporting_bind():
+    """
+    Start routing reads to the reporting engine until pop_reporting_bind()
+
+    Returns:
+        Token to pass to pop_reporting_bind()
+    """
+    return _use_reporting_bind.set(True)
+
+
+def pop_reporting_bind(token):
+    """
+    Restore the routing in effect before the matching push_reporting_bind()
+    """
+    _use_reporting_bind.reset(token)
+
+
+def on_reporting_bind(func):
+    """
+    Decorator running a function inside reporting_bind()
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with reporting_bind():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class RoutingSession(SignallingSession):
+    """
+    Session sending reads to the reporting engine while reporting_bind() is active
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        # SQLAlchemy 1.4's scoped_session passes extra keyword arguments that
+        # SignallingSession.get_bind() does not accept
+        if _use_reporting_bind.get() and not self._flushing and not self.has_uncommitted_writes():
+            engine = self.app.extensions.get('reporting_engine')
+            if engine is not None:
+                return engine
+
+        return super().get_bind(mapper, clause)
+
+    def has_uncommitted_writes(self):
+        """
+        Whether the session holds changes only the primary engine can see
+        """
+        return self.info.get(_WROTE_KEY, False) or bool(self.new or self.deleted or self.dirty)
+
+
+# session.info key set by a flush and cleared when its transaction ends
+_WROTE_KEY = 'wrote_to_primary'
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _note_flush(session, flush_context):
+    session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+@event.listens_for(RoutingSession, 'after_rollback')
+def _clear_flush(session):
+    session.info.pop(_WROTE_KEY, None)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """
+    Flask-SQLAlchemy extension whose sessions honour reporting_bind()
+    """
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+def build_reporting_uri(config, root_path=''):
+    """
+    Work out the database URI for the reporting engine
+
+    Args:
+        config: Flask config mapping
+        root_path (str): Directory relative SQLite paths are resolved against
+
+    Returns:
+        str or None: Replica URL, read-only SQLite URI, or None when disabled
+    """
+    if config.get('REPORTING_DATABASE_URL'):
+        return config['REPORTING_DATABASE_URL']
+
+    uri = config.get('SQLALCHEMY_DATABASE_URI')
+    if not config.get('REPORTING_READ_ONLY') or not uri or not is_file_sqlite(uri):
+        return None
+
+    # Resolve relative paths the same way Flask-SQLAlchemy does for the primary
+    path = os.path.join(root_path, make_url(uri).database)
+    return f"sqlite:///file:{path}?mode=ro&uri=true"
+
+
+def configure_reporting_bind(app):
+    """
+    Create (or replace) the application's reporting engine from its config
+
+    Args:
+        app: Flask application
+    """
+    previous = app.extensions.pop('reporting_engine', None)
+    if previous is not None:
+        previous.dispose()
+
+    uri = build_reporting_uri(app.config, app.root_path)
+    if uri is None:
+        return
+
+    engine = create_engine(uri, **build_engine_options(app.config, uri))
+
+    # journal_mode is a property of the database file and cannot be set read-only
+    pragmas = {
+        name: value for name, value in (app.config.get('SQLITE_PRAGMAS') or {}).items()
+        if name != 'journal_mode'
+    }
+    register_sqlite_pragmas(engine, pragmas)
+
+    app.extensions['reporting_engine'] = engine
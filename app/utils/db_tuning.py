@@ -0,0 +1,113 @@
+"""
+Database engine tuning for the Car Repair and Sales Tracking application.
+
+This module provides:
+1. Connection pool settings for file-based SQLite and external databases
+2. A ``connect`` event listener applying SQLite PRAGMAs to every new connection
+
+The profile is driven by configuration (``SQLITE_PRAGMAS`` and ``DB_POOL_*``),
+so development and testing keep SQLAlchemy's stock behaviour while production
+runs SQLite in WAL mode, where readers no longer block writers.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+def is_file_sqlite(uri):
+    """
+    Check whether a database URI points at an on-disk SQLite database
+
+    Args:
+        uri (str): SQLAlchemy database URI
+
+    Returns:
+        bool: True for a file-based SQLite URI, False for in-memory or other backends
+    """
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def build_engine_options(config, uri=None):
+    """
+    Build SQLAlchemy engine options for the configured pool settings
+
+    Args:
+        config: Flask config mapping
+        uri (str, optional): Database URI, defaults to SQLALCHEMY_DATABASE_URI
+
+    Returns:
+        dict: Keyword arguments for create_engine (empty when pooling is not configured)
+    """
+    uri = uri or config.get('SQLALCHEMY_DATABASE_URI')
+    pool_size = config.get('DB_POOL_SIZE')
+    if not uri or not pool_size:
+        return {}
+
+    options = {
+        'pool_size': pool_size,
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+    }
+
+    if make_url(uri).get_backend_name() == 'sqlite':
+        # In-memory databases must stay on Flask-SQLAlchemy's StaticPool
+        if not is_file_sqlite(uri):
+            return {}
+
+        # SQLAlchemy 1.4 uses NullPool for file databases, which reopens the
+        # file (and re-runs the PRAGMAs) on every checkout
+        busy_timeout = config.get('SQLITE_PRAGMAS', {}).get('busy_timeout', 5000)
+        options['poolclass'] = QueuePool
+        options['connect_args'] = {
+            'timeout': busy_timeout / 1000.0,
+            'check_same_thread': False
+        }
+    else:
+        # Drop connections the server closed and recycle long-lived ones
+        options['pool_pre_ping'] = True
+        options['pool_recycle'] = config.get('DB_POOL_RECYCLE', 1800)
+
+    return options
+
+
+def register_sqlite_pragmas(engine, pragmas):
+    """
+    Apply PRAGMAs to every new DBAPI connection opened by an engine
+
+    Args:
+        engine: SQLAlchemy engine
+        pragmas (dict): PRAGMA names mapped to values, applied in order
+    """
+    if not pragmas or engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def configure_database(app, db):
+    """
+    Apply the configured engine profile to the application's database
+
+    Must run after db.init_app(app). Explicit SQLALCHEMY_ENGINE_OPTIONS
+    entries take precedence over the generated pool settings.
+
+    Args:
+        app: Flask application
+        db: Flask-SQLAlchemy extension
+    """
+    options = build_engine_options(app.config)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if pragmas and is_file_sqlite(app.config['SQLALCHEMY_DATABASE_URI']):
+        register_sqlite_pragmas(db.get_engine(app), pragmas)
@@ -8,7 +8,7 @@ from flask import current_app
 from app.utils.errors import NotFoundError
 from app import db
 
-def safe_get_or_404(model_class, id, description=None):
+def safe_get_or_404(model_class, id, description=None, options=None):
     """
     Safely retrieve a resource by ID or raise a proper 404 error.
     This is a wrapper around SQLAlchemy's get_or_404 to provide consistent 
@@ -18,6 +18,7 @@ def safe_get_or_404(model_class, id, description=None):
         model_class: SQLAlchemy model class
         id: The ID to look up
         description: Custom error message, defaults to "Resource not found"
+        options: Optional SQLAlchemy loader options (see app.utils.loaders)
         
     Returns:
         The found object
@@ -30,9 +31,10 @@ def safe_get_or_404(model_class, id, description=None):
     primary_key = model_class.__mapper__.primary_key[0].name
     
     # Build a query to get the record
-    result = db.session.execute(
-        db.select(model_class).filter(getattr(model_class, primary_key) == id)
-    ).scalar_one_or_none()
+    query = db.select(model_class).filter(getattr(model_class, primary_key) == id)
+    if options:
+        query = query.options(*options)
+    result = db.session.execute(query).scalar_one_or_none()
     
     if result is None:
         if description is None:
@@ -5,19 +5,30 @@ These functions handle the parsing and validation of imported data.
 """
 
 import pandas as pd
+import numpy as np
 import logging
+from flask import current_app
 from app import db
 from werkzeug.datastructures import FileStorage
-from typing import Dict, List, Any, Union
+from typing import Callable, Dict, List, Any, Union
 from datetime import datetime
 from app.models.car import Car, VehicleMake, VehicleModel, VehicleColor
 from app.models.dealer import Dealer
+from app.models.sale import Sale
 from app.models.stand import Stand
+from app.utils.autocomplete import invalidate_autocomplete
+from app.utils.kpi_counters import reconcile_kpi_counters
+from app.utils.report_buckets import invalidate_report_buckets
+from app.utils.report_snapshots import bump_report_data_version
 from sqlalchemy.exc import SQLAlchemyError
 import re
 import os
 import io
-from openpyxl import Workbook
+import json
+import hashlib
+from itertools import islice
+from werkzeug.utils import secure_filename
+from openpyxl import Workbook, load_workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.datavalidation import DataValidation
@@ -25,437 +36,626 @@ from openpyxl.comments import Comment
 from io import BytesIO
 
 
-def import_cars(file: FileStorage) -> Dict[str, Any]:
+# Status values accepted from the 'Status' column of a car import
+VALID_IMPORT_STATUSES = ['Available', 'In Repairs', 'Sold', 'Reserved']
+
+
+def _column(df: pd.DataFrame, name: str) -> pd.Series:
+    """Return a column, or an all-missing column if the file does not have it"""
+    if name in df.columns:
+        return df[name].astype(object)
+    return pd.Series(np.nan, index=df.index, dtype=object)
+
+
+def _text(df: pd.DataFrame, name: str) -> pd.Series:
+    """Stripped text values of a column; missing and blank cells are NaN"""
+    values = _column(df, name)
+    text = values.astype(str).str.strip().where(values.notna())
+    return text.where(text != '')
+
+
+def _number(df: pd.DataFrame, name: str):
+    """Return (numbers, invalid) where invalid marks filled cells that are not numbers"""
+    values = _column(df, name)
+    numbers = pd.to_numeric(values, errors='coerce')
+    return numbers, values.notna() & numbers.isna()
+
+
+def _date(df: pd.DataFrame, name: str):
+    """
+    Parse a date column holding 'YYYY-MM-DD' strings or spreadsheet dates
+
+    Returns:
+        tuple: (dates, invalid_text, other) where invalid_text marks strings
+        that are not dates and other marks filled cells of any other type
+    """
+    values = _column(df, name)
+    is_text = values.map(lambda value: isinstance(value, str))
+    is_datetime = values.map(lambda value: isinstance(value, datetime))
+    parsed = pd.to_datetime(values.where(is_text), format='%Y-%m-%d', errors='coerce')
+    parsed = parsed.where(is_text, pd.to_datetime(values.where(is_datetime), errors='coerce'))
+    dates = parsed.dt.date.astype(object).where(parsed.notna())
+    return dates, is_text & parsed.isna(), values.notna() & ~is_text & ~is_datetime
+
+
+def _sanitized(values: pd.Series, sanitize) -> pd.Series:
+    """Apply a name sanitizer once per distinct value"""
+    return values.map({value: sanitize(value) for value in values.dropna().unique()})
+
+
+def _first_error(error: pd.Series, mask: pd.Series, message) -> pd.Series:
+    """Set an error on rows that match mask and do not already have one"""
+    return error.mask(error.isna() & mask, message)
+
+
+def _load_car_import_lookups(load_licences: bool = True) -> Dict[str, Any]:
+    """
+    Load everything car rows are checked against, with one query per table
+
+    Args:
+        load_licences: Load every existing licence number; chunked imports
+            look up each chunk's licences with _existing_licences instead
+
+    Returns:
+        dict: licences (set), makes (lower name -> VehicleMake), models
+        ((lower name, make id) -> name), colours (set of lower names),
+        stands (lower name -> id) and default_stand_id
+    """
+    stands = Stand.query.order_by(Stand.stand_id).all()
+    licences = {licence for licence, in db.session.query(Car.licence_number)} if load_licences else set()
+    return {
+        'licences': licences,
+        'makes': {make.name.lower(): make for make in VehicleMake.query.all()},
+        'models': {(name.lower(), make_id): name
+                   for name, make_id in db.session.query(VehicleModel.name, VehicleModel.make_id)},
+        'colours': {name.lower() for name, in db.session.query(VehicleColor.name)},
+        'stands': {stand.stand_name.lower(): stand.stand_id for stand in stands},
+        'default_stand_id': stands[0].stand_id if stands else None,
+    }
+
+
+def _ensure_vehicle_data(makes: pd.Series, models: pd.Series, colours: pd.Series,
+                         lookups: Dict[str, Any]) -> pd.Series:
+    """
+    Create missing makes, models and colours in bulk
+
+    Args:
+        makes, models, colours: Sanitized names for the rows being imported
+        lookups: Lookups from _load_car_import_lookups, updated in place
+
+    Returns:
+        pd.Series: Make IDs for the rows
+    """
+    make_keys = makes.str.lower()
+    new_makes = makes[~make_keys.isin(lookups['makes'])].groupby(make_keys).first()
+    if len(new_makes):
+        db.session.bulk_insert_mappings(VehicleMake, [{'name': name} for name in new_makes])
+        for make in VehicleMake.query.filter(VehicleMake.name.in_(list(new_makes))):
+            lookups['makes'][make.name.lower()] = make
+    make_ids = make_keys.map({key: make.id for key, make in lookups['makes'].items()})
+
+    model_keys = pd.Series(list(zip(models.str.lower(), make_ids)), index=models.index)
+    new_models = models[~model_keys.isin(lookups['models'])].groupby(model_keys).first()
+    if len(new_models):
+        db.session.bulk_insert_mappings(VehicleModel, [
+            {'name': name, 'make_id': int(make_id)} for (_, make_id), name in new_models.items()
+        ])
+        lookups['models'].update(new_models.to_dict())
+
+    colour_keys = colours.str.lower()
+    new_colours = colours[~colour_keys.isin(lookups['colours'])].groupby(colour_keys).first()
+    if len(new_colours):
+        db.session.bulk_insert_mappings(VehicleColor, [{'name': name} for name in new_colours])
+        lookups['colours'].update(new_colours.index)
+
+    return make_ids
+
+
+def _prepare_car_rows(df: pd.DataFrame, lookups: Dict[str, Any]):
+    """
+    Validate and normalise a frame of car rows with column operations
+
+    Row numbers in messages are the spreadsheet rows (frame index + 2).
+    Makes, models and colours used by valid rows are created as needed and
+    imported licence numbers are added to lookups['licences'].
+
+    Returns:
+        tuple: (records, row_numbers, errors, warnings) where records are
+        Car column mappings for the valid rows
+    """
+    today = datetime.now().date()
+    current_year = today.year
+    row_numbers = pd.Series(df.index + 2, index=df.index)
+    row_labels = 'Row ' + row_numbers.astype(str)
+    error = pd.Series(np.nan, index=df.index, dtype=object)
+    row_warnings = pd.Series('', index=df.index, dtype=object)
+
+    def warn(mask, message):
+        nonlocal row_warnings
+        separator = np.where(row_warnings == '', '', '; ')
+        row_warnings = row_warnings.mask(mask, row_warnings + separator + message)
+
+    # Required identifiers; in-file duplicates are checked once all other checks ran
+    licence = _text(df, 'Licence Number').str.upper()
+    existing = licence.isin(lookups['licences'])
+    error = _first_error(error, licence.isna(), "Licence Number is required. Skipping.")
+    error = _first_error(error, existing,
+                         "Car with licence number '" + licence + "' already exists. Skipping.")
+
+    registration = _text(df, 'Registration Number').str.upper()
+    warn(registration.isna(), "No Registration Number provided, using Licence Number")
+    registration = registration.fillna(licence)
+
+    make = _sanitized(_text(df, 'Make'), VehicleMake.sanitize_name)
+    error = _first_error(error, make.isna(), "Make is required. Skipping.")
+    model = _sanitized(_text(df, 'Model'), VehicleModel.sanitize_name)
+    error = _first_error(error, model.isna(), "Model is required. Skipping.")
+
+    year, year_invalid = _number(df, 'Year')
+    year = np.trunc(year).astype('Int64')
+    error = _first_error(error, _column(df, 'Year').isna(), "Year is required. Skipping.")
+    error = _first_error(error, year_invalid, "Year must be a valid number. Skipping.")
+    error = _first_error(
+        error, ((year < 1900) | (year > current_year + 1)).fillna(False),
+        "Year " + year.astype(str) + f" is invalid (must be between 1900 and {current_year + 1}). Skipping."
+    )
+
+    colour = _sanitized(_text(df, 'Colour'), VehicleColor.sanitize_name)
+    error = _first_error(error, colour.isna(), "Colour is required. Skipping.")
+
+    dekra_condition = _text(df, 'Dekra Condition')
+    warn(dekra_condition.isna(), "No dekra condition provided, using 'Unknown'")
+    dekra_condition = dekra_condition.fillna('Unknown')
+
+    purchase_price, purchase_invalid = _number(df, 'Purchase Price')
+    error = _first_error(error, _column(df, 'Purchase Price').isna(), "Purchase Price is required. Skipping.")
+    error = _first_error(error, purchase_invalid, "Purchase price must be a valid number. Skipping.")
+    error = _first_error(error, purchase_price < 0, "Purchase price cannot be negative. Skipping.")
+
+    # Rows that pass every check except the in-file duplicate check; later
+    # rows repeating one of their licence numbers are duplicates
+    passing = error.isna()
+    first_passing = row_numbers[passing].groupby(licence[passing]).min()
+    duplicate = passing & (row_numbers > licence.map(first_passing))
+    error = error.mask(duplicate, "Car with licence number '" + licence + "' already exists. Skipping.")
+
+    recon_cost, recon_invalid = _number(df, 'Recon Cost')
+    warn(recon_cost < 0, "Negative recon cost, using 0.0")
+    warn(recon_invalid, "Invalid recon cost format, using 0.0")
+    recon_cost = recon_cost.mask((recon_cost < 0) | recon_invalid, 0.0)
+    recon_or_zero = recon_cost.fillna(0.0)
+
+    final_cost_price, final_invalid = _number(df, 'Final Cost Price')
+    calculated = (purchase_price + recon_or_zero).astype(str)
+    final_missing = _column(df, 'Final Cost Price').isna()
+    warn(final_cost_price < 0, "Negative final cost price, calculating as purchase + recon = " + calculated)
+    warn(final_invalid, "Invalid final cost price format, calculating as purchase + recon = " + calculated)
+    warn(final_missing, "No final cost price provided, calculating as purchase + recon = " + calculated)
+    final_cost_price = final_cost_price.mask((final_cost_price < 0) | final_invalid | final_missing,
+                                             purchase_price + recon_or_zero)
+
+    sell_price, sell_invalid = _number(df, 'Sell Price')
+    warn(sell_invalid, "Invalid sell price format, ignoring")
+
+    date_bought, bought_invalid, bought_other = _date(df, 'Date Bought')
+    warn(bought_invalid | bought_other, "Invalid date bought format, using today's date")
+    warn(_column(df, 'Date Bought').isna(), "No date bought provided, using today's date")
+    date_bought = date_bought.fillna(today)
+
+    date_added_to_stand, added_invalid, _ = _date(df, 'Date Added To Stand')
+    warn(added_invalid, "Invalid date added to stand format, leaving empty")
+
+    # A date sold or a sale price (even a rejected negative one) marks the car as sold
+    date_sold, sold_invalid, _ = _date(df, 'Date Sold')
+    warn(sold_invalid, "Invalid date sold format, treating as not sold")
+    sale_price, sale_invalid = _number(df, 'Sale Price')
+    warn(sale_price < 0, "Negative sale price, treating as not sold")
+    warn(sale_invalid, "Invalid sale price format, treating as not sold")
+    sold = date_sold.notna() | sale_price.notna()
+    warn(sold & date_sold.isna(), "Sale price provided without date sold, marking as sold with no date")
+    warn(sold & sale_price.isna(), "Date sold provided without sale price, marking as sold with no price")
+    sale_price = sale_price.where(sale_price >= 0, sell_price.where(sell_price >= 0)).where(sold)
+
+    refuel_cost, refuel_invalid = _number(df, 'Refuel Cost')
+    warn(refuel_cost < 0, "Negative refuel cost, using 0.0")
+    warn(refuel_invalid, "Invalid refuel cost format, using 0.0")
+    refuel_cost = refuel_cost.mask(refuel_cost < 0, 0.0).fillna(0.0)
+
+    current_location = _text(df, 'Current Location')
+    warn(current_location.isna(), "No current location provided, using 'Showroom'")
+    current_location = current_location.fillna('Showroom')
+
+    status = _text(df, 'Status')
+    status_valid = status.isin(VALID_IMPORT_STATUSES)
+    waiting = status.isna() & (recon_cost > 0)
+    warn(~sold & status.notna() & ~status_valid, "Invalid status '" + status + "', using 'Available'")
+    warn(~sold & waiting, "Car has recon cost but no status provided, using 'Waiting for Repairs'")
+    warn(~sold & status.isna() & ~waiting, "No status provided, using 'Available'")
+    repair_status = status.where(status_valid, 'Available').mask(waiting, 'Waiting for Repairs').mask(sold, 'Sold')
+
+    source = _text(df, 'Source')
+    warn(source.isna(), "No source provided, using 'Import'")
+    source = source.fillna('Import')
+
+    # Stand names that do not match a stand fall back to the first stand
+    default_stand_id = lookups['default_stand_id']
+    stand = _text(df, 'Stand')
+    stand_id = stand.str.lower().map(lookups['stands'])
+    if default_stand_id:
+        warn(stand.isna(), "No stand provided, using 'Unknown'")
+        stand_id = stand_id.fillna(default_stand_id)
+    stand_id = stand_id.astype('Int64')
+
+    valid = error.isna()
+    make_ids = _ensure_vehicle_data(make[valid], model[valid], colour[valid], lookups)
+    vehicle_make = make.str.lower().map({key: obj.name for key, obj in lookups['makes'].items()})
+    vehicle_model = pd.Series(list(zip(model.str.lower(), make_ids.reindex(df.index))),
+                              index=df.index).map(lookups['models'])
+
+    vehicle_name = _text(df, 'Vehicle Name')
+    generated_name = year.astype(str) + ' ' + vehicle_make + ' ' + vehicle_model
+    warn(vehicle_name.isna(), "No vehicle name provided, using '" + generated_name + "'")
+    vehicle_name = vehicle_name.fillna(generated_name)
+
+    records = pd.DataFrame({
+        'licence_number': licence,
+        'registration_number': registration,
+        'vehicle_make': vehicle_make,
+        'vehicle_model': vehicle_model,
+        'year': year,
+        'colour': colour,
+        'dekra_condition': dekra_condition,
+        'purchase_price': purchase_price,
+        'recon_cost': recon_cost,
+        'final_cost_price': final_cost_price,
+        'sale_price': sale_price,
+        'date_bought': date_bought,
+        'date_added_to_stand': date_added_to_stand,
+        'date_sold': date_sold.where(sold),
+        'refuel_cost': refuel_cost,
+        'current_location': current_location,
+        'repair_status': repair_status,
+        'source': source,
+        'stand_id': stand_id,
+        'vehicle_name': vehicle_name,
+    })[valid].astype(object)
+    records = records.where(records.notna(), None).to_dict('records')
+    lookups['licences'].update(licence[valid])
+
+    errors = (row_labels + ': ' + error)[~valid].tolist()
+    warned = valid & (row_warnings != '')
+    warnings = (row_labels + ' imported with warnings: ' + row_warnings)[warned].tolist()
+    return records, row_numbers[valid].tolist(), errors, warnings
+
+
+def _existing_licences(licences) -> set:
+    """Return which of the given licence numbers are already in the cars table"""
+    licences = list(licences)
+    existing = set()
+    for start in range(0, len(licences), 500):
+        existing.update(licence for licence, in db.session.query(Car.licence_number).filter(
+            Car.licence_number.in_(licences[start:start + 500])
+        ))
+    return existing
+
+
+def _insert_batches(model, records: List[Dict[str, Any]], row_numbers: List[int], batch_size: int = None,
+                    after_insert: Callable = None):
+    """
+    Insert mappings for a model in batches, committing each batch
+
+    Args:
+        model: Model class to insert
+        records: Column mappings
+        row_numbers: Spreadsheet row number of each mapping
+        batch_size: Rows per transaction, defaults to IMPORT_BATCH_SIZE
+        after_insert: Called with each batch before it commits, for
+            set-based updates that belong in the same transaction
+
+    Returns:
+        tuple: (success_count, fail_count, errors)
+    """
+    batch_size = batch_size or current_app.config.get('IMPORT_BATCH_SIZE', 1000)
+    success_count = fail_count = 0
+    errors = []
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        try:
+            db.session.bulk_insert_mappings(model, batch)
+            if after_insert:
+                after_insert(batch)
+            db.session.commit()
+            success_count += len(batch)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            fail_count += len(batch)
+            first, last = row_numbers[start], row_numbers[start + len(batch) - 1]
+            errors.append(f"Rows {first}-{last}: Error saving data: {str(e)}")
+            logging.error(f"Error saving rows {first}-{last}: {str(e)}")
+    return success_count, fail_count, errors
+
+
+def _refresh_after_bulk_import():
+    """
+    Bring derived data up to date after bulk inserts
+
+    Bulk inserts skip the ORM events that normally refresh the autocomplete
+    indexes, the dashboard snapshot, the KPI counters, the report data
+    version and the report buckets.
+    """
+    # Imported here: the dashboard imports the reports, some of which import this module
+    from app.utils.dashboard import invalidate_dashboard_snapshot
+
+    invalidate_autocomplete()
+    invalidate_dashboard_snapshot()
+    reconcile_kpi_counters()
+    bump_report_data_version()
+    invalidate_report_buckets()
+    db.session.commit()
+
+
+def _import_car_frame(df: pd.DataFrame, lookups: Dict[str, Any], result: Dict[str, Any],
+                      reported_stands: set, batch_size: int = None, progress: Callable = None) -> None:
+    """
+    Validate and insert one frame of car rows, adding its outcome to result
+
+    Args:
+        df: Rows to import, indexed by data row position
+        lookups: Lookups from _load_car_import_lookups
+        result: Running import result, updated in place
+        reported_stands: Lower-cased unknown stand names already warned about
+        batch_size: Rows per insert transaction
+        progress: Called with result after validation and after the inserts
+    """
+    # Stand names that match no stand are reported once each
+    if lookups['default_stand_id']:
+        stand_names = _text(df, 'Stand').dropna()
+        for name in stand_names[~stand_names.str.lower().isin(lookups['stands'])]:
+            if name.lower() not in reported_stands:
+                reported_stands.add(name.lower())
+                result['warnings'].append(f"Stand '{name}' not found, using default stand")
+
+    records, row_numbers, row_errors, row_warnings = _prepare_car_rows(df, lookups)
+    result['failed'] += len(row_errors)
+    result['errors'].extend(row_errors)
+    result['warnings'].extend(row_warnings)
+    if progress:
+        progress(result)
+
+    # New makes, models and colours are saved even if a car batch fails
+    db.session.commit()
+
+    inserted, failed, batch_errors = _insert_batches(Car, records, row_numbers, batch_size)
+    result['success'] += inserted
+    result['failed'] += failed
+    result['errors'].extend(batch_errors)
+    if progress:
+        progress(result)
+
+
+def _stream_size(file: FileStorage) -> int:
+    """Size of an uploaded file in bytes, or 0 if its stream cannot seek"""
+    stream = file.stream
+    try:
+        position = stream.tell()
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell()
+        stream.seek(position)
+        return size
+    except (AttributeError, OSError, ValueError):
+        return 0
+
+
+def _stream_digest(file: FileStorage) -> Union[str, None]:
+    """SHA-1 of an uploaded file's contents, or None if its stream cannot seek"""
+    stream = file.stream
+    digest = hashlib.sha1()
+    try:
+        position = stream.tell()
+        for block in iter(lambda: stream.read(1024 * 1024), b''):
+            digest.update(block if isinstance(block, bytes) else block.encode())
+        stream.seek(position)
+    except (AttributeError, OSError, ValueError):
+        return None
+    return digest.hexdigest()
+
+
+def _iter_csv_chunks(stream, chunk_size: int, skip_rows: int):
+    """Yield frames of chunk_size CSV rows, indexed by data row position"""
+    start = skip_rows
+    for chunk in pd.read_csv(stream, chunksize=chunk_size, skiprows=range(1, skip_rows + 1)):
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+
+def _iter_xlsx_chunks(stream, chunk_size: int, skip_rows: int):
+    """Yield frames of chunk_size worksheet rows, streamed with openpyxl's read-only mode"""
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        # Blank rows are skipped but keep their place in the row numbering
+        rows = ((position, row) for position, row in enumerate(islice(rows, skip_rows, None), skip_rows)
+                if any(value is not None for value in row))
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            positions = [position for position, _ in chunk]
+            yield pd.DataFrame([row for _, row in chunk], columns=header, index=positions)
+    finally:
+        workbook.close()
+
+
+def _checkpoint_path(filename: str, digest: str) -> str:
+    """Checkpoint file for an upload, keyed by its name and a digest of its contents"""
+    directory = current_app.config.get('IMPORT_CHECKPOINT_DIR') or \
+        os.path.join(current_app.instance_path, 'import_checkpoints')
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"cars-{secure_filename(filename)}-{digest[:16]}.json")
+
+
+def _read_checkpoint(path: str) -> Dict[str, Any]:
+    try:
+        with open(path) as checkpoint:
+            return json.load(checkpoint)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_checkpoint(path: str, state: Dict[str, Any]) -> None:
+    """Replace the checkpoint atomically so a crash never leaves half a file"""
+    with open(path + '.tmp', 'w') as checkpoint:
+        json.dump(state, checkpoint)
+    os.replace(path + '.tmp', path)
+
+
+def _import_car_chunks(file: FileStorage, file_ext: str, chunk_size: int,
+                       result: Dict[str, Any], progress: Callable = None) -> None:
+    """
+    Import a large car file chunk by chunk with bounded memory
+
+    Each chunk is read, validated and inserted in its own transaction, and a
+    checkpoint recording the rows done is written after it commits. If the
+    import stops, uploading the same file again resumes after the last
+    committed chunk; the checkpoint is removed once the file is done.
+    Checkpoints are keyed by the file's contents, so a corrected file with
+    the same name starts from the top; uploads that cannot be read twice
+    are imported without one.
+    """
+    digest = _stream_digest(file)
+    path = _checkpoint_path(file.filename, digest) if digest else None
+    state = _read_checkpoint(path) if path else {}
+    if state.get('digest') != digest:
+        state = {}
+    next_row = state.get('next_row', 0)
+    result['success'] = state.get('success', 0)
+    result['failed'] = state.get('failed', 0)
+    if next_row:
+        result['warnings'].append(f"Resuming import from row {next_row + 2}")
+    if progress:
+        progress(result)
+
+    max_messages = current_app.config.get('IMPORT_MAX_MESSAGES', 1000)
+    omitted = {'errors': state.get('errors_omitted', 0), 'warnings': state.get('warnings_omitted', 0)}
+    lookups = _load_car_import_lookups(load_licences=False)
+    reported_stands = set()
+
+    if file_ext == 'csv':
+        chunks = _iter_csv_chunks(file.stream, chunk_size, next_row)
+    else:
+        chunks = _iter_xlsx_chunks(file.stream, chunk_size, next_row)
+
+    for chunk in chunks:
+        # Rows committed from earlier chunks are in the table, so looking up
+        # this chunk's licences also catches repeats across chunks
+        lookups['licences'] = _existing_licences(_text(chunk, 'Licence Number').str.upper().dropna().unique())
+        _import_car_frame(chunk, lookups, result, reported_stands, batch_size=len(chunk), progress=progress)
+
+        # Keep at most max_messages errors and warnings; counts stay exact
+        for key in ('errors', 'warnings'):
+            omitted[key] += max(len(result[key]) - max_messages, 0)
+            del result[key][max_messages:]
+
+        next_row = int(chunk.index[-1]) + 1
+        if path is not None:
+            _write_checkpoint(path, {
+                'filename': file.filename,
+                'digest': digest,
+                'next_row': next_row,
+                'success': result['success'],
+                'failed': result['failed'],
+                'errors_omitted': omitted['errors'],
+                'warnings_omitted': omitted['warnings'],
+            })
+
+    if next_row == 0:
+        result['errors'].append("File contains no data")
+    for key in ('errors', 'warnings'):
+        if omitted[key]:
+            result[key].append(f"... {omitted[key]} more {key} not listed")
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def import_cars(file: FileStorage, chunk_size: int = None, progress: Callable = None) -> Dict[str, Any]:
     """
     Import cars from a CSV or Excel file.
     
+    Rows are validated with column operations against lookups loaded up
+    front, and valid cars are bulk-inserted in batches. Files larger than
+    IMPORT_STREAM_THRESHOLD bytes (or any file, when chunk_size is given)
+    are streamed in chunks of IMPORT_CHUNK_SIZE rows instead of being read
+    whole; see _import_car_chunks.
+    
     Args:
         file: Uploaded file object
+        chunk_size: Rows per chunk, to force a chunked import
+        progress: Called with the running result as rows are processed
         
     Returns:
         dict: Results of the import with success and failure counts
     """
     logging.info("Car import started")
-    success_count = 0
-    fail_count = 0
-    errors = []
-    warnings = []
+    result = {"success": 0, "failed": 0, "errors": [], "warnings": []}
     
     try:
         # Validate file format and read into DataFrame
         if not file or not file.filename:
-            errors.append("No file provided")
-            return {"success": 0, "failed": 0, "errors": errors, "warnings": warnings}
+            result["errors"].append("No file provided")
+            return result
         
         # Check file extension
         file_ext = os.path.splitext(file.filename)[1][1:].lower()
         if file_ext not in ['csv', 'xlsx']:
-            errors.append(f"Unsupported file format: {file_ext}. Please use CSV or Excel (.xlsx)")
-            return {"success": 0, "failed": 0, "errors": errors, "warnings": warnings}
+            result["errors"].append(f"Unsupported file format: {file_ext}. Please use CSV or Excel (.xlsx)")
+            return result
         
-        # Read file into DataFrame
-        try:
-            if file_ext == 'csv':
-                df = pd.read_csv(file.stream)
-            else:  # xlsx
-                df = pd.read_excel(file.stream)
-        except Exception as e:
-            errors.append(f"Error reading file: {str(e)}")
-            return {"success": 0, "failed": 0, "errors": errors, "warnings": warnings}
+        size = _stream_size(file)
+        if chunk_size is None and size > current_app.config.get('IMPORT_STREAM_THRESHOLD', 20 * 1024 * 1024):
+            chunk_size = current_app.config.get('IMPORT_CHUNK_SIZE', 5000)
         
-        # Check if DataFrame is empty
-        if df.empty:
-            errors.append("File contains no data")
-            return {"success": 0, "failed": 0, "errors": errors, "warnings": warnings}
-        
-        # Get existing data for relationships to avoid duplicates
-        makes_dict = {m.name.lower(): m for m in VehicleMake.query.all()}
-        models_dict = {(m.name.lower(), m.make_id): m for m in VehicleModel.query.all()}
-        colors_dict = {c.name.lower(): c for c in VehicleColor.query.all()}
-        stands_dict = {s.stand_name.lower(): s for s in Stand.query.all()}
-        
-        # Get a default stand for missing stand relationships
-        default_stand = Stand.query.first()
-        default_stand_id = default_stand.stand_id if default_stand else None
-        
-        # Pre-process input data to handle duplicates in relationships
-        # Especially for cases where multiple rows reference the same stand by name
-        stand_name_mapping = {}
-        
-        # First scan to identify and cache relationships
-        for index, row in df.iterrows():
-            # Create mappings for stand names
-            if 'Stand' in df.columns and not pd.isna(row.get('Stand')) and str(row.get('Stand')).strip():
-                stand_name = str(row.get('Stand')).strip().lower()
-                if stand_name not in stand_name_mapping:
-                    # Look for existing stand
-                    stand = next((s for s_name, s in stands_dict.items() if s_name == stand_name), None)
-                    if stand:
-                        stand_name_mapping[stand_name] = stand.stand_id
-                    elif default_stand_id:
-                        stand_name_mapping[stand_name] = default_stand_id
-                        warnings.append(f"Stand '{row.get('Stand')}' not found, using default stand")
-        
-        # Process each row
-        for index, row in df.iterrows():
-            row_data = {}
-            row_warnings = []
-            
-            # Extract values with validation
+        if chunk_size:
+            _import_car_chunks(file, file_ext, chunk_size, result, progress)
+        else:
+            # Read file into DataFrame
             try:
-                # Licence Number (required)
-                if 'Licence Number' in df.columns and not pd.isna(row.get('Licence Number')) and str(row.get('Licence Number')).strip():
-                    licence_number = str(row.get('Licence Number')).strip().upper()
-                    
-                    # Check for duplicate licence number
-                    existing_car = Car.query.filter_by(licence_number=licence_number).first()
-                    if existing_car:
-                        fail_count += 1
-                        errors.append(f"Row {index+2}: Car with licence number '{licence_number}' already exists. Skipping.")
-                        continue
-                    
-                    row_data['licence_number'] = licence_number
-                else:
-                    fail_count += 1
-                    errors.append(f"Row {index+2}: Licence Number is required. Skipping.")
-                    continue
-                
-                # Registration Number (required)
-                if 'Registration Number' in df.columns and not pd.isna(row.get('Registration Number')) and str(row.get('Registration Number')).strip():
-                    row_data['registration_number'] = str(row.get('Registration Number')).strip().upper()
-                else:
-                    row_data['registration_number'] = licence_number  # Use licence number if not provided
-                    row_warnings.append(f"No Registration Number provided, using Licence Number")
-                
-                # Make (required for vehicle name calculation)
-                if 'Make' in df.columns and not pd.isna(row.get('Make')) and str(row.get('Make')).strip():
-                    make_str = str(row.get('Make')).strip()
-                    
-                    # Handle Make relationship - find or create
-                    sanitized_make = VehicleMake.sanitize_name(make_str)
-                    make_obj = None
-                    
-                    # Look for existing make
-                    if sanitized_make.lower() in makes_dict:
-                        make_obj = makes_dict[sanitized_make.lower()]
-                    else:
-                        make_obj = VehicleMake(name=sanitized_make)
-                        db.session.add(make_obj)
-                        db.session.flush()  # Get ID without committing
-                        makes_dict[sanitized_make.lower()] = make_obj
-                    
-                    row_data['vehicle_make'] = make_obj.name
-                else:
-                    fail_count += 1
-                    errors.append(f"Row {index+2}: Make is required. Skipping.")
-                    continue
-                
-                # Model (required for vehicle name calculation)
-                if 'Model' in df.columns and not pd.isna(row.get('Model')) and str(row.get('Model')).strip():
-                    model_str = str(row.get('Model')).strip()
-                    
-                    # Handle Model relationship - find or create
-                    sanitized_model = VehicleModel.sanitize_name(model_str)
-                    model_obj = None
-                    
-                    # Look for existing model
-                    if (sanitized_model.lower(), make_obj.id) in models_dict:
-                        model_obj = models_dict[(sanitized_model.lower(), make_obj.id)]
-                    else:
-                        model_obj = VehicleModel(name=sanitized_model, make_id=make_obj.id)
-                        db.session.add(model_obj)
-                        db.session.flush()  # Get ID without committing
-                        models_dict[(sanitized_model.lower(), make_obj.id)] = model_obj
-                    
-                    row_data['vehicle_model'] = model_obj.name
-                else:
-                    fail_count += 1
-                    errors.append(f"Row {index+2}: Model is required. Skipping.")
-                    continue
-                
-                # Year (required for vehicle name calculation)
-                if 'Year' in df.columns and not pd.isna(row.get('Year')):
-                    try:
-                        year = int(row.get('Year'))
-                        # Basic year validation
-                        current_year = datetime.now().year
-                        if year < 1900 or year > current_year + 1:
-                            fail_count += 1
-                            errors.append(f"Row {index+2}: Year {year} is invalid (must be between 1900 and {current_year+1}). Skipping.")
-                            continue
-                        row_data['year'] = year
-                    except (ValueError, TypeError):
-                        fail_count += 1
-                        errors.append(f"Row {index+2}: Year must be a valid number. Skipping.")
-                        continue
-                else:
-                    fail_count += 1
-                    errors.append(f"Row {index+2}: Year is required. Skipping.")
-                    continue
-                
-                # Color (required)
-                if 'Colour' in df.columns and not pd.isna(row.get('Colour')) and str(row.get('Colour')).strip():
-                    color = str(row.get('Colour')).strip()
-                    
-                    # Handle Color relationship - find or create
-                    color_sanitized = VehicleColor.sanitize_name(color)
-                    color_obj = None
-                    
-                    # Look for existing color
-                    if color_sanitized.lower() in colors_dict:
-                        color_obj = colors_dict[color_sanitized.lower()]
-                    else:
-                        color_obj = VehicleColor(name=color_sanitized)
-                        db.session.add(color_obj)
-                        db.session.flush()  # Get ID without committing
-                        colors_dict[color_sanitized.lower()] = color_obj
-                    
-                    row_data['colour'] = color_sanitized
-                else:
-                    fail_count += 1
-                    errors.append(f"Row {index+2}: Colour is required. Skipping.")
-                    continue
-                
-                # Dekra condition (required)
-                if 'Dekra Condition' in df.columns and not pd.isna(row.get('Dekra Condition')) and str(row.get('Dekra Condition')).strip():
-                    row_data['dekra_condition'] = str(row.get('Dekra Condition')).strip()
-                else:
-                    row_data['dekra_condition'] = "Unknown"  # Changed from "Good" to "Unknown"
-                    row_warnings.append("No dekra condition provided, using 'Unknown'")
-                
-                # Purchase price (required)
-                if 'Purchase Price' in df.columns and not pd.isna(row.get('Purchase Price')):
-                    try:
-                        purchase_price = float(row.get('Purchase Price'))
-                        if purchase_price < 0:
-                            fail_count += 1
-                            errors.append(f"Row {index+2}: Purchase price cannot be negative. Skipping.")
-                            continue
-                        row_data['purchase_price'] = purchase_price
-                    except (ValueError, TypeError):
-                        fail_count += 1
-                        errors.append(f"Row {index+2}: Purchase price must be a valid number. Skipping.")
-                        continue
-                else:
-                    fail_count += 1
-                    errors.append(f"Row {index+2}: Purchase Price is required. Skipping.")
-                    continue
-                
-                # Recon cost (optional)
-                if 'Recon Cost' in df.columns and not pd.isna(row.get('Recon Cost')):
-                    try:
-                        recon_cost = float(row.get('Recon Cost'))
-                        if recon_cost < 0:
-                            row_warnings.append("Negative recon cost, using 0.0")
-                            recon_cost = 0.0
-                        row_data['recon_cost'] = recon_cost
-                    except (ValueError, TypeError):
-                        row_warnings.append("Invalid recon cost format, using 0.0")
-                        row_data['recon_cost'] = 0.0
-                
-                # Final cost price (optional)
-                if 'Final Cost Price' in df.columns and not pd.isna(row.get('Final Cost Price')):
-                    try:
-                        final_cost_price = float(row.get('Final Cost Price'))
-                        if final_cost_price < 0:
-                            recon_cost = row_data.get('recon_cost', 0.0)
-                            final_cost_price = purchase_price + recon_cost
-                            row_warnings.append(f"Negative final cost price, calculating as purchase + recon = {final_cost_price}")
-                        row_data['final_cost_price'] = final_cost_price
-                    except (ValueError, TypeError):
-                        recon_cost = row_data.get('recon_cost', 0.0)
-                        row_data['final_cost_price'] = purchase_price + recon_cost
-                        row_warnings.append(f"Invalid final cost price format, calculating as purchase + recon = {row_data['final_cost_price']}")
-                else:
-                    # If not provided, calculate from purchase price and recon cost
-                    recon_cost = row_data.get('recon_cost', 0.0)
-                    row_data['final_cost_price'] = purchase_price + recon_cost
-                    row_warnings.append(f"No final cost price provided, calculating as purchase + recon = {row_data['final_cost_price']}")
-                
-                # Sell Price (optional)
-                if 'Sell Price' in df.columns and not pd.isna(row.get('Sell Price')):
-                    try:
-                        sell_price = float(row.get('Sell Price'))
-                        if sell_price >= 0:
-                            row_data['sale_price'] = sell_price
-                    except (ValueError, TypeError):
-                        row_warnings.append("Invalid sell price format, ignoring")
-                
-                # Date bought (required)
-                if 'Date Bought' in df.columns and not pd.isna(row.get('Date Bought')):
-                    try:
-                        if isinstance(row.get('Date Bought'), str):
-                            row_data['date_bought'] = datetime.strptime(row.get('Date Bought'), '%Y-%m-%d').date()
-                        elif isinstance(row.get('Date Bought'), datetime):
-                            row_data['date_bought'] = row.get('Date Bought').date()
-                        else:
-                            row_data['date_bought'] = datetime.now().date()
-                            row_warnings.append("Invalid date bought format, using today's date")
-                    except (ValueError, TypeError):
-                        row_data['date_bought'] = datetime.now().date()
-                        row_warnings.append("Invalid date bought format, using today's date")
-                else:
-                    row_data['date_bought'] = datetime.now().date()
-                    row_warnings.append("No date bought provided, using today's date")
-                
-                # Date added to stand (optional)
-                if 'Date Added To Stand' in df.columns and not pd.isna(row.get('Date Added To Stand')):
-                    try:
-                        if isinstance(row.get('Date Added To Stand'), str):
-                            row_data['date_added_to_stand'] = datetime.strptime(row.get('Date Added To Stand'), '%Y-%m-%d').date()
-                        elif isinstance(row.get('Date Added To Stand'), datetime):
-                            row_data['date_added_to_stand'] = row.get('Date Added To Stand').date()
-                    except (ValueError, TypeError):
-                        row_warnings.append("Invalid date added to stand format, leaving empty")
-                elif 'date_sold' in row_data:
-                    # If car has been sold but no date added to stand, set to current date
-                    row_data['date_added_to_stand'] = datetime.now().date()
-                    row_warnings.append("Car is sold but no date added to stand provided, using today's date")
-                
-                # ===== Adding Sale Information =====
-                # Date sold (optional)
-                date_sold = None
-                if 'Date Sold' in df.columns and not pd.isna(row.get('Date Sold')):
-                    try:
-                        if isinstance(row.get('Date Sold'), str):
-                            date_sold = datetime.strptime(row.get('Date Sold'), '%Y-%m-%d').date()
-                        elif isinstance(row.get('Date Sold'), datetime):
-                            date_sold = row.get('Date Sold').date()
-                        row_data['date_sold'] = date_sold
-                    except (ValueError, TypeError):
-                        row_warnings.append("Invalid date sold format, treating as not sold")
-                
-                # Sale price (optional)
-                sale_price = None
-                if 'Sale Price' in df.columns and not pd.isna(row.get('Sale Price')):
-                    try:
-                        sale_price = float(row.get('Sale Price'))
-                        if sale_price < 0:
-                            row_warnings.append("Negative sale price, treating as not sold")
-                        else:
-                            row_data['sale_price'] = sale_price
-                    except (ValueError, TypeError):
-                        row_warnings.append("Invalid sale price format, treating as not sold")
-                
-                # Handle sold status logic:
-                # If either date_sold or sale_price is provided, the car is considered sold
-                if (date_sold is not None) or (sale_price is not None):
-                    row_data['repair_status'] = 'Sold'
-                    
-                    # If one is missing but the other is present, keep the provided one as is
-                    if date_sold is None and sale_price is not None:
-                        row_warnings.append("Sale price provided without date sold, marking as sold with no date")
-                    
-                    if sale_price is None and date_sold is not None:
-                        row_warnings.append("Date sold provided without sale price, marking as sold with no price")
-                else:
-                    # If neither is provided, car is not sold
-                    # We'll set the status below, but make sure these fields are not set
-                    if 'date_sold' in row_data:
-                        del row_data['date_sold']
-                    if 'sale_price' in row_data:
-                        del row_data['sale_price']
-                
-                # Refuel cost (optional)
-                if 'Refuel Cost' in df.columns and not pd.isna(row.get('Refuel Cost')):
-                    try:
-                        refuel_cost = float(row.get('Refuel Cost'))
-                        if refuel_cost < 0:
-                            row_warnings.append("Negative refuel cost, using 0.0")
-                            refuel_cost = 0.0
-                        row_data['refuel_cost'] = refuel_cost
-                    except (ValueError, TypeError):
-                        row_warnings.append("Invalid refuel cost format, using 0.0")
-                        row_data['refuel_cost'] = 0.0
-                else:
-                    row_data['refuel_cost'] = 0.0
-                
-                # Current location (optional with default)
-                if 'Current Location' in df.columns and not pd.isna(row.get('Current Location')) and str(row.get('Current Location')).strip():
-                    row_data['current_location'] = str(row.get('Current Location')).strip()
-                else:
-                    row_data['current_location'] = "Showroom"  # Default
-                    row_warnings.append("No current location provided, using 'Showroom'")
-                
-                # Status (optional with default, or from sale status)
-                if 'repair_status' not in row_data:  # If not already set by sale condition
-                    if 'Status' in df.columns and not pd.isna(row.get('Status')) and str(row.get('Status')).strip():
-                        status = str(row.get('Status')).strip()
-                        valid_statuses = ['Available', 'In Repairs', 'Sold', 'Reserved']
-                        if status in valid_statuses:
-                            row_data['repair_status'] = status
-                        else:
-                            row_data['repair_status'] = 'Available'
-                            row_warnings.append(f"Invalid status '{status}', using 'Available'")
-                    elif 'recon_cost' in row_data and row_data['recon_cost'] > 0:
-                        # If car has recon cost but no status, set to "Waiting for Repairs"
-                        row_data['repair_status'] = 'Waiting for Repairs'
-                        row_warnings.append("Car has recon cost but no status provided, using 'Waiting for Repairs'")
-                    else:
-                        row_data['repair_status'] = 'Available'  # Default
-                        row_warnings.append("No status provided, using 'Available'")
-                
-                # Source (optional with default)
-                if 'Source' in df.columns and not pd.isna(row.get('Source')) and str(row.get('Source')).strip():
-                    row_data['source'] = str(row.get('Source')).strip()
-                else:
-                    row_data['source'] = "Import"  # Default
-                    row_warnings.append("No source provided, using 'Import'")
-                
-                # Stand relationship (optional with default)
-                if 'Stand' in df.columns and not pd.isna(row.get('Stand')) and str(row.get('Stand')).strip():
-                    stand_name = str(row.get('Stand')).strip().lower()
-                    if stand_name in stand_name_mapping:
-                        row_data['stand_id'] = stand_name_mapping[stand_name]
-                    elif default_stand_id:
-                        row_data['stand_id'] = default_stand_id
-                        row_warnings.append(f"Stand '{row.get('Stand')}' not found, using default stand")
-                elif default_stand_id:
-                    row_data['stand_id'] = default_stand_id
-                    row_warnings.append("No stand provided, using 'Unknown'")
-                
-                # Vehicle name (derived or provided)
-                if 'Vehicle Name' in df.columns and not pd.isna(row.get('Vehicle Name')) and str(row.get('Vehicle Name')).strip():
-                    row_data['vehicle_name'] = str(row.get('Vehicle Name')).strip()
-                else:
-                    row_data['vehicle_name'] = f"{year} {make_obj.name} {model_obj.name}"
-                    row_warnings.append(f"No vehicle name provided, using '{row_data['vehicle_name']}'")
-                
-                # Create the new car
-                new_car = Car(**row_data)
-                db.session.add(new_car)
-                db.session.commit()
-                success_count += 1
-                
-                # Log any warnings
-                if row_warnings:
-                    warnings.append(f"Row {index+2} imported with warnings: {'; '.join(row_warnings)}")
-                
+                if file_ext == 'csv':
+                    df = pd.read_csv(file.stream)
+                else:  # xlsx
+                    df = pd.read_excel(file.stream)
             except Exception as e:
-                db.session.rollback()
-                fail_count += 1
-                errors.append(f"Row {index+2}: Error processing data: {str(e)}")
-                logging.error(f"Error processing row {index+2}: {str(e)}")
+                result["errors"].append(f"Error reading file: {str(e)}")
+                return result
+            
+            # Check if DataFrame is empty
+            if df.empty:
+                result["errors"].append("File contains no data")
+                return result
+            
+            _import_car_frame(df, _load_car_import_lookups(), result, set(), progress=progress)
+        
+        _refresh_after_bulk_import()
     except Exception as e:
+        db.session.rollback()
         logging.error(f"Overall import error: {str(e)}")
         import traceback
         logging.error(traceback.format_exc())
-        errors.append(f"Import process error: {str(e)}")
+        result["errors"].append(f"Import process error: {str(e)}")
     
-    return {
-        "success": success_count,
-        "failed": fail_count,
-        "errors": errors,
-        "warnings": warnings
-    }
+    return result
 
 
-def import_repairs(file: FileStorage) -> Dict[str, Any]:
+def import_repairs(file: FileStorage, progress: Callable = None) -> Dict[str, Any]:
     """
     Import repairs from a CSV or Excel file.
     
     Args:
         file: Uploaded file object
+        progress: Called with the running result as rows are processed
         
     Returns:
         dict: Results of the import with success and failure counts
@@ -470,32 +670,184 @@ def import_repairs(file: FileStorage) -> Dict[str, Any]:
     }
 
 
-def import_sales(file: FileStorage) -> Dict[str, Any]:
+def _load_sale_import_lookups() -> Dict[str, Any]:
+    """
+    Load the cars and dealers sale rows refer to, with one query each
+
+    Returns:
+        dict: cars (upper-case licence -> (car_id, dealer_id, already sold))
+        and dealers (lower-case name -> dealer_id)
+    """
+    cars = db.session.query(
+        Car.licence_number, Car.car_id, Car.dealer_id, Sale.sale_id
+    ).outerjoin(Sale, Sale.car_id == Car.car_id)
+    # Newest first, so the oldest dealer wins when names repeat
+    dealers = db.session.query(Dealer.dealer_name, Dealer.dealer_id).order_by(Dealer.dealer_id.desc())
+    return {
+        'cars': {licence.upper(): (car_id, dealer_id, sale_id is not None)
+                 for licence, car_id, dealer_id, sale_id in cars if licence},
+        'dealers': {name.lower(): dealer_id for name, dealer_id in dealers},
+    }
+
+
+def _prepare_sale_rows(df: pd.DataFrame, lookups: Dict[str, Any]):
+    """
+    Validate a frame of sale rows with column operations
+
+    Row numbers in messages are the spreadsheet rows (frame index + 2).
+
+    Returns:
+        tuple: (records, row_numbers, errors) where records are Sale column
+        mappings for the valid rows
+    """
+    row_numbers = pd.Series(df.index + 2, index=df.index)
+    row_labels = 'Row ' + row_numbers.astype(str)
+    error = pd.Series(np.nan, index=df.index, dtype=object)
+
+    licence = _text(df, 'Car Licence Number').str.upper()
+    car = licence.map(lookups['cars'])
+    error = _first_error(error, licence.isna(), "Car Licence Number is required. Skipping.")
+    error = _first_error(error, car.isna(), "Car with licence number '" + licence + "' not found. Skipping.")
+    error = _first_error(error, car.map(lambda found: found[2], na_action='ignore').fillna(False).astype(bool),
+                         "Car with licence number '" + licence + "' has already been sold. Skipping.")
+    car_id = car.map(lambda found: found[0], na_action='ignore')
+
+    sale_date, date_invalid, date_other = _date(df, 'Sale Date')
+    error = _first_error(error, _column(df, 'Sale Date').isna(), "Sale Date is required. Skipping.")
+    error = _first_error(error, date_invalid | date_other, "Sale Date must be in YYYY-MM-DD format. Skipping.")
+
+    sale_price, price_invalid = _number(df, 'Sale Price')
+    error = _first_error(error, _column(df, 'Sale Price').isna(), "Sale Price is required. Skipping.")
+    error = _first_error(error, price_invalid, "Sale price must be a valid number. Skipping.")
+    error = _first_error(error, sale_price < 0, "Sale price cannot be negative. Skipping.")
+
+    customer_name = _text(df, 'Customer Name')
+    error = _first_error(error, customer_name.isna(), "Customer Name is required. Skipping.")
+
+    # Sales without a Dealer column go to the dealer the car came from
+    dealer = _text(df, 'Dealer')
+    dealer_id = dealer.str.lower().map(lookups['dealers'])
+    error = _first_error(error, dealer.notna() & dealer_id.isna(),
+                         "Dealer '" + dealer + "' not found. Skipping.")
+    dealer_id = dealer_id.fillna(car.map(lambda found: found[1], na_action='ignore'))
+    error = _first_error(error, dealer_id.isna(), "Dealer is required when the car has no dealer. Skipping.")
+
+    # A car can only be sold once; later rows for the same car are rejected
+    passing = error.isna()
+    first_passing = row_numbers[passing].groupby(licence[passing]).min()
+    duplicate = passing & (row_numbers > licence.map(first_passing))
+    error = error.mask(duplicate, "Car with licence number '" + licence + "' is sold more than once in this file. Skipping.")
+
+    valid = error.isna()
+    records = pd.DataFrame({
+        'car_id': car_id.astype('Int64'),
+        'dealer_id': dealer_id.astype('Int64'),
+        'sale_price': sale_price,
+        'sale_date': sale_date,
+        'customer_name': customer_name,
+        'customer_contact': _text(df, 'Customer Contact'),
+        'payment_method': _text(df, 'Payment Method'),
+        'notes': _text(df, 'Notes'),
+    })[valid].astype(object)
+    records = records.where(records.notna(), None).to_dict('records')
+    now = datetime.now()
+    for record in records:
+        record['car_id'] = int(record['car_id'])
+        record['dealer_id'] = int(record['dealer_id'])
+        record['created_at'] = record['updated_at'] = now
+
+    # Imported cars count as sold for the rest of the file
+    for car_licence in licence[valid]:
+        found = lookups['cars'][car_licence]
+        lookups['cars'][car_licence] = (found[0], found[1], True)
+
+    errors = (row_labels + ': ' + error)[~valid].tolist()
+    return records, row_numbers[valid].tolist(), errors
+
+
+def _mark_cars_sold(batch: List[Dict[str, Any]]) -> None:
+    """Copy each inserted sale's date to its car in one UPDATE (the per-row Sale hook's job)"""
+    sale_date = db.select(Sale.sale_date).where(Sale.car_id == Car.car_id).scalar_subquery()
+    db.session.execute(
+        db.update(Car).where(Car.car_id.in_([record['car_id'] for record in batch])).values(date_sold=sale_date),
+        execution_options={'synchronize_session': False}
+    )
+
+
+def import_sales(file: FileStorage, progress: Callable = None) -> Dict[str, Any]:
     """
     Import sales from a CSV or Excel file.
     
+    Licence numbers and dealer names are resolved with one query each,
+    rows are validated in memory, and valid sales are bulk-inserted in
+    batches of IMPORT_BATCH_SIZE. Bulk inserts skip the Sale model's hooks,
+    so each batch also sets its cars' date_sold with a single UPDATE.
+    
     Args:
         file: Uploaded file object
+        progress: Called with the running result as rows are processed
         
     Returns:
         dict: Results of the import with success and failure counts
     """
     logging.info("Sales import started")
-    # The implementation will be done later
-    # For now, return a stub response
-    return {
-        "success": 0,
-        "failed": 0,
-        "errors": []
-    }
+    result = {"success": 0, "failed": 0, "errors": [], "warnings": []}
+    
+    try:
+        if not file or not file.filename:
+            result["errors"].append("No file provided")
+            return result
+        
+        file_ext = os.path.splitext(file.filename)[1][1:].lower()
+        if file_ext not in ['csv', 'xlsx']:
+            result["errors"].append(f"Unsupported file format: {file_ext}. Please use CSV or Excel (.xlsx)")
+            return result
+        
+        try:
+            if file_ext == 'csv':
+                df = pd.read_csv(file.stream)
+            else:  # xlsx
+                df = pd.read_excel(file.stream)
+        except Exception as e:
+            result["errors"].append(f"Error reading file: {str(e)}")
+            return result
+        
+        if df.empty:
+            result["errors"].append("File contains no data")
+            return result
+        
+        records, row_numbers, errors = _prepare_sale_rows(df, _load_sale_import_lookups())
+        result["failed"] += len(errors)
+        result["errors"].extend(errors)
+        if progress:
+            progress(result)
+        
+        inserted, failed, batch_errors = _insert_batches(Sale, records, row_numbers,
+                                                         after_insert=_mark_cars_sold)
+        result["success"] += inserted
+        result["failed"] += failed
+        result["errors"].extend(batch_errors)
+        if progress:
+            progress(result)
+        
+        _refresh_after_bulk_import()
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Overall import error: {str(e)}")
+        import traceback
+        logging.error(traceback.format_exc())
+        result["errors"].append(f"Import process error: {str(e)}")
+    
+    return result
 
 
-def import_dealers(file: FileStorage) -> Dict[str, Any]:
+def import_dealers(file: FileStorage, progress: Callable = None) -> Dict[str, Any]:
     """
     Import dealers from a CSV or Excel file.
     
     Args:
         file: Uploaded file object
+        progress: Called with the running result as rows are processed
         
     Returns:
         dict: Results of the import with success and failure counts
@@ -510,12 +862,13 @@ def import_dealers(file: FileStorage) -> Dict[str, Any]:
     }
 
 
-def import_parts(file: FileStorage) -> Dict[str, Any]:
+def import_parts(file: FileStorage, progress: Callable = None) -> Dict[str, Any]:
     """
     Import parts from a CSV or Excel file.
     
     Args:
         file: Uploaded file object
+        progress: Called with the running result as rows are processed
         
     Returns:
         dict: Results of the import with success and failure counts
@@ -530,12 +883,13 @@ def import_parts(file: FileStorage) -> Dict[str, Any]:
     }
 
 
-def import_stands(file: FileStorage) -> Dict[str, Any]:
+def import_stands(file: FileStorage, progress: Callable = None) -> Dict[str, Any]:
     """
     Import stands from a CSV or Excel file.
     
     Args:
         file: Uploaded file object
+        progress: Called with the running result as rows are processed
         
     Returns:
         dict: Results of the import with success and failure counts
@@ -624,6 +978,7 @@ def create_sample_template(entity_type: str) -> BytesIO:
             {"name": "Sale Date", "comment": "Required. Date of sale (YYYY-MM-DD).", "type": "required", "width": 15},
             {"name": "Sale Price", "comment": "Required. Sale price (numeric value).", "type": "required", "width": 15},
             {"name": "Customer Name", "comment": "Required. Name of customer who purchased the car.", "type": "required", "width": 25},
+            {"name": "Dealer", "comment": "Optional. Dealer name; defaults to the dealer the car came from.", "type": "optional", "width": 20},
             {"name": "Customer Contact", "comment": "Optional. Contact information for the customer.", "type": "optional", "width": 25},
             {"name": "Payment Method", "comment": "Optional. Method of payment (Cash, Credit, Finance, etc.).", "type": "optional", "width": 15},
             {"name": "Notes", "comment": "Optional. Additional notes about the sale.", "type": "optional", "width": 40},
@@ -748,6 +1103,7 @@ def create_sample_template(entity_type: str) -> BytesIO:
             datetime.now().date(), # Sale Date
             18500,                # Sale Price
             "Jane Smith",         # Customer Name
+            "AutoMax Dealership", # Dealer
             "jane.smith@email.com, 555-1234", # Customer Contact
             "Finance",            # Payment Method
             "Customer very satisfied with purchase" # Notes
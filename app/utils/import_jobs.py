@@ -0,0 +1,197 @@
+"""
+Background import jobs for the Car Repair and Sales Tracking application.
+
+Imports used to run inside the upload request, so large files hit worker
+timeouts and the user saw nothing until the end. Uploads are now saved to a
+temporary file and imported by a pool of IMPORT_WORKERS threads, while the
+request returns a job id straight away:
+
+    job = submit_import_job('cars', request.files['file'])
+    ...
+    get_import_job(job.job_id).to_dict()   # served by GET /import/jobs/<id>
+
+Importers receive a ``progress`` callback that they call with their running
+result dict, so a job's counts and errors can be read while it runs. Jobs
+are kept in memory, per process, for IMPORT_JOB_RETENTION seconds after
+they finish.
+"""
+
+import logging
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from flask import current_app
+from werkzeug.datastructures import FileStorage
+from app import db
+from app.utils.import_helpers import (
+    import_cars,
+    import_repairs,
+    import_sales,
+    import_dealers,
+    import_parts,
+    import_stands
+)
+
+# Dictionary mapping entity types to their import functions
+IMPORTERS = {
+    'cars': import_cars,
+    'repairs': import_repairs,
+    'sales': import_sales,
+    'dealers': import_dealers,
+    'parts': import_parts,
+    'stands': import_stands,
+}
+
+
+class ImportJob:
+    """
+    An import running (or queued) in the worker pool
+
+    Attributes:
+        job_id (str): Identifier used in the status URL
+        entity_type (str): Key in IMPORTERS
+        filename (str): Name of the uploaded file
+        status (str): 'queued', 'running', 'completed' or 'failed'
+        result (dict): The importer's running result (success, failed, errors, warnings)
+    """
+
+    def __init__(self, entity_type, filename):
+        self.job_id = uuid.uuid4().hex
+        self.entity_type = entity_type
+        self.filename = filename
+        self.status = 'queued'
+        self.result = {'success': 0, 'failed': 0, 'errors': [], 'warnings': []}
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self.future = None
+
+    def update(self, result):
+        """Progress callback: record the importer's running result"""
+        self.result = result
+
+    @property
+    def finished(self):
+        return self.status in ('completed', 'failed')
+
+    def wait(self, timeout=None):
+        """Block until the job has finished (used by tests and scripts)"""
+        if self.future is not None:
+            self.future.result(timeout)
+        return self
+
+    def to_dict(self):
+        result = self.result
+        succeeded = result.get('success', 0)
+        failed = result.get('failed', 0)
+        return {
+            'job_id': self.job_id,
+            'entity_type': self.entity_type,
+            'filename': self.filename,
+            'status': self.status,
+            'processed': succeeded + failed,
+            'succeeded': succeeded,
+            'failed': failed,
+            'errors': list(result.get('errors', [])),
+            'warnings': list(result.get('warnings', [])),
+            'submitted_at': self.submitted_at,
+            'finished_at': self.finished_at
+        }
+
+
+_executor = None
+_jobs = {}
+_jobs_lock = Lock()
+
+
+def _get_executor():
+    global _executor
+    with _jobs_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get('IMPORT_WORKERS', 2),
+                thread_name_prefix='import'
+            )
+        return _executor
+
+
+def _prune_jobs():
+    """Forget finished jobs older than IMPORT_JOB_RETENTION seconds"""
+    cutoff = time.time() - current_app.config.get('IMPORT_JOB_RETENTION', 3600)
+    with _jobs_lock:
+        for job_id in [job_id for job_id, job in _jobs.items()
+                       if job.finished and job.finished_at < cutoff]:
+            del _jobs[job_id]
+
+
+def _save_upload(file):
+    """Copy an upload to a temporary file the worker can read after the request ends"""
+    directory = os.path.join(current_app.instance_path, 'import_uploads')
+    os.makedirs(directory, exist_ok=True)
+    extension = os.path.splitext(file.filename)[1].lower()
+    handle, path = tempfile.mkstemp(suffix=extension, dir=directory)
+    with os.fdopen(handle, 'wb') as upload:
+        file.save(upload)
+    return path
+
+
+def _run_job(app, job, path):
+    with app.app_context():
+        job.status = 'running'
+        status = 'failed'
+        try:
+            with open(path, 'rb') as stream:
+                upload = FileStorage(stream=stream, filename=job.filename)
+                job.result = IMPORTERS[job.entity_type](upload, progress=job.update)
+            status = 'completed'
+        except Exception as e:
+            logging.error(f"Import job {job.job_id} failed: {str(e)}")
+            job.result.setdefault('errors', []).append(f"Import process error: {str(e)}")
+        finally:
+            db.session.remove()
+            if os.path.exists(path):
+                os.remove(path)
+            job.finished_at = time.time()
+            job.status = status
+
+
+def submit_import_job(entity_type, file):
+    """
+    Queue an uploaded file for import in the background
+
+    Args:
+        entity_type (str): Key in IMPORTERS
+        file (FileStorage): The uploaded file
+
+    Returns:
+        ImportJob: The queued job
+
+    Raises:
+        ValueError: If the entity type has no importer
+    """
+    if entity_type not in IMPORTERS:
+        raise ValueError(f"Import type '{entity_type}' not found")
+
+    _prune_jobs()
+    job = ImportJob(entity_type, file.filename)
+    path = _save_upload(file)
+    with _jobs_lock:
+        _jobs[job.job_id] = job
+    app = current_app._get_current_object()
+    job.future = _get_executor().submit(_run_job, app, job, path)
+    return job
+
+
+def get_import_job(job_id):
+    """Get a job by id, or None if it is unknown or has been pruned"""
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def list_import_jobs():
+    """Jobs still held in memory, newest first"""
+    with _jobs_lock:
+        jobs = list(_jobs.values())
+    return sorted(jobs, key=lambda job: job.submitted_at, reverse=True)
@@ -0,0 +1,295 @@
+"""
+Live KPI counters for the Car Repair and Sales Tracking application.
+
+The dashboard's headline numbers (cars in stock, in repair, on display,
+ready for display, and sales over the last 30 days) are kept as running
+totals in the kpi_counters table instead of being counted on every view:
+
+    counters = get_kpi_counters()
+    counters['unsold_cars'], counters['recent_sales_value']
+
+ORM events turn each car insert, delete or change to its status, sold date
+or sale price (and each Sale insert, which stamps the car's sold date) into
+counter deltas, written in the same transaction as the change. Sales are
+counted per day (``cars_sold:2024-05-01``) so a 30-day window is a range
+read. Writes that bypass the ORM (bulk inserts, raw SQL) are caught by
+reconcile_kpi_counters, which recounts everything and runs whenever the
+counters are read more than KPI_RECONCILE_INTERVAL seconds after the last
+reconciliation.
+
+Other modules keep version counters in the same table (the report data
+version, per-day report bucket versions) and bump them with mark_counters().
+All of a flush's counter changes are written by one statement at its end.
+"""
+
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import and_, case, event, func, or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, object_session
+from app import db
+from app.models.car import Car
+from app.models.kpi_counter import KpiCounter
+from app.models.sale import Sale
+
+# Counters over all cars, named like the dashboard metrics they feed
+INVENTORY_COUNTERS = ('total_cars', 'unsold_cars', 'cars_in_repair', 'cars_on_stand', 'ready_for_display_count')
+# Per-day sales counters, keyed '<prefix>:<ISO date sold>'
+SOLD_PREFIX = 'cars_sold'
+SALES_VALUE_PREFIX = 'sales_value'
+# Time of the last full recount, in seconds since the epoch
+RECONCILED_AT = 'reconciled_at'
+# Days of sales in the recent sales window
+RECENT_SALES_DAYS = 30
+
+# Car columns the counters depend on
+TRACKED_COLUMNS = ('repair_status', 'date_sold', 'sale_price')
+
+
+def _contribution(repair_status, date_sold, sale_price):
+    """Counter amounts one car adds, given its tracked column values"""
+    amounts = Counter(total_cars=1)
+    if repair_status == 'In Repair':
+        amounts['cars_in_repair'] += 1
+    if repair_status == 'On Display':
+        amounts['cars_on_stand'] += 1
+    if date_sold is None:
+        amounts['unsold_cars'] += 1
+        if repair_status == 'Ready for Display':
+            amounts['ready_for_display_count'] += 1
+    else:
+        amounts[f'{SOLD_PREFIX}:{date_sold.isoformat()}'] += 1
+        amounts[f'{SALES_VALUE_PREFIX}:{date_sold.isoformat()}'] += Decimal(sale_price or 0)
+    return amounts
+
+
+def _stored_row(connection, car_id):
+    """The tracked columns of a car as currently written in the database"""
+    return connection.execute(
+        select(*(getattr(Car, column) for column in TRACKED_COLUMNS)).where(Car.car_id == car_id)
+    ).first()
+
+
+def _record(target, added, removed=None):
+    """Queue counter deltas on the session until its flush finishes"""
+    session = object_session(target)
+    if session is None:
+        return
+    deltas = session.info.setdefault('kpi_deltas', Counter())
+    for name, amount in added.items():
+        deltas[name] += amount
+    for name, amount in (removed or {}).items():
+        deltas[name] -= amount
+
+
+def mark_counters(target, names):
+    """
+    Bump each named counter by one in the flush writing target, however many
+    rows that flush writes
+    """
+    session = object_session(target)
+    if session is None:
+        return
+    deltas = session.info.setdefault('kpi_deltas', Counter())
+    for name in names:
+        deltas[name] = 1
+
+
+@event.listens_for(Car, 'after_insert')
+def _count_inserted_car(mapper, connection, target):
+    _record(target, _contribution(*(getattr(target, column) for column in TRACKED_COLUMNS)))
+
+
+@event.listens_for(Car, 'before_update')
+def _count_updated_car(mapper, connection, target):
+    state = db.inspect(target)
+    if not any(state.attrs[column].history.has_changes() for column in TRACKED_COLUMNS):
+        return
+    # Compare with the stored row rather than the loaded values, which can be
+    # stale after the Sale insert hook updates date_sold with plain SQL
+    stored = _stored_row(connection, target.car_id)
+    if stored is None:
+        return
+    new_values = [
+        state.dict[column] if column in state.dict else stored[i]
+        for i, column in enumerate(TRACKED_COLUMNS)
+    ]
+    _record(target, _contribution(*new_values), _contribution(*stored))
+
+
+@event.listens_for(Car, 'before_delete')
+def _count_deleted_car(mapper, connection, target):
+    stored = _stored_row(connection, target.car_id)
+    if stored is not None:
+        _record(target, Counter(), _contribution(*stored))
+
+
+# insert=True runs this before the hook in app.models.sale that sets the car's date_sold
+@event.listens_for(Sale, 'after_insert', insert=True)
+def _count_sale(mapper, connection, target):
+    stored = _stored_row(connection, target.car_id)
+    if stored is not None and stored.date_sold != target.sale_date:
+        _record(target, _contribution(stored.repair_status, target.sale_date, stored.sale_price),
+                _contribution(*stored))
+
+
+def _add_to_counter(connection, name, amount):
+    table = KpiCounter.__table__
+    updated = connection.execute(
+        table.update().where(table.c.name == name).values(
+            value=table.c.value + amount, updated_at=datetime.now()
+        )
+    )
+    if updated.rowcount == 0:
+        connection.execute(table.insert().values(name=name, value=amount, updated_at=datetime.now()))
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_deltas(session, flush_context):
+    deltas = session.info.pop('kpi_deltas', None)
+    changes = sorted((name, amount) for name, amount in (deltas or {}).items() if amount)
+    if not changes:
+        return
+    connection = session.connection()
+    if connection.dialect.name != 'sqlite':
+        for name, amount in changes:
+            _add_to_counter(connection, name, amount)
+        return
+
+    # Every counter in one upsert: SQLite has a single writer
+    table = KpiCounter.__table__
+    now = datetime.now()
+    upsert = sqlite_insert(table).values([
+        {'name': name, 'value': amount, 'updated_at': now} for name, amount in changes
+    ])
+    connection.execute(upsert.on_conflict_do_update(
+        index_elements=[table.c.name],
+        set_={'value': table.c.value + upsert.excluded.value, 'updated_at': upsert.excluded.updated_at}
+    ))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_deltas(session):
+    session.info.pop('kpi_deltas', None)
+
+
+def _window_start(today):
+    return (today - timedelta(days=RECENT_SALES_DAYS)).isoformat()
+
+
+def _daily_range(prefix, start):
+    """Counter names for days on or after start (';' sorts right after ':')"""
+    return and_(KpiCounter.name >= f'{prefix}:{start}', KpiCounter.name < f'{prefix};')
+
+
+def count_kpis(today=None):
+    """
+    Count every counter's true value from the cars table
+
+    Returns:
+        dict: Counter name -> value, including per-day sales in the window
+    """
+    today = today or datetime.now().date()
+    unsold = Car.date_sold == None
+
+    def count_where(condition):
+        return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+    row = db.session.query(
+        func.count(Car.car_id),
+        count_where(unsold),
+        count_where(Car.repair_status == 'In Repair'),
+        count_where(Car.repair_status == 'On Display'),
+        count_where(and_(unsold, Car.repair_status == 'Ready for Display'))
+    ).one()
+    values = dict(zip(INVENTORY_COUNTERS, row))
+
+    sales_by_day = db.session.query(
+        Car.date_sold, func.count(Car.car_id), func.sum(Car.sale_price)
+    ).filter(
+        Car.date_sold >= today - timedelta(days=RECENT_SALES_DAYS)
+    ).group_by(Car.date_sold)
+    for date_sold, count, value in sales_by_day:
+        values[f'{SOLD_PREFIX}:{date_sold.isoformat()}'] = count
+        values[f'{SALES_VALUE_PREFIX}:{date_sold.isoformat()}'] = Decimal(value or 0)
+    return values
+
+
+def _read_counters(today):
+    start = _window_start(today)
+    rows = db.session.query(KpiCounter.name, KpiCounter.value).filter(or_(
+        KpiCounter.name.in_(INVENTORY_COUNTERS + (RECONCILED_AT,)),
+        _daily_range(SOLD_PREFIX, start),
+        _daily_range(SALES_VALUE_PREFIX, start)
+    ))
+    return dict(rows)
+
+
+def reconcile_kpi_counters(today=None):
+    """
+    Recount the counters and overwrite any that drifted
+
+    Drift is logged as a warning. Per-day counters that have left the sales
+    window are deleted. The caller commits.
+
+    Returns:
+        dict: Counter name -> (stored value, true value) for each corrected counter
+    """
+    today = today or datetime.now().date()
+    actual = count_kpis(today)
+    stored = _read_counters(today)
+    first_run = stored.pop(RECONCILED_AT, None) is None
+
+    drift = {}
+    for name in set(actual) | set(stored):
+        true_value = Decimal(actual.get(name, 0))
+        if Decimal(stored.get(name, 0)) != true_value:
+            drift[name] = (stored.get(name), true_value)
+
+    table = KpiCounter.__table__
+    now = datetime.now()
+    start = _window_start(today)
+    for prefix in (SOLD_PREFIX, SALES_VALUE_PREFIX):
+        db.session.execute(table.delete().where(and_(table.c.name.like(f'{prefix}:%'), table.c.name < f'{prefix}:{start}')))
+    for name in drift:
+        db.session.execute(table.delete().where(table.c.name == name))
+        db.session.execute(table.insert().values(name=name, value=drift[name][1], updated_at=now))
+    db.session.execute(table.delete().where(table.c.name == RECONCILED_AT))
+    db.session.execute(table.insert().values(name=RECONCILED_AT, value=int(time.time()), updated_at=now))
+
+    if drift and not first_run:
+        current_app.logger.warning(f"KPI counters drifted and were reconciled: {sorted(drift)}")
+    return drift
+
+
+def get_kpi_counters(today=None):
+    """
+    Read the dashboard's headline numbers from the counters
+
+    Runs (and commits) reconcile_kpi_counters first when the counters have
+    never been reconciled or KPI_RECONCILE_INTERVAL seconds have passed.
+
+    Returns:
+        dict: The INVENTORY_COUNTERS plus recent_sales and recent_sales_value
+    """
+    today = today or datetime.now().date()
+    stored = _read_counters(today)
+
+    interval = current_app.config.get('KPI_RECONCILE_INTERVAL', 3600)
+    reconciled_at = stored.get(RECONCILED_AT)
+    if reconciled_at is None or time.time() - float(reconciled_at) >= interval:
+        reconcile_kpi_counters(today)
+        db.session.commit()
+        stored = _read_counters(today)
+
+    counters = {name: int(stored.get(name, 0)) for name in INVENTORY_COUNTERS}
+    counters['recent_sales'] = int(sum(
+        value for name, value in stored.items() if name.startswith(f'{SOLD_PREFIX}:')
+    ))
+    counters['recent_sales_value'] = sum(
+        (value for name, value in stored.items() if name.startswith(f'{SALES_VALUE_PREFIX}:')), Decimal(0)
+    )
+    return counters
@@ -0,0 +1,154 @@
+"""
+Named eager-loading profiles for the Car Repair and Sales Tracking application.
+
+List routes and reports read relationships such as ``Sale.car``, ``Car.repairs``
+and ``Repair.provider`` for every row they render. Left lazy, each access costs
+one SELECT per row. This module keeps a small registry of named loader profiles
+so a query can fetch everything it needs up front:
+
+    sales = with_loader_profile(Sale.query, 'sale_with_costs').all()
+
+Queries that already join the related table for filtering use the ``joined_``
+profiles, which fill the relationship from that join (``contains_eager``)
+instead of adding a second, aliased join to the same table:
+
+    sales = with_loader_profile(Sale.query.join(Car), 'sale_with_joined_car_costs').all()
+"""
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import contains_eager, joinedload, selectinload, with_expression
+
+
+def _sale_with_costs():
+    """Sale with its car (plus repairs and stand, for cost totals) and dealer"""
+    from app.models import Sale, Car
+    return (
+        joinedload(Sale.car).selectinload(Car.repairs),
+        joinedload(Sale.car).joinedload(Car.stand),
+        joinedload(Sale.dealer),
+    )
+
+
+def _sale_with_joined_car_costs():
+    """Like sale_with_costs, for queries that already join Car"""
+    from app.models import Sale, Car
+    return (
+        contains_eager(Sale.car).selectinload(Car.repairs),
+        contains_eager(Sale.car).joinedload(Car.stand),
+        joinedload(Sale.dealer),
+    )
+
+
+def _car_with_costs():
+    """Car with the repairs used by total_repair_cost/total_investment/profit"""
+    from app.models import Car
+    return (
+        selectinload(Car.repairs),
+    )
+
+
+def _car_with_sale_and_costs():
+    """Car with its sale record and repairs, for sale.profit"""
+    from app.models import Car
+    return (
+        selectinload(Car.sale),
+        selectinload(Car.repairs),
+    )
+
+
+def _car_with_repair_details():
+    """Car with each repair's provider and parts, for the car detail page"""
+    from app.models import Car, Repair
+    return (
+        selectinload(Car.repairs).joinedload(Repair.provider),
+        selectinload(Car.repairs).selectinload(Repair.parts),
+    )
+
+
+def _repair_with_car_and_provider():
+    """Repair with its car and provider"""
+    from app.models import Repair
+    return (
+        joinedload(Repair.car),
+        joinedload(Repair.provider),
+    )
+
+
+def _repair_with_joined_car_and_provider():
+    """Like repair_with_car_and_provider, for queries that already join Car"""
+    from app.models import Repair
+    return (
+        contains_eager(Repair.car),
+        joinedload(Repair.provider),
+    )
+
+
+def _provider_with_repair_count():
+    """Repair provider with its number of repairs, counted by a correlated subquery"""
+    from app.models import Repair, RepairProvider
+    return (
+        with_expression(RepairProvider.repair_count, select(func.count(Repair.repair_id)).where(
+            Repair.provider_id == RepairProvider.provider_id
+        ).scalar_subquery()),
+    )
+
+
+# Dictionary mapping profile names to functions building the loader options.
+# Options are built on demand so this module can be imported before the models.
+LOADER_PROFILES = {
+    'sale_with_costs': _sale_with_costs,
+    'sale_with_joined_car_costs': _sale_with_joined_car_costs,
+    'car_with_costs': _car_with_costs,
+    'car_with_sale_and_costs': _car_with_sale_and_costs,
+    'car_with_repair_details': _car_with_repair_details,
+    'repair_with_car_and_provider': _repair_with_car_and_provider,
+    'repair_with_joined_car_and_provider': _repair_with_joined_car_and_provider,
+    'provider_with_repair_count': _provider_with_repair_count,
+}
+
+
+def get_loader_options(profile_name):
+    """
+    Get the loader options for a named profile
+
+    Args:
+        profile_name (str): Name of a registered profile
+
+    Returns:
+        tuple: SQLAlchemy loader options
+
+    Raises:
+        ValueError: If the profile does not exist
+    """
+    if profile_name not in LOADER_PROFILES:
+        raise ValueError(f"Loader profile '{profile_name}' not found")
+
+    return LOADER_PROFILES[profile_name]()
+
+
+def with_loader_profile(query, profile_name):
+    """
+    Apply a named loader profile to a query
+
+    Args:
+        query: SQLAlchemy query or select statement
+        profile_name (str): Name of a registered profile
+
+    Returns:
+        The query with the profile's loader options applied
+    """
+    return query.options(*get_loader_options(profile_name))
+
+
+def register_loader_profile(profile_name, options_factory):
+    """
+    Register a custom loader profile
+
+    Args:
+        profile_name (str): Name of the new profile
+        options_factory (callable): Function returning a tuple of loader options
+    """
+    if profile_name in LOADER_PROFILES:
+        raise ValueError(f"Loader profile '{profile_name}' already exists")
+
+    LOADER_PROFILES[profile_name] = options_factory
@@ -0,0 +1,203 @@
+"""
+Keyset pagination for the list pages of the Car Repair and Sales Tracking application.
+
+Instead of rendering every row (or using OFFSET, which still walks every
+skipped row), a page is fetched with a WHERE clause continuing from the
+last row shown, ordered by the list's sort column with the primary key as a
+tiebreaker. Each page costs the same however deep into the list it is:
+
+    page = keyset_paginate(query, Car.date_bought, Car.car_id, 'desc',
+                           after=params.get('after'), before=params.get('before'))
+    return render_template('cars/index.html', cars=page.items, page=page)
+
+Cursors are opaque URL-safe strings holding the (sort value, key) of the
+row a page starts or ends at.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from flask import current_app, request, url_for
+from sqlalchemy import and_, or_
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated list
+
+    Attributes:
+        items (list): Rows on this page
+        next_cursor (str): Cursor for the following page, or None on the last page
+        prev_cursor (str): Cursor for the preceding page, or None on the first page
+        total (int): Number of matching rows, capped at LIST_COUNT_CAP
+        total_is_estimate (bool): True when the count reached the cap
+        per_page (int): Page size
+    """
+
+    def __init__(self, items, next_cursor, prev_cursor, total, total_is_estimate, per_page):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+        self.total_is_estimate = total_is_estimate
+        self.per_page = per_page
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def _url(self, **cursor):
+        """Current URL with its query string kept and the cursor replaced"""
+        args = request.args.to_dict()
+        args.pop('after', None)
+        args.pop('before', None)
+        args.update(cursor)
+        return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+    def next_url(self):
+        return self._url(after=self.next_cursor) if self.has_next else None
+
+    def prev_url(self):
+        return self._url(before=self.prev_cursor) if self.has_prev else None
+
+
+def _encode_value(value):
+    """Tag values JSON cannot round-trip so decode_cursor restores their type"""
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'n': str(value)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        if 'n' in value:
+            return Decimal(value['n'])
+    return value
+
+
+def encode_cursor(sort_value, key):
+    """
+    Encode a row's sort value and primary key as an opaque cursor
+
+    Returns:
+        str: URL-safe cursor
+    """
+    raw = json.dumps([_encode_value(sort_value), key], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor from encode_cursor
+
+    Returns:
+        tuple: (sort_value, key), or None if the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort_value, key = json.loads(raw)
+        return _decode_value(sort_value), key
+    except (ValueError, TypeError):
+        return None
+
+
+def _ordering(sort_column, pk_column, descending):
+    # NULLs first ascending and last descending (SQLite's default), so that
+    # reversing the direction reverses the whole order
+    if descending:
+        return sort_column.desc().nullslast(), pk_column.desc()
+    return sort_column.asc().nullsfirst(), pk_column.asc()
+
+
+def _after(sort_column, pk_column, sort_value, key, descending):
+    """Condition selecting the rows that come after (sort_value, key) in the ordering"""
+    if descending:
+        if sort_value is None:
+            return and_(sort_column.is_(None), pk_column < key)
+        return or_(
+            sort_column < sort_value,
+            and_(sort_column == sort_value, pk_column < key),
+            sort_column.is_(None)
+        )
+
+    if sort_value is None:
+        return or_(and_(sort_column.is_(None), pk_column > key), sort_column.isnot(None))
+    return or_(sort_column > sort_value, and_(sort_column == sort_value, pk_column > key))
+
+
+def estimate_count(query, cap):
+    """
+    Count a query's rows, stopping at a cap so large tables stay cheap
+
+    Returns:
+        tuple: (count, is_estimate) where is_estimate means "at least count"
+    """
+    count = query.order_by(None).limit(cap + 1).count()
+    if count > cap:
+        return cap, True
+    return count, False
+
+
+def keyset_paginate(query, sort_column, pk_column, sort_dir='asc', after=None, before=None,
+                    per_page=None, sort_value=None):
+    """
+    Fetch one page of a query in keyset order
+
+    Args:
+        query: Filtered query, without ORDER BY
+        sort_column: Column or expression the list is sorted by
+        pk_column: Primary key column, used as the tiebreaker
+        sort_dir (str): 'asc' or 'desc'
+        after (str, optional): Cursor of the row before the wanted page
+        before (str, optional): Cursor of the row after the wanted page
+        per_page (int, optional): Page size, defaults to LIST_PAGE_SIZE
+        sort_value (callable, optional): Reads the sort value from a row;
+            defaults to the attribute named like sort_column
+
+    Returns:
+        KeysetPage: The page with its next/prev cursors and total count
+    """
+    per_page = per_page or current_app.config.get('LIST_PAGE_SIZE', 50)
+    if sort_value is None:
+        sort_value = lambda item: getattr(item, sort_column.key)
+    pk_key = pk_column.key
+
+    total, total_is_estimate = estimate_count(query, current_app.config.get('LIST_COUNT_CAP', 1000))
+
+    descending = sort_dir == 'desc'
+    after_values = decode_cursor(after) if after else None
+    before_values = decode_cursor(before) if before and not after_values else None
+
+    if before_values:
+        # Walk backwards from the cursor, then put the page back in display order
+        page_query = query.filter(_after(sort_column, pk_column, *before_values, not descending))
+        rows = page_query.order_by(*_ordering(sort_column, pk_column, not descending)).limit(per_page + 1).all()
+        has_prev = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        has_next = True
+    else:
+        if after_values:
+            query = query.filter(_after(sort_column, pk_column, *after_values, descending))
+        rows = query.order_by(*_ordering(sort_column, pk_column, descending)).limit(per_page + 1).all()
+        has_next = len(rows) > per_page
+        items = rows[:per_page]
+        has_prev = after_values is not None
+
+    cursor = lambda item: encode_cursor(sort_value(item), getattr(item, pk_key))
+    next_cursor = cursor(items[-1]) if has_next and items else None
+    prev_cursor = cursor(items[0]) if has_prev and items else None
+
+    return KeysetPage(items, next_cursor, prev_cursor, total, total_is_estimate, per_page)
@@ -0,0 +1,202 @@
+"""
+Incremental time buckets for the Car Repair and Sales Tracking application.
+
+Time-windowed reports (the profit margin trend, monthly sales performance)
+split their window into buckets - days, weeks, months - and used to query
+every bucket on every request, although only the bucket holding today can
+still gain sales. get_bucket_totals() keeps each closed bucket's sales count,
+revenue and cost per process, keyed by (report, filter set, bucket), and only
+loads the open bucket and the buckets whose days were written since:
+
+    totals = get_bucket_totals('profit_margin', (stand_id, dealer_id),
+                               [(week_start, week_end), ...], load_rows)
+
+A bucket is "written" when a sale dated in it, the sold car or one of the
+car's repairs changes. Each flush bumps a counter per sale day written in
+the kpi_counters table (``report_day:2024-05-01``), along with its other
+counter changes and in the same transaction, so every worker sees them; a
+closed bucket is reused while the counters of its days are unchanged. Writes
+that bypass the ORM call invalidate_report_buckets, which bumps a counter
+every bucket depends on.
+"""
+
+import weakref
+from collections import OrderedDict, namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+from threading import Lock
+from flask import current_app
+from sqlalchemy import event, inspect, or_, select
+from app import db
+from app.models.car import Car
+from app.models.kpi_counter import KpiCounter
+from app.models.repair import Repair
+from app.models.sale import Sale
+from app.utils.kpi_counters import mark_counters
+
+# Per-day write counters, keyed '<prefix>:<ISO sale date>'
+DAY_PREFIX = 'report_day'
+# Counter bumped by writes that cannot be traced to a sale day
+EPOCH = 'report_bucket_epoch'
+# Car columns bucket totals and filters depend on
+TRACKED_CAR_COLUMNS = ('purchase_price', 'refuel_cost', 'stand_id', 'vehicle_make', 'vehicle_model', 'date_sold')
+
+
+class BucketTotals(namedtuple('BucketTotals', ['count', 'revenue', 'cost'])):
+    """Sales count, revenue and cost of the sales in one bucket"""
+    __slots__ = ()
+
+    @property
+    def profit(self):
+        return self.revenue - self.cost
+
+
+EMPTY_BUCKET = BucketTotals(0, Decimal('0.00'), Decimal('0.00'))
+
+
+def _current_and_previous(target, attribute):
+    """An attribute's value and, when this flush changed it, its previous value"""
+    history = inspect(target).attrs[attribute].history
+    return [value for value in (getattr(target, attribute), *history.deleted) if value is not None]
+
+
+def _sale_days(connection, car_ids):
+    """Days the given cars were sold on"""
+    return connection.execute(
+        select(Sale.sale_date).where(Sale.car_id.in_(car_ids)).distinct()
+    ).scalars().all()
+
+
+def _mark_days(target, days):
+    mark_counters(target, {f'{DAY_PREFIX}:{day.isoformat()}' for day in days})
+
+
+def _note_sale(mapper, connection, target):
+    _mark_days(target, _current_and_previous(target, 'sale_date'))
+
+
+def _note_car_update(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in TRACKED_CAR_COLUMNS):
+        _note_car(mapper, connection, target)
+
+
+def _note_car(mapper, connection, target):
+    # A deleted car's sales may already be gone, so its sold dates count too
+    days = _current_and_previous(target, 'date_sold')
+    _mark_days(target, days + _sale_days(connection, [target.car_id]))
+
+
+def _note_repair(mapper, connection, target):
+    # Repairs count towards the day their car was sold
+    _mark_days(target, _sale_days(connection, _current_and_previous(target, 'car_id')))
+
+
+for _event in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Sale, _event, _note_sale)
+    event.listen(Repair, _event, _note_repair)
+# A new car has no sale yet
+event.listen(Car, 'after_update', _note_car_update)
+event.listen(Car, 'after_delete', _note_car)
+
+
+def invalidate_report_buckets():
+    """
+    Recompute every bucket after writes that bypass the ORM (bulk inserts,
+    raw SQL). The caller commits.
+    """
+    table = KpiCounter.__table__
+    connection = db.session.connection()
+    updated = connection.execute(
+        table.update().where(table.c.name == EPOCH).values(value=table.c.value + 1, updated_at=datetime.now())
+    )
+    if updated.rowcount == 0:
+        connection.execute(table.insert().values(name=EPOCH, value=1, updated_at=datetime.now()))
+
+
+# Engine -> {(report, filters, bucket): (stamp, BucketTotals)}, oldest first
+_memo = weakref.WeakKeyDictionary()
+_memo_lock = Lock()
+
+
+def _read_versions(first, last):
+    """The epoch and the write counters of the days from first to last"""
+    rows = db.session.query(KpiCounter.name, KpiCounter.value).filter(or_(
+        KpiCounter.name == EPOCH,
+        KpiCounter.name.between(f'{DAY_PREFIX}:{first.isoformat()}', f'{DAY_PREFIX}:{last.isoformat()}')
+    )).all()
+    epoch = 0
+    days = {}
+    for name, value in rows:
+        if name == EPOCH:
+            epoch = int(value)
+        else:
+            days[date.fromisoformat(name.split(':', 1)[1])] = int(value)
+    return epoch, days
+
+
+def get_bucket_totals(report_name, filters, buckets, load_rows):
+    """
+    Get the sales totals of each bucket, loading only the buckets that may have changed
+
+    Args:
+        report_name (str): Name of the report the buckets belong to
+        filters (tuple): The report's filter values; buckets are only shared
+            between requests with the same filters
+        buckets (list): (first day, last day) pairs, both inclusive
+        load_rows (callable): load_rows(first, last) returns the filtered
+            sales between two days as (sale date, revenue, cost) rows
+
+    Returns:
+        list: BucketTotals for each bucket, in the order given
+    """
+    results = [EMPTY_BUCKET] * len(buckets)
+    spans = [(first, last) for first, last in buckets if first <= last]
+    if not spans:
+        return results
+
+    today = date.today()
+    engine = db.session.get_bind()
+    # Read the counters first, so writes made while loading leave the buckets stale
+    epoch, versions = _read_versions(min(first for first, _ in spans), max(last for _, last in spans))
+
+    def stamp(first, last):
+        return epoch, tuple(sorted((day, version) for day, version in versions.items() if first <= day <= last))
+
+    missing = []
+    with _memo_lock:
+        memo = _memo.get(engine, {})
+        for i, (first, last) in enumerate(buckets):
+            if first > last:
+                continue
+            cached = memo.get((report_name, filters, first, last))
+            if last < today and cached is not None and cached[0] == stamp(first, last):
+                results[i] = cached[1]
+            else:
+                missing.append(i)
+    if not missing:
+        return results
+
+    sums = {i: [0, Decimal('0.00'), Decimal('0.00')] for i in missing}
+    rows = load_rows(min(buckets[i][0] for i in missing), max(buckets[i][1] for i in missing))
+    for sale_date, revenue, cost in rows:
+        for i in missing:
+            if buckets[i][0] <= sale_date <= buckets[i][1]:
+                sums[i][0] += 1
+                sums[i][1] += revenue
+                sums[i][2] += cost
+
+    max_size = current_app.config.get('REPORT_BUCKET_MEMO_SIZE', 10000)
+    with _memo_lock:
+        memo = _memo.setdefault(engine, OrderedDict())
+        for i in missing:
+            first, last = buckets[i]
+            results[i] = BucketTotals(*sums[i])
+            # The open bucket can still gain sales today
+            if last < today:
+                key = (report_name, filters, first, last)
+                memo.pop(key, None)
+                memo[key] = (stamp(first, last), results[i])
+        while len(memo) > max_size:
+            memo.popitem(last=False)
+    return results
@@ -0,0 +1,305 @@
+"""
+Pre-generated report snapshots for the Car Repair and Sales Tracking application.
+
+Managers open the same few reports every morning. The report-snapshots worker
+generates each REPORT_SNAPSHOTS report/parameter combination every
+REPORT_SNAPSHOT_INTERVAL seconds and writes it to REPORT_SNAPSHOT_DIR twice:
+as JSON (the generate() payload) and as HTML (the report template's blocks,
+rendered without the user-specific page chrome):
+
+    flask report-snapshots          # keep refreshing until stopped
+    flask report-snapshots --once   # one pass, e.g. from cron
+
+Both files are stamped with the report data version, a counter in the
+kpi_counters table that every flush writing a car, sale, repair, part, stand,
+dealer or provider bumps in the same transaction. Report pages decorated with
+serves_report_snapshot() return the stored HTML instead of generating the
+report while its snapshot was made today, less than REPORT_SNAPSHOT_MAX_AGE
+seconds ago, at the current data version.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import datetime
+from functools import wraps
+from inspect import signature
+import click
+from flask import current_app, render_template, request
+from flask.cli import with_appcontext
+from sqlalchemy import event
+from app import db
+from app.models.car import Car
+from app.models.dealer import Dealer
+from app.models.kpi_counter import KpiCounter
+from app.models.part import Part, RepairPart
+from app.models.repair import Repair
+from app.models.repair_provider import RepairProvider
+from app.models.sale import Sale
+from app.models.stand import Stand
+from app.utils.kpi_counters import mark_counters
+from app.utils.serializers import DecimalEncoder
+
+# kpi_counters row counting writes to the models reports read
+DATA_VERSION = 'report_data_version'
+SOURCE_MODELS = (Car, Sale, Repair, RepairPart, Part, Stand, Dealer, RepairProvider)
+
+# Template blocks kept in the HTML snapshot, in the order base.html uses them
+SNAPSHOT_BLOCKS = ('title', 'extra_css', 'content', 'extra_js')
+_STAMP = re.compile(r'<!-- report-snapshot (\{.*\}) -->\n')
+_BLOCK_MARKER = re.compile(r'<!-- block:(\w+) -->\n')
+
+
+def _note_write(mapper, connection, target):
+    mark_counters(target, (DATA_VERSION,))
+
+
+for _model in SOURCE_MODELS:
+    event.listen(_model, 'after_insert', _note_write)
+    event.listen(_model, 'after_update', _note_write)
+    event.listen(_model, 'after_delete', _note_write)
+
+
+def _bump(connection):
+    table = KpiCounter.__table__
+    updated = connection.execute(
+        table.update().where(table.c.name == DATA_VERSION).values(
+            value=table.c.value + 1, updated_at=datetime.now()
+        )
+    )
+    if updated.rowcount == 0:
+        connection.execute(table.insert().values(name=DATA_VERSION, value=1, updated_at=datetime.now()))
+
+
+def bump_report_data_version():
+    """
+    Mark every snapshot stale after writes that bypass the ORM (bulk inserts,
+    raw SQL). The caller commits.
+    """
+    _bump(db.session.connection())
+
+
+def get_report_data_version():
+    """
+    Get the current report data version (0 before the first write)
+    """
+    value = db.session.query(KpiCounter.value).filter(KpiCounter.name == DATA_VERSION).scalar()
+    return int(value or 0)
+
+
+def snapshot_params(report_class, params):
+    """
+    Normalize report parameters so equivalent requests share one snapshot
+
+    Parameters left out take their parameter_rules default; parameters with no
+    value are dropped.
+    """
+    accepted = signature(report_class.__init__).parameters
+    normalized = {}
+    for name, rule in getattr(report_class, 'parameter_rules', {}).items():
+        if name not in accepted:
+            continue
+        value = params.get(name, rule.get('default'))
+        if value is not None and value != '' and value != []:
+            normalized[name] = value
+    return normalized
+
+
+def _get_report(report_name):
+    # Imported here: the report modules import the importers, which import this module
+    from app.reports import get_report
+    return get_report(report_name)
+
+
+def _snapshot_dir():
+    return current_app.config.get('REPORT_SNAPSHOT_DIR') or \
+        os.path.join(current_app.instance_path, 'report_snapshots')
+
+
+def _snapshot_path(report_name, params, extension):
+    key = json.dumps(params, sort_keys=True, default=str)
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return os.path.join(_snapshot_dir(), f'{report_name}-{digest}.{extension}')
+
+
+def _write_atomic(path, text):
+    """Write a file so readers see either the old or the new contents"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _render_blocks(report_name, template_path, params, context):
+    """Render the template's SNAPSHOT_BLOCKS as they would appear on its report page"""
+    url = '/reports/' + report_name.replace('_', '-')
+    query = {name: value.isoformat() if hasattr(value, 'isoformat') else value
+             for name, value in params.items()}
+    with current_app.test_request_context(url, query_string=query):
+        template = current_app.jinja_env.get_template(template_path)
+        current_app.update_template_context(context)
+        template_context = template.new_context(context)
+        return {
+            name: ''.join(template.blocks[name](template_context))
+            for name in SNAPSHOT_BLOCKS if name in template.blocks
+        }
+
+
+def write_report_snapshot(report_name, params=None):
+    """
+    Generate a report and write its JSON and HTML snapshots
+
+    Returns:
+        dict: The snapshot stamp (report, params, data_version, generated_at)
+    """
+    report_class = _get_report(report_name)
+    params = snapshot_params(report_class, params or {})
+
+    # Read the version first, so writes made while generating leave the snapshot stale
+    data_version = get_report_data_version()
+    data = report_class(**params).generate()
+    stamp = {
+        'report': report_name,
+        'params': params,
+        'data_version': data_version,
+        'generated_at': datetime.now().isoformat(timespec='seconds')
+    }
+    context = {**params, 'current_year': datetime.now().year,
+               'report_date': datetime.now().strftime('%Y-%m-%d %H:%M'), **data}
+    blocks = _render_blocks(report_name, report_class.template_path, params, context)
+
+    os.makedirs(_snapshot_dir(), exist_ok=True)
+    stamp_json = json.dumps(stamp, default=str)
+    _write_atomic(_snapshot_path(report_name, params, 'json'),
+                  json.dumps({**stamp, 'data': data}, cls=DecimalEncoder, default=str))
+    _write_atomic(_snapshot_path(report_name, params, 'html'), f'<!-- report-snapshot {stamp_json} -->\n' + ''.join(
+        f'<!-- block:{name} -->\n{html}\n' for name, html in blocks.items()
+    ))
+    return stamp
+
+
+def _read_stamp(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            match = _STAMP.match(f.readline())
+    except FileNotFoundError:
+        return None
+    return json.loads(match.group(1)) if match else None
+
+
+def _is_fresh(stamp, data_version, margin=0):
+    """Whether a snapshot is from today, at data_version and young enough to outlast margin seconds"""
+    generated_at = datetime.fromisoformat(stamp['generated_at'])
+    now = datetime.now()
+    max_age = current_app.config.get('REPORT_SNAPSHOT_MAX_AGE', 3600)
+    return (generated_at.date() == now.date()
+            and (now - generated_at).total_seconds() + margin < max_age
+            and stamp['data_version'] == data_version)
+
+
+def load_fresh_snapshot(report_name, args):
+    """
+    Get the stored page for a report request if its snapshot is still fresh
+
+    Args:
+        report_name (str): Registered report name
+        args: The request's query arguments
+
+    Returns:
+        dict: The snapshot's stamp and rendered blocks, or None
+    """
+    if not current_app.config.get('REPORT_SNAPSHOTS'):
+        return None
+
+    report_class = _get_report(report_name)
+    params = report_class.parse_parameters(args)
+    # Arguments the report could not read may change the page; leave those to the view
+    if any(value and name not in params for name, value in args.items(multi=True)):
+        return None
+
+    path = _snapshot_path(report_name, snapshot_params(report_class, params), 'html')
+    stamp = _read_stamp(path)
+    if stamp is None or not _is_fresh(stamp, get_report_data_version()):
+        return None
+
+    try:
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+    except FileNotFoundError:
+        return None
+    parts = _BLOCK_MARKER.split(text[_STAMP.match(text).end():])
+    return {'stamp': stamp, 'blocks': dict(zip(parts[1::2], parts[2::2]))}
+
+
+def serves_report_snapshot(report_name):
+    """
+    Decorator serving a report page from its snapshot while the snapshot is fresh
+
+    Example:
+        @reports_bp.route('/profit-margin')
+        @login_required
+        @serves_report_snapshot('profit_margin')
+        def profit_margin():
+            ...
+    """
+    def decorator(view):
+        @wraps(view)
+        def decorated_function(*args, **kwargs):
+            snapshot = load_fresh_snapshot(report_name, request.args)
+            if snapshot is None:
+                return view(*args, **kwargs)
+
+            response = current_app.make_response(render_template('reports/snapshot.html', **snapshot))
+            response.headers['X-Report-Snapshot'] = snapshot['stamp']['generated_at']
+            return response
+        return decorated_function
+    return decorator
+
+
+def refresh_report_snapshots():
+    """
+    Regenerate each REPORT_SNAPSHOTS entry that would go stale before the next run
+
+    Returns:
+        list: Stamps of the snapshots written
+    """
+    interval = current_app.config.get('REPORT_SNAPSHOT_INTERVAL', 900)
+    written = []
+    try:
+        data_version = get_report_data_version()
+        for report_name, params in current_app.config.get('REPORT_SNAPSHOTS', []):
+            try:
+                report_class = _get_report(report_name)
+                path = _snapshot_path(report_name, snapshot_params(report_class, params), 'html')
+                stamp = _read_stamp(path)
+                if stamp is not None and _is_fresh(stamp, data_version, margin=interval):
+                    continue
+                written.append(write_report_snapshot(report_name, params))
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"Error generating snapshot of {report_name} {params}: {str(e)}")
+    finally:
+        # Start the next run with a fresh session so it sees new rows
+        db.session.remove()
+    return written
+
+
+@click.command('report-snapshots')
+@click.option('--once', is_flag=True, help='Refresh the snapshots once and exit.')
+@with_appcontext
+def report_snapshots_command(once):
+    """Pre-generate the REPORT_SNAPSHOTS reports every REPORT_SNAPSHOT_INTERVAL seconds."""
+    interval = current_app.config.get('REPORT_SNAPSHOT_INTERVAL', 900)
+    while True:
+        written = refresh_report_snapshots()
+        click.echo(f"{datetime.now():%Y-%m-%d %H:%M:%S} wrote {len(written)} report snapshot(s)")
+        if once:
+            return
+        time.sleep(interval)
@@ -0,0 +1,90 @@
+"""
+Schema upgrades for the Car Repair and Sales Tracking application.
+
+Some tables and columns the models map were added after databases were
+first created (``kpi_counters``, ``repairs.duration_days``). On a database
+created before them every query of the model fails, as does every car or
+sale write, which updates the KPI counters. The migrations adding them
+cannot be left to be run by hand: create_app() applies the ones a database
+is missing when UPGRADE_SCHEMA_ON_START is set, and they can also be
+applied explicitly:
+
+    flask upgrade-db
+
+Each migration is only run while the live schema still lacks what it adds,
+so starting the application against an up-to-date database costs a schema
+inspection and nothing more.
+"""
+
+import importlib
+import logging
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import inspect
+from app import db
+
+
+def _lacks_kpi_counters(inspector, tables):
+    return 'cars' in tables and 'kpi_counters' not in tables
+
+
+def _lacks_repair_duration_days(inspector, tables):
+    return 'repairs' in tables and \
+        'duration_days' not in {column['name'] for column in inspector.get_columns('repairs')}
+
+
+# Migrations in the migrations package the models depend on, oldest first,
+# each with a check telling whether a database still needs it
+STARTUP_MIGRATIONS = [
+    ('add_kpi_counters_table', _lacks_kpi_counters),
+    ('add_repair_duration_days', _lacks_repair_duration_days),
+]
+
+
+def pending_migrations():
+    """
+    Get the STARTUP_MIGRATIONS the database has not had yet
+
+    A database without the application's tables needs none of them:
+    db.create_all() creates the current schema.
+
+    Returns:
+        list: Migration names, in the order they must run
+    """
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    return [name for name, is_pending in STARTUP_MIGRATIONS if is_pending(inspector, tables)]
+
+
+def upgrade_schema():
+    """
+    Run the pending STARTUP_MIGRATIONS
+
+    Returns:
+        list: Names of the migrations applied
+
+    Raises:
+        RuntimeError: If a migration failed and the database still needs it
+    """
+    applied = []
+    for name in pending_migrations():
+        logging.info(f"Running migration: {name}")
+        migration = importlib.import_module(f'migrations.{name}')
+        if migration.up():
+            applied.append(name)
+        # Another worker starting at the same time may have applied it first
+        elif name in pending_migrations():
+            raise RuntimeError(f"Migration {name} failed; see the log for details")
+    db.session.remove()
+    return applied
+
+
+@click.command('upgrade-db')
+@with_appcontext
+def upgrade_db_command():
+    """Apply the migrations the current models need."""
+    applied = upgrade_schema()
+    if applied:
+        click.echo(f"Applied {len(applied)} migration(s): {', '.join(applied)}")
+    else:
+        click.echo("Database schema is up to date")
@@ -0,0 +1,322 @@
+"""
+Full-text search for the Car Repair and Sales Tracking application.
+
+List pages used to search with ``ilike('%term%')`` across several columns,
+which scans the whole table on every search. On SQLite this module keeps an
+FTS5 shadow table per searchable table (``<table>_fts``), synchronised by
+triggers so ORM writes, bulk inserts and raw SQL all stay indexed:
+
+    query = apply_search(Car.query, 'cars', search)
+
+Other backends, SQLite builds without FTS5 or an index's tokenizer, and
+terms the index cannot answer fall back to the original ``ilike`` filter.
+"""
+
+import logging
+import re
+import weakref
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from app import db
+
+# Oldest SQLite release shipping each FTS5 tokenizer that is not built in everywhere
+TOKENIZER_MIN_SQLITE = {'trigram': (3, 34, 0)}
+
+
+class SearchIndex:
+    """
+    An FTS5 index over some text columns of one table
+
+    Args:
+        table (str): Content table name
+        key (str): Integer primary key column, used as the FTS rowid
+        columns (list): Indexed column names
+        tokenize (str): FTS5 tokenizer; 'trigram' gives substring matching
+            like ilike('%term%'), 'unicode61' gives word matching
+        prefix (bool): Match word prefixes ('brak' finds 'brake'), unicode61 only
+    """
+
+    def __init__(self, table, key, columns, tokenize='unicode61', prefix=False):
+        self.table = table
+        self.key = key
+        self.columns = list(columns)
+        self.tokenize = tokenize
+        self.prefix = prefix
+        self.fts_table = f'{table}_fts'
+        self.triggers = [f'{self.fts_table}_ai', f'{self.fts_table}_ad', f'{self.fts_table}_au']
+
+        self._fts = sa.table(self.fts_table, sa.column('rowid'), sa.column('rank'))
+
+    def create_statements(self):
+        """
+        DDL creating the FTS table and its sync triggers (all idempotent)
+        """
+        columns = ', '.join(self.columns)
+        new_values = ', '.join(f'new.{name}' for name in self.columns)
+        old_values = ', '.join(f'old.{name}' for name in self.columns)
+        options = f"tokenize='{self.tokenize}'"
+        if self.prefix:
+            options += ", prefix='2 3'"
+
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.fts_table} USING fts5("
+            f"{columns}, content='{self.table}', content_rowid='{self.key}', {options})",
+
+            f"CREATE TRIGGER IF NOT EXISTS {self.triggers[0]} AFTER INSERT ON {self.table} BEGIN "
+            f"INSERT INTO {self.fts_table}(rowid, {columns}) VALUES (new.{self.key}, {new_values}); END",
+
+            f"CREATE TRIGGER IF NOT EXISTS {self.triggers[1]} AFTER DELETE ON {self.table} BEGIN "
+            f"INSERT INTO {self.fts_table}({self.fts_table}, rowid, {columns}) "
+            f"VALUES ('delete', old.{self.key}, {old_values}); END",
+
+            # Only re-index when an indexed column changes, not on status/date updates
+            f"CREATE TRIGGER IF NOT EXISTS {self.triggers[2]} AFTER UPDATE OF {columns} ON {self.table} BEGIN "
+            f"INSERT INTO {self.fts_table}({self.fts_table}, rowid, {columns}) "
+            f"VALUES ('delete', old.{self.key}, {old_values}); "
+            f"INSERT INTO {self.fts_table}(rowid, {columns}) VALUES (new.{self.key}, {new_values}); END",
+        ]
+
+    def supported(self, connection):
+        """
+        Check whether the connection's SQLite has this index's tokenizer
+        """
+        minimum = TOKENIZER_MIN_SQLITE.get(self.tokenize)
+        return minimum is None or sqlite_version(connection) >= minimum
+
+    def create(self, connection):
+        """
+        Create any missing FTS objects and rebuild the index if something was missing
+
+        Args:
+            connection: SQLAlchemy connection to a SQLite database with FTS5
+        """
+        names = [self.fts_table] + self.triggers
+        existing = {
+            row[0] for row in connection.execute(
+                sa.text("SELECT name FROM sqlite_master WHERE name IN :names").bindparams(
+                    sa.bindparam('names', expanding=True)
+                ),
+                {'names': names}
+            )
+        }
+        if existing == set(names):
+            return
+
+        for statement in self.create_statements():
+            connection.exec_driver_sql(statement)
+
+        # Index rows written while the table or triggers were missing
+        connection.exec_driver_sql(f"INSERT INTO {self.fts_table}({self.fts_table}) VALUES ('rebuild')")
+
+    def drop(self, connection):
+        """
+        Drop the FTS table (the triggers go with their content table)
+        """
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {self.fts_table}")
+
+    def match_expression(self, term):
+        """
+        Build an FTS5 MATCH expression for a user search term
+
+        Returns:
+            str or None: The expression, or None if the index cannot answer the term
+        """
+        if self.tokenize == 'trigram':
+            # Trigrams need at least three characters; quote the whole term
+            # so it matches as a substring, exactly like ilike('%term%')
+            if len(term) < 3:
+                return None
+            return '"' + term.replace('"', '""') + '"'
+
+        words = re.findall(r'\w+', term)
+        if not words:
+            return None
+        suffix = '*' if self.prefix else ''
+        return ' '.join(f'"{word}"{suffix}' for word in words)
+
+    def content_table(self):
+        """
+        The mapped content table, looked up by name so models need not be imported here
+        """
+        return db.metadata.tables[self.table]
+
+    def ilike_filter(self, term):
+        """
+        Fallback filter matching the term anywhere in any indexed column
+        """
+        pattern = f'%{term}%'
+        columns = self.content_table().c
+        return sa.or_(*(columns[name].ilike(pattern) for name in self.columns))
+
+    def key_column(self):
+        """
+        The content table's key column, for joining against matches
+        """
+        return self.content_table().c[self.key]
+
+    def match_subquery(self, expression):
+        """
+        Subquery of (rowid, rank) for rows matching an FTS5 expression
+        """
+        match = sa.literal_column(self.fts_table).op('MATCH')(sa.bindparam('fts_match', expression, unique=True))
+        return sa.select(self._fts.c.rowid, self._fts.c.rank).where(match).subquery()
+
+
+# Dictionary mapping index names to search indexes
+SEARCH_INDEXES = {
+    'cars': SearchIndex(
+        'cars', 'car_id',
+        ['vehicle_name', 'vehicle_make', 'vehicle_model', 'colour', 'licence_number', 'registration_number'],
+        tokenize='trigram'
+    ),
+    # Word-prefix matching: 'brak pad' finds 'Brake pads (front)'
+    'parts': SearchIndex(
+        'parts', 'part_id',
+        ['part_name', 'description', 'manufacturer', 'location'],
+        prefix=True
+    ),
+    'repairs': SearchIndex(
+        'repairs', 'repair_id',
+        ['repair_type', 'additional_notes'],
+        prefix=True
+    ),
+}
+
+# Engines whose FTS objects have been verified, mapped to the names of the usable indexes
+_checked_engines = weakref.WeakKeyDictionary()
+
+
+def get_search_index(index_name):
+    """
+    Get a search index by name
+
+    Raises:
+        ValueError: If the index does not exist
+    """
+    if index_name in SEARCH_INDEXES:
+        return SEARCH_INDEXES[index_name]
+
+    raise ValueError(f"Search index '{index_name}' not found")
+
+
+def register_search_index(index_name, search_index):
+    """
+    Register a custom search index
+    """
+    if index_name in SEARCH_INDEXES:
+        raise ValueError(f"Search index '{index_name}' already exists")
+
+    SEARCH_INDEXES[index_name] = search_index
+
+
+def fts5_supported(connection):
+    """
+    Check whether a connection is SQLite compiled with FTS5
+    """
+    if connection.dialect.name != 'sqlite':
+        return False
+    options = {row[0] for row in connection.exec_driver_sql("PRAGMA compile_options")}
+    return 'ENABLE_FTS5' in options
+
+
+def sqlite_version(connection):
+    """
+    The SQLite library version a connection runs, as a tuple of integers
+    """
+    version = connection.exec_driver_sql("SELECT sqlite_version()").scalar()
+    return tuple(int(part) for part in version.split('.'))
+
+
+def _create_indexes(connection, tables=None):
+    """
+    Create the FTS objects of each index the connection can support
+
+    Args:
+        connection: SQLAlchemy connection to a SQLite database with FTS5
+        tables (set, optional): Only create indexes over these content tables
+
+    Returns:
+        set: Names of the indexes that exist and can be queried
+    """
+    available = set()
+    for index_name, search_index in SEARCH_INDEXES.items():
+        if tables is not None and search_index.table not in tables:
+            continue
+        if not search_index.supported(connection):
+            continue
+        try:
+            with connection.begin_nested():
+                search_index.create(connection)
+        except OperationalError as e:
+            logging.warning(f"Search index '{index_name}' is unavailable, using ilike: {str(e)}")
+            continue
+        available.add(index_name)
+    return available
+
+
+def search_available(engine, index_name):
+    """
+    Check (once per engine) that FTS5 is usable and a search index exists
+
+    Databases created before the indexes existed get them created and
+    rebuilt on first use. Indexes whose tokenizer the SQLite build lacks are
+    left out, and searches on them use the ilike fallback.
+    """
+    if engine.dialect.name != 'sqlite':
+        return False
+
+    if engine not in _checked_engines:
+        with engine.begin() as connection:
+            available = _create_indexes(connection) if fts5_supported(connection) else set()
+        _checked_engines[engine] = available
+
+    return index_name in _checked_engines[engine]
+
+
+def apply_search(query, index_name, term, ranked=False):
+    """
+    Filter a query to rows matching a search term
+
+    Args:
+        query: Query over the index's content table
+        index_name (str): Name of a registered search index
+        term (str): User search term
+        ranked (bool): Order results by FTS5 relevance (best first)
+
+    Returns:
+        The filtered query
+    """
+    search_index = get_search_index(index_name)
+    term = (term or '').strip()
+    if not term:
+        return query
+
+    expression = search_index.match_expression(term)
+    if expression is not None and search_available(db.session.get_bind(), index_name):
+        matches = search_index.match_subquery(expression)
+        query = query.join(matches, matches.c.rowid == search_index.key_column())
+        if ranked:
+            query = query.order_by(matches.c.rank)
+        return query
+
+    return query.filter(search_index.ilike_filter(term))
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_search_indexes(target, connection, tables=(), **kw):
+    """Create FTS tables alongside their content tables in db.create_all()"""
+    if not fts5_supported(connection):
+        return
+    _create_indexes(connection, {table.name for table in tables})
+
+
+@event.listens_for(db.metadata, 'before_drop')
+def _drop_search_indexes(target, connection, tables=(), **kw):
+    """Drop FTS tables before their content tables in db.drop_all()"""
+    if connection.dialect.name != 'sqlite':
+        return
+    dropped = {table.name for table in tables}
+    for search_index in SEARCH_INDEXES.values():
+        if search_index.table in dropped:
+            search_index.drop(connection)
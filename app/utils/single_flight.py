@@ -0,0 +1,272 @@
+"""
+Single-flight report generation for the Car Repair and Sales Tracking application.
+
+At the start of the day several managers open the same report at once, and
+each request used to run its own generate(). Every report's generate() is
+now wrapped by single_flight(): requests for the same report with the same
+parameters share one computation.
+
+Within a worker, the first request runs generate() and the others wait for
+its result. Across workers, the running request holds a lock file in
+REPORT_FLIGHT_DIR. A worker that had to wait for the lock picks up the result
+the holder left next to it. That result must have been finished after the
+worker started waiting, at the current report data version. Otherwise the
+worker generates the report itself, as it also does after
+REPORT_FLIGHT_TIMEOUT seconds.
+
+A request that did not run generate() gets its own copy of the result, with
+model instances merged into its own session, and, for reports that keep
+their payload in ``self.data``, that copy as its data. Results passed between
+workers are pickled, so instances in them only carry the columns that were
+loaded. Without fcntl (Windows), or with REPORT_FLIGHT_LOCKS off, only
+requests within a worker are coalesced.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import time
+from functools import wraps
+from inspect import Parameter, signature
+from threading import Event, Lock, get_ident
+from flask import current_app, has_app_context
+from sqlalchemy import inspect
+from sqlalchemy.orm.state import InstanceState
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds between attempts to take another worker's lock
+_LOCK_POLL_INTERVAL = 0.05
+
+
+class _Flight:
+    """A generate() call in progress, shared by the requests waiting for it"""
+
+    def __init__(self):
+        self.thread = get_ident()
+        self.done = Event()
+        self.result = None
+        # Whether generate() also kept its result in the report's data attribute
+        self.fills_data = False
+        self.error = None
+
+
+_flights = {}
+_flights_lock = Lock()
+
+
+def _flight_key(report):
+    """
+    Identify a report call by its class, constructor arguments and deferred sections
+
+    Returns None for reports that do not keep their arguments as attributes;
+    those are never coalesced.
+    """
+    report_class = type(report)
+    params = {}
+    for name, parameter in signature(report_class.__init__).parameters.items():
+        if name == 'self' or parameter.kind in (Parameter.VAR_POSITIONAL, Parameter.VAR_KEYWORD):
+            continue
+        if not hasattr(report, name):
+            return None
+        params[name] = getattr(report, name)
+    return json.dumps({
+        'report': f'{report_class.__module__}.{report_class.__qualname__}',
+        'params': params,
+        'defer_sections': getattr(report, 'defer_sections', False),
+        'database': current_app.config.get('SQLALCHEMY_DATABASE_URI')
+    }, sort_keys=True, default=str)
+
+
+def _flight_paths(key):
+    directory = current_app.config.get('REPORT_FLIGHT_DIR') or \
+        os.path.join(current_app.instance_path, 'report_flights')
+    os.makedirs(directory, exist_ok=True)
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return os.path.join(directory, f'{digest}.lock'), os.path.join(directory, f'{digest}.pickle')
+
+
+def _data_version():
+    # Imported here: the report snapshots import the reports, whose base class imports this module
+    from app.utils.report_snapshots import get_report_data_version
+    return get_report_data_version()
+
+
+def _acquire(lock_file, timeout):
+    """
+    Take the lock file, waiting up to timeout seconds
+
+    Returns:
+        tuple: (acquired, waited) - whether the lock is held, and whether
+        another worker held it first
+    """
+    deadline = time.monotonic() + timeout
+    waited = False
+    while True:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True, waited
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                return False, True
+            waited = True
+            time.sleep(_LOCK_POLL_INTERVAL)
+
+
+def _read_result(path, key, waiting_since):
+    """The result another worker finished for key since waiting_since, if still current"""
+    try:
+        with open(path, 'rb') as f:
+            shared = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+    if (shared.get('key') != key or shared['finished_at'] < waiting_since
+            or shared['data_version'] != _data_version()):
+        return None
+    return shared
+
+
+def _write_result(path, key, data_version, result, fills_data=False):
+    """Leave a result for the workers waiting on the lock"""
+    try:
+        payload = pickle.dumps({
+            'key': key,
+            'data_version': data_version,
+            'finished_at': time.time(),
+            'result': result,
+            'fills_data': fills_data
+        })
+    except Exception as e:
+        logger.debug(f"Report result cannot be shared between workers: {str(e)}")
+        return
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _run_across_workers(key, compute):
+    """
+    Run compute() while holding the key's lock file, or reuse the result of the worker that held it
+
+    Returns:
+        tuple: (result, fills_data) as returned by compute()
+    """
+    if fcntl is None or not current_app.config.get('REPORT_FLIGHT_LOCKS', True):
+        return compute()
+
+    lock_path, result_path = _flight_paths(key)
+    waiting_since = time.time()
+    with open(lock_path, 'a') as lock_file:
+        acquired, waited = _acquire(lock_file, current_app.config.get('REPORT_FLIGHT_TIMEOUT', 60))
+        try:
+            if acquired and waited:
+                shared = _read_result(result_path, key, waiting_since)
+                if shared is not None:
+                    return shared['result'], shared.get('fills_data', False)
+            # Read the version first, so writes made while generating leave the result stale
+            data_version = _data_version()
+            result, fills_data = compute()
+            if acquired:
+                _write_result(result_path, key, data_version, result, fills_data)
+            return result, fills_data
+        finally:
+            if acquired:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _shared(value):
+    """
+    Copy a result for a request that did not generate it
+
+    Containers are copied so callers can change their payload, and model
+    instances are merged into this request's session: the originals belong
+    to the generating request's session (or to none, when they were pickled
+    by another worker), where lazy loads would fail or cross threads.
+    """
+    if isinstance(value, dict):
+        return {key: _shared(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_shared(item) for item in value]
+    if type(value) is tuple:
+        return tuple(_shared(item) for item in value)
+    state = inspect(value, raiseerr=False)
+    if isinstance(state, InstanceState) and state.has_identity:
+        # Imported here: the app package imports the reports, whose base class imports this module
+        from app import db
+        return db.session.merge(value, load=False)
+    return value
+
+
+def _follow(report, result, fills_data):
+    """Give a report that did not run its generate() the shared result"""
+    result = _shared(result)
+    if fills_data:
+        report.data = result
+    return result
+
+
+def single_flight(generate):
+    """
+    Decorator sharing one generate() call between identical concurrent report requests
+
+    Example:
+        cls.generate = single_flight(on_reporting_bind(cls.__dict__['generate']))
+    """
+    @wraps(generate)
+    def decorated_function(self, *args, **kwargs):
+        key = _flight_key(self) if has_app_context() and not args and not kwargs else None
+        if key is None:
+            return generate(self, *args, **kwargs)
+
+        with _flights_lock:
+            flight = _flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _flights[key] = _Flight()
+
+        if not leader:
+            # A report generating another with the same arguments runs it itself
+            if flight.thread == get_ident():
+                return generate(self)
+            # A stuck request does not hold up the others past the cross-worker timeout
+            if not flight.done.wait(current_app.config.get('REPORT_FLIGHT_TIMEOUT', 60)):
+                return generate(self)
+            if flight.error is not None:
+                raise flight.error
+            return _follow(self, flight.result, flight.fills_data)
+
+        ran = False
+
+        def compute():
+            nonlocal ran
+            ran = True
+            result = generate(self)
+            return result, getattr(self, 'data', None) is result
+
+        try:
+            flight.result, flight.fills_data = _run_across_workers(key, compute)
+            if not ran:
+                # Another worker generated the result
+                return _follow(self, flight.result, flight.fills_data)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with _flights_lock:
+                _flights.pop(key, None)
+            flight.done.set()
+    return decorated_function
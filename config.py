@@ -9,6 +9,60 @@ class Config:
     """Base configuration class for the application"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-key-replace-in-production'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Seconds a logged-in user's principal is cached per process (0 disables)
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    # Rows per page on the list pages, and the most rows counted for their totals
+    LIST_PAGE_SIZE = int(os.environ.get('LIST_PAGE_SIZE', 50))
+    LIST_COUNT_CAP = int(os.environ.get('LIST_COUNT_CAP', 1000))
+    # Maximum suggestions per autocomplete lookup, and seconds an index is reused
+    AUTOCOMPLETE_LIMIT = int(os.environ.get('AUTOCOMPLETE_LIMIT', 20))
+    AUTOCOMPLETE_TTL = int(os.environ.get('AUTOCOMPLETE_TTL', 300))
+    # Seconds the dashboard's metrics snapshot is reused between writes
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 60))
+    # Seconds between full recounts checking the dashboard's KPI counters
+    KPI_RECONCILE_INTERVAL = int(os.environ.get('KPI_RECONCILE_INTERVAL', 3600))
+    # Rows inserted per transaction by the bulk importers
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+    # Uploads larger than this many bytes are imported in chunks of
+    # IMPORT_CHUNK_SIZE rows, each committed and checkpointed on its own
+    IMPORT_STREAM_THRESHOLD = int(os.environ.get('IMPORT_STREAM_THRESHOLD', 20 * 1024 * 1024))
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 5000))
+    # Where chunked imports keep their resume checkpoints (None: instance folder)
+    IMPORT_CHECKPOINT_DIR = os.environ.get('IMPORT_CHECKPOINT_DIR')
+    # Most error and warning messages a chunked import keeps
+    IMPORT_MAX_MESSAGES = int(os.environ.get('IMPORT_MAX_MESSAGES', 1000))
+    # Worker threads running background imports, and seconds finished jobs stay queryable
+    IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS', 2))
+    IMPORT_JOB_RETENTION = int(os.environ.get('IMPORT_JOB_RETENTION', 3600))
+    # SQLite PRAGMAs applied to each new connection (empty keeps SQLite defaults)
+    SQLITE_PRAGMAS = {}
+    # Connection pool size (None keeps Flask-SQLAlchemy's default pooling)
+    DB_POOL_SIZE = None
+    # Replica URL that reports read from (None falls back to REPORTING_READ_ONLY)
+    REPORTING_DATABASE_URL = os.environ.get('REPORTING_DATABASE_URL')
+    # Read reports through a separate read-only connection to a SQLite file
+    REPORTING_READ_ONLY = False
+    # (report name, parameters) pairs pre-generated by `flask report-snapshots`
+    REPORT_SNAPSHOTS = [
+        ('sales_performance', {'period': 'monthly'}),
+        ('profit_margin', {'timeframe': 'last_30_days'}),
+        ('inventory_aging', {}),
+    ]
+    # Where snapshots are written (None: instance folder), seconds between
+    # worker runs, and seconds a snapshot may be served for
+    REPORT_SNAPSHOT_DIR = os.environ.get('REPORT_SNAPSHOT_DIR')
+    REPORT_SNAPSHOT_INTERVAL = int(os.environ.get('REPORT_SNAPSHOT_INTERVAL', 900))
+    REPORT_SNAPSHOT_MAX_AGE = int(os.environ.get('REPORT_SNAPSHOT_MAX_AGE', 3600))
+    # Closed report buckets (past days, weeks, months) kept per process
+    REPORT_BUCKET_MEMO_SIZE = int(os.environ.get('REPORT_BUCKET_MEMO_SIZE', 10000))
+    # Share one report generation between workers through lock files in
+    # REPORT_FLIGHT_DIR (None: instance folder); workers stop waiting for
+    # another worker's result after REPORT_FLIGHT_TIMEOUT seconds
+    REPORT_FLIGHT_LOCKS = True
+    REPORT_FLIGHT_DIR = os.environ.get('REPORT_FLIGHT_DIR')
+    REPORT_FLIGHT_TIMEOUT = int(os.environ.get('REPORT_FLIGHT_TIMEOUT', 60))
+    # Apply the migrations the models need (see `flask upgrade-db`) when the app starts
+    UPGRADE_SCHEMA_ON_START = True
     
     @staticmethod
     def init_app(app):
@@ -23,6 +77,10 @@ class DevelopmentConfig(Config):
 class TestingConfig(Config):
     """Testing configuration using in-memory SQLite database"""
     TESTING = True
+    # Keep the suite from writing lock files into the instance folder
+    REPORT_FLIGHT_LOCKS = False
+    # Tests point the app at their own database after creating it
+    UPGRADE_SCHEMA_ON_START = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'data-test.sqlite')
 
@@ -31,6 +89,21 @@ class ProductionConfig(Config):
     Override with DATABASE_URL environment variable if needed"""
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'data.sqlite')
+    # WAL lets report readers run alongside sale and repair writes; with WAL,
+    # synchronous=NORMAL only fsyncs at checkpoints
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_KB', 65536)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 268435456)),
+        'temp_store': 'MEMORY'
+    }
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    REPORTING_READ_ONLY = True
 
 # Environment configuration dictionary
 config = {
@@ -1,10 +1,12 @@
 from migrations.add_vehicle_makes_table import up as create_vehicle_makes_table
 import logging
-from app import app, db
+from app import create_app
+from app.utils.schema import upgrade_schema
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 if __name__ == "__main__":
+    app = create_app()
     logging.info("Starting migration: Creating vehicle_makes table")
     
     with app.app_context():
@@ -13,4 +15,8 @@ if __name__ == "__main__":
         if result:
             logging.info("Migration completed successfully")
         else:
-            logging.error("Migration failed") 
\ No newline at end of file
+            logging.error("Migration failed")
+        
+        # Migrations the models depend on (also applied when the app starts)
+        applied = upgrade_schema()
+        logging.info(f"Applied {len(applied)} schema migration(s)")
@@ -0,0 +1,40 @@
+from app import db
+from app.models.kpi_counter import KpiCounter
+from app.utils.kpi_counters import reconcile_kpi_counters
+import logging
+
+def up():
+    """Create the kpi_counters table and fill it from the current cars"""
+    try:
+        inspector = db.inspect(db.engine)
+        if 'kpi_counters' not in inspector.get_table_names():
+            logging.info("Creating kpi_counters table...")
+            KpiCounter.__table__.create(db.engine)
+        else:
+            logging.info("kpi_counters table already exists")
+
+        # Counters only track changes, so start them from a full count
+        reconcile_kpi_counters()
+        db.session.commit()
+        logging.info("Successfully populated kpi_counters table")
+        return True
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error creating kpi_counters table: {str(e)}")
+        return False
+
+def down():
+    """Drop the kpi_counters table"""
+    try:
+        inspector = db.inspect(db.engine)
+        if 'kpi_counters' in inspector.get_table_names():
+            logging.info("Dropping kpi_counters table...")
+            KpiCounter.__table__.drop(db.engine)
+            logging.info("Successfully dropped kpi_counters table")
+        else:
+            logging.info("kpi_counters table does not exist")
+
+        return True
+    except Exception as e:
+        logging.error(f"Error dropping kpi_counters table: {str(e)}")
+        return False
@@ -0,0 +1,59 @@
+from app import db
+from app.models.repair import Repair
+from app.reports.base import days_between
+from sqlalchemy import text
+import logging
+
+def up():
+    """Add repairs.duration_days, fill it from the repair dates and add the analytics indexes"""
+    try:
+        inspector = db.inspect(db.engine)
+        columns = [column['name'] for column in inspector.get_columns('repairs')]
+        with db.engine.begin() as conn:
+            if 'duration_days' not in columns:
+                logging.info("Adding duration_days column to repairs...")
+                conn.execute(text("ALTER TABLE repairs ADD COLUMN duration_days INTEGER"))
+            else:
+                logging.info("repairs.duration_days already exists")
+
+            # Backfill every row in one statement; later writes keep it current
+            conn.execute(
+                Repair.__table__.update().values(
+                    duration_days=days_between(Repair.__table__.c.start_date, Repair.__table__.c.end_date)
+                )
+            )
+
+        existing_indexes = {index['name'] for index in inspector.get_indexes('repairs')}
+        for index in Repair.__table__.indexes:
+            if index.name not in existing_indexes:
+                logging.info(f"Creating index {index.name}...")
+                index.create(db.engine)
+
+        logging.info("Successfully added and backfilled repairs.duration_days")
+        return True
+    except Exception as e:
+        logging.error(f"Error adding repairs.duration_days: {str(e)}")
+        return False
+
+def down():
+    """Drop the analytics indexes and the duration_days column"""
+    try:
+        inspector = db.inspect(db.engine)
+        existing_indexes = {index['name'] for index in inspector.get_indexes('repairs')}
+        for index in Repair.__table__.indexes:
+            if index.name in existing_indexes:
+                logging.info(f"Dropping index {index.name}...")
+                index.drop(db.engine)
+
+        columns = [column['name'] for column in inspector.get_columns('repairs')]
+        if 'duration_days' in columns:
+            logging.info("Dropping duration_days column from repairs...")
+            with db.engine.begin() as conn:
+                conn.execute(text("ALTER TABLE repairs DROP COLUMN duration_days"))
+        else:
+            logging.info("repairs.duration_days does not exist")
+
+        return True
+    except Exception as e:
+        logging.error(f"Error dropping repairs.duration_days: {str(e)}")
+        return False
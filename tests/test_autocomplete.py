@@ -0,0 +1,107 @@
+import unittest
+from app import create_app, db
+from app.models.car import Car, VehicleMake, VehicleModel
+from app.models.part import Part
+from app.utils.autocomplete import AutocompleteIndex, invalidate_autocomplete
+from sqlalchemy import event
+from datetime import date
+
+class AutocompleteTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.app.config['LOGIN_DISABLED'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        invalidate_autocomplete()
+        self.client = self.app.test_client()
+
+        toyota = VehicleMake(name='Toyota')
+        vw = VehicleMake(name='Volkswagen')
+        db.session.add_all([toyota, vw])
+        db.session.flush()
+        db.session.add_all([
+            VehicleModel(name='Corolla', make_id=toyota.id),
+            VehicleModel(name='Hilux', make_id=toyota.id),
+            VehicleModel(name='Polo', make_id=vw.id),
+            Part(part_name='Filter', manufacturer='Bosch', storage_location='Shelf A'),
+            Part(part_name='Pads', manufacturer='Mann', storage_location='Shelf B'),
+        ])
+        for make, model, year, colour in [('Toyota', 'Corolla', 2018, 'White'),
+                                          ('Toyota', 'Hilux', 2021, 'Silver'),
+                                          ('Volkswagen', 'Polo', 2019, 'Red')]:
+            db.session.add(self.make_car(make, model, year, colour))
+        db.session.commit()
+
+    def tearDown(self):
+        invalidate_autocomplete()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def make_car(self, make, model, year, colour):
+        return Car(vehicle_name=f'{make} {model}', vehicle_make=make, vehicle_model=model,
+                   year=year, colour=colour, dekra_condition='Good', licence_number='L',
+                   registration_number='R', purchase_price=1000, source='Dealer',
+                   date_bought=date(2024, 1, 1), current_location='Lot', repair_status='On Display')
+
+    def get_json(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response.get_json()
+
+    def test_index_substring_group_and_limit(self):
+        index = AutocompleteIndex([('Corolla', 'toyota'), ('Hilux', 'toyota'), ('Polo', 'vw'), ('Golf', 'vw')])
+        self.assertEqual(index.search('OL'), ['Corolla', 'Polo', 'Golf'])
+        self.assertEqual(index.search('ol', group='vw'), ['Polo', 'Golf'])
+        self.assertEqual(index.search('', group='toyota'), ['Corolla', 'Hilux'])
+        self.assertEqual(index.search('', limit=2), ['Corolla', 'Hilux'])
+        self.assertEqual(index.search('x', group='unknown'), [])
+
+    def test_endpoints(self):
+        self.assertEqual(self.get_json('/vehicle-data/api/makes?query=OTA'), ['Toyota'])
+        self.assertEqual(self.get_json('/vehicle-data/api/models?make=toyota'), ['Corolla', 'Hilux'])
+        self.assertEqual(self.get_json('/vehicle-data/api/models?make=Nope&query=o'), ['Corolla', 'Polo'])
+        self.assertEqual(self.get_json('/vehicle-data/api/years'), ['2021', '2019', '2018'])
+        self.assertEqual(self.get_json('/vehicle-data/api/colors?query=e'), ['Red', 'Silver', 'White'])
+        self.assertEqual(self.get_json('/parts/autocomplete/makes?query=w'), ['Volkswagen'])
+        self.assertEqual(self.get_json('/parts/autocomplete/models?make=TOYOTA&query=lux'), ['Hilux'])
+        self.assertEqual(self.get_json('/parts/autocomplete/manufacturers?query=b'), ['Bosch'])
+        self.assertEqual(self.get_json('/parts/autocomplete/storage-locations?query=shelf'), ['Shelf A', 'Shelf B'])
+
+    def test_lookups_served_from_memory(self):
+        self.get_json('/vehicle-data/api/colors?query=r')
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            for query in ('r', 're', 'red'):
+                self.get_json(f'/vehicle-data/api/colors?query={query}')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        self.assertFalse([s for s in statements if 'colour' in s])
+
+    def test_commit_refreshes_index(self):
+        self.assertEqual(self.get_json('/vehicle-data/api/colors?query=blue'), [])
+        db.session.add(self.make_car('Ford', 'Ranger', 2020, 'Blue'))
+        db.session.commit()
+        self.assertEqual(self.get_json('/vehicle-data/api/colors?query=blue'), ['Blue'])
+
+        car = Car.query.filter_by(colour='Blue').first()
+        car.colour = 'Navy'
+        db.session.commit()
+        self.assertEqual(self.get_json('/vehicle-data/api/colors?query=blue'), [])
+
+        # Rolled back writes leave the index alone
+        db.session.add(VehicleMake(name='Mazda'))
+        db.session.flush()
+        db.session.rollback()
+        self.assertEqual(self.get_json('/vehicle-data/api/makes?query=maz'), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import unittest
+from app import create_app, db
+from app.models.car import Car
+from app.models.repair import Repair
+from app.models.repair_provider import RepairProvider
+from app.models.setting import Setting
+from app.models.stand import Stand
+from app.utils.dashboard import build_dashboard_snapshot, get_dashboard_snapshot, invalidate_dashboard_snapshot
+from sqlalchemy import event
+from datetime import date, timedelta
+
+TODAY = date.today()
+
+class DashboardSnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.app.config['LOGIN_DISABLED'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        invalidate_dashboard_snapshot()
+        self.client = self.app.test_client()
+
+        north = Stand(stand_name='North', location='Lot', capacity=10)
+        south = Stand(stand_name='South', location='Lot', capacity=10)
+        provider = RepairProvider(provider_name='Fixit', service_type='Mechanical', contact_info='x')
+        db.session.add_all([north, south, provider])
+        db.session.flush()
+
+        # (status, days since bought, days on stand, stand, days since sold, sale price)
+        for status, bought, on_stand, stand, sold, price in [
+            ('On Display', 300, 200, north, None, None),
+            ('On Display', 150, 100, north, None, None),
+            ('On Display', 40, 20, south, None, None),
+            ('Waiting for Repairs', 40, None, None, None, None),
+            ('Waiting for Repairs', 20, None, None, None, None),
+            ('Waiting for Repairs', 15, None, None, None, None),
+            ('Ready for Display', 10, None, None, None, None),
+            ('Ready for Display', 30, None, None, None, None),
+            ('In Repair', 50, None, None, None, None),
+            ('Sold', 90, 60, south, 5, 150000),
+            ('Sold', 80, 40, north, 10, 90000),
+            ('Sold', 200, 100, north, 100, 200000),
+        ]:
+            db.session.add(self.make_car(status, bought, on_stand, stand, sold, price))
+        db.session.flush()
+
+        first_sold = Car.query.filter(Car.sale_price == 150000).one()
+        db.session.add_all([
+            Repair(car_id=first_sold.car_id, repair_type='Paint', provider_id=provider.provider_id,
+                   repair_cost=20000, start_date=TODAY - timedelta(days=30), end_date=TODAY - timedelta(days=20)),
+            Repair(car_id=first_sold.car_id, repair_type='Tyres', provider_id=provider.provider_id,
+                   repair_cost=5000, start_date=TODAY - timedelta(days=12), end_date=TODAY - timedelta(days=10)),
+        ])
+        db.session.commit()
+
+    def tearDown(self):
+        invalidate_dashboard_snapshot()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def make_car(self, status, bought, on_stand, stand, sold, price):
+        return Car(vehicle_name='Car', vehicle_make='Toyota', vehicle_model='Corolla', year=2018,
+                   colour='White', dekra_condition='Good', licence_number='L', registration_number='R',
+                   purchase_price=100000, refuel_cost=500, source='Dealer',
+                   date_bought=TODAY - timedelta(days=bought),
+                   date_added_to_stand=TODAY - timedelta(days=on_stand) if on_stand is not None else None,
+                   date_sold=TODAY - timedelta(days=sold) if sold is not None else None,
+                   sale_price=price, current_location='Lot', repair_status=status,
+                   stand_id=stand.stand_id if stand else None)
+
+    def test_metrics(self):
+        metrics = build_dashboard_snapshot().metrics
+        self.assertEqual(metrics['total_cars'], 12)
+        self.assertEqual(metrics['unsold_cars'], 9)
+        self.assertEqual(metrics['cars_in_repair'], 1)
+        self.assertEqual(metrics['cars_on_stand'], 3)
+        self.assertEqual(metrics['ready_for_display_count'], 2)
+        self.assertEqual(metrics['avg_recon_time'], 20)
+        # Threshold 180: exceeding at 200 days, approaching between 90 and 180
+        self.assertEqual(metrics['vehicles_exceeding_aging'], 1)
+        self.assertEqual(metrics['vehicles_approaching_aging'], 1)
+        # Threshold 30: inactive past 30 days, approaching past 15
+        self.assertEqual(metrics['vehicles_inactive_status'], 1)
+        self.assertEqual(metrics['vehicles_approaching_inactive'], 1)
+
+        self.assertEqual(metrics['recent_sales'], 2)
+        self.assertEqual(float(metrics['recent_sales_value']), 240000)
+        # 150000 - 125500 and 90000 - 100500
+        self.assertAlmostEqual(metrics['total_profit'], 14000)
+        self.assertAlmostEqual(metrics['avg_profit'], 7000)
+        self.assertAlmostEqual(metrics['avg_roi'], (24500 / 125500 - 10500 / 100500) * 50)
+
+        self.assertEqual([(s['stand_name'], s['total_cars'], s['avg_age']) for s in metrics['stands_with_stats']],
+                         [('North', 2, 150), ('South', 1, 20)])
+        self.assertEqual([(c.stand_name, (TODAY - c.date_added_to_stand).days)
+                          for c in metrics['cars_on_stand_longest']],
+                         [('North', 200), ('North', 100), ('South', 20)])
+        self.assertEqual([(TODAY - c.date_bought).days for c in metrics['cars_waiting_repair']], [40, 20, 15])
+        self.assertEqual([(r['repair_type'], r['provider_name'], r['duration']) for r in metrics['recent_repairs']],
+                         [('Tyres', 'Fixit', 2), ('Paint', 'Fixit', 10)])
+
+        Setting.set_setting('enable_status_warnings', False)
+        db.session.commit()
+        metrics = build_dashboard_snapshot().metrics
+        self.assertEqual(metrics['vehicles_inactive_status'], 0)
+        self.assertEqual(metrics['vehicles_approaching_inactive'], 0)
+
+    def test_dashboard_page_reuses_snapshot(self):
+        self.assertEqual(self.client.get('/dashboard').status_code, 200)
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            response = self.client.get('/dashboard')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Fixit', response.data)
+        self.assertFalse([s for s in statements if 'cars' in s])
+
+    def test_commit_invalidates_snapshot(self):
+        snapshot = get_dashboard_snapshot()
+        self.assertIs(get_dashboard_snapshot(), snapshot)
+
+        car = Car.query.filter_by(repair_status='In Repair').one()
+        car.repair_status = 'Ready for Display'
+        db.session.flush()
+        db.session.rollback()
+        self.assertIs(get_dashboard_snapshot(), snapshot)
+
+        car = Car.query.filter_by(repair_status='In Repair').one()
+        car.repair_status = 'Ready for Display'
+        db.session.commit()
+        metrics = get_dashboard_snapshot().metrics
+        self.assertEqual(metrics['cars_in_repair'], 0)
+        self.assertEqual(metrics['ready_for_display_count'], 3)
+
+        self.app.config['DASHBOARD_CACHE_TTL'] = 0
+        self.assertIsNot(get_dashboard_snapshot(), get_dashboard_snapshot())
+
+if __name__ == '__main__':
+    unittest.main()
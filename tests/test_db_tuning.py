@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import unittest
+from app import create_app, db
+from app.utils.db_tuning import build_engine_options, configure_database
+from config import ProductionConfig
+from sqlalchemy.pool import QueuePool
+
+class DatabaseTuningTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(self.tmpdir, 'tuned.sqlite')
+        self.app.config['SQLITE_PRAGMAS'] = ProductionConfig.SQLITE_PRAGMAS
+        self.app.config['DB_POOL_SIZE'] = 2
+        configure_database(self.app, db)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        db.get_engine(self.app).dispose()
+        self.app_context.pop()
+        shutil.rmtree(self.tmpdir)
+
+    def test_pragmas_applied_to_new_connections(self):
+        with db.engine.connect() as conn:
+            self.assertEqual(conn.exec_driver_sql('PRAGMA journal_mode').scalar(), 'wal')
+            self.assertEqual(conn.exec_driver_sql('PRAGMA synchronous').scalar(), 1)
+            self.assertEqual(conn.exec_driver_sql('PRAGMA busy_timeout').scalar(), 5000)
+            self.assertEqual(conn.exec_driver_sql('PRAGMA temp_store').scalar(), 2)
+        self.assertIsInstance(db.engine.pool, QueuePool)
+
+    def test_reader_not_blocked_by_open_write(self):
+        writer = db.engine.connect()
+        reader = db.engine.connect()
+        try:
+            trans = writer.begin()
+            writer.exec_driver_sql("INSERT INTO stands (stand_name, location) VALUES ('Open Write', 'Lot')")
+            # The uncommitted row is invisible, but the read does not wait
+            self.assertEqual(reader.exec_driver_sql('SELECT COUNT(*) FROM stands').scalar(), 0)
+            trans.commit()
+            self.assertEqual(reader.exec_driver_sql('SELECT COUNT(*) FROM stands').scalar(), 1)
+        finally:
+            writer.close()
+            reader.close()
+
+    def test_pool_options_by_backend(self):
+        config = {'DB_POOL_SIZE': 5, 'DB_POOL_RECYCLE': 600}
+        self.assertEqual(build_engine_options(config, 'sqlite://'), {})
+        self.assertEqual(build_engine_options({}, 'sqlite:///data.sqlite'), {})
+
+        options = build_engine_options(config, 'postgresql://user@localhost/cars')
+        self.assertEqual(options['pool_size'], 5)
+        self.assertEqual(options['pool_recycle'], 600)
+        self.assertTrue(options['pool_pre_ping'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from app import create_app, db
+from app.models.car import Car, VehicleMake, VehicleModel, VehicleColor
+from app.models.stand import Stand
+from app.utils.autocomplete import autocomplete, invalidate_autocomplete
+from app.utils.import_helpers import import_cars
+from app.utils.kpi_counters import get_kpi_counters, reconcile_kpi_counters
+from werkzeug.datastructures import FileStorage
+from openpyxl import Workbook
+from datetime import date, datetime
+
+CSV = """Licence Number,Registration Number,Make,Model,Year,Colour,Purchase Price,Recon Cost,Date Bought,Date Sold,Sale Price,Stand,Status
+abc1,,bmw,x5,2019,red,1000,50,2024-01-02,,,Main,
+abc1,,bmw,x5,2019,red,1000,,2024-01-02,,,Main,
+abc2,R2,toyota,hilux,1800,blue,1000,,,,,,
+abc3,R3,toyota,hilux,2020,blue,-5,,,,,,
+abc4,R4,toyota,hilux,2020,Blue,2000,,bad,2024-05-01,90000,Nowhere,
+,R5,toyota,hilux,2020,blue,2000,,,,,,
+abc6,R6,toyota,hilux,x,blue,2000,,,,,,
+old1,R7,ford,focus,2015,grey,500,,2020-01-01,,,,Reserved
+"""
+
+class ImportCarsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.app.config['LOGIN_DISABLED'] = True
+        self.checkpoints = tempfile.TemporaryDirectory()
+        self.app.config['IMPORT_CHECKPOINT_DIR'] = self.checkpoints.name
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        invalidate_autocomplete()
+
+        self.stand = Stand(stand_name='Main', location='Lot')
+        db.session.add_all([self.stand, VehicleMake(name='BMW')])
+        db.session.add(Car(vehicle_name='Old', vehicle_make='Ford', vehicle_model='Focus', year=2015,
+                           colour='Grey', dekra_condition='Good', licence_number='OLD1',
+                           registration_number='R', purchase_price=500, source='Dealer',
+                           date_bought=date(2020, 1, 1), current_location='Lot', repair_status='Available'))
+        db.session.commit()
+        reconcile_kpi_counters()
+        db.session.commit()
+
+    def tearDown(self):
+        invalidate_autocomplete()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.checkpoints.cleanup()
+
+    def run_import(self, text, filename='cars.csv', chunk_size=None):
+        data = text if isinstance(text, bytes) else text.encode()
+        return import_cars(FileStorage(io.BytesIO(data), filename=filename), chunk_size=chunk_size)
+
+    def test_rows_are_validated_and_imported(self):
+        result = self.run_import(CSV)
+
+        self.assertEqual(result['success'], 2)
+        self.assertEqual(result['failed'], 6)
+        self.assertEqual(result['errors'], [
+            "Row 3: Car with licence number 'ABC1' already exists. Skipping.",
+            "Row 4: Year 1800 is invalid (must be between 1900 and %d). Skipping." % (date.today().year + 1),
+            "Row 5: Purchase price cannot be negative. Skipping.",
+            "Row 7: Licence Number is required. Skipping.",
+            "Row 8: Year must be a valid number. Skipping.",
+            "Row 9: Car with licence number 'OLD1' already exists. Skipping.",
+        ])
+        self.assertEqual(result['warnings'][0], "Stand 'Nowhere' not found, using default stand")
+        self.assertIn("Row 2 imported with warnings: No Registration Number provided, using Licence Number",
+                      result['warnings'][1])
+        self.assertIn("Car has recon cost but no status provided, using 'Waiting for Repairs'", result['warnings'][1])
+        self.assertIn("Invalid date bought format, using today's date", result['warnings'][2])
+
+        first = Car.query.filter_by(licence_number='ABC1').one()
+        self.assertEqual((first.vehicle_make, first.vehicle_model, first.colour), ('BMW', 'X5', 'Red'))
+        self.assertEqual(first.registration_number, 'ABC1')
+        self.assertEqual(float(first.final_cost_price), 1050)
+        self.assertEqual(first.repair_status, 'Waiting for Repairs')
+        self.assertEqual(first.vehicle_name, '2019 BMW X5')
+        self.assertEqual(first.stand_id, self.stand.stand_id)
+
+        sold = Car.query.filter_by(licence_number='ABC4').one()
+        self.assertEqual((sold.repair_status, sold.date_sold, float(sold.sale_price)), ('Sold', date(2024, 5, 1), 90000))
+        self.assertEqual(sold.date_bought, date.today())
+
+        # Only makes, models and colours of imported rows are created, once each
+        self.assertEqual(sorted(m.name for m in VehicleMake.query), ['BMW', 'Toyota'])
+        self.assertEqual(sorted(m.name for m in VehicleModel.query), ['Hilux', 'X5'])
+        self.assertEqual(sorted(c.name for c in VehicleColor.query), ['Blue', 'Red'])
+
+    def test_derived_data_is_refreshed(self):
+        self.assertEqual(autocomplete('car_makes', 'toy'), [])
+        self.run_import(CSV)
+        self.assertEqual(autocomplete('car_makes', 'toy'), ['Toyota'])
+        counters = get_kpi_counters()
+        self.assertEqual(counters['total_cars'], 3)
+        self.assertEqual(counters['unsold_cars'], 2)
+
+    def test_batches_and_reimport(self):
+        self.app.config['IMPORT_BATCH_SIZE'] = 2
+        rows = '\n'.join(f'L{i},R{i},Mazda,Demio,2020,White,{1000 + i}' for i in range(5))
+        result = self.run_import('Licence Number,Registration Number,Make,Model,Year,Colour,Purchase Price\n' + rows)
+        self.assertEqual((result['success'], result['failed']), (5, 0))
+        self.assertEqual(Car.query.filter_by(vehicle_make='Mazda').count(), 5)
+
+        result = self.run_import('Licence Number,Registration Number,Make,Model,Year,Colour,Purchase Price\n' + rows)
+        self.assertEqual((result['success'], result['failed']), (0, 5))
+
+    def test_rejected_files(self):
+        self.assertEqual(self.run_import('x', filename='cars.txt')['errors'],
+                         ['Unsupported file format: txt. Please use CSV or Excel (.xlsx)'])
+        self.assertEqual(self.run_import('Licence Number,Make\n')['errors'], ['File contains no data'])
+
+    def test_chunked_import_matches_whole_file_import(self):
+        whole = self.run_import(CSV)
+        whole_cars = sorted((c.licence_number, c.vehicle_make, c.repair_status) for c in Car.query)
+        db.session.query(Car).filter(Car.licence_number != 'OLD1').delete()
+        db.session.commit()
+
+        chunked = self.run_import(CSV, chunk_size=2)
+        self.assertEqual((chunked['success'], chunked['failed']), (whole['success'], whole['failed']))
+        self.assertEqual(chunked['errors'], whole['errors'])
+        self.assertEqual(sorted((c.licence_number, c.vehicle_make, c.repair_status) for c in Car.query), whole_cars)
+        self.assertEqual(os.listdir(self.checkpoints.name), [])
+
+    def write_checkpoint(self, text, next_row, success):
+        digest = hashlib.sha1(text.encode()).hexdigest()
+        checkpoint = os.path.join(self.checkpoints.name, f'cars-cars.csv-{digest[:16]}.json')
+        with open(checkpoint, 'w') as f:
+            json.dump({'filename': 'cars.csv', 'digest': digest, 'next_row': next_row,
+                       'success': success, 'failed': 0}, f)
+        return checkpoint
+
+    def test_chunked_import_resumes_from_checkpoint(self):
+        rows = ''.join(f'L{i},Mazda,Demio,2020,White,1000\n' for i in range(6))
+        text = 'Licence Number,Make,Model,Year,Colour,Purchase Price\n' + rows
+        # A previous attempt committed the first four rows, then stopped
+        checkpoint = self.write_checkpoint(text, next_row=4, success=4)
+
+        result = self.run_import(text, chunk_size=4)
+        self.assertEqual((result['success'], result['failed']), (6, 0))
+        self.assertIn('Resuming import from row 6', result['warnings'])
+        self.assertEqual(sorted(c.licence_number for c in Car.query.filter_by(vehicle_make='Mazda')), ['L4', 'L5'])
+        self.assertFalse(os.path.exists(checkpoint))
+
+    def test_corrected_file_does_not_resume(self):
+        header = 'Licence Number,Make,Model,Year,Colour,Purchase Price\n'
+        failed = header + ''.join(f'L{i},Mazda,Demio,2020,White,1000\n' for i in range(6))
+        corrected = header + ''.join(f'K{i},Mazda,Demio,2020,White,1000\n' for i in range(6))
+        self.assertEqual(len(failed), len(corrected))
+        self.write_checkpoint(failed, next_row=4, success=4)
+
+        # Same name and size, different rows: every row is imported
+        result = self.run_import(corrected, chunk_size=4)
+        self.assertEqual((result['success'], result['failed']), (6, 0))
+        self.assertFalse([w for w in result['warnings'] if w.startswith('Resuming')])
+        self.assertEqual(Car.query.filter(Car.licence_number.like('K%')).count(), 6)
+
+    def test_chunked_excel_import_streams_rows(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['Licence Number', 'Make', 'Model', 'Year', 'Colour', 'Purchase Price', 'Date Bought'])
+        sheet.append(['x1', 'kia', 'rio', 2020, 'white', 1000, datetime(2024, 3, 1)])
+        sheet.append([None] * 7)
+        sheet.append(['x2', 'kia', 'rio', 2020, 'white', 1000, '2024-03-02'])
+        sheet.append(['x1', 'kia', 'rio', 2020, 'white', 1000, None])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+
+        result = self.run_import(buffer.getvalue(), filename='cars.xlsx', chunk_size=2)
+        self.assertEqual((result['success'], result['failed']), (2, 1))
+        self.assertEqual(result['errors'], ["Row 5: Car with licence number 'X1' already exists. Skipping."])
+        self.assertEqual(Car.query.filter_by(licence_number='X1').one().date_bought, date(2024, 3, 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import io
+import os
+import tempfile
+import unittest
+from app import create_app, db
+from app.models.car import Car
+from app.models.stand import Stand
+from app.models.user import User
+from app.utils.autocomplete import invalidate_autocomplete
+from app.utils.import_jobs import get_import_job
+
+CSV = """Licence Number,Registration Number,Make,Model,Year,Colour,Purchase Price,Date Bought,Stand
+JOB1,R1,Toyota,Hilux,2020,Blue,1000,2024-01-02,Main
+JOB2,R2,Toyota,Hilux,1800,Blue,1000,2024-01-02,Main
+JOB3,R3,Toyota,Corolla,2019,Red,2000,2024-01-03,Main
+"""
+
+class ImportJobsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.instance = tempfile.TemporaryDirectory()
+        self.app.instance_path = self.instance.name
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        invalidate_autocomplete()
+        db.session.add(Stand(stand_name='Main', location='Lot'))
+        db.session.add(User(username='importer', full_name='Import Admin', password='password123', role='admin'))
+        db.session.commit()
+        self.client = self.app.test_client()
+        self.client.post('/auth/login', data={'username': 'importer', 'password': 'password123'})
+
+    def tearDown(self):
+        invalidate_autocomplete()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.instance.cleanup()
+
+    def upload(self, url, data, filename, **headers):
+        return self.client.post(url, data={'file': (io.BytesIO(data), filename)},
+                                content_type='multipart/form-data', headers=headers)
+
+    def test_upload_returns_job_and_status_reports_progress(self):
+        response = self.upload('/import/cars', CSV.encode(), 'cars.csv', Accept='application/json')
+        self.assertEqual(response.status_code, 202)
+        body = response.get_json()
+
+        get_import_job(body['job_id']).wait(timeout=30)
+
+        status = self.client.get(body['status_url'])
+        self.assertEqual(status.status_code, 200)
+        job = status.get_json()
+        self.assertEqual(job['status'], 'completed')
+        self.assertEqual(job['entity_type'], 'cars')
+        self.assertEqual((job['processed'], job['succeeded'], job['failed']), (3, 2, 1))
+        self.assertEqual(len(job['errors']), 1)
+        self.assertIn('Row 3: Year 1800 is invalid', job['errors'][0])
+
+        db.session.remove()
+        self.assertEqual(Car.query.count(), 2)
+        # The saved upload is removed once the worker is done with it
+        self.assertEqual(os.listdir(os.path.join(self.instance.name, 'import_uploads')), [])
+
+    def test_form_upload_redirects_to_import_page(self):
+        response = self.upload('/import/repairs', b'Car ID\n1\n', 'repairs.csv')
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.headers['Location'].endswith('/import/'))
+
+        page = self.client.get('/import/')
+        self.assertIn(b'repairs.csv', page.data)
+
+    def test_rejected_uploads_and_unknown_jobs(self):
+        response = self.upload('/import/cars', b'x', 'cars.txt', Accept='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/import/jobs/missing').status_code, 404)
+
+        # Import routes are no longer exempt from CSRF protection
+        self.app.config['WTF_CSRF_ENABLED'] = True
+        response = self.upload('/import/cars', CSV.encode(), 'cars.csv', Accept='application/json')
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import io
+import unittest
+from app import create_app, db
+from app.models.car import Car
+from app.models.dealer import Dealer
+from app.models.sale import Sale
+from app.utils.import_helpers import import_sales
+from app.utils.kpi_counters import get_kpi_counters, reconcile_kpi_counters
+from sqlalchemy import event
+from werkzeug.datastructures import FileStorage
+from datetime import date
+
+CSV = """Car Licence Number,Sale Date,Sale Price,Customer Name,Customer Contact,Payment Method,Notes,Dealer
+abc1,2024-03-01,15000,Jane Smith,jane@example.com,Cash,,
+ABC2,2024-03-02,16000,John Smith,,Finance,Trade-in,second dealer
+abc1,2024-03-03,15000,Jane Smith,,,,
+NOPE,2024-03-04,1000,Someone,,,,
+SOLD,2024-03-05,1000,Someone,,,,
+abc3,03/05/2024,1000,Someone,,,,
+abc3,2024-03-06,-1,Someone,,,,
+abc3,2024-03-06,1000,,,,,
+abc3,2024-03-06,1000,Someone,,,,Unknown Dealer
+abc4,2024-03-07,1000,Someone,,,,
+"""
+
+class ImportSalesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.app.config['LOGIN_DISABLED'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.first = Dealer(dealer_name='First Dealer', contact_info='first@example.com')
+        self.second = Dealer(dealer_name='Second Dealer', contact_info='second@example.com')
+        db.session.add_all([self.first, self.second])
+        db.session.flush()
+        for licence, dealer_id in [('ABC1', self.first.dealer_id), ('ABC2', None), ('ABC3', self.first.dealer_id),
+                                   ('ABC4', None), ('SOLD', self.first.dealer_id)]:
+            db.session.add(Car(vehicle_name='Car', vehicle_make='Toyota', vehicle_model='Hilux', year=2020,
+                               colour='Blue', dekra_condition='Good', licence_number=licence,
+                               registration_number=licence, purchase_price=1000, source='Dealer',
+                               date_bought=date(2024, 1, 1), current_location='Lot',
+                               repair_status='Available', dealer_id=dealer_id))
+        db.session.flush()
+        sold = Car.query.filter_by(licence_number='SOLD').one()
+        db.session.add(Sale(car_id=sold.car_id, dealer_id=self.first.dealer_id, sale_price=900,
+                            sale_date=date(2024, 2, 1), customer_name='Earlier'))
+        db.session.commit()
+        reconcile_kpi_counters()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def run_import(self, text, filename='sales.csv'):
+        return import_sales(FileStorage(io.BytesIO(text.encode()), filename=filename))
+
+    def test_rows_are_validated_and_imported(self):
+        result = self.run_import(CSV)
+
+        self.assertEqual(result['success'], 2)
+        self.assertEqual(result['failed'], 8)
+        self.assertEqual(result['errors'], [
+            "Row 4: Car with licence number 'ABC1' is sold more than once in this file. Skipping.",
+            "Row 5: Car with licence number 'NOPE' not found. Skipping.",
+            "Row 6: Car with licence number 'SOLD' has already been sold. Skipping.",
+            "Row 7: Sale Date must be in YYYY-MM-DD format. Skipping.",
+            "Row 8: Sale price cannot be negative. Skipping.",
+            "Row 9: Customer Name is required. Skipping.",
+            "Row 10: Dealer 'Unknown Dealer' not found. Skipping.",
+            "Row 11: Dealer is required when the car has no dealer. Skipping.",
+        ])
+
+        first = Car.query.filter_by(licence_number='ABC1').one()
+        self.assertEqual(first.date_sold, date(2024, 3, 1))
+        self.assertEqual(first.sale.dealer_id, self.first.dealer_id)
+        self.assertEqual(first.sale.payment_method, 'Cash')
+        self.assertIsNone(first.sale.notes)
+
+        second = Car.query.filter_by(licence_number='ABC2').one()
+        self.assertEqual(second.date_sold, date(2024, 3, 2))
+        self.assertEqual(second.sale.dealer_id, self.second.dealer_id)
+        self.assertEqual(float(second.sale.sale_price), 16000)
+
+        self.assertIsNone(Car.query.filter_by(licence_number='ABC3').one().date_sold)
+        self.assertEqual(Sale.query.count(), 3)
+
+        # Bulk inserts skip the KPI listeners, so the importer reconciles
+        self.assertEqual(get_kpi_counters()['unsold_cars'], 2)
+
+    def test_queries_do_not_grow_with_rows(self):
+        rows = ''.join(f"abc{i},2024-03-01,1000,Customer {i},,,,\n" for i in (1, 2, 3, 4))
+        db.session.add_all([Car(vehicle_name='Car', vehicle_make='Toyota', vehicle_model='Hilux', year=2020,
+                                colour='Blue', dekra_condition='Good', licence_number=f'BULK{i}',
+                                registration_number='R', purchase_price=1000, source='Dealer',
+                                date_bought=date(2024, 1, 1), current_location='Lot',
+                                repair_status='Available', dealer_id=self.first.dealer_id)
+                            for i in range(200)])
+        db.session.commit()
+        bulk_rows = ''.join(f"bulk{i},2024-03-01,1000,Customer {i},,,,\n" for i in range(200))
+
+        def count_statements(text):
+            statements = []
+
+            def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+            try:
+                result = self.run_import(text)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+            return result, [s for s in statements if 'sales' in s or 'dealers' in s]
+
+        header = CSV.splitlines()[0] + '\n'
+        small, small_statements = count_statements(header + rows)
+        large, large_statements = count_statements(header + bulk_rows)
+        self.assertEqual(small['success'], 2)  # abc2 and abc4 have no dealer
+        self.assertEqual(large['success'], 200)
+        self.assertEqual(len(small_statements), len(large_statements))
+        self.assertEqual(Car.query.filter(Car.licence_number.like('BULK%'), Car.date_sold == None).count(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
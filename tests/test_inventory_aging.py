@@ -0,0 +1,138 @@
+import unittest
+from app import create_app, db
+from app.models.car import Car
+from app.models.stand import Stand
+from app.reports.standard.inventory_aging import InventoryAgingReport
+from datetime import date, timedelta
+
+class InventoryAgingReportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.today = date.today()
+        self.stands = [Stand(stand_name='North', location='Lot A'), Stand(stand_name='East', location='Lot B')]
+        db.session.add_all(self.stands)
+        db.session.flush()
+        north, east = self.stands
+        # (make, model, status, stand, days since bought, days on stand, purchase price, recon cost, days since sold)
+        self.cars = []
+        for i, (make, model, status, stand, age, on_stand, price, recon_cost, sold) in enumerate([
+            ('Toyota', 'Hilux', 'Available', north, 100, 80, 1000, 200, None),
+            ('Ford', 'Ranger', 'Waiting for Repairs', None, 10, None, 2000, None, None),
+            ('Toyota', 'Corolla', 'Available', east, 300, 290, 1500, None, None),
+            ('Ford', 'Focus', 'In Reconditioning', None, 190, None, 800, 50, None),
+            ('Toyota', 'Hilux', 'Available', north, 50, 40, 5000, None, 5),
+        ]):
+            car = Car(vehicle_name='Car', vehicle_make=make, vehicle_model=model, year=2018 + i, colour='Blue',
+                      dekra_condition='Good', licence_number=f'L{i}', registration_number=f'R{i}',
+                      purchase_price=price, recon_cost=recon_cost, source='Dealer',
+                      date_bought=self.today - timedelta(days=age),
+                      date_added_to_stand=self.today - timedelta(days=on_stand) if on_stand else None,
+                      date_sold=self.today - timedelta(days=sold) if sold else None,
+                      current_location='Lot', repair_status=status,
+                      stand_id=stand.stand_id if stand else None)
+            db.session.add(car)
+            self.cars.append(car)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_report_lists_unsold_cars_oldest_first(self):
+        data = InventoryAgingReport().generate()
+
+        hilux, ranger, corolla, focus = (car.car_id for car in self.cars[:4])
+        self.assertEqual([car["car_id"] for car in data["cars"]], [corolla, focus, hilux, ranger])
+        self.assertEqual(data["cars"][0], {
+            "car_id": corolla,
+            "vin": "R2",
+            "year": 2020,
+            "make": "Toyota",
+            "model": "Corolla",
+            "trim": "Blue",
+            "status": "stand",
+            "date_bought": (self.today - timedelta(days=300)).isoformat(),
+            "purchase_price": "1500.00",
+            "date_sold": None,
+            "vehicle_name": "2020 Toyota Corolla",
+            "date_added_to_stand": (self.today - timedelta(days=290)).isoformat(),
+            "purchase_date": self.today - timedelta(days=300),
+            "recon_cost": 0,
+            "status_last_changed": self.today - timedelta(days=10),
+            "book_value": self.cars[2].purchase_price,
+            "stand_id": self.stands[1].stand_id,
+            "current_location": "Lot",
+            "days_in_inventory": 300,
+            "days_in_recon": 10,
+            "days_on_stand": 290,
+            "days_since_status_change": 10,
+            "is_status_inactive": False,
+            "stand_warning_level": "danger",
+            "total_investment": "1500.00",
+            "value_lost": "0.00",
+        })
+        self.assertEqual(
+            [(car["status"], car["days_in_inventory"], car["days_in_recon"], car["days_on_stand"],
+              car["stand_warning_level"], car["total_investment"]) for car in data["cars"][1:]],
+            [("reconditioning", 190, 190, 0, "none", "850.00"),
+             ("stand", 100, 20, 80, "danger", "1200.00"),
+             ("reconditioning", 10, 10, 0, "none", "2000.00")])
+
+    def test_report_summarises_the_inventory(self):
+        data = InventoryAgingReport().generate()
+
+        self.assertEqual(data["total_inventory"], 4)
+        self.assertEqual(data["aged_vehicle_count"], 3)
+        self.assertEqual(data["aged_vehicle_percentage"], 75.0)
+        self.assertEqual(data["total_investment"], "5550.00")
+        self.assertEqual(data["avg_investment_per_vehicle"], "1387.50")
+        self.assertEqual(data["avg_days_in_inventory"], 150.0)
+        self.assertEqual(data["total_value_lost"], "0.00")
+        self.assertEqual(data["status_counts"], {"reconditioning": 2, "stand": 2})
+        self.assertEqual([(bucket["label"], bucket["count"], bucket["investment"], bucket["alert"])
+                          for bucket in data["aging_buckets"]],
+                         [("0-60 days", 1, "2000.00", False),
+                          ("61-180 days", 1, "1200.00", False),
+                          ("181-195 days", 1, "850.00", True),
+                          ("196-270 days", 0, "0.00", False),
+                          ("91+ days", 1, "1500.00", True)])
+        self.assertEqual(data["stands"], [{"stand_id": self.stands[1].stand_id, "stand_name": "East"},
+                                          {"stand_id": self.stands[0].stand_id, "stand_name": "North"}])
+        self.assertEqual(data["vehicle_makes"], ["Ford", "Toyota"])
+        self.assertEqual(data["vehicle_models"], ["Corolla", "Focus", "Hilux", "Ranger"])
+        self.assertEqual(data["models_by_make"], {"Toyota": ["Corolla", "Hilux"], "Ford": ["Focus", "Ranger"]})
+
+    def test_report_filters(self):
+        hilux, ranger, corolla, focus = (car.car_id for car in self.cars[:4])
+        for params, expected in [
+            ({"status": "reconditioning"}, [focus, ranger]),
+            ({"status": "stand"}, [corolla, hilux]),
+            ({"stand_id": self.stands[0].stand_id}, [hilux]),
+            ({"make": "toy"}, [corolla, hilux]),
+            ({"model": "r"}, [corolla, ranger]),
+            ({"min_age": 50, "max_age": 200}, [focus, hilux]),
+        ]:
+            with self.subTest(**params):
+                data = InventoryAgingReport(**params).generate()
+                self.assertEqual([car["car_id"] for car in data["cars"]], expected)
+                # Status counts and filter options always cover the whole unsold inventory
+                self.assertEqual(data["status_counts"], {"reconditioning": 2, "stand": 2})
+                self.assertEqual(data["vehicle_makes"], ["Ford", "Toyota"])
+
+    def test_report_without_matching_cars(self):
+        data = InventoryAgingReport(make='Nissan').generate()
+
+        self.assertEqual(data["cars"], [])
+        self.assertEqual(data["total_inventory"], 0)
+        self.assertEqual(data["total_investment"], "0.00")
+        self.assertEqual([bucket["count"] for bucket in data["aging_buckets"]], [0, 0, 0, 0, 0])
+        self.assertEqual(data["models_by_make"], {"Toyota": ["Corolla", "Hilux"], "Ford": ["Focus", "Ranger"]})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+from app import create_app, db
+from app.models.car import Car
+from app.models.dealer import Dealer
+from app.models.kpi_counter import KpiCounter
+from app.models.sale import Sale
+from app.utils.kpi_counters import count_kpis, get_kpi_counters, reconcile_kpi_counters
+from app.utils.schema import pending_migrations, upgrade_schema
+from datetime import date, timedelta
+from decimal import Decimal
+
+TODAY = date.today()
+
+class KpiCountersTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.app.config['LOGIN_DISABLED'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.dealer = Dealer(dealer_name='Dealer', contact_info='dealer@example.com')
+        db.session.add(self.dealer)
+        for status in ('On Display', 'On Display', 'In Repair', 'Ready for Display', 'Waiting for Repairs'):
+            db.session.add(self.make_car(status))
+        db.session.commit()
+        reconcile_kpi_counters()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def make_car(self, status, **kwargs):
+        return Car(vehicle_name='Car', vehicle_make='Toyota', vehicle_model='Corolla', year=2018,
+                   colour='White', dekra_condition='Good', licence_number='L', registration_number='R',
+                   purchase_price=100000, source='Dealer', date_bought=TODAY - timedelta(days=60),
+                   current_location='Lot', repair_status=status, **kwargs)
+
+    def stored(self, name):
+        counter = db.session.get(KpiCounter, name)
+        return counter.value if counter else None
+
+    def test_counters_follow_orm_writes(self):
+        self.assertEqual(get_kpi_counters(), {
+            'total_cars': 5, 'unsold_cars': 5, 'cars_in_repair': 1, 'cars_on_stand': 2,
+            'ready_for_display_count': 1, 'recent_sales': 0, 'recent_sales_value': 0
+        })
+
+        # Status change, a sale recorded through Sale, a direct sale, an old sale and a delete
+        in_repair = Car.query.filter_by(repair_status='In Repair').one()
+        in_repair.repair_status = 'Ready for Display'
+        on_display = Car.query.filter_by(repair_status='On Display').first()
+        on_display.sale_price = 150000
+        db.session.add(Sale(car_id=on_display.car_id, dealer_id=self.dealer.dealer_id,
+                            sale_price=150000, sale_date=TODAY - timedelta(days=2)))
+        db.session.add(self.make_car('Sold', date_sold=TODAY, sale_price=90000))
+        db.session.add(self.make_car('Sold', date_sold=TODAY - timedelta(days=45), sale_price=80000))
+        db.session.delete(Car.query.filter_by(repair_status='Waiting for Repairs').one())
+        db.session.commit()
+
+        counters = get_kpi_counters()
+        self.assertEqual(counters['total_cars'], 6)
+        self.assertEqual(counters['unsold_cars'], 3)
+        self.assertEqual(counters['cars_in_repair'], 0)
+        self.assertEqual(counters['cars_on_stand'], 2)
+        self.assertEqual(counters['ready_for_display_count'], 2)
+        self.assertEqual(counters['recent_sales'], 2)
+        self.assertEqual(counters['recent_sales_value'], Decimal('240000'))
+        # Nothing to correct: the events kept every counter exact
+        self.assertEqual(reconcile_kpi_counters(), {})
+
+    def test_rollback_leaves_counters(self):
+        db.session.add(self.make_car('In Repair'))
+        db.session.flush()
+        self.assertEqual(self.stored('cars_in_repair'), 2)
+        db.session.rollback()
+        self.assertEqual(self.stored('cars_in_repair'), 1)
+
+    def test_reconcile_repairs_drift_from_raw_sql(self):
+        db.session.execute(Car.__table__.update().where(Car.repair_status == 'On Display').values(
+            date_sold=TODAY - timedelta(days=1), sale_price=50000
+        ))
+        db.session.commit()
+        self.assertEqual(get_kpi_counters()['unsold_cars'], 5)
+
+        self.app.config['KPI_RECONCILE_INTERVAL'] = 0
+        counters = get_kpi_counters()
+        self.assertEqual(counters['unsold_cars'], 3)
+        self.assertEqual(counters['recent_sales'], 2)
+        self.assertEqual(counters['recent_sales_value'], Decimal('100000'))
+        self.assertEqual({name: int(value) for name, value in count_kpis().items()
+                          if name in ('unsold_cars', 'total_cars')}, {'unsold_cars': 3, 'total_cars': 5})
+
+    def test_reconcile_prunes_days_outside_window(self):
+        old_day = f'cars_sold:{(TODAY - timedelta(days=90)).isoformat()}'
+        db.session.add(KpiCounter(name=old_day, value=4))
+        db.session.commit()
+        reconcile_kpi_counters()
+        db.session.commit()
+        self.assertIsNone(self.stored(old_day))
+
+    def test_startup_upgrade_creates_the_table(self):
+        KpiCounter.__table__.drop(db.engine)
+        self.assertEqual(pending_migrations(), ['add_kpi_counters_table'])
+
+        self.assertEqual(upgrade_schema(), ['add_kpi_counters_table'])
+        self.assertEqual(get_kpi_counters()['cars_on_stand'], 2)
+
+        # Car writes update the new table
+        car = Car.query.filter_by(repair_status='In Repair').first()
+        car.repair_status = 'On Display'
+        db.session.commit()
+        self.assertEqual(get_kpi_counters()['cars_on_stand'], 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from app import create_app, db
+from app.models.part import Part
+from app.utils.pagination import keyset_paginate, encode_cursor, decode_cursor
+from datetime import date
+from decimal import Decimal
+
+class KeysetPaginationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.app.config['LOGIN_DISABLED'] = True
+        self.app.config['LIST_PAGE_SIZE'] = 3
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        # Duplicate and missing manufacturers exercise the tiebreaker and NULL handling
+        for name, manufacturer, price in [
+            ('Filter', 'Bosch', 50), ('Wiper', None, 20), ('Pads', 'Bosch', 300),
+            ('Disc', 'Mann', 450), ('Bulb', None, 5), ('Belt', 'Gates', 120),
+            ('Hose', 'Gates', 80), ('Plug', 'Bosch', 15),
+        ]:
+            db.session.add(Part(part_name=name, manufacturer=manufacturer, standard_price=price))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def walk(self, sort_column, sort_dir):
+        """Page forwards to the end, then backwards to the start"""
+        forward, pages = [], []
+        page = keyset_paginate(Part.query, sort_column, Part.part_id, sort_dir)
+        pages.append(page)
+        while True:
+            forward.extend(part.part_id for part in page.items)
+            if not page.has_next:
+                break
+            page = keyset_paginate(Part.query, sort_column, Part.part_id, sort_dir, after=page.next_cursor)
+            pages.append(page)
+
+        backward = [part.part_id for part in page.items]
+        while page.has_prev:
+            page = keyset_paginate(Part.query, sort_column, Part.part_id, sort_dir, before=page.prev_cursor)
+            backward = [part.part_id for part in page.items] + backward
+        return forward, backward, pages
+
+    def test_pages_match_full_ordering(self):
+        for sort_column in (Part.manufacturer, Part.part_name, Part.standard_price):
+            for sort_dir in ('asc', 'desc'):
+                with self.subTest(column=sort_column.key, direction=sort_dir):
+                    column = sort_column.desc().nullslast() if sort_dir == 'desc' else sort_column.asc().nullsfirst()
+                    tiebreak = Part.part_id.desc() if sort_dir == 'desc' else Part.part_id
+                    expected = [part.part_id for part in Part.query.order_by(column, tiebreak)]
+
+                    forward, backward, pages = self.walk(sort_column, sort_dir)
+                    self.assertEqual(forward, expected)
+                    self.assertEqual(backward, expected)
+                    self.assertEqual([len(page.items) for page in pages], [3, 3, 2])
+                    self.assertFalse(pages[0].has_prev)
+                    self.assertEqual(pages[0].total, 8)
+
+    def test_count_is_capped(self):
+        self.app.config['LIST_COUNT_CAP'] = 5
+        page = keyset_paginate(Part.query, Part.part_name, Part.part_id)
+        self.assertEqual(page.total, 5)
+        self.assertTrue(page.total_is_estimate)
+
+    def test_cursor_round_trip_and_bad_cursor(self):
+        for value in (date(2024, 5, 1), Decimal('12.50'), 'Bosch', None, 7):
+            self.assertEqual(decode_cursor(encode_cursor(value, 3)), (value, 3))
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+
+        page = keyset_paginate(Part.query, Part.part_name, Part.part_id, after='not-a-cursor')
+        self.assertEqual([part.part_name for part in page.items], ['Belt', 'Bulb', 'Disc'])
+
+    def test_list_route_links_keep_filters(self):
+        response = self.client.get('/parts/?sort_by=part_name&sort_dir=asc')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Belt', response.data)
+        self.assertNotIn(b'Wiper', response.data)
+
+        with self.app.test_request_context('/parts/?sort_by=part_name&sort_dir=asc&search=x'):
+            page = keyset_paginate(Part.query, Part.part_name, Part.part_id)
+            self.assertIn('search=x', page.next_url())
+            self.assertIn('after=', page.next_url())
+            self.assertIsNone(page.prev_url())
+
+if __name__ == '__main__':
+    unittest.main()
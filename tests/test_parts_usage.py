@@ -0,0 +1,94 @@
+import unittest
+from app import create_app, db
+from app.models.car import Car
+from app.models.part import Part, RepairPart
+from app.models.repair import Repair
+from app.models.repair_provider import RepairProvider
+from app.reports.standard.parts_usage import PartsUsageReport
+from decimal import Decimal
+from datetime import date
+
+class PartsUsageReportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['LOGIN_DISABLED'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        provider = RepairProvider(provider_name='Fixit', service_type='Mechanical', contact_info='x')
+        parts = [Part(part_name=f'Part {i}', manufacturer='Bosch' if i else None) for i in range(7)]
+        db.session.add(provider)
+        db.session.add_all(parts)
+        cars = [Car(vehicle_name='Car', vehicle_make=make, vehicle_model=model, year=2020, colour='Blue',
+                    dekra_condition='Good', licence_number=f'L{i}', registration_number=f'R{i}',
+                    purchase_price=1000, source='Dealer', date_bought=date(2024, 1, 1),
+                    current_location='Lot', repair_status='Available')
+                for i, (make, model) in enumerate([('Toyota', 'Hilux'), ('Ford', 'Ranger')])]
+        db.session.add_all(cars)
+        db.session.flush()
+        repairs = [Repair(car_id=car.car_id, provider_id=provider.provider_id, repair_type='Service',
+                          start_date=date(2024, 2, 1), repair_cost=100) for car in cars]
+        db.session.add_all(repairs)
+        db.session.flush()
+
+        # Part i is used i + 1 times on the Hilux; part 0 is also fitted to the Ranger
+        for i, part in enumerate(parts):
+            for n in range(i + 1):
+                db.session.add(RepairPart(repair_id=repairs[0].repair_id, part_id=part.part_id,
+                                          purchase_price=10 * (n + 1), purchase_date=date(2024, 1 + n % 3, 5),
+                                          vendor='Shop'))
+        db.session.add(RepairPart(repair_id=repairs[1].repair_id, part_id=parts[0].part_id,
+                                  purchase_price=30, purchase_date=date(2024, 3, 5), vendor='Shop'))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_metrics(self):
+        data = PartsUsageReport(start_date=date(2024, 1, 1), end_date=date(2024, 3, 31)).generate()
+
+        most_used = data['most_used_parts']
+        self.assertEqual([part['count'] for part in most_used], [7, 6, 5, 4, 3, 2, 2])
+        part_0 = next(part for part in most_used if part['part_name'] == 'Part 0')
+        self.assertEqual((part_0['total_cost'], part_0['avg_cost']), (Decimal('40.00'), Decimal('20.00')))
+        self.assertEqual((part_0['repairs'], part_0['models']), (2, 2))
+        self.assertIsNone(part_0['manufacturer'])
+
+        trend = data['avg_unit_cost_over_time']
+        self.assertEqual(trend['labels'], ['Jan 2024', 'Feb 2024', 'Mar 2024'])
+        self.assertEqual([dataset['label'] for dataset in trend['datasets']],
+                         ['Part 6', 'Part 5', 'Part 4', 'Part 3', 'Part 2'])
+        # Part 6 costs 10..70 over months Jan, Feb, Mar, Jan, Feb, Mar, Jan
+        self.assertEqual(trend['datasets'][0]['data'], [40.0, 35.0, 45.0])
+        # Part 2 was bought in Jan, Feb and Mar only once each
+        self.assertEqual(trend['datasets'][4]['data'], [10.0, 20.0, 30.0])
+
+        top = data['top_parts_by_frequency']
+        self.assertEqual([part['part_name'] for part in top][:2], ['Part 6', 'Part 5'])
+        self.assertEqual(len(top), 7)
+        part_0 = next(part for part in top if part['part_name'] == 'Part 0')
+        self.assertEqual((part_0['model_count'], part_0['most_common_models']), (2, 'Toyota Hilux, Ford Ranger'))
+
+        per_model = data['parts_most_used_per_model']
+        self.assertEqual([model['model'] for model in per_model], ['Hilux', 'Ranger'])
+        self.assertEqual(per_model[0]['total_parts_used'], 28)
+        self.assertEqual([part['count'] for part in per_model[0]['top_parts']], [7, 6, 5, 4, 3])
+        self.assertEqual(per_model[1]['top_parts'], [{'part_name': 'Part 0', 'count': 1, 'total_cost': Decimal('30.00')}])
+
+        # Metrics hold plain Python values, not numpy scalars
+        metrics = ('most_used_parts', 'avg_unit_cost_over_time', 'top_parts_by_frequency', 'parts_most_used_per_model')
+        self.assertTrue(self.app.json.dumps({key: data[key] for key in metrics}))
+
+    def test_empty_report(self):
+        data = PartsUsageReport(part_name='No such part').generate()
+        self.assertEqual(data['most_used_parts'], [])
+        self.assertEqual(data['avg_unit_cost_over_time'], {'labels': [], 'datasets': []})
+        self.assertEqual(data['top_parts_by_frequency'], [])
+        self.assertEqual(data['parts_most_used_per_model'], [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from app import create_app, db
+from app.models.car import Car
+from app.models.dealer import Dealer
+from app.models.repair import Repair
+from app.models.repair_provider import RepairProvider
+from app.models.sale import Sale
+from app.models.stand import Stand
+from app.reports.standard.profitability import ProfitabilityReport
+from sqlalchemy import event
+from decimal import Decimal
+from datetime import date
+
+class ProfitabilityReportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        stand = Stand(stand_name='Main', location='Lot')
+        dealers = [Dealer(dealer_name=f'Dealer {i}', contact_info='x') for i in range(2)]
+        provider = RepairProvider(provider_name='Fixit', service_type='Mechanical', contact_info='x')
+        db.session.add_all([stand, provider] + dealers)
+        db.session.flush()
+        # (make, model, purchase price, repair costs, sale price) -> ROI 50%, 20%, 0% and 40%
+        for i, (make, model, purchase, repairs, sale_price) in enumerate([
+            ('Toyota', 'Hilux', 1000, [100, 100], 1800),
+            ('Toyota', 'Hilux', 1000, [], 1200),
+            ('Ford', 'Ranger', 2000, [500], 2500),
+            ('Ford', 'Ranger', 500, [], 700),
+        ]):
+            car = Car(vehicle_name='Car', vehicle_make=make, vehicle_model=model, year=2020, colour='Blue',
+                      dekra_condition='Good', licence_number=f'L{i}', registration_number=f'R{i}',
+                      purchase_price=purchase, source='Dealer', date_bought=date(2024, 1, 1),
+                      current_location='Lot', repair_status='Available', stand_id=stand.stand_id if i else None)
+            db.session.add(car)
+            db.session.flush()
+            for cost in repairs:
+                db.session.add(Repair(car_id=car.car_id, provider_id=provider.provider_id, repair_type='Service',
+                                      start_date=date(2024, 1, 2), repair_cost=cost))
+            db.session.add(Sale(car_id=car.car_id, dealer_id=dealers[i % 2].dealer_id,
+                                sale_price=sale_price, sale_date=date(2024, 2, 1), customer_name='Buyer'))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_sections_share_per_car_roi(self):
+        data = ProfitabilityReport(timeframe='all_time').generate()
+
+        self.assertEqual(data['total_cars_sold'], 4)
+        self.assertEqual((data['total_revenue'], data['total_investment']), (Decimal('6200'), Decimal('5200')))
+
+        cars = data['cars_data']
+        self.assertEqual([car['roi'] for car in cars], [Decimal('50'), Decimal('40'), Decimal('20'), Decimal('0')])
+        self.assertEqual([car['roi_band'] for car in cars], ['high', 'high', 'medium', 'low'])
+        self.assertEqual(cars[0]['repair_cost'], Decimal('200'))
+        self.assertEqual((cars[0]['stand_name'], cars[0]['dealer_name']), ('Unknown', 'Dealer 0'))
+        self.assertEqual((cars[1]['stand_name'], cars[1]['dealer_name']), ('Main', 'Dealer 1'))
+
+        models = {model['model']: model for model in data['model_profitability']}
+        self.assertEqual((models['Hilux']['count'], models['Hilux']['total_profit']), (2, Decimal('800')))
+        self.assertEqual([car['roi'] for car in models['Ranger']['cars']], [Decimal('40'), Decimal('0')])
+
+        distribution = data['roi_distribution']
+        self.assertEqual((distribution['high'], distribution['medium'], distribution['low']), (2, 1, 1))
+        self.assertEqual(distribution['high_percent'], 50)
+
+    def test_sale_rows_load_in_one_query(self):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            ProfitabilityReport(timeframe='all_time').generate()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+        self.assertEqual(len([s for s in statements if 'FROM sales' in s]), 1)
+        self.assertFalse([s for s in statements if 'FROM repairs' in s and 'GROUP BY' not in s])
+
+if __name__ == '__main__':
+    unittest.main()
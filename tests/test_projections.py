@@ -0,0 +1,73 @@
+import unittest
+from app import create_app, db
+from app.models.car import Car
+from app.reports.base import Projection
+from decimal import Decimal
+from datetime import date
+
+CAR_ROW = Projection(
+    'CarRow',
+    car_id=Car.car_id,
+    make=Car.vehicle_make,
+    date_bought=Car.date_bought,
+    purchase_price=Car.purchase_price,
+    recon_cost=Car.recon_cost
+)
+
+class ProjectionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        for i, (make, price, recon_cost) in enumerate([('Toyota', 1000, 150), ('Ford', 2000, None)]):
+            db.session.add(Car(vehicle_name='Car', vehicle_make=make, vehicle_model='Model', year=2020,
+                               colour='Blue', dekra_condition='Good', licence_number=f'L{i}',
+                               registration_number=f'R{i}', purchase_price=price, recon_cost=recon_cost,
+                               source='Dealer', date_bought=date(2024, 1, i + 1), current_location='Lot',
+                               repair_status='Available'))
+        db.session.commit()
+        db.session.expunge_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_query_selects_the_columns_under_their_labels(self):
+        query = CAR_ROW.query()
+
+        self.assertEqual(CAR_ROW.row_type.__name__, 'CarRow')
+        self.assertEqual(CAR_ROW.row_type._fields, ('car_id', 'make', 'date_bought', 'purchase_price', 'recon_cost'))
+        self.assertEqual([column['name'] for column in query.column_descriptions],
+                         ['car_id', 'make', 'date_bought', 'purchase_price', 'recon_cost'])
+
+    def test_rows_are_named_tuples_with_column_types(self):
+        rows = CAR_ROW.rows(CAR_ROW.query().order_by(Car.car_id))
+
+        self.assertEqual(len(rows), 2)
+        first, second = rows
+        self.assertIsInstance(first, CAR_ROW.row_type)
+        self.assertIsInstance(first.car_id, int)
+        self.assertEqual(first.make, 'Toyota')
+        self.assertEqual(first.date_bought, date(2024, 1, 1))
+        self.assertEqual(first.purchase_price, Decimal('1000.00'))
+        self.assertIsInstance(first.purchase_price, Decimal)
+        self.assertEqual(first.recon_cost, Decimal('150.00'))
+        self.assertIsNone(second.recon_cost)
+        self.assertEqual(second, CAR_ROW.row_type(second.car_id, 'Ford', date(2024, 1, 2), Decimal('2000.00'), None))
+
+    def test_rows_apply_the_query_filters(self):
+        rows = CAR_ROW.rows(CAR_ROW.query().filter(Car.vehicle_make == 'Ford'))
+
+        self.assertEqual([row.make for row in rows], ['Ford'])
+
+    def test_rows_do_not_load_entities(self):
+        CAR_ROW.rows(CAR_ROW.query())
+
+        self.assertEqual(len(db.session.identity_map), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+from app import create_app, db
+from app.models.car import Car
+from app.models.repair import Repair
+from app.models.repair_provider import RepairProvider
+from app.reports.base import days_between
+from app.reports.provider_efficiency import ProviderEfficiencyReport
+from sqlalchemy import event
+from decimal import Decimal
+from datetime import date
+
+class ProviderEfficiencyReportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        fast = RepairProvider(provider_name='Fast', service_type='Mechanical', contact_info='x')
+        slow = RepairProvider(provider_name='Slow', service_type='Body', contact_info='y')
+        car = Car(vehicle_name='Car', vehicle_make='Toyota', vehicle_model='Hilux', year=2020, colour='Blue',
+                  dekra_condition='Good', licence_number='L1', registration_number='R1', purchase_price=1000,
+                  source='Dealer', date_bought=date(2024, 1, 1), current_location='Lot',
+                  repair_status='Available')
+        db.session.add_all([fast, slow, car])
+        db.session.flush()
+        for provider, repair_type, start, end, cost in [
+            (fast, 'Engine', date(2024, 1, 30), date(2024, 2, 2), 300),
+            (fast, 'Engine', date(2024, 3, 1), date(2024, 3, 2), 100),
+            (fast, 'Paint', date(2024, 3, 1), None, 1000),
+            (slow, 'Paint', date(2024, 2, 1), date(2024, 3, 2), 900),
+        ]:
+            db.session.add(Repair(car_id=car.car_id, provider_id=provider.provider_id, repair_type=repair_type,
+                                  start_date=start, end_date=end, repair_cost=cost))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_days_between(self):
+        durations = db.session.query(days_between(Repair.start_date, Repair.end_date)).order_by(Repair.repair_id)
+        self.assertEqual([days for days, in durations], [3, 1, None, 30])
+
+    def test_provider_metrics(self):
+        data = ProviderEfficiencyReport().generate()
+
+        metrics = {provider['provider_name']: provider for provider in data['provider_metrics']}
+        fast = metrics['Fast']
+        self.assertEqual((fast['total_repairs'], fast['completed_repairs'], fast['total_duration']), (3, 2, 4))
+        self.assertEqual(fast['total_cost'], Decimal('1400'))
+        self.assertAlmostEqual(float(fast['avg_cost']), 466.67, places=2)
+        self.assertEqual(fast['avg_duration'], 2)
+        self.assertEqual(metrics['Slow']['avg_duration'], 30)
+        self.assertEqual([provider['provider_name'] for provider in data['provider_metrics']], ['Fast', 'Slow'])
+
+        chart = data['cost_vs_duration']
+        self.assertEqual([provider['provider_name'] for provider in chart], ['Fast', 'Slow'])
+        self.assertEqual((chart[0]['count'], chart[0]['avg_cost'], chart[0]['avg_duration']), (2, 200.0, 2))
+
+    def test_filters_and_single_query(self):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            data = ProviderEfficiencyReport(repair_type='Paint', start_date=date(2024, 2, 15)).generate()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+        self.assertEqual([provider['provider_name'] for provider in data['provider_metrics']], ['Fast'])
+        self.assertIsNone(data['provider_metrics'][0]['cost_duration_ratio'])
+        self.assertEqual(data['cost_vs_duration'], [])
+        # One aggregate query plus the repair types for the filter options
+        self.assertEqual(len([s for s in statements if 'FROM repairs' in s]), 2)
+
+if __name__ == '__main__':
+    unittest.main()
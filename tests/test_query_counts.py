@@ -0,0 +1,158 @@
+import unittest
+from app import create_app, db
+from app.models.car import Car
+from app.models.dealer import Dealer
+from app.models.part import Part, RepairPart
+from app.models.repair import Repair
+from app.models.repair_provider import RepairProvider
+from app.models.sale import Sale
+from app.models.stand import Stand
+from app.utils.kpi_counters import reconcile_kpi_counters
+from sqlalchemy import event
+from datetime import date, timedelta
+
+# Maximum number of SQL statements each route may issue. These do not depend
+# on the number of cars, repairs or sales, so a lazy relationship load
+# creeping back into a list or report shows up as a failure here.
+MAX_QUERIES = {
+    '/dashboard': 12,
+    '/cars/': 4,
+    '/cars/1': 8,
+    '/repairs/': 4,
+    '/providers/': 4,
+    '/dealers/1': 13,
+    '/reports/sales-performance': 34,
+    '/reports/profit-margin?timeframe=year_to_date': 20,
+    '/reports/profitability?timeframe=all_time': 10,
+    '/reports/stand-performance': 15,
+    '/reports/repair-analysis': 20,
+    '/reports/repair-history': 10,
+    '/reports/provider-efficiency': 5,
+}
+
+CAR_COUNT = 12
+
+class QueryCountTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.app.config['LOGIN_DISABLED'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.create_test_data()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def create_test_data(self):
+        today = date.today()
+        dealer = Dealer(dealer_name='Query Dealer', contact_info='dealer@example.com')
+        stands = [Stand(stand_name=f'Stand {i}', location='Lot', capacity=10) for i in range(2)]
+        provider = RepairProvider(provider_name='Query Provider', service_type='Mechanical',
+                                  contact_info='provider@example.com')
+        part = Part(part_name='Filter', standard_price=50)
+        db.session.add_all([dealer, provider, part] + stands)
+        db.session.flush()
+
+        for i in range(CAR_COUNT):
+            bought = today - timedelta(days=60 + i)
+            car = Car(
+                vehicle_name=f'Car {i}',
+                vehicle_make='Toyota',
+                vehicle_model=f'Model {i % 3}',
+                year=2018,
+                colour='White',
+                dekra_condition='Good',
+                licence_number=f'LIC{i:03d}',
+                registration_number=f'REG{i:03d}',
+                purchase_price=100000,
+                source='Query Dealer',
+                dealer_id=dealer.dealer_id,
+                date_bought=bought,
+                date_added_to_stand=bought + timedelta(days=10),
+                current_location='Lot',
+                repair_status='On Display',
+                stand_id=stands[i % 2].stand_id
+            )
+            db.session.add(car)
+            db.session.flush()
+
+            for j in range(2):
+                repair = Repair(
+                    car_id=car.car_id,
+                    repair_type='Service' if j == 0 else 'Panel',
+                    provider_id=provider.provider_id,
+                    repair_cost=1000,
+                    start_date=bought + timedelta(days=1),
+                    end_date=bought + timedelta(days=5)
+                )
+                db.session.add(repair)
+                db.session.flush()
+                db.session.add(RepairPart(
+                    repair_id=repair.repair_id,
+                    part_id=part.part_id,
+                    purchase_price=50,
+                    purchase_date=bought + timedelta(days=2),
+                    vendor='Parts Co'
+                ))
+
+            if i % 2 == 0:
+                car.repair_status = 'Sold'
+                car.sale_price = 130000
+                db.session.add(Sale(
+                    car_id=car.car_id,
+                    dealer_id=dealer.dealer_id,
+                    sale_price=130000,
+                    sale_date=today - timedelta(days=i)
+                ))
+        db.session.commit()
+
+        # Measure the dashboard in its steady state, not its first full recount
+        reconcile_kpi_counters()
+        db.session.commit()
+
+    def capture_statements(self, url):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        db.session.expunge_all()
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            response = self.client.get(url)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        self.assertEqual(response.status_code, 200, url)
+        return statements
+
+    def count_queries(self, url):
+        return len(self.capture_statements(url))
+
+    def test_routes_stay_within_query_budget(self):
+        for url, max_queries in MAX_QUERIES.items():
+            with self.subTest(url=url):
+                self.assertLessEqual(self.count_queries(url), max_queries)
+
+    def test_reports_join_cars_once(self):
+        # Reports filtering on the car's columns load it from their own join
+        for url in ('/reports/sales-performance', '/reports/profit-margin?timeframe=year_to_date',
+                    '/reports/repair-history'):
+            with self.subTest(url=url):
+                for statement in self.capture_statements(url):
+                    self.assertLessEqual(statement.count('JOIN cars '), 1, statement)
+
+    def test_provider_list_counts_repairs_in_sql(self):
+        # The provider's repairs are counted, not loaded
+        for statement in self.capture_statements('/providers/'):
+            self.assertFalse(statement.lstrip().startswith('SELECT repairs.'), statement)
+        page = self.client.get('/providers/').get_data(as_text=True)
+        self.assertIn(f'<td data-label="Repairs Count">{CAR_COUNT * 2}</td>', page)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+from app import create_app, db
+from app.models.car import Car
+from app.models.repair import Repair
+from app.models.repair_provider import RepairProvider
+from app.reports.standard.repair_analysis import RepairAnalysisReport
+from sqlalchemy import event
+from decimal import Decimal
+from datetime import date
+
+class RepairAnalysisReportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        fast = RepairProvider(provider_name='Fast', service_type='Mechanical', contact_info='x')
+        slow = RepairProvider(provider_name='Slow', service_type='Body', contact_info='y')
+        car = Car(vehicle_name='Car', vehicle_make='Toyota', vehicle_model='Hilux', year=2020, colour='Blue',
+                  dekra_condition='Good', licence_number='L1', registration_number='R1', purchase_price=1000,
+                  source='Dealer', date_bought=date(2024, 1, 1), current_location='Lot',
+                  repair_status='Available')
+        db.session.add_all([fast, slow, car])
+        db.session.flush()
+        for provider, repair_type, start, end, cost in [
+            (fast, 'Engine', date(2023, 12, 30), date(2024, 1, 2), 300),
+            (fast, 'Engine', date(2024, 1, 1), date(2024, 1, 3), 100),
+            (fast, 'Paint', date(2024, 1, 31), None, 1000),
+            (slow, 'Paint', date(2024, 3, 1), date(2024, 3, 11), 900),
+            (slow, 'Paint', date(2025, 1, 5), date(2025, 1, 6), 50),
+        ]:
+            db.session.add(Repair(car_id=car.car_id, provider_id=provider.provider_id, repair_type=repair_type,
+                                  start_date=start, end_date=end, repair_cost=cost))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_year_breakdowns(self):
+        data = RepairAnalysisReport(year=2024).generate()
+
+        self.assertEqual((data['total_repairs'], data['total_cost']), (3, Decimal('2000')))
+        self.assertEqual(data['average_duration'], 6)
+
+        costs = {row['type']: (row['count'], row['total_cost']) for row in data['repair_costs_by_type']}
+        self.assertEqual(costs, {'Engine': (1, Decimal('100')), 'Paint': (2, Decimal('1900'))})
+        providers = [(row['name'], row['count'], row['total_cost']) for row in data['repair_costs_by_provider']]
+        self.assertEqual(providers, [('Fast', 2, Decimal('1100')), ('Slow', 1, Decimal('900'))])
+
+        monthly = data['monthly_costs']
+        self.assertEqual([month['name'] for month in monthly][:3], ['January', 'February', 'March'])
+        self.assertEqual(len(monthly), 12)
+        self.assertEqual((monthly[0]['count'], monthly[0]['total_cost'], monthly[0]['average_cost']),
+                         (2, Decimal('1100'), Decimal('550')))
+        self.assertEqual(monthly[0]['average_duration'], 2)
+        self.assertEqual((monthly[1]['count'], monthly[1]['total_cost']), (0, Decimal('0.00')))
+        self.assertEqual(monthly[2]['average_duration'], 10)
+
+    def test_monthly_costs_across_a_date_range(self):
+        data = RepairAnalysisReport(start_date=date(2023, 12, 15), end_date=date(2025, 1, 10),
+                                    repair_type='Engine').generate()
+
+        monthly = data['monthly_costs']
+        self.assertEqual(len(monthly), 14)
+        self.assertEqual((monthly[0]['name'], monthly[-1]['name']), ('December 2023', 'January 2025'))
+        self.assertEqual([month['count'] for month in monthly if month['count']], [1, 1])
+        self.assertEqual(monthly[0]['total_cost'], Decimal('300'))
+
+    def test_inverted_date_range(self):
+        data = RepairAnalysisReport(start_date=date(2024, 5, 1), end_date=date(2024, 3, 1)).generate()
+        self.assertEqual(data['monthly_costs'], [])
+
+    def test_query_count_does_not_grow_with_range(self):
+        def count_statements(report):
+            statements = []
+
+            def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+            try:
+                report.generate()
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+            return len(statements)
+
+        one_year = count_statements(RepairAnalysisReport(year=2024))
+        three_years = count_statements(RepairAnalysisReport(start_date=date(2023, 1, 1), end_date=date(2025, 12, 31)))
+        self.assertEqual(one_year, three_years)
+        self.assertLessEqual(one_year, 6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from app import create_app, db
+from app.models.car import Car
+from app.models.repair import Repair
+from app.models.repair_provider import RepairProvider
+from app.reports.provider_efficiency import ProviderEfficiencyReport
+from app.reports.standard.repair_analysis import RepairAnalysisReport
+from app.utils.schema import pending_migrations, upgrade_schema
+from migrations import add_repair_duration_days
+from sqlalchemy import text
+from datetime import date
+
+class RepairDurationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.fast = RepairProvider(provider_name='Fast', service_type='Mechanical', contact_info='x')
+        self.slow = RepairProvider(provider_name='Slow', service_type='Body', contact_info='y')
+        car = Car(vehicle_name='Car', vehicle_make='Toyota', vehicle_model='Hilux', year=2020, colour='Blue',
+                  dekra_condition='Good', licence_number='L1', registration_number='R1', purchase_price=1000,
+                  source='Dealer', date_bought=date(2024, 1, 1), current_location='Lot',
+                  repair_status='Available')
+        db.session.add_all([self.fast, self.slow, car])
+        db.session.flush()
+        for provider, repair_type, start, end in [
+            (self.fast, 'Engine', date(2024, 1, 30), date(2024, 2, 2)),
+            (self.fast, 'Engine', date(2024, 3, 1), date(2024, 3, 2)),
+            (self.fast, 'Paint', date(2024, 3, 1), None),
+            (self.slow, 'Paint', date(2024, 2, 1), date(2024, 3, 2)),
+            (self.slow, 'Paint', date(2023, 2, 1), date(2023, 2, 11)),
+        ]:
+            db.session.add(Repair(car_id=car.car_id, provider_id=provider.provider_id, repair_type=repair_type,
+                                  start_date=start, end_date=end, repair_cost=100))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def durations(self):
+        return [days for days, in db.session.query(Repair.duration_days).order_by(Repair.repair_id)]
+
+    def test_duration_is_maintained_on_write(self):
+        self.assertEqual(self.durations(), [3, 1, None, 30, 10])
+
+        open_repair = Repair.query.filter_by(end_date=None).one()
+        open_repair.end_date = date(2024, 3, 8)
+        db.session.commit()
+        self.assertEqual(db.session.get(Repair, open_repair.repair_id).duration_days, 7)
+
+        open_repair.end_date = None
+        db.session.commit()
+        self.assertIsNone(db.session.get(Repair, open_repair.repair_id).duration_days)
+
+    def drop_duration_days(self):
+        """Turn the database back into one created before repairs.duration_days"""
+        with db.engine.begin() as conn:
+            for index in Repair.__table__.indexes:
+                conn.execute(text(f"DROP INDEX {index.name}"))
+            conn.execute(text("ALTER TABLE repairs DROP COLUMN duration_days"))
+
+    def test_migration_backfills_existing_rows(self):
+        self.drop_duration_days()
+
+        self.assertTrue(add_repair_duration_days.up())
+        db.session.expire_all()
+        self.assertEqual(self.durations(), [3, 1, None, 30, 10])
+        indexes = {index['name'] for index in db.inspect(db.engine).get_indexes('repairs')}
+        self.assertTrue({'ix_repairs_provider_end_date', 'ix_repairs_type_start_date'} <= indexes)
+
+        # Running it again is a no-op
+        self.assertTrue(add_repair_duration_days.up())
+
+    def test_startup_upgrade_adds_the_column(self):
+        self.assertEqual(pending_migrations(), [])
+        self.drop_duration_days()
+        self.assertEqual(pending_migrations(), ['add_repair_duration_days'])
+
+        self.assertEqual(upgrade_schema(), ['add_repair_duration_days'])
+        self.assertEqual(self.durations(), [3, 1, None, 30, 10])
+        self.assertEqual(upgrade_schema(), [])
+
+    def test_durations_not_filled_in_are_computed(self):
+        expected = RepairAnalysisReport(year=2024).generate()
+        with db.engine.begin() as conn:
+            conn.execute(text("UPDATE repairs SET duration_days = NULL"))
+
+        data = RepairAnalysisReport(year=2024).generate()
+        self.assertAlmostEqual(data['average_duration'], expected['average_duration'])
+        self.assertEqual(data['repair_duration_by_type'], expected['repair_duration_by_type'])
+        metrics = ProviderEfficiencyReport().generate()['provider_metrics']
+        self.assertEqual(sorted(row['avg_duration'] for row in metrics), [2, 20])
+
+    def test_repair_analysis_durations(self):
+        data = RepairAnalysisReport(year=2024).generate()
+
+        self.assertAlmostEqual(data['average_duration'], 34 / 3)
+        by_type = {row['type']: row for row in data['repair_duration_by_type']}
+        self.assertEqual((by_type['Engine']['count'], by_type['Engine']['average_duration']), (2, 2))
+        self.assertEqual((by_type['Paint']['count'], by_type['Paint']['average_duration']), (1, 30))
+        self.assertEqual([row['name'] for row in data['repair_duration_by_provider']], ['Fast', 'Slow'])
+
+        data = RepairAnalysisReport(year=2023, provider_id=self.slow.provider_id).generate()
+        self.assertEqual(data['average_duration'], 10)
+        self.assertEqual(data['repair_duration_by_provider'][0]['total_duration'], 10)
+
+if __name__ == '__main__':
+    unittest.main()
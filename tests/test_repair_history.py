@@ -0,0 +1,76 @@
+import unittest
+from app import create_app, db
+from app.models.car import Car
+from app.models.repair import Repair
+from app.models.repair_provider import RepairProvider
+from app.reports.repair_history import RepairHistoryReport
+from datetime import date
+
+class RepairHistoryReportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        provider = RepairProvider(provider_name='Fixit', service_type='Mechanical', contact_info='x')
+        db.session.add(provider)
+        cars = [Car(vehicle_name=f'Car {i}', vehicle_make='Toyota', vehicle_model='Hilux', year=2020,
+                    colour='Blue', dekra_condition='Good', licence_number=f'L{i}', registration_number=f'R{i}',
+                    purchase_price=1000, source='Dealer', date_bought=date(2024, 1, 1),
+                    current_location='Lot', repair_status='Available') for i in range(2)]
+        db.session.add_all(cars)
+        db.session.flush()
+        for car, repair_type, start, cost in [
+            (cars[0], 'Paint', date(2024, 3, 20), 300),
+            (cars[0], 'Engine', date(2024, 1, 11), 1000),
+            (cars[0], 'Paint', date(2024, 3, 2), 100),
+            (cars[1], 'Engine', date(2024, 5, 1), 500),
+            (cars[1], 'Tyres', date(2023, 12, 31), 80),
+        ]:
+            db.session.add(Repair(car_id=car.car_id, provider_id=provider.provider_id, repair_type=repair_type,
+                                  start_date=start, repair_cost=cost))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_cost_trend_covers_all_types_per_month(self):
+        trend = RepairHistoryReport(year=2020, start_date=date(2024, 1, 1), end_date=date(2024, 5, 31)).generate()[
+            'cost_trend_per_type']
+        self.assertEqual(trend['labels'], ['Jan 2024', 'Feb 2024', 'Mar 2024', 'Apr 2024', 'May 2024'])
+        datasets = {dataset['label']: dataset['data'] for dataset in trend['datasets']}
+        self.assertEqual(datasets, {
+            'Engine': [1000.0, 0, 0, 0, 500.0],
+            'Paint': [0, 0, 200.0, 0, 0],
+        })
+
+    def test_trend_spans_years_without_filters(self):
+        report = RepairHistoryReport()
+        report.year = None
+        trend = report._calculate_cost_trend_per_type(Repair.query.all())
+        self.assertEqual(len(trend['labels']), 12)
+
+        report.start_date = date(2023, 11, 15)
+        trend = report._calculate_cost_trend_per_type(Repair.query.all())
+        self.assertEqual(trend['labels'][0], 'Nov 2023')
+        self.assertEqual(trend['labels'][-1], 'May 2024')
+        tyres = next(dataset for dataset in trend['datasets'] if dataset['label'] == 'Tyres')
+        self.assertEqual(tyres['data'][:3], [0, 80.0, 0])
+
+    def test_per_car_metrics(self):
+        data = RepairHistoryReport().generate()
+        first_repairs = {car['car_id']: car for car in data['avg_duration_from_purchase']['cars']}
+        self.assertEqual(first_repairs[1]['first_repair_date'], date(2024, 1, 11))
+        self.assertEqual(first_repairs[1]['days_to_repair'], 10)
+        self.assertEqual(first_repairs[2]['days_to_repair'], -1)
+        self.assertEqual(data['avg_duration_from_purchase']['average_days'], 4.5)
+
+        counts = {car['car_id']: (car['repairs'], float(car['total_cost'])) for car in data['repair_count_per_car']}
+        self.assertEqual(counts, {1: (3, 1400.0), 2: (2, 580.0)})
+
+if __name__ == '__main__':
+    unittest.main()
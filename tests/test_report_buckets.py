@@ -0,0 +1,143 @@
+import unittest
+from app import create_app, db
+from app.models.car import Car
+from app.models.dealer import Dealer
+from app.models.repair import Repair
+from app.models.repair_provider import RepairProvider
+from app.models.sale import Sale
+from app.models.stand import Stand
+from app.reports.standard.profit_margin import ProfitMarginReport
+from app.reports.standard.sales_performance import SalesPerformanceReport
+from app.utils.report_buckets import get_bucket_totals, invalidate_report_buckets
+from decimal import Decimal
+from sqlalchemy import event
+from datetime import date, timedelta
+
+class ReportBucketsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.today = date.today()
+        self.stand = Stand(stand_name='Main', location='Lot')
+        self.dealer = Dealer(dealer_name='Dealer', contact_info='x')
+        self.provider = RepairProvider(provider_name='Fixit', service_type='Mechanical', contact_info='x')
+        db.session.add_all([self.stand, self.dealer, self.provider])
+        db.session.flush()
+        self.old_sale = self.add_sale('L1', self.today - timedelta(days=10), 1500)
+        self.recent_sale = self.add_sale('L2', self.today - timedelta(days=3), 1200)
+        db.session.commit()
+        self.loads = []
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add_sale(self, licence, sale_date, sale_price):
+        car = Car(vehicle_name='Car', vehicle_make='Toyota', vehicle_model='Hilux', year=2020, colour='Blue',
+                  dekra_condition='Good', licence_number=licence, registration_number=licence,
+                  purchase_price=1000, source='Dealer', date_bought=sale_date - timedelta(days=30),
+                  current_location='Lot', repair_status='Available', stand_id=self.stand.stand_id)
+        db.session.add(car)
+        db.session.flush()
+        sale = Sale(car_id=car.car_id, dealer_id=self.dealer.dealer_id, sale_price=sale_price,
+                    sale_date=sale_date, customer_name='Buyer')
+        db.session.add(sale)
+        return sale
+
+    def load_rows(self, first, last):
+        self.loads.append((first, last))
+        return [(sale.sale_date, Decimal(sale.sale_price), Decimal(sale.car.total_investment))
+                for sale in Sale.query.filter(Sale.sale_date.between(first, last))]
+
+    def totals(self, filters=()):
+        days = [self.today - timedelta(days=10), self.today - timedelta(days=3), self.today]
+        return get_bucket_totals('test', filters, [(day, day) for day in days], self.load_rows)
+
+    def test_closed_buckets_are_reused(self):
+        first = self.totals()
+        self.assertEqual([bucket.count for bucket in first], [1, 1, 0])
+        self.assertEqual((first[0].revenue, first[0].profit), (Decimal('1500'), Decimal('500')))
+        self.assertEqual(self.loads, [(self.today - timedelta(days=10), self.today)])
+
+        # Only the open bucket is loaded again
+        self.assertEqual(self.totals(), first)
+        self.assertEqual(self.loads[1:], [(self.today, self.today)])
+
+        # Buckets are not shared between filter sets
+        self.totals(filters=('Toyota',))
+        self.assertEqual(self.loads[2], (self.today - timedelta(days=10), self.today))
+
+    def test_writes_reload_touched_buckets(self):
+        self.totals()
+
+        self.old_sale.sale_price = 1800
+        db.session.commit()
+        self.assertEqual(self.totals()[0].revenue, Decimal('1800'))
+        self.assertEqual(self.loads[1], (self.today - timedelta(days=10), self.today))
+
+        # A repair changes the cost of the day its car was sold
+        db.session.add(Repair(car_id=self.recent_sale.car_id, provider_id=self.provider.provider_id,
+                              repair_type='Service', start_date=self.today - timedelta(days=20), repair_cost=200))
+        db.session.commit()
+        self.assertEqual(self.totals()[1].cost, Decimal('1200'))
+        self.assertEqual(self.loads[2], (self.today - timedelta(days=3), self.today))
+
+        # Writes that bypass the ORM invalidate every bucket
+        invalidate_report_buckets()
+        db.session.commit()
+        self.totals()
+        self.assertEqual(self.loads[3], (self.today - timedelta(days=10), self.today))
+
+        # A rolled back write leaves the buckets alone
+        self.old_sale.sale_price = 100
+        db.session.flush()
+        db.session.rollback()
+        self.totals()
+        self.assertEqual(self.loads[4], (self.today, self.today))
+
+    def test_day_counters_share_the_flush_write(self):
+        # Flushes the new car; the sale is written by the commit
+        self.add_sale('L3', self.today - timedelta(days=5), 1000)
+        writes = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if 'kpi_counters' in statement and not statement.lstrip().startswith('SELECT'):
+                writes.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            # Bumps the KPI counters, the report data version and two sale days
+            self.old_sale.sale_price = 1700
+            db.session.commit()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        self.assertEqual(len(writes), 1)
+
+    def test_reports_use_current_bucket_totals(self):
+        trend = ProfitMarginReport(timeframe='last_30_days').generate()['margin_trend']
+        self.assertEqual(len(trend), 30)
+        self.assertEqual(trend[19]['margin'], Decimal('500') / Decimal('1500') * 100)
+        self.assertEqual(trend[26]['roi'], 20)
+        self.assertEqual(trend[29]['margin'], 0)
+
+        self.old_sale.sale_price = 2000
+        db.session.commit()
+        trend = ProfitMarginReport(timeframe='last_30_days').generate()['margin_trend']
+        self.assertEqual(trend[19]['margin'], 50)
+
+        weekly = ProfitMarginReport(timeframe='last_90_days').generate()['margin_trend']
+        self.assertEqual(sum(1 for week in weekly if week['margin']), 2)
+
+        year = self.old_sale.sale_date.year
+        periods = SalesPerformanceReport(year=year).generate()['sales_by_period']
+        self.assertEqual(periods[self.old_sale.sale_date.month - 1]['revenue'] >= Decimal('2000'), True)
+        self.assertEqual(sum(period['count'] for period in periods),
+                         len([sale for sale in (self.old_sale, self.recent_sale) if sale.sale_date.year == year]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+from unittest import mock
+from app import create_app, db
+from app.models.car import Car
+from app.models.dealer import Dealer
+from app.models.sale import Sale
+from app.models.stand import Stand
+from app.reports.standard.profitability import ProfitabilityReport
+from app.reports.standard.sales_performance import SalesPerformanceReport
+from werkzeug.datastructures import MultiDict
+from datetime import date
+
+class ReportSectionsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['LOGIN_DISABLED'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        stand = Stand(stand_name='Main', location='Lot')
+        dealer = Dealer(dealer_name='Dealer', contact_info='x')
+        db.session.add_all([stand, dealer])
+        db.session.flush()
+        for i, model in enumerate(['Hilux', 'Hilux', 'Corolla']):
+            car = Car(vehicle_name='Car', vehicle_make='Toyota', vehicle_model=model, year=2020, colour='Blue',
+                      dekra_condition='Good', licence_number=f'VIN{i}', registration_number=f'R{i}',
+                      purchase_price=1000, source='Dealer', date_bought=date(2024, 1, 1),
+                      current_location='Lot', repair_status='Available', stand_id=stand.stand_id,
+                      date_sold=date(2024, 2, 1))
+            db.session.add(car)
+            db.session.flush()
+            db.session.add(Sale(car_id=car.car_id, dealer_id=dealer.dealer_id, sale_price=1500,
+                                sale_date=date(2024, 2, 1), customer_name='Buyer'))
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_parse_parameters(self):
+        args = MultiDict([('year', '2024'), ('start_date', 'bad'), ('period', 'weekly'),
+                          ('stand_ids', '1'), ('stand_ids', 'x'), ('stand_ids', '3')])
+        self.assertEqual(SalesPerformanceReport.parse_parameters(args), {'year': 2024, 'stand_ids': [1, 3]})
+
+        args = MultiDict([('timeframe', 'custom'), ('start_date', '2024-01-01'), ('dealer_id', '2')])
+        self.assertEqual(ProfitabilityReport.parse_parameters(args),
+                         {'timeframe': 'custom', 'start_date': date(2024, 1, 1), 'dealer_id': 2})
+
+    def test_generate_leaves_out_deferred_sections(self):
+        report = ProfitabilityReport(timeframe='all_time')
+        report.defer_sections = True
+        data = report.generate()
+        self.assertIsNone(data['model_profitability'])
+        self.assertIsNone(data['cars_data'])
+        self.assertEqual(data['total_cars_sold'], 3)
+
+        # Without deferral the payload is complete, as the API and exports expect
+        data = ProfitabilityReport(timeframe='all_time').generate()
+        self.assertEqual(len(data['cars_data']), 3)
+
+        with self.assertRaises(ValueError):
+            report.generate_section('roi_distribution')
+
+    def test_pages_render_placeholders(self):
+        page = self.client.get('/reports/sales-performance?year=2024')
+        self.assertEqual(page.status_code, 200)
+        self.assertIn(b'/reports/api/sales-performance/sections/top_models?year=2024', page.data)
+        self.assertNotIn(b'VIN0', page.data)
+
+        page = self.client.get('/reports/profitability?timeframe=all_time')
+        self.assertEqual(page.status_code, 200)
+        self.assertIn(b'/reports/api/profitability/sections/model_profitability?timeframe=all_time', page.data)
+        self.assertIn(b'/reports/api/profitability/sections/cars_data?timeframe=all_time', page.data)
+
+    def test_section_fragments(self):
+        response = self.client.get('/reports/api/sales-performance/sections/top_models?year=2024')
+        self.assertEqual(response.status_code, 200)
+        fragment = response.get_json()
+        self.assertEqual(fragment['section'], 'top_models')
+        self.assertEqual([(model['model'], model['count']) for model in fragment['data']],
+                         [('Hilux', 2), ('Corolla', 1)])
+        self.assertIn('VIN0', fragment['html'])
+
+        fragment = self.client.get('/reports/api/profitability/sections/model_profitability'
+                                   '?timeframe=all_time').get_json()
+        self.assertEqual(sorted(model['model'] for model in fragment['data']), ['Corolla', 'Hilux'])
+        self.assertIn('toggle-details', fragment['html'])
+
+        fragment = self.client.get('/reports/api/profitability/sections/cars_data?timeframe=all_time').get_json()
+        self.assertEqual(len(fragment['data']), 3)
+        self.assertEqual(fragment['data'][0]['roi'], 50.0)
+
+    def test_unknown_sections(self):
+        self.assertEqual(self.client.get('/reports/api/profitability/sections/roi_distribution').status_code, 404)
+        self.assertEqual(self.client.get('/reports/api/nope/sections/top_models').status_code, 404)
+
+    def test_section_errors_are_json(self):
+        with mock.patch.object(SalesPerformanceReport, 'generate_section', side_effect=RuntimeError('boom')):
+            response = self.client.get('/reports/api/sales-performance/sections/top_models')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.get_json(), {'error': 'boom'})
+
+if __name__ == '__main__':
+    unittest.main()
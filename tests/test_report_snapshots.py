@@ -0,0 +1,126 @@
+import json
+import os
+import tempfile
+import unittest
+from app import create_app, db
+from app.models.car import Car
+from app.models.dealer import Dealer
+from app.models.sale import Sale
+from app.models.stand import Stand
+from app.utils.report_snapshots import get_report_data_version, refresh_report_snapshots
+from datetime import date, timedelta
+from sqlalchemy import event
+
+class ReportSnapshotsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['LOGIN_DISABLED'] = True
+        self.snapshot_dir = tempfile.TemporaryDirectory()
+        self.app.config['REPORT_SNAPSHOT_DIR'] = self.snapshot_dir.name
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.stand = Stand(stand_name='Main', location='Lot')
+        self.dealer = Dealer(dealer_name='Dealer', contact_info='x')
+        db.session.add_all([self.stand, self.dealer])
+        db.session.flush()
+        self.car = self.add_car('L1')
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.snapshot_dir.cleanup()
+
+    def add_car(self, licence):
+        car = Car(vehicle_name='Car', vehicle_make='Toyota', vehicle_model='Hilux', year=2020, colour='Blue',
+                  dekra_condition='Good', licence_number=licence, registration_number=licence,
+                  purchase_price=1000, source='Dealer', date_bought=date.today() - timedelta(days=40),
+                  current_location='Lot', repair_status='On Display', stand_id=self.stand.stand_id)
+        db.session.add(car)
+        return car
+
+    def test_writes_bump_the_data_version(self):
+        version = get_report_data_version()
+        self.assertGreater(version, 0)
+
+        self.car.colour = 'Red'
+        db.session.commit()
+        self.assertEqual(get_report_data_version(), version + 1)
+
+        self.add_car('L2')
+        db.session.flush()
+        db.session.rollback()
+        self.assertEqual(get_report_data_version(), version + 1)
+
+    def test_flush_writes_counters_in_one_statement(self):
+        version = get_report_data_version()
+        writes = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if 'kpi_counters' in statement and not statement.lstrip().startswith('SELECT'):
+                writes.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            # Changes the KPI counters and the data version
+            self.add_car('L2')
+            self.add_car('L3')
+            db.session.commit()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(get_report_data_version(), version + 1)
+
+    def test_worker_writes_json_and_html(self):
+        result = self.app.test_cli_runner().invoke(args=['report-snapshots', '--once'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('wrote 3 report snapshot(s)', result.output)
+
+        files = sorted(os.listdir(self.snapshot_dir.name))
+        self.assertEqual(len([name for name in files if name.endswith('.json')]), 3)
+        self.assertEqual(len([name for name in files if name.endswith('.html')]), 3)
+
+        aging = next(name for name in files if name.startswith('inventory_aging') and name.endswith('.json'))
+        with open(os.path.join(self.snapshot_dir.name, aging)) as f:
+            snapshot = json.load(f)
+        self.assertEqual(snapshot['data_version'], get_report_data_version())
+        self.assertEqual(snapshot['params'], {'status': 'all', 'min_age': 0})
+
+        # Snapshots that are still fresh are not regenerated
+        self.assertEqual(refresh_report_snapshots(), [])
+
+    def test_routes_serve_fresh_snapshots(self):
+        refresh_report_snapshots()
+
+        page = self.client.get('/reports/profit-margin')
+        self.assertEqual(page.status_code, 200)
+        self.assertIn('X-Report-Snapshot', page.headers)
+        self.assertIn(b'Profit Margin Analysis', page.data)
+        self.assertIn(b'</html>', page.data)
+
+        # Same parameters spelled out, and the current year's sales performance
+        self.assertIn('X-Report-Snapshot', self.client.get('/reports/profit-margin?timeframe=last_30_days').headers)
+        self.assertIn('X-Report-Snapshot',
+                      self.client.get(f'/reports/sales-performance?year={date.today().year}').headers)
+
+        # Other parameters, and arguments the report does not know, are generated live
+        self.assertNotIn('X-Report-Snapshot', self.client.get('/reports/profit-margin?timeframe=all_time').headers)
+        self.assertNotIn('X-Report-Snapshot', self.client.get('/reports/profit-margin?debug=1').headers)
+
+        # A write makes every snapshot stale until the worker runs again
+        db.session.add(Sale(car_id=self.car.car_id, dealer_id=self.dealer.dealer_id, sale_price=1500,
+                            sale_date=date.today(), customer_name='Buyer'))
+        db.session.commit()
+        self.assertNotIn('X-Report-Snapshot', self.client.get('/reports/profit-margin').headers)
+
+        self.assertEqual(len(refresh_report_snapshots()), 3)
+        self.assertIn('X-Report-Snapshot', self.client.get('/reports/inventory-aging').headers)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import unittest
+from app import create_app, db
+from app.models.stand import Stand
+from app.reports import get_report
+from app.utils.db_routing import build_reporting_uri, configure_reporting_bind, reporting_bind
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+class ReportingBindTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(self.tmpdir, 'primary.sqlite')
+        self.app.config['REPORTING_READ_ONLY'] = True
+        self.app.config['LOGIN_DISABLED'] = True
+        configure_reporting_bind(self.app)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.session.add(Stand(stand_name='Report Stand', location='Lot', capacity=5))
+        db.session.commit()
+        self.client = self.app.test_client()
+
+        self.reporting_engine = self.app.extensions['reporting_engine']
+        self.reporting_statements = []
+        event.listen(self.reporting_engine, 'before_cursor_execute', self.record_statement)
+
+    def tearDown(self):
+        event.remove(self.reporting_engine, 'before_cursor_execute', self.record_statement)
+        db.session.remove()
+        db.drop_all()
+        self.reporting_engine.dispose()
+        db.get_engine(self.app).dispose()
+        self.app_context.pop()
+        shutil.rmtree(self.tmpdir)
+
+    def record_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.reporting_statements.append(statement)
+
+    def test_reads_inside_block_use_reporting_engine(self):
+        self.assertEqual(Stand.query.count(), 1)
+        self.assertEqual(self.reporting_statements, [])
+
+        db.session.remove()
+        with reporting_bind():
+            self.assertEqual(Stand.query.count(), 1)
+        self.assertEqual(len(self.reporting_statements), 1)
+
+    def test_reads_after_writes_use_primary_until_commit(self):
+        db.session.remove()
+        with reporting_bind():
+            db.session.delete(Stand.query.one())
+            self.reporting_statements.clear()
+            # The autoflushed delete is only visible on the primary connection
+            self.assertEqual(Stand.query.count(), 0)
+            self.assertEqual(self.reporting_statements, [])
+
+            db.session.commit()
+            self.assertEqual(Stand.query.count(), 0)
+        self.assertEqual(len(self.reporting_statements), 1)
+
+    def test_reporting_engine_is_read_only(self):
+        db.session.remove()
+        with reporting_bind():
+            with self.assertRaises(OperationalError):
+                db.session.execute(text("DELETE FROM stands"))
+        db.session.rollback()
+        self.assertEqual(Stand.query.count(), 1)
+
+    def test_registry_reports_and_api_use_reporting_engine(self):
+        db.session.remove()
+        get_report('stand_performance')().generate()
+        self.assertTrue(self.reporting_statements)
+
+        self.reporting_statements.clear()
+        db.session.remove()
+        response = self.client.get('/reports/api/inventory-aging')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.reporting_statements)
+
+    def test_reporting_uri(self):
+        self.assertIsNone(build_reporting_uri({'SQLALCHEMY_DATABASE_URI': 'sqlite:///data.sqlite'}))
+        self.assertIsNone(build_reporting_uri({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'REPORTING_READ_ONLY': True}))
+        self.assertEqual(
+            build_reporting_uri({'SQLALCHEMY_DATABASE_URI': 'sqlite:////srv/data.sqlite', 'REPORTING_READ_ONLY': True}),
+            'sqlite:///file:/srv/data.sqlite?mode=ro&uri=true'
+        )
+        self.assertEqual(
+            build_reporting_uri({'REPORTING_DATABASE_URL': 'postgresql://replica/cars'}),
+            'postgresql://replica/cars'
+        )
+
+if __name__ == '__main__':
+    unittest.main()
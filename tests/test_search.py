@@ -0,0 +1,174 @@
+import unittest
+from app import create_app, db
+from app.models.car import Car
+from app.models.part import Part
+from app.models.repair import Repair
+from app.models.repair_provider import RepairProvider
+from app.utils.search import apply_search, get_search_index, search_available
+from sqlalchemy import event, inspect
+from unittest import mock
+from datetime import date
+
+class SearchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.app.config['LOGIN_DISABLED'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        for i, (make, model, colour) in enumerate([
+            ('Toyota', 'Corolla', 'White'),
+            ('Toyota', 'Hilux', 'Silver'),
+            ('Volkswagen', 'Polo Vivo', 'Red'),
+        ]):
+            db.session.add(Car(
+                vehicle_name=f'{make} {model}',
+                vehicle_make=make,
+                vehicle_model=model,
+                year=2019,
+                colour=colour,
+                dekra_condition='Good',
+                licence_number=f'CA{i}23-456',
+                registration_number=f'REG{i:03d}',
+                purchase_price=100000,
+                source='Dealer',
+                date_bought=date(2024, 1, 1),
+                current_location='Lot',
+                repair_status='On Display'
+            ))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def search_cars(self, term):
+        return sorted(car.vehicle_name for car in apply_search(Car.query, 'cars', term))
+
+    def test_matches_substrings_like_ilike(self):
+        self.assertEqual(self.search_cars('toyo'), ['Toyota Corolla', 'Toyota Hilux'])
+        self.assertEqual(self.search_cars('olla'), ['Toyota Corolla'])
+        self.assertEqual(self.search_cars('123-45'), ['Toyota Hilux'])
+        self.assertEqual(self.search_cars('polo viv'), ['Volkswagen Polo Vivo'])
+        self.assertEqual(self.search_cars('no such car'), [])
+
+    def test_uses_fts_index(self):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            self.search_cars('hilux')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        self.assertIn('cars_fts MATCH', statements[-1])
+        self.assertNotIn('LIKE', statements[-1].upper())
+
+    def test_short_terms_fall_back_to_ilike(self):
+        self.assertIsNone(get_search_index('cars').match_expression('ed'))
+        self.assertEqual(self.search_cars('ed'), ['Volkswagen Polo Vivo'])
+
+    def test_index_follows_updates_and_deletes(self):
+        car = Car.query.filter_by(vehicle_model='Hilux').first()
+        car.colour = 'Midnight Blue'
+        db.session.commit()
+        self.assertEqual(self.search_cars('midnight'), ['Toyota Hilux'])
+        self.assertEqual(self.search_cars('silver'), [])
+
+        db.session.delete(car)
+        db.session.commit()
+        self.assertEqual(self.search_cars('midnight'), [])
+
+    def test_cars_index_route_searches(self):
+        response = self.client.get('/cars/?search=corolla')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Toyota Corolla', response.data)
+        self.assertNotIn(b'Toyota Hilux', response.data)
+
+    def add_parts_and_repairs(self):
+        db.session.add_all([
+            Part(part_name='Brake pads (front)', manufacturer='Bosch', storage_location='Shelf A'),
+            Part(part_name='Oil filter', description='Fits most Toyota engines', manufacturer='Mann'),
+            Part(part_name='Wiper blade', manufacturer='Bosch', storage_location='Bin 12'),
+        ])
+        provider = RepairProvider(provider_name='Workshop', service_type='Mechanical')
+        db.session.add(provider)
+        db.session.flush()
+        car = Car.query.first()
+        for repair_type, notes in [
+            ('Service', 'Replaced brake pads and discs, brakes bled'),
+            ('Panel', 'Rear bumper respray'),
+            ('Service', 'Brake fluid topped up'),
+        ]:
+            db.session.add(Repair(car_id=car.car_id, provider_id=provider.provider_id,
+                                  repair_type=repair_type, additional_notes=notes,
+                                  repair_cost=500, start_date=date(2024, 2, 1)))
+        db.session.commit()
+
+    def test_parts_prefix_search(self):
+        self.add_parts_and_repairs()
+        names = lambda term: sorted(p.part_name for p in apply_search(Part.query, 'parts', term))
+        self.assertEqual(names('brak'), ['Brake pads (front)'])
+        self.assertEqual(names('bosch'), ['Brake pads (front)', 'Wiper blade'])
+        self.assertEqual(names('toyota eng'), ['Oil filter'])
+        self.assertEqual(names('shelf'), ['Brake pads (front)'])
+
+        response = self.client.get('/parts/?search=wip')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Wiper blade', response.data)
+        self.assertNotIn(b'Oil filter', response.data)
+
+    def test_repairs_search_endpoint_ranks_notes(self):
+        self.add_parts_and_repairs()
+        response = self.client.get('/repairs/search?query=brake')
+        self.assertEqual(response.status_code, 200)
+        notes = [repair['additional_notes'] for repair in response.get_json()]
+        self.assertEqual(len(notes), 2)
+        self.assertIn('Brake fluid topped up', notes)
+
+        response = self.client.get('/repairs/search?query=respr')
+        self.assertEqual([r['repair_type'] for r in response.get_json()], ['Panel'])
+        self.assertEqual(self.client.get('/repairs/search').get_json(), [])
+
+    def add_hilux(self):
+        db.session.add(Car(vehicle_name='Toyota Hilux', vehicle_make='Toyota', vehicle_model='Hilux', year=2019,
+                           colour='Silver', dekra_condition='Good', licence_number='CA1', registration_number='R1',
+                           purchase_price=100000, source='Dealer', date_bought=date(2024, 1, 1),
+                           current_location='Lot', repair_status='On Display'))
+        db.session.commit()
+
+    def test_unsupported_tokenizers_fall_back_to_ilike(self):
+        # A SQLite build older than the trigram tokenizer skips the cars index
+        db.drop_all()
+        with mock.patch('app.utils.search.sqlite_version', return_value=(3, 31, 1)):
+            db.create_all()
+            self.assertNotIn('cars_fts', inspect(db.engine).get_table_names())
+            self.assertFalse(search_available(db.engine, 'cars'))
+            self.assertTrue(search_available(db.engine, 'parts'))
+
+        self.add_hilux()
+        self.assertEqual(self.search_cars('hilu'), ['Toyota Hilux'])
+        self.assertEqual(self.client.get('/cars/?search=hilu').status_code, 200)
+
+    def test_failed_index_creation_falls_back_to_ilike(self):
+        parts_index = get_search_index('parts')
+        db.drop_all()
+        with mock.patch.object(parts_index, 'tokenize', 'no_such_tokenizer'):
+            db.create_all()
+            self.assertFalse(search_available(db.engine, 'parts'))
+            self.assertTrue(search_available(db.engine, 'cars'))
+
+        self.add_hilux()
+        self.add_parts_and_repairs()
+        names = sorted(p.part_name for p in apply_search(Part.query, 'parts', 'pads'))
+        self.assertEqual(names, ['Brake pads (front)'])
+
+if __name__ == '__main__':
+    unittest.main()
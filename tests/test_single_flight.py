@@ -0,0 +1,204 @@
+import fcntl
+import os
+import tempfile
+import threading
+import unittest
+from app import create_app, db
+from app.models.stand import Stand
+from app.reports.base import Report
+from app.reports.provider_efficiency import ProviderEfficiencyReport
+from app.reports.standard.parts_usage import PartsUsageReport
+from app.utils.report_snapshots import get_report_data_version
+from app.utils.single_flight import _Flight, _flight_key, _flight_paths, _flights, _write_result
+from sqlalchemy.orm import Session
+
+class CountingReport(Report):
+    """Report that counts its runs and can be held until released"""
+    calls = []
+    release = threading.Event()
+
+    def __init__(self, year=None):
+        super().__init__()
+        self.year = year or 2024
+
+    def generate(self):
+        self.calls.append(self.year)
+        self.release.wait(5)
+        if self.year < 0:
+            raise ValueError("bad year")
+        return {"year": self.year, "rows": [1, 2, 3]}
+
+class SingleFlightTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(self.tmp.name, 'test.sqlite')
+        self.app.config['REPORT_FLIGHT_DIR'] = os.path.join(self.tmp.name, 'flights')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        CountingReport.calls = []
+        CountingReport.release = threading.Event()
+
+    def tearDown(self):
+        CountingReport.release.set()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.tmp.cleanup()
+
+    def generate_in_threads(self, years):
+        results = [None] * len(years)
+        errors = [None] * len(years)
+
+        def run(i, year):
+            with self.app.app_context():
+                try:
+                    results[i] = CountingReport(year=year).generate()
+                except Exception as e:
+                    errors[i] = e
+                finally:
+                    db.session.remove()
+
+        threads = [threading.Thread(target=run, args=(i, year)) for i, year in enumerate(years)]
+        return threads, results, errors
+
+    def start_flight(self, report, result=None, fills_data=False):
+        """Register a flight for report's arguments, as if another thread were generating it"""
+        key = _flight_key(report)
+        flight = _flights[key] = _Flight()
+        flight.thread = None
+        self.addCleanup(_flights.pop, key, None)
+        if result is not None:
+            flight.result, flight.fills_data = result, fills_data
+            flight.done.set()
+        return flight
+
+    def wait_for_calls(self, count):
+        for _ in range(200):
+            if len(CountingReport.calls) >= count:
+                return
+            threading.Event().wait(0.01)
+
+    def test_identical_requests_share_one_run(self):
+        threads, results, errors = self.generate_in_threads([None, 2024, 2024, 2023])
+        threads[0].start()
+        self.wait_for_calls(1)
+        for thread in threads[1:]:
+            thread.start()
+        self.wait_for_calls(2)
+        threading.Event().wait(0.2)
+        CountingReport.release.set()
+        for thread in threads:
+            thread.join(5)
+
+        # The default year is normalized, so the first three requests share a run
+        self.assertEqual(sorted(CountingReport.calls), [2023, 2024])
+        self.assertEqual(errors, [None] * 4)
+        self.assertEqual(results[0], results[2])
+        self.assertIsNot(results[1], results[2])
+        self.assertEqual(results[3]['year'], 2023)
+
+        # Finished runs are not reused
+        CountingReport().generate()
+        self.assertEqual(len(CountingReport.calls), 3)
+
+    def test_waiting_requests_get_the_error(self):
+        threads, results, errors = self.generate_in_threads([-1, -1])
+        threads[0].start()
+        self.wait_for_calls(1)
+        threads[1].start()
+        threading.Event().wait(0.2)
+        CountingReport.release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(CountingReport.calls, [-1])
+        self.assertTrue(all(isinstance(error, ValueError) for error in errors))
+
+    def test_followers_get_the_report_data(self):
+        data = PartsUsageReport().generate()
+        self.start_flight(PartsUsageReport(), data, fills_data=True)
+
+        follower = PartsUsageReport()
+        self.assertEqual(follower.generate(), data)
+        self.assertEqual(follower.data, data)
+        self.assertIsNot(follower.data, data)
+
+    def test_followers_render_the_shared_data(self):
+        data = ProviderEfficiencyReport().generate()
+        data['available_repair_types'] = ['Shared repair type']
+        self.start_flight(ProviderEfficiencyReport(), data, fills_data=True)
+
+        with self.app.test_request_context('/reports/provider-efficiency'):
+            self.assertIn('Shared repair type', ProviderEfficiencyReport().get())
+
+    def test_followers_get_instances_in_their_own_session(self):
+        db.session.add(Stand(stand_name='Main', location='Lot'))
+        db.session.commit()
+        other_session = Session(db.engine)
+        self.addCleanup(other_session.close)
+        stand = other_session.query(Stand).one()
+        self.start_flight(CountingReport(), {"stands": [stand]})
+
+        shared = CountingReport().generate()['stands'][0]
+        self.assertIsNot(shared, stand)
+        self.assertIn(shared, db.session)
+        self.assertEqual(shared.stand_name, 'Main')
+        # Lazy loads run in this request's session
+        self.assertEqual(shared.cars, [])
+        self.assertEqual(CountingReport.calls, [])
+
+    def test_followers_stop_waiting_after_the_timeout(self):
+        self.app.config['REPORT_FLIGHT_TIMEOUT'] = 0.1
+        CountingReport.release.set()
+        flight = self.start_flight(CountingReport())
+
+        self.assertEqual(CountingReport().generate()['year'], 2024)
+        self.assertEqual(CountingReport.calls, [2024])
+        self.assertFalse(flight.done.is_set())
+
+    def test_workers_share_results_through_lock_files(self):
+        self.app.config['REPORT_FLIGHT_LOCKS'] = True
+        CountingReport.release.set()
+        key = _flight_key(CountingReport())
+        lock_path, result_path = _flight_paths(key)
+
+        # Another worker holds the lock and finishes while this one waits
+        with open(lock_path, 'a') as other_worker:
+            fcntl.flock(other_worker, fcntl.LOCK_EX)
+            threads, results, errors = self.generate_in_threads([2024])
+            threads[0].start()
+            threading.Event().wait(0.2)
+            _write_result(result_path, key, get_report_data_version(), {"year": 2024, "shared": True})
+            fcntl.flock(other_worker, fcntl.LOCK_UN)
+            threads[0].join(5)
+
+        self.assertEqual(results[0], {"year": 2024, "shared": True})
+        self.assertEqual(CountingReport.calls, [])
+
+        # Without a wait the result is not reused, and the new run is left for the next waiter
+        self.assertEqual(CountingReport().generate()['rows'], [1, 2, 3])
+        self.assertEqual(CountingReport.calls, [2024])
+        self.assertTrue(os.path.exists(result_path))
+
+    def test_stale_shared_results_are_not_used(self):
+        self.app.config['REPORT_FLIGHT_LOCKS'] = True
+        CountingReport.release.set()
+        key = _flight_key(CountingReport())
+        lock_path, result_path = _flight_paths(key)
+
+        with open(lock_path, 'a') as other_worker:
+            fcntl.flock(other_worker, fcntl.LOCK_EX)
+            threads, results, errors = self.generate_in_threads([2024])
+            threads[0].start()
+            threading.Event().wait(0.2)
+            _write_result(result_path, key, get_report_data_version() - 1, {"year": 2024, "shared": True})
+            fcntl.flock(other_worker, fcntl.LOCK_UN)
+            threads[0].join(5)
+
+        self.assertEqual(results[0]['rows'], [1, 2, 3])
+        self.assertEqual(CountingReport.calls, [2024])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from app import create_app, db
+from app.models.user import User, UserPrincipal, load_user, invalidate_user_cache
+
+class UserCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['USER_CACHE_TTL'] = 60
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        invalidate_user_cache()
+
+        user = User(username='cacheuser', full_name='Cache User', role='user')
+        user.password = 'password123'
+        db.session.add(user)
+        db.session.commit()
+        self.user_id = user.user_id
+
+    def tearDown(self):
+        invalidate_user_cache()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_load_user_returns_detached_principal(self):
+        principal = load_user(str(self.user_id))
+        self.assertIsInstance(principal, UserPrincipal)
+        self.assertEqual(principal.get_id(), str(self.user_id))
+        self.assertEqual(principal.role, 'user')
+        self.assertTrue(principal.is_authenticated)
+        self.assertFalse(hasattr(principal, '__dict__'))
+
+    def test_cached_principal_skips_database(self):
+        first = load_user(str(self.user_id))
+        # Change the row behind the cache's back; the cached value is served
+        User.query.filter_by(user_id=self.user_id).update({'role': 'admin'})
+        db.session.commit()
+        self.assertIs(load_user(str(self.user_id)), first)
+        self.assertEqual(load_user(str(self.user_id)).role, 'user')
+
+    def test_invalidation_reloads_row(self):
+        load_user(str(self.user_id))
+        user = User.query.get(self.user_id)
+        user.update_last_login()
+        self.assertEqual(load_user(str(self.user_id)).last_login, user.last_login)
+
+        User.query.filter_by(user_id=self.user_id).update({'role': 'admin'})
+        db.session.commit()
+        invalidate_user_cache(self.user_id)
+        self.assertEqual(load_user(str(self.user_id)).role, 'admin')
+
+    def test_missing_user_returns_none(self):
+        self.assertIsNone(load_user('99999'))
+        self.assertIsNone(load_user(None))
+
+if __name__ == '__main__':
+    unittest.main()